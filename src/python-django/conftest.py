@@ -0,0 +1,35 @@
+import django
+from django.conf import settings
+
+
+def pytest_configure():
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY="ecraspay-django-tests",
+        ALLOWED_HOSTS=["*"],
+        USE_TZ=True,
+        INSTALLED_APPS=[
+            "django.contrib.admin",
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "django.contrib.sessions",
+            "django.contrib.messages",
+            "ecraspay_django",
+        ],
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        },
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+        ROOT_URLCONF="ecraspay_django.urls",
+        ECRASPAY_API_KEY="test-key",
+        ECRASPAY_SETTLED_CACHE=False,
+    )
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
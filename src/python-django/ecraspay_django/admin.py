@@ -0,0 +1,291 @@
+"""
+Django admin for the ecraspay_django payment table.
+
+``PaymentAdmin`` stays fast on tables with millions of rows:
+
+- No ``COUNT(*)``: the result count is exact up to ``count_limit`` rows and
+  estimated beyond that (from the query planner on PostgreSQL), and the
+  unfiltered total is never counted.
+- Keyset pagination: pages are read with ``WHERE (created_at, id) < cursor
+  ORDER BY created_at DESC, id DESC LIMIT n`` instead of ``OFFSET``, so
+  every page costs the same however deep it is.
+- Filters on status, currency and payment method come from their choices
+  (no ``SELECT DISTINCT``) and are backed by indexes, as is the ordering.
+- Search is exact-match on the indexed references; no ``LIKE '%...%'``.
+- The verify and cancel actions run as concurrent, batched gateway calls
+  through ``ecraspay_django.tasks.run_batch``; larger selections are queued.
+
+To use it with a custom payment model:
+
+    from django.contrib import admin
+    from ecraspay_django.admin import PaymentAdmin
+
+    admin.site.register(MyPayment, PaymentAdmin)
+"""
+
+import json
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.db import connections
+from django.db.models import Q
+
+from ecraspay.log import get_logger
+from ecraspay_django.choices import PaymentMethodChoices
+from ecraspay_django.models import ArchivedPayment, Payment
+from ecraspay_django.tasks import (
+    CANCEL,
+    OPEN_STATUSES,
+    VERIFY,
+    get_task_queue,
+    run_batch,
+)
+
+logger = get_logger(__name__)
+
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+
+
+def estimated_count(queryset, limit=10000):
+    """
+    Return the number of rows in ``queryset``, estimated above ``limit``.
+
+    Up to ``limit`` rows are counted exactly, with a ``COUNT`` over a
+    ``LIMIT``-ed subquery. Larger results use the query planner's estimate
+    on PostgreSQL and ``limit + 1`` elsewhere.
+
+    Returns:
+        tuple: ``(count, estimated)``.
+    """
+    count = queryset.order_by()[: limit + 1].count()
+    if count <= limit:
+        return count, False
+    estimate = None
+    if connections[queryset.db].vendor == "postgresql":
+        try:
+            plan = json.loads(queryset.order_by().explain(format="json"))
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:  # an estimate is never worth failing the page
+            logger.warning("Could not estimate payment count: %s", e)
+    return max(estimate or 0, count), True
+
+
+def _parse_cursor(value):
+    """Split an ``"<created_at>_<pk>"`` cursor, or return None if malformed."""
+    created_at, separator, pk = (value or "").rpartition("_")
+    if not separator or not created_at or not pk:
+        return None
+    return created_at, pk
+
+
+def _cursor(payment):
+    return f"{payment.created_at.isoformat()}_{payment.pk}"
+
+
+class KeysetChangeList(ChangeList):
+    """
+    A change list paginated by ``(created_at, pk)`` cursors instead of pages.
+
+    ``?after=<cursor>`` shows the payments older than the cursor and
+    ``?before=<cursor>`` the ones newer than it.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = _parse_cursor(request.GET.get(AFTER_VAR))
+        self.before = _parse_cursor(request.GET.get(BEFORE_VAR))
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filter, search and cursor links all start again from the first page.
+        return super().get_query_string(
+            new_params, list(remove or []) + [AFTER_VAR, BEFORE_VAR]
+        )
+
+    def get_results(self, request):
+        per_page = self.list_per_page
+        queryset = self.queryset
+        rows = None
+        if self.before is not None:
+            created_at, pk = self.before
+            newer = Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            rows = list(
+                queryset.filter(newer).order_by("created_at", "pk")[: per_page + 1]
+            )
+            if len(rows) > per_page:
+                rows = rows[:per_page][::-1]
+                has_newer, has_older = True, True
+            else:
+                rows = None  # fewer than a page left: show the first page
+        if rows is None:
+            if self.after is not None:
+                created_at, pk = self.after
+                older = Q(created_at__lt=created_at) | Q(
+                    created_at=created_at, pk__lt=pk
+                )
+                queryset = queryset.filter(older)
+            rows = list(queryset.order_by("-created_at", "-pk")[: per_page + 1])
+            has_newer = self.after is not None and self.before is None
+            has_older = len(rows) > per_page
+            rows = rows[:per_page]
+
+        self.result_count, self.result_count_estimated = estimated_count(
+            self.queryset, self.model_admin.count_limit
+        )
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_newer or has_older
+        self.paginator = None
+        self.newer_url = (
+            self.get_query_string({BEFORE_VAR: _cursor(rows[0])})
+            if rows and has_newer
+            else None
+        )
+        self.older_url = (
+            self.get_query_string({AFTER_VAR: _cursor(rows[-1])})
+            if rows and has_older
+            else None
+        )
+
+
+class PaymentMethodFilter(admin.SimpleListFilter):
+    """Filter on ``payment_method`` using its choices, not ``SELECT DISTINCT``."""
+
+    title = "payment method"
+    parameter_name = "payment_method"
+
+    def lookups(self, request, model_admin):
+        return PaymentMethodChoices.choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(payment_method=self.value())
+        return queryset
+
+
+class PaymentAdmin(admin.ModelAdmin):
+    """
+    Admin for payment tables too large for ``COUNT(*)`` and ``OFFSET``.
+
+    Attributes:
+        count_limit (int): Rows counted exactly before switching to an
+            estimate.
+        inline_action_limit (int): Largest selection the verify and cancel
+            actions run during the request; larger ones are queued.
+    """
+
+    change_list_template = "admin/ecraspay_django/payment/change_list.html"
+    list_display = (
+        "payment_reference",
+        "transaction_reference",
+        "amount",
+        "currency",
+        "status",
+        "payment_method",
+        "created_at",
+    )
+    list_filter = ("status", "currency", PaymentMethodFilter)
+    search_fields = ("=payment_reference", "=transaction_reference")
+    search_help_text = "Exact payment or transaction reference."
+    readonly_fields = ("id", "version", "created_at", "updated_at")
+    ordering = ("-created_at", "-pk")
+    sortable_by = ()
+    show_full_result_count = False
+    list_per_page = 100
+    actions = ("verify_payments", "cancel_payments")
+    count_limit = 10000
+    inline_action_limit = 200
+    if hasattr(admin, "ShowFacets"):  # Django 5.0+
+        show_facets = admin.ShowFacets.NEVER
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    @admin.action(description="Verify selected payments with the gateway")
+    def verify_payments(self, request, queryset):
+        self._run_operation(request, queryset, VERIFY, "verified")
+
+    @admin.action(description="Cancel selected payments")
+    def cancel_payments(self, request, queryset):
+        self._run_operation(request, queryset, CANCEL, "cancelled")
+
+    def _run_operation(self, request, queryset, operation, done):
+        """
+        Run ``operation`` for the open payments in ``queryset``.
+
+        Up to ``inline_action_limit`` payments are processed now, as one
+        concurrent batch; larger selections are handed to the task queue in
+        chunks so the request returns quickly.
+        """
+        references = (
+            queryset.filter(status__in=OPEN_STATUSES)
+            .order_by()
+            .values_list("transaction_reference", flat=True)
+        )
+        selected = list(references[: self.inline_action_limit + 1])
+        if not selected:
+            self.message_user(request, "No open payments selected.", messages.WARNING)
+            return
+        if len(selected) > self.inline_action_limit:
+            queue = get_task_queue()
+            queued = 0
+            chunk = []
+            for reference in references.iterator(chunk_size=2000):
+                chunk.append(reference)
+                if len(chunk) == 2000:
+                    queued += queue.enqueue_many(operation, chunk)
+                    chunk = []
+            if chunk:
+                queued += queue.enqueue_many(operation, chunk)
+            self.message_user(
+                request, f"Queued {queued} payments to be {done} in the background."
+            )
+            return
+
+        results = run_batch(operation, selected)
+        failed = sum(1 for result in results.values() if not result.ok)
+        self.message_user(request, f"{len(results) - failed} payments {done}.")
+        if failed:
+            self.message_user(
+                request,
+                f"{failed} payments failed; see the logs for details.",
+                messages.ERROR,
+            )
+
+
+class ArchivedPaymentAdmin(admin.ModelAdmin):
+    """Read-only admin for archived payments, with the same keyset paging."""
+
+    change_list_template = PaymentAdmin.change_list_template
+    list_display = PaymentAdmin.list_display
+    search_fields = PaymentAdmin.search_fields
+    search_help_text = PaymentAdmin.search_help_text
+    ordering = PaymentAdmin.ordering
+    sortable_by = ()
+    show_full_result_count = False
+    list_per_page = PaymentAdmin.list_per_page
+    count_limit = PaymentAdmin.count_limit
+    if hasattr(admin, "ShowFacets"):  # Django 5.0+
+        show_facets = admin.ShowFacets.NEVER
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(Payment, PaymentAdmin)
+admin.site.register(ArchivedPayment, ArchivedPaymentAdmin)
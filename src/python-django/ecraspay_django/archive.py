@@ -0,0 +1,149 @@
+"""
+Archival of settled payments.
+
+The payment table only needs the payments that can still change or are
+still being looked at. ``archive_payments`` moves payments in a final status
+(success, failed, cancelled) older than a cutoff into ``ArchivedPayment`` in
+batches: each batch is read, copied with one bulk INSERT and removed with
+one DELETE in a single transaction on the primary, so a payment is never in
+both tables or in neither. The hot table and its indexes stay small enough to
+remain in memory.
+
+Archived rows keep their references and carry a ``month`` partition key. On
+PostgreSQL the archive table can be turned into a table partitioned by
+``month`` (and old partitions moved to compressed or cheaper storage)
+without changes here.
+
+Lookups by reference (``ecraspay_django.status.get_payment_status`` and
+``EcraspayService.get_payment``) fall back to the archive, and exports
+(``ecraspay_django.exports``) include it by default. Queries written
+directly against the payment model do not see archived payments.
+
+Example:
+    python manage.py archive_payments --older-than 90 --batch-size 1000
+"""
+
+import datetime
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from ecraspay.log import get_logger
+from ecraspay_django.models import ArchivedPayment
+from ecraspay_django.routers import read_database
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.status import FINAL_STATUSES
+from ecraspay_django.utils import get_payment_model
+
+logger = get_logger(__name__)
+
+# Payment fields copied into the archive; the others are set on archiving.
+ARCHIVED_FIELDS = tuple(
+    field.name
+    for field in ArchivedPayment._meta.concrete_fields
+    if field.name not in ("month", "archived_at")
+)
+
+
+def _month(created_at):
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return created_at.date().replace(day=1)
+
+
+def archive_payments(older_than_days=None, batch_size=1000, limit=None):
+    """
+    Move settled payments created more than ``older_than_days`` ago into the
+    archive.
+
+    Args:
+        older_than_days (float, optional): Minimum age in days. Defaults to
+            ``ECRASPAY_ARCHIVE_AFTER_DAYS``.
+        batch_size (int, optional): Payments moved per transaction.
+            Defaults to 1000.
+        limit (int, optional): Maximum payments moved by this call.
+
+    Payments whose payment or transaction reference is already in the
+    archive (under another payment) are left in place and logged.
+
+    Returns:
+        int: The number of payments archived.
+    """
+    if older_than_days is None:
+        older_than_days = get_ecraspay_setting("ECRASPAY_ARCHIVE_AFTER_DAYS")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    payment_model = get_payment_model()
+    db = router.db_for_write(payment_model)
+    payments = payment_model._default_manager.using(db)
+    fields = [
+        name
+        for name in ARCHIVED_FIELDS
+        if any(field.name == name for field in payment_model._meta.concrete_fields)
+    ]
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    settled = payments.filter(
+        status__in=FINAL_STATUSES, created_at__lt=cutoff
+    ).order_by("created_at")
+    if connections[db].features.has_select_for_update_skip_locked:
+        # Concurrent archivers take different batches.
+        settled = settled.select_for_update(skip_locked=True)
+
+    archived = 0
+    skipped = set()
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        with transaction.atomic(using=db):
+            batch = settled.exclude(pk__in=skipped) if skipped else settled
+            rows = list(batch.values(*fields)[:size])
+            if not rows:
+                break
+            now = timezone.now()
+            ids = [row["id"] for row in rows]
+            ArchivedPayment.objects.using(db).bulk_create(
+                [
+                    ArchivedPayment(
+                        month=_month(row["created_at"]), archived_at=now, **row
+                    )
+                    for row in rows
+                ],
+                ignore_conflicts=True,
+            )
+            # Only delete what reached the archive: a row whose references
+            # are already archived under another payment was not inserted.
+            moved = set(
+                ArchivedPayment.objects.using(db)
+                .filter(pk__in=ids)
+                .values_list("pk", flat=True)
+            )
+            payments.filter(pk__in=moved).delete()
+        conflicts = [row for row in rows if row["id"] not in moved]
+        for row in conflicts:
+            skipped.add(row["id"])
+            logger.warning(
+                "Payment %s not archived: its references are already archived",
+                row["transaction_reference"],
+            )
+        archived += len(moved)
+        logger.debug("Archived %s payments", len(moved))
+        if len(rows) < size:
+            break
+    if archived:
+        logger.info("Archived %s payments created before %s", archived, cutoff)
+    return archived
+
+
+def find_archived_payment(reference, using=None):
+    """
+    Return the archived payment for a transaction reference, or None.
+
+    Args:
+        reference (str): Transaction reference of the payment.
+        using (str, optional): Database alias to read from. Defaults to a
+            read replica, if configured (see ``ecraspay_django.routers``).
+    """
+    return (
+        ArchivedPayment.objects.using(using or read_database(reference))
+        .filter(transaction_reference=reference)
+        .first()
+    )
@@ -0,0 +1,189 @@
+"""
+Bank transfer helpers for the ecraspay_django integration.
+
+Issued virtual account details are cached in a Django cache, so every process
+serving a payment page reuses the account issued for a transaction reference
+until it expires; a short cache lock ensures only one process asks the
+gateway for it. Pending bank transfers whose account has expired are marked
+as expired in bulk by ``expire_stale_bank_transfers``, which
+``BankTransferExpirer`` runs periodically in a background thread.
+
+Example:
+    from ecraspay_django.bank_transfers import BankTransferExpirer
+
+    # e.g. in AppConfig.ready() of a worker process
+    BankTransferExpirer(interval=60).start()
+"""
+
+import datetime
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import connection, router
+from django.utils import timezone
+
+from ecraspay.log import get_logger
+from ecraspay.modules.bank_transfer import account_ttl
+from ecraspay_django.choices import PaymentMethodChoices, PaymentStatusChoices
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.transitions import transition_many
+from ecraspay_django.utils import get_payment_model
+
+logger = get_logger(__name__)
+
+CACHE_KEY = "ecraspay:bank_transfer:{}"
+
+
+def get_bank_transfer_account(client, transaction_ref, wait=5.0, poll=0.05):
+    """
+    Return account details for a bank transfer, requesting them at most once.
+
+    Args:
+        client (BankTransfer): Client used to request the account.
+        transaction_ref (str): Unique reference for the transaction.
+        wait (float, optional): Seconds to wait for another process that is
+            already requesting the account. Defaults to 5.
+        poll (float, optional): Seconds between cache checks while waiting.
+
+    Returns:
+        dict: The gateway response with the bank account details.
+    """
+    cache = caches[get_ecraspay_setting("ECRASPAY_BANK_TRANSFER_CACHE")]
+    key = CACHE_KEY.format(transaction_ref)
+    response = cache.get(key)
+    if response is not None:
+        return response
+
+    lock = f"{key}:lock"
+    deadline = time.monotonic() + wait
+    owner = cache.add(lock, 1, timeout=wait)
+    while not owner and time.monotonic() < deadline:
+        time.sleep(poll)
+        response = cache.get(key)
+        if response is not None:
+            return response
+        owner = cache.add(lock, 1, timeout=wait)
+
+    try:
+        response = client.initialize_bank_transfer(transaction_ref)
+        ttl = account_ttl(response, get_ecraspay_setting("ECRASPAY_BANK_TRANSFER_TTL"))
+        if ttl:
+            cache.set(key, response, ttl)
+        return response
+    finally:
+        if owner:
+            cache.delete(lock)
+
+
+def forget_bank_transfer_account(transaction_ref):
+    """Drop cached account details for ``transaction_ref``."""
+    cache = caches[get_ecraspay_setting("ECRASPAY_BANK_TRANSFER_CACHE")]
+    cache.delete(CACHE_KEY.format(transaction_ref))
+
+
+def expire_stale_bank_transfers(max_age=None, batch_size=1000, now=None):
+    """
+    Mark pending bank transfers older than ``max_age`` as expired.
+
+    Payments are expired in batches through
+    ``ecraspay_django.transitions.transition_many``, so each UPDATE holds its
+    locks briefly even when a large backlog has built up, and every expiry
+    is recorded in the outbox like any other status change.
+
+    Args:
+        max_age (float, optional): Age in seconds after which a transfer is
+            stale. Defaults to ``ECRASPAY_BANK_TRANSFER_TTL``.
+        batch_size (int, optional): Payments expired per transaction.
+            Defaults to 1000.
+        now (datetime, optional): Reference time. Defaults to now.
+
+    Returns:
+        int: The number of payments marked as expired.
+    """
+    if max_age is None:
+        max_age = get_ecraspay_setting("ECRASPAY_BANK_TRANSFER_TTL")
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=max_age)
+    payment_model = get_payment_model()
+    # Scan the primary: a lagging replica would return rows already expired.
+    stale = payment_model._default_manager.using(
+        router.db_for_write(payment_model)
+    ).filter(
+        payment_method=PaymentMethodChoices.BANK_TRANSFER,
+        status__in=(PaymentStatusChoices.PENDING, PaymentStatusChoices.IN_PROGRESS),
+        created_at__lt=cutoff,
+        transaction_reference__isnull=False,
+    )
+    expired = 0
+    while True:
+        # In primary key order, so every run walks the backlog the same way.
+        references = list(
+            stale.order_by("pk").values_list("transaction_reference", flat=True)[
+                :batch_size
+            ]
+        )
+        if not references:
+            break
+        # Through the state machine, so each expiry bumps the version,
+        # records an outbox event and is published once committed; payments
+        # settled in the meantime lose the transition and are kept.
+        results = transition_many(
+            {reference: PaymentStatusChoices.EXPIRED for reference in references}
+        )
+        applied = sum(1 for result in results.values() if result.applied)
+        expired += applied
+        if len(references) < batch_size or not applied:
+            break
+    if expired:
+        logger.info("Marked %s stale bank transfers as expired", expired)
+    return expired
+
+
+class BankTransferExpirer:
+    """
+    Runs ``expire_stale_bank_transfers`` every ``interval`` seconds in a
+    daemon thread.
+
+    Args:
+        interval (float, optional): Seconds between runs. Defaults to 60.
+        **kwargs: Arguments for ``expire_stale_bank_transfers``.
+    """
+
+    def __init__(self, interval=60, **kwargs):
+        self.interval = interval
+        self.kwargs = kwargs
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ecraspay-expirer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and wait for it to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self):
+        """Expire stale transfers now, logging instead of raising errors."""
+        try:
+            return expire_stale_bank_transfers(**self.kwargs)
+        except Exception as e:
+            logger.error("Failed to expire stale bank transfers: %s", e)
+            return 0
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                self.run_once()
+        finally:
+            # The thread has its own database connection; don't leak it.
+            connection.close()
@@ -11,6 +11,7 @@ class PaymentStatusChoices(models.TextChoices):
         SUCCESS (str): Payment process completed successfully.
         FAILED (str): Payment process encountered an error and did not complete.
         CANCELLED (str): Payment process was deliberately stopped before completion.
+        EXPIRED (str): Payment was not completed before its payment details expired.
     """
 
     PENDING = "pending", "Pending"
@@ -18,6 +19,7 @@ class PaymentStatusChoices(models.TextChoices):
     SUCCESS = "success", "Success"
     FAILED = "failed", "Failed"
     CANCELLED = "cancelled", "Cancelled"
+    EXPIRED = "expired", "Expired"
 
 
 class CurrencyChoices(models.TextChoices):
@@ -51,3 +53,18 @@ class PaymentMethodChoices(models.TextChoices):
     CARD = "card", "Card"
     BANK_TRANSFER = "bank_transfer", "Bank Transfer"
     USSD = "ussd", "USSD"
+
+
+class TaskOperationChoices(models.TextChoices):
+    """
+    Enum-like class for representing background payment operations.
+
+    Attributes:
+        VERIFY (str): Verify a transaction with the gateway.
+        CANCEL (str): Cancel a transaction.
+        REFRESH_STATUS (str): Fetch the latest status of a transaction.
+    """
+
+    VERIFY = "verify", "Verify"
+    CANCEL = "cancel", "Cancel"
+    REFRESH_STATUS = "refresh_status", "Refresh Status"
@@ -0,0 +1,427 @@
+"""
+Streaming exports of the payment table.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL and Oracle, chunked fetches elsewhere) and written out as
+they arrive, so memory use does not depend on the number of payments. No
+model instances are created.
+
+Payments moved to ``ArchivedPayment`` (see ``ecraspay_django.archive``) are
+included by default and merged into the same ``created_at`` order; the
+archive is only read for the months in range. Fields the archive does not
+keep are exported as empty values for archived payments.
+
+Formats:
+
+- "csv": a header row, then one row per payment.
+- "ndjson": one JSON object per line.
+- "parquet": columnar, one row group per chunk. Requires ``pyarrow``.
+
+Large ranges can be split into ``created_at`` partitions exported in
+parallel, one file and one database connection per partition, with
+``export_payments_parallel``. ``export_response`` streams a CSV or NDJSON
+export as a ``StreamingHttpResponse``.
+
+Example:
+    from ecraspay_django.exports import export_payments, month_range
+
+    start, end = month_range("2024-05")
+    with open("payments-2024-05.csv", "w", newline="") as out:
+        export_payments(out, "csv", start=start, end=end)
+"""
+
+import csv
+import datetime
+import decimal
+import heapq
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import DateTimeField, DecimalField, IntegerField, JSONField
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from ecraspay.log import get_logger
+from ecraspay_django.models import ArchivedPayment
+from ecraspay_django.routers import read_database
+from ecraspay_django.utils import get_payment_model
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional
+    pyarrow = None
+
+logger = get_logger(__name__)
+
+FORMATS = ("csv", "ndjson", "parquet")
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "parquet": "parquet"}
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+DEFAULT_FIELDS = (
+    "id",
+    "payment_reference",
+    "transaction_reference",
+    "amount",
+    "currency",
+    "status",
+    "payment_method",
+    "created_at",
+    "updated_at",
+)
+
+
+def month_range(month):
+    """
+    Return the ``[start, end)`` datetimes of a month.
+
+    Args:
+        month (str): The month, as "YYYY-MM", in the current time zone.
+
+    Raises:
+        ValueError: If ``month`` is not in "YYYY-MM" form.
+    """
+    try:
+        start = datetime.datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise ValueError(f"Invalid month '{month}'. Use YYYY-MM.") from None
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def partition_range(start, end, partitions):
+    """Split ``[start, end)`` into ``partitions`` equal, contiguous ranges."""
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1.")
+    step = (end - start) / partitions
+    bounds = [start + step * index for index in range(partitions)] + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _first_of_month(moment):
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.date().replace(day=1)
+
+
+def _ordered_rows(queryset, start, end, fields, chunk_size):
+    """Yield ``(created_at, pk, *fields)`` tuples of ``queryset``, oldest first."""
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=end)
+    return (
+        queryset.order_by("created_at", "pk")
+        .values_list("created_at", "pk", *fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _archived_rows(start, end, fields, chunk_size, using):
+    names = {field.name for field in ArchivedPayment._meta.concrete_fields}
+    kept = [name for name in fields if name in names]
+    positions = [kept.index(name) + 2 if name in names else None for name in fields]
+    queryset = ArchivedPayment.objects.using(using)
+    # ``month`` is the partition key: bound it so only the months in range
+    # are read.
+    if start is not None:
+        queryset = queryset.filter(month__gte=_first_of_month(start))
+    if end is not None:
+        queryset = queryset.filter(month__lte=_first_of_month(end))
+    for row in _ordered_rows(queryset, start, end, kept, chunk_size):
+        yield row[:2] + tuple(
+            None if position is None else row[position] for position in positions
+        )
+
+
+def payment_rows(
+    start=None,
+    end=None,
+    fields=None,
+    chunk_size=2000,
+    using=None,
+    include_archive=True,
+):
+    """
+    Yield payments as tuples of ``fields``, oldest first, with constant memory.
+
+    Args:
+        start (datetime, optional): Inclusive lower bound on ``created_at``.
+        end (datetime, optional): Exclusive upper bound on ``created_at``.
+        fields (tuple, optional): Field names. Defaults to ``DEFAULT_FIELDS``.
+        chunk_size (int, optional): Rows fetched per round-trip.
+        using (str, optional): Database alias to read from. Defaults to a
+            read replica, if configured (see ``ecraspay_django.routers``).
+        include_archive (bool, optional): Include archived payments.
+            Defaults to True.
+    """
+    fields = tuple(fields or DEFAULT_FIELDS)
+    using = using or read_database()
+    rows = _ordered_rows(
+        get_payment_model()._default_manager.using(using),
+        start,
+        end,
+        fields,
+        chunk_size,
+    )
+    if include_archive:
+        rows = heapq.merge(
+            rows,
+            _archived_rows(start, end, fields, chunk_size, using),
+            key=lambda row: row[:2],
+        )
+    return (row[2:] for row in rows)
+
+
+def _plain(value):
+    """Convert a database value into a CSV/JSON-friendly value."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, datetime.date)):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """A file-like object whose ``write`` returns what was written."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_plain(value) for value in row])
+
+
+def _ndjson_chunks(rows, fields):
+    for row in rows:
+        record = {name: _plain(value) for name, value in zip(fields, row)}
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def iter_export(format, rows, fields):
+    """
+    Yield an export as text chunks.
+
+    Args:
+        format (str): "csv" or "ndjson".
+        rows (Iterable[tuple]): Rows, e.g. from ``payment_rows``.
+        fields (tuple): Field names matching the rows.
+    """
+    if format == "csv":
+        return _csv_chunks(rows, fields)
+    if format == "ndjson":
+        return _ndjson_chunks(rows, fields)
+    raise ValueError(f"Cannot stream '{format}' exports. Use 'csv' or 'ndjson'.")
+
+
+def _arrow_type(field):
+    if isinstance(field, DecimalField):
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, DateTimeField):
+        return pyarrow.timestamp("us", tz="UTC")
+    if isinstance(field, IntegerField):
+        return pyarrow.int64()
+    return pyarrow.string()
+
+
+def _write_parquet(path, rows, fields, chunk_size):
+    if pyarrow is None:
+        raise ImportError("Parquet exports require the pyarrow package.")
+    meta = get_payment_model()._meta
+    model_fields = [meta.get_field(name) for name in fields]
+    schema = pyarrow.schema(
+        [(name, _arrow_type(field)) for name, field in zip(fields, model_fields)]
+    )
+    # Values Arrow cannot take as they are (UUIDs, JSON) become strings.
+    as_string = [
+        index
+        for index in range(len(fields))
+        if schema.field(index).type == pyarrow.string()
+    ]
+    as_json = {
+        index
+        for index, field in enumerate(model_fields)
+        if isinstance(field, JSONField)
+    }
+
+    written = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            if as_string:
+                row = list(row)
+                for index in as_string:
+                    value = row[index]
+                    if value is not None:
+                        row[index] = (
+                            json.dumps(value) if index in as_json else str(value)
+                        )
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                writer.write_table(_arrow_table(batch, schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(_arrow_table(batch, schema))
+            written += len(batch)
+    return written
+
+
+def _arrow_table(batch, schema):
+    columns = list(zip(*batch))
+    return pyarrow.Table.from_arrays(
+        [
+            pyarrow.array(column, type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+def export_payments(
+    out,
+    format="csv",
+    start=None,
+    end=None,
+    fields=None,
+    chunk_size=2000,
+    using=None,
+    include_archive=True,
+):
+    """
+    Write payments created in ``[start, end)`` to ``out``.
+
+    Args:
+        out: A text file opened with ``newline=""`` for CSV and NDJSON, or a
+            path or binary file for Parquet.
+        format (str, optional): "csv", "ndjson" or "parquet". Defaults to "csv".
+        start (datetime, optional): Inclusive lower bound on ``created_at``.
+        end (datetime, optional): Exclusive upper bound on ``created_at``.
+        fields (tuple, optional): Field names. Defaults to ``DEFAULT_FIELDS``.
+        chunk_size (int, optional): Rows fetched per round-trip, and rows per
+            Parquet row group. Defaults to 2000.
+        using (str, optional): Database alias to read from.
+        include_archive (bool, optional): Include archived payments.
+            Defaults to True.
+
+    Returns:
+        int: The number of payments written.
+
+    Raises:
+        ValueError: If ``format`` is unknown.
+        ImportError: For Parquet exports without ``pyarrow``.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}'. Use one of {FORMATS}.")
+    fields = tuple(fields or DEFAULT_FIELDS)
+    rows = payment_rows(start, end, fields, chunk_size, using, include_archive)
+    if format == "parquet":
+        return _write_parquet(out, rows, fields, chunk_size)
+
+    written = 0
+
+    def counted():
+        nonlocal written
+        for row in rows:
+            written += 1
+            yield row
+
+    write = out.write
+    for chunk in iter_export(format, counted(), fields):
+        write(chunk)
+    return written
+
+
+def _export_partition(directory, format, start, end, index, kwargs):
+    path = os.path.join(
+        directory, f"payments-{start:%Y%m%dT%H%M%S}-{index:03d}.{EXTENSIONS[format]}"
+    )
+    try:
+        if format == "parquet":
+            count = export_payments(path, format, start, end, **kwargs)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as out:
+                count = export_payments(out, format, start, end, **kwargs)
+    finally:
+        # Each worker thread has its own connection; don't leave it open.
+        connections.close_all()
+    logger.info("Exported %s payments to %s", count, path)
+    return path, count
+
+
+def export_payments_parallel(
+    directory, format="csv", start=None, end=None, partitions=4, workers=None, **kwargs
+):
+    """
+    Export ``[start, end)`` as ``partitions`` files written concurrently.
+
+    The range is split into equal ``created_at`` intervals; each is exported
+    by its own thread and database connection to
+    ``<directory>/payments-<partition start>-<index>.<format>``.
+
+    Args:
+        directory (str): Output directory, created if missing.
+        format (str, optional): "csv", "ndjson" or "parquet".
+        start (datetime): Inclusive lower bound on ``created_at``.
+        end (datetime): Exclusive upper bound on ``created_at``.
+        partitions (int, optional): Number of ranges and files. Defaults to 4.
+        workers (int, optional): Concurrent exports. Defaults to ``partitions``.
+        **kwargs: Arguments for ``export_payments`` (``fields``,
+            ``chunk_size``, ``using``, ``include_archive``).
+
+    Returns:
+        list: ``(path, count)`` for every partition, in ``created_at`` order.
+    """
+    if start is None or end is None:
+        raise ValueError("Parallel exports need both start and end.")
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}'. Use one of {FORMATS}.")
+    os.makedirs(directory, exist_ok=True)
+    close_old_connections()
+    ranges = partition_range(start, end, partitions)
+    with ThreadPoolExecutor(
+        max_workers=workers or partitions, thread_name_prefix="ecraspay-export"
+    ) as executor:
+        futures = [
+            executor.submit(
+                _export_partition, directory, format, low, high, index, kwargs
+            )
+            for index, (low, high) in enumerate(ranges)
+        ]
+        return [future.result() for future in futures]
+
+
+def export_response(format="csv", start=None, end=None, fields=None, **kwargs):
+    """
+    Return a ``StreamingHttpResponse`` downloading a CSV or NDJSON export.
+
+    Args:
+        format (str, optional): "csv" or "ndjson". Defaults to "csv".
+        start (datetime, optional): Inclusive lower bound on ``created_at``.
+        end (datetime, optional): Exclusive upper bound on ``created_at``.
+        fields (tuple, optional): Field names. Defaults to ``DEFAULT_FIELDS``.
+        **kwargs: Arguments for ``payment_rows`` (``chunk_size``, ``using``,
+            ``include_archive``).
+    """
+    if format not in CONTENT_TYPES:
+        raise ValueError(f"Cannot stream '{format}' exports. Use 'csv' or 'ndjson'.")
+    fields = tuple(fields or DEFAULT_FIELDS)
+    rows = payment_rows(start, end, fields, **kwargs)
+    response = StreamingHttpResponse(
+        iter_export(format, rows, fields), content_type=CONTENT_TYPES[format]
+    )
+    name = f"payments-{start:%Y%m%d}" if start is not None else "payments"
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{EXTENSIONS[format]}"'
+    )
+    return response
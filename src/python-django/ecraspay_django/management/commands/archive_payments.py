@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ecraspay_django.archive import archive_payments
+from ecraspay_django.settings import get_ecraspay_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Move settled payments older than --older-than days into the archive "
+        "in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=None,
+            help="Minimum age in days. Defaults to ECRASPAY_ARCHIVE_AFTER_DAYS.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Maximum payments to move."
+        )
+
+    def handle(self, *args, **options):
+        older_than = options["older_than"]
+        if older_than is None:
+            older_than = get_ecraspay_setting("ECRASPAY_ARCHIVE_AFTER_DAYS")
+        try:
+            archived = archive_payments(
+                older_than_days=older_than,
+                batch_size=options["batch_size"],
+                limit=options["limit"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Archived {archived} payments older than {older_than} days.")
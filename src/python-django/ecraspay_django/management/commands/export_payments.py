@@ -0,0 +1,106 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from ecraspay_django.exports import (
+    DEFAULT_FIELDS,
+    FORMATS,
+    export_payments,
+    export_payments_parallel,
+    month_range,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export payments to CSV, NDJSON or Parquet with constant memory. "
+        "Example: manage.py export_payments --month 2024-05 --format ndjson "
+        "--output payments-2024-05.ndjson"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Month to export, as YYYY-MM.")
+        parser.add_argument("--start", help="Inclusive start (ISO 8601).")
+        parser.add_argument("--end", help="Exclusive end (ISO 8601).")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Output file, '-' for stdout, or a directory with --partitions.",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=1,
+            help="Split the range into this many files exported in parallel.",
+        )
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--fields",
+            default=",".join(DEFAULT_FIELDS),
+            help="Comma-separated field names.",
+        )
+        parser.add_argument("--database", default=None, help="Database alias.")
+        parser.add_argument(
+            "--exclude-archive",
+            action="store_true",
+            help="Leave out payments moved to the archive.",
+        )
+
+    def handle(self, *args, **options):
+        start, end = self._range(options)
+        export_format = options["format"]
+        output = options["output"]
+        kwargs = {
+            "fields": tuple(options["fields"].split(",")),
+            "chunk_size": options["chunk_size"],
+            "using": options["database"],
+            "include_archive": not options["exclude_archive"],
+        }
+        try:
+            if options["partitions"] > 1:
+                if output == "-":
+                    raise CommandError("--partitions needs an --output directory.")
+                results = export_payments_parallel(
+                    output,
+                    export_format,
+                    start,
+                    end,
+                    partitions=options["partitions"],
+                    workers=options["workers"],
+                    **kwargs,
+                )
+                count = sum(rows for _, rows in results)
+            elif export_format == "parquet":
+                if output == "-":
+                    raise CommandError("Parquet exports need an --output file.")
+                count = export_payments(output, export_format, start, end, **kwargs)
+            elif output == "-":
+                count = export_payments(sys.stdout, export_format, start, end, **kwargs)
+            else:
+                with open(output, "w", newline="", encoding="utf-8") as out:
+                    count = export_payments(out, export_format, start, end, **kwargs)
+        except (ValueError, ImportError) as e:
+            raise CommandError(str(e))
+        self.stderr.write(f"Exported {count} payments.")
+
+    def _range(self, options):
+        if options["month"]:
+            if options["start"] or options["end"]:
+                raise CommandError("Use either --month or --start/--end.")
+            try:
+                return month_range(options["month"])
+            except ValueError as e:
+                raise CommandError(str(e))
+        bounds = []
+        for name in ("start", "end"):
+            value = options[name]
+            parsed = parse_datetime(value) if value else None
+            if value and parsed is None:
+                raise CommandError(f"Invalid --{name} '{value}'.")
+            bounds.append(parsed)
+        if options["partitions"] > 1 and None in bounds:
+            raise CommandError("--partitions needs --month or --start and --end.")
+        return tuple(bounds)
@@ -1,6 +1,7 @@
-import uuid
 from django.db import models
-from .choices import PaymentStatusChoices, CurrencyChoices
+from django.utils import timezone
+from ecraspay.ids import uuid7
+from .choices import PaymentStatusChoices, CurrencyChoices, TaskOperationChoices
 
 
 class Payment(models.Model):
@@ -11,12 +12,13 @@ class Payment(models.Model):
     currency, status, and timestamps for creation and updates.
 
     Fields:
-        id (UUIDField): Unique identifier for the payment.
+        id (UUIDField): Unique, time-ordered identifier for the payment.
         payment_reference (CharField): Unique reference identifier for the payment.
         transaction_reference (CharField): Unique reference identifier for the transaction.
         amount (DecimalField): The amount for the payment.
         currency (CharField): The currency used for the payment, chosen from CurrencyChoices.
         status (CharField): The current status of the payment, chosen from PaymentStatusChoices.
+        version (PositiveIntegerField): Incremented on every status change.
         created_at (DateTimeField): Timestamp when the payment record was created.
         updated_at (DateTimeField): Timestamp when the payment record was last updated.
 
@@ -27,7 +29,7 @@ class Payment(models.Model):
     """
 
     id = models.UUIDField(
-        primary_key=True, default=uuid.uuid4, editable=False, verbose_name="Payment ID"
+        primary_key=True, default=uuid7, editable=False, verbose_name="Payment ID"
     )
     payment_reference = models.CharField(
         max_length=255,
@@ -60,6 +62,11 @@ class Payment(models.Model):
         verbose_name="Payment Status",
         help_text="Current status of the payment.",
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Version",
+        help_text="Incremented on every status change.",
+    )
     payment_method = models.CharField(
         max_length=255,
         blank=True,
@@ -92,9 +99,14 @@ class Payment(models.Model):
         verbose_name = "Payment"
         verbose_name_plural = "Payments"
         ordering = ["-created_at"]  # Default ordering by creation date, descending.
+        # payment_reference and transaction_reference are already indexed by
+        # their unique constraints.
         indexes = [
-            models.Index(fields=["payment_reference"]),
-            models.Index(fields=["transaction_reference"]),
+            # Keyset pagination and filtered listings in the admin.
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["status", "-created_at"]),
+            models.Index(fields=["currency", "-created_at"]),
+            models.Index(fields=["payment_method", "-created_at"]),
         ]
 
     def __str__(self):
@@ -116,11 +128,12 @@ class AbstractPayment(models.Model):
     can be extended by child models.
 
     Fields:
-        id (UUIDField): Unique identifier for the payment.
+        id (UUIDField): Unique, time-ordered identifier for the payment.
         payment_reference (CharField): Unique reference identifier for the payment.
         transaction_reference (CharField): Unique reference identifier for the transaction.
         amount (DecimalField): The amount for the payment.
         status (CharField): The current status of the payment.
+        version (PositiveIntegerField): Incremented on every status change.
         created_at (DateTimeField): Timestamp when the payment record was created.
         updated_at (DateTimeField): Timestamp when the payment record was last updated.
 
@@ -130,7 +143,7 @@ class AbstractPayment(models.Model):
     """
 
     id = models.UUIDField(
-        primary_key=True, default=uuid.uuid4, editable=False, verbose_name="Payment ID"
+        primary_key=True, default=uuid7, editable=False, verbose_name="Payment ID"
     )
     payment_reference = models.CharField(
         max_length=255,
@@ -155,6 +168,11 @@ class AbstractPayment(models.Model):
         verbose_name="Payment Status",
         help_text="Current status of the payment.",
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Version",
+        help_text="Incremented on every status change.",
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Created At",
@@ -178,3 +196,191 @@ class AbstractPayment(models.Model):
             "Abstract Payment <payment_reference> - <status>"
         """
         return f"Abstract Payment {self.payment_reference} - {self.status}"
+
+
+class PaymentTask(models.Model):
+    """
+    A queued background operation on a payment, used by the database task queue.
+
+    There is at most one row per operation and transaction reference, so
+    enqueueing an operation that is already queued is a no-op.
+
+    Fields:
+        operation (CharField): The operation to run, chosen from TaskOperationChoices.
+        reference (CharField): Transaction reference the operation applies to.
+        attempts (PositiveIntegerField): Number of failed attempts so far.
+        available_at (DateTimeField): Earliest time the task may run.
+        locked_until (DateTimeField): Lease held by the worker running the task.
+        last_error (TextField): Error of the last failed attempt.
+        created_at (DateTimeField): Timestamp when the task was queued.
+    """
+
+    operation = models.CharField(
+        max_length=32,
+        choices=TaskOperationChoices.choices,
+        verbose_name="Operation",
+    )
+    reference = models.CharField(max_length=255, verbose_name="Transaction Reference")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    available_at = models.DateTimeField(verbose_name="Available At")
+    locked_until = models.DateTimeField(
+        blank=True, null=True, verbose_name="Locked Until"
+    )
+    last_error = models.TextField(blank=True, default="", verbose_name="Last Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Payment Task"
+        verbose_name_plural = "Payment Tasks"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["operation", "reference"], name="ecraspay_unique_payment_task"
+            )
+        ]
+        indexes = [models.Index(fields=["available_at"])]
+
+    def __str__(self):
+        return f"{self.operation} {self.reference}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A payment event waiting to be delivered by the outbox relay.
+
+    Events are written in the same database transaction as the payment change
+    they describe, so a change is never committed without its event. The relay
+    deletes an event once every handler has accepted it.
+
+    Fields:
+        id (BigAutoField): Increasing identifier, giving the delivery order.
+        event_type (CharField): Kind of event, e.g. "payment.status_changed".
+        reference (CharField): Transaction reference; events with the same
+            reference are delivered in order.
+        payload (JSONField): Event data.
+        attempts (PositiveIntegerField): Number of failed deliveries so far.
+        available_at (DateTimeField): Earliest time of the next delivery.
+        last_error (TextField): Error of the last failed delivery.
+        created_at (DateTimeField): Timestamp when the event was recorded.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=64, verbose_name="Event Type")
+    reference = models.CharField(max_length=255, verbose_name="Transaction Reference")
+    payload = models.JSONField(default=dict, verbose_name="Payload")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    available_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Available At"
+    )
+    last_error = models.TextField(blank=True, default="", verbose_name="Last Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox Events"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["reference", "id"])]
+
+    def __str__(self):
+        return f"{self.event_type} {self.reference}"
+
+    def to_dict(self):
+        """Return the JSON-serialisable representation sent to handlers."""
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "reference": self.reference,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class SettledResponse(models.Model):
+    """
+    A gateway lookup response for a settled transaction.
+
+    Settled responses never change, so rows are written once and never
+    updated. This is the durable tier of the SDK's ``SettledCache`` (see
+    ``ecraspay_django.settled``).
+
+    Fields:
+        operation (CharField): Endpoint name, e.g. "transaction.verify".
+        reference (CharField): Transaction reference looked up.
+        response (JSONField): The gateway response.
+        created_at (DateTimeField): Timestamp when the response was stored.
+    """
+
+    operation = models.CharField(max_length=64, verbose_name="Operation")
+    reference = models.CharField(max_length=255, verbose_name="Transaction Reference")
+    response = models.JSONField(verbose_name="Response")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Settled Response"
+        verbose_name_plural = "Settled Responses"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["reference", "operation"],
+                name="ecraspay_unique_settled_response",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.operation} {self.reference}"
+
+
+class ArchivedPayment(models.Model):
+    """
+    A settled payment moved out of the payment table by ``archive_payments``.
+
+    Rows are copied as they were when archived and never change. Only the
+    references are indexed, for lookups, and ``month`` for dropping or
+    exporting a whole month; the hot table keeps its other indexes small.
+    Reference lookups fall back to this table (see ``ecraspay_django.archive``).
+
+    Fields:
+        id (UUIDField): The payment's original ID.
+        payment_reference (CharField): Unique reference of the payment.
+        transaction_reference (CharField): Unique reference of the transaction.
+        amount (DecimalField): The amount of the payment.
+        currency (CharField): The currency of the payment.
+        status (CharField): The final status of the payment.
+        version (PositiveIntegerField): The payment's last version.
+        payment_method (CharField): Method used for the payment.
+        gateway_reference (CharField): Reference from the payment gateway.
+        created_at (DateTimeField): When the payment was created.
+        updated_at (DateTimeField): When the payment was last updated.
+        month (DateField): First day of the month ``created_at`` falls in; the
+            partition key.
+        archived_at (DateTimeField): When the payment was archived.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False, verbose_name="Payment ID")
+    payment_reference = models.CharField(
+        max_length=255, unique=True, verbose_name="Payment Reference"
+    )
+    transaction_reference = models.CharField(
+        max_length=255, unique=True, verbose_name="Transaction Reference"
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Amount")
+    currency = models.CharField(max_length=3, blank=True, verbose_name="Currency")
+    status = models.CharField(max_length=255, verbose_name="Payment Status")
+    version = models.PositiveIntegerField(default=0, verbose_name="Version")
+    payment_method = models.CharField(
+        max_length=255, blank=True, null=True, verbose_name="Payment Method"
+    )
+    gateway_reference = models.CharField(
+        max_length=255, blank=True, null=True, verbose_name="Gateway Reference"
+    )
+    created_at = models.DateTimeField(verbose_name="Created At")
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+    month = models.DateField(verbose_name="Month")
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name="Archived At")
+
+    class Meta:
+        verbose_name = "Archived Payment"
+        verbose_name_plural = "Archived Payments"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["month"])]
+
+    def __str__(self):
+        return f"Archived payment {self.payment_reference} - {self.status}"
@@ -0,0 +1,256 @@
+"""
+Transactional outbox for payment events.
+
+Payment status changes (see ``ecraspay_django.transitions``) write an
+``OutboxEvent`` row in the same database transaction as the ``Payment``
+update, so no change is committed without its event and no side effect runs
+inside the payment path. Verified gateway webhooks are recorded as well (see
+``ecraspay_django.views.payment_webhook_view``). ``OutboxRelay`` drains
+the table in batches and hands the events to handlers: Django signals, task
+queues or HTTP callbacks.
+
+Delivery is at-least-once: an event is deleted only after every handler has
+accepted it, in the transaction that locked it, so a crash redelivers it.
+Ordering is kept per transaction reference: the relay only claims the oldest
+pending event of each reference, and a failing event holds back the later
+events of its reference until it has been delivered.
+
+Example:
+    from ecraspay_django.outbox import OutboxRelay, callback_handler
+
+    relay = OutboxRelay(
+        handlers=[callback_handler("https://example.com/hooks/payments")]
+    )
+    relay.start(interval=1)
+"""
+
+import datetime
+import threading
+
+import requests
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ecraspay.log import get_logger
+from ecraspay_django.models import OutboxEvent
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.signals import payment_event, webhook_received
+
+logger = get_logger(__name__)
+
+STATUS_CHANGED = "payment.status_changed"
+WEBHOOK_RECEIVED = "payment.webhook_received"
+
+
+def record_event(event_type, reference, payload=None):
+    """
+    Record an event for delivery. Call inside the transaction making the change.
+
+    Returns:
+        OutboxEvent: The recorded event.
+    """
+    return OutboxEvent.objects.create(
+        event_type=event_type, reference=reference, payload=payload or {}
+    )
+
+
+def status_event(payment):
+    """
+    Build (without saving) the status-change event for ``payment``.
+
+    ``version`` increases with every status change of the payment, so
+    consumers can discard events older than one they already processed.
+    """
+    return OutboxEvent(
+        event_type=STATUS_CHANGED,
+        reference=payment.transaction_reference,
+        payload={
+            "payment_reference": payment.payment_reference,
+            "transaction_reference": payment.transaction_reference,
+            "status": payment.status,
+            "version": payment.version,
+        },
+    )
+
+
+def signal_handler(events):
+    """
+    Send ``webhook_received`` for received webhooks and ``payment_event`` for
+    every other event. A receiver error fails the event.
+    """
+    failed = []
+    for event in events:
+        try:
+            if event.event_type == WEBHOOK_RECEIVED:
+                webhook_received.send(
+                    sender=OutboxEvent, event=event.payload, event_id=event.id
+                )
+            else:
+                payment_event.send(
+                    sender=OutboxEvent,
+                    event_type=event.event_type,
+                    reference=event.reference,
+                    payload=event.payload,
+                    event_id=event.id,
+                )
+        except Exception as e:
+            logger.error("Signal receiver failed for event %s: %s", event.id, e)
+            failed.append(event.id)
+    return failed
+
+
+def callback_handler(url, timeout=5.0, session=None):
+    """
+    Return a handler POSTing each batch as JSON to ``url``.
+
+    Any non-2xx response or network error fails the whole batch.
+    """
+    session = session or requests.Session()
+
+    def handler(events):
+        response = session.post(
+            url, json={"events": [event.to_dict() for event in events]}, timeout=timeout
+        )
+        response.raise_for_status()
+
+    return handler
+
+
+def task_handler(task):
+    """
+    Return a handler queueing every event on a Celery task (or anything with
+    a ``delay`` method), e.g. ``task_handler(notify_customer)``.
+    """
+
+    def handler(events):
+        for event in events:
+            task.delay(event.to_dict())
+
+    return handler
+
+
+class OutboxRelay:
+    """
+    Delivers outbox events to handlers in batches.
+
+    A handler is a callable taking a list of ``OutboxEvent`` objects. It may
+    return the ids of events it failed to deliver; raising fails the whole
+    batch. Several relays can run at once: claimed events are locked with
+    ``SKIP LOCKED`` where the database supports it.
+
+    Args:
+        handlers (list, optional): Handlers, or dotted paths to them.
+            Defaults to ``ECRASPAY_OUTBOX_HANDLERS``.
+        batch_size (int, optional): Events claimed per batch. Defaults to 500.
+        max_backoff (float, optional): Longest delay between redeliveries of
+            a failing event, in seconds. Defaults to 300.
+    """
+
+    def __init__(self, handlers=None, batch_size=500, max_backoff=300):
+        if handlers is None:
+            handlers = get_ecraspay_setting("ECRASPAY_OUTBOX_HANDLERS")
+        self.handlers = [
+            import_string(handler) if isinstance(handler, str) else handler
+            for handler in handlers
+        ]
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pending(self):
+        """Return a queryset of the events claimable now, oldest first."""
+        earlier = OutboxEvent.objects.filter(
+            reference=OuterRef("reference"), pk__lt=OuterRef("pk")
+        )
+        return (
+            OutboxEvent.objects.filter(available_at__lte=timezone.now())
+            .exclude(Exists(earlier))
+            .order_by("pk")
+        )
+
+    def relay_batch(self):
+        """
+        Claim and deliver one batch.
+
+        Returns:
+            tuple: ``(delivered, failed)`` event counts.
+        """
+        with transaction.atomic():
+            events = list(
+                self.pending().select_for_update(skip_locked=True)[: self.batch_size]
+            )
+            if not events:
+                return 0, 0
+            failed = {}
+            for handler in self.handlers:
+                try:
+                    for event_id in handler(events) or ():
+                        failed.setdefault(event_id, "rejected by handler")
+                except Exception as e:
+                    logger.error("Outbox handler %s failed: %s", handler, e)
+                    for event in events:
+                        failed.setdefault(event.id, str(e))
+
+            OutboxEvent.objects.filter(
+                pk__in=[event.id for event in events if event.id not in failed]
+            ).delete()
+            retried = [event for event in events if event.id in failed]
+            now = timezone.now()
+            for event in retried:
+                event.attempts += 1
+                event.last_error = failed[event.id]
+                event.available_at = now + datetime.timedelta(
+                    seconds=min(self.max_backoff, 2**event.attempts)
+                )
+            OutboxEvent.objects.bulk_update(
+                retried, ["attempts", "last_error", "available_at"]
+            )
+        return len(events) - len(retried), len(retried)
+
+    def drain(self, max_batches=None):
+        """
+        Deliver batches until nothing is claimable.
+
+        Returns:
+            int: The number of events delivered.
+        """
+        delivered = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count, _ = self.relay_batch()
+            if not count:
+                break
+            delivered += count
+            batches += 1
+        return delivered
+
+    def start(self, interval=1.0):
+        """Drain the outbox every ``interval`` seconds in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="ecraspay-outbox", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and wait for it to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.drain()
+                except Exception as e:
+                    logger.error("Outbox relay failed: %s", e)
+                self._stop.wait(interval)
+        finally:
+            connection.close()
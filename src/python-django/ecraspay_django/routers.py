@@ -0,0 +1,199 @@
+"""
+Read-replica routing for the payment model.
+
+``PrimaryReplicaRouter`` sends reads of the payment model (status lookups,
+exports, admin listings, reconciliation scans) to the aliases in
+``ECRASPAY_REPLICA_DATABASES``. Writes, including every status transition and
+payment creation, go to ``ECRASPAY_PRIMARY_DATABASE``. Other models are left
+to the next router.
+
+Replicas lag behind the primary, so reads go to the primary for
+``ECRASPAY_REPLICA_LAG`` seconds after a write:
+
+- in the same thread or async context, after any write of the payment model;
+- in the next requests of the same client, through a cookie set by
+  ``replica_stickiness_middleware``;
+- for a transaction reference, in every process, after it was created or
+  transitioned (recorded in the ``ECRASPAY_STATUS_CACHE`` cache). Callers
+  reading by reference use ``read_database(reference)``.
+
+Reads inside a transaction on the primary always stay on the primary.
+
+Example settings:
+    DATABASES = {"default": {...}, "replica": {...}}
+    DATABASE_ROUTERS = ["ecraspay_django.routers.PrimaryReplicaRouter"]
+    ECRASPAY_REPLICA_DATABASES = ["replica"]
+    MIDDLEWARE = [..., "ecraspay_django.routers.replica_stickiness_middleware"]
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.db import connections
+from django.utils.decorators import sync_and_async_middleware
+
+from ecraspay.log import get_logger
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.utils import get_payment_model
+
+logger = get_logger(__name__)
+
+STICKY_COOKIE = "ecraspay_primary"
+
+# Monotonic time until which reads in this context go to the primary.
+_pinned_until = ContextVar("ecraspay_pinned_until", default=0.0)
+
+
+def primary_database():
+    """Return the alias of the primary database."""
+    return get_ecraspay_setting("ECRASPAY_PRIMARY_DATABASE")
+
+
+def replica_databases():
+    """Return the aliases of the read replicas; empty when not configured."""
+    return get_ecraspay_setting("ECRASPAY_REPLICA_DATABASES")
+
+
+def _pin_key(reference):
+    return f"ecraspay:primary:{reference}"
+
+
+def pin_primary(seconds=None):
+    """
+    Send this thread's or task's reads to the primary for ``seconds``.
+
+    Args:
+        seconds (float, optional): Defaults to ``ECRASPAY_REPLICA_LAG``.
+    """
+    if seconds is None:
+        seconds = get_ecraspay_setting("ECRASPAY_REPLICA_LAG")
+    _pinned_until.set(max(_pinned_until.get(), time.monotonic() + seconds))
+
+
+def is_pinned():
+    """Return True if reads in this context currently go to the primary."""
+    return _pinned_until.get() > time.monotonic()
+
+
+def pin_references(references, seconds=None):
+    """
+    Send reads of these transaction references to the primary, in every
+    process, for ``seconds`` (``ECRASPAY_REPLICA_LAG`` by default).
+    """
+    if not replica_databases():
+        return
+    if seconds is None:
+        seconds = get_ecraspay_setting("ECRASPAY_REPLICA_LAG")
+    try:
+        caches[get_ecraspay_setting("ECRASPAY_STATUS_CACHE")].set_many(
+            {_pin_key(reference): 1 for reference in references}, seconds
+        )
+    except Exception as e:
+        logger.error("Failed to pin payment references to the primary: %s", e)
+
+
+def read_database(reference=None):
+    """
+    Return the database alias to read a payment from.
+
+    Args:
+        reference (str, optional): Transaction reference being read. Recently
+            written references are read from the primary.
+
+    Returns:
+        str: The primary while pinned or inside one of its transactions,
+        otherwise a random replica (the primary if there are none).
+    """
+    replicas = replica_databases()
+    primary = primary_database()
+    if not replicas or is_pinned() or connections[primary].in_atomic_block:
+        return primary
+    if reference is not None:
+        cache = caches[get_ecraspay_setting("ECRASPAY_STATUS_CACHE")]
+        if cache.get(_pin_key(reference)):
+            return primary
+    return random.choice(replicas)
+
+
+def _is_routed(model):
+    return model._meta.label_lower == get_payment_model()._meta.label_lower
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router reading the payment model from replicas and writing it
+    to the primary, with read-your-writes stickiness (see the module docs).
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _is_routed(model):
+            return None
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        if not _is_routed(model):
+            return None
+        pin_primary()
+        instance = hints.get("instance")
+        reference = getattr(instance, "transaction_reference", None)
+        if reference:
+            pin_references([reference])
+        return primary_database()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {primary_database(), *replica_databases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if app_label == "ecraspay_django" and db in replica_databases():
+            return False
+        return None
+
+
+def _sticky(request):
+    # Every request starts unpinned, whatever an earlier request on this
+    # thread did, unless its client wrote recently.
+    token = _pinned_until.set(0.0)
+    if STICKY_COOKIE in request.COOKIES:
+        pin_primary()
+    return token, _pinned_until.get()
+
+
+def _unstick(response, token, pinned_at_start):
+    # Only a write during this request (re)sets the cookie; reads within the
+    # lag must not keep extending it.
+    if _pinned_until.get() > pinned_at_start:
+        lag = get_ecraspay_setting("ECRASPAY_REPLICA_LAG")
+        response.set_cookie(STICKY_COOKIE, "1", max_age=lag, httponly=True)
+    _pinned_until.reset(token)
+    return response
+
+
+@sync_and_async_middleware
+def replica_stickiness_middleware(get_response):
+    """
+    Keep a client's reads on the primary for ``ECRASPAY_REPLICA_LAG`` seconds
+    after one of its requests wrote a payment, so e.g. the page a form
+    redirects to shows the payment it just created.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token, pinned = _sticky(request)
+            response = await get_response(request)
+            return _unstick(response, token, pinned)
+
+    else:
+
+        def middleware(request):
+            token, pinned = _sticky(request)
+            response = get_response(request)
+            return _unstick(response, token, pinned)
+
+    return middleware
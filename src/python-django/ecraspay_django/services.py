@@ -1,16 +1,59 @@
-from requests.exceptions import HTTPError
+import functools
+import inspect
+import threading
 from ecraspay import Checkout, Transaction, Card, BankTransfer, USSD
+from ecraspay.exceptions import ApiWrapperError, ApiWrapperValidationError
 from ecraspay_django.settings import get_ecraspay_setting
-from django.apps import apps
-import logging
+from ecraspay.log import get_logger
+from ecraspay.process import call_after_fork
+from ecraspay_django.archive import find_archived_payment
+from ecraspay_django.bank_transfers import get_bank_transfer_account
+from ecraspay_django.choices import PaymentStatusChoices
+from ecraspay_django.routers import read_database
+from ecraspay_django.settled import get_settled_cache
+from ecraspay_django.transitions import transition
+from ecraspay_django.utils import get_payment_model, payment_status_from_response
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+
+def _gateway_call(message, *arg_names):
+    """
+    Log gateway errors raised by a service method in one place.
+
+    Validation errors (400 and 422) return the gateway's error body, parsed
+    once by the SDK; every other ``ApiWrapperError`` is re-raised.
+
+    Args:
+        message (str): %-style log message, e.g. "Failed to verify %s".
+        *arg_names (str): Names of the method arguments filling the message.
+    """
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            except ApiWrapperError as e:
+                bound = signature.bind(*args, **kwargs).arguments
+                values = [bound.get(name) for name in arg_names]
+                logger.error(message + ": %s", *values, e)
+                if isinstance(e, ApiWrapperValidationError):
+                    return e.body
+                raise
+
+        return wrapper
+
+    return decorator
 
 
 class EcraspayService:
     def __init__(self):
         self.api_key = get_ecraspay_setting("ECRASPAY_API_KEY")
         self.environment = get_ecraspay_setting("ECRASPAY_ENVIRONMENT")
+        self.base_url = get_ecraspay_setting("ECRASPAY_BASE_URL")
         self._initialize_services()
 
     def _initialize_services(self):
@@ -26,11 +69,19 @@ class EcraspayService:
             setattr(
                 self,
                 name,
-                service_class(api_key=self.api_key, environment=self.environment),
+                service_class(
+                    api_key=self.api_key,
+                    environment=self.environment,
+                    base_url=self.base_url,
+                ),
             )
+        if get_ecraspay_setting("ECRASPAY_SETTLED_CACHE"):
+            self.transaction.settled_cache = get_settled_cache()
+            self.checkout.settled_cache = get_settled_cache()
 
     # Transaction Methods
 
+    @_gateway_call("Failed to initiate transaction %s", "reference")
     def initiate_transaction(
         self,
         amount,
@@ -47,215 +98,247 @@ class EcraspayService:
         **kwargs,
     ):
         """Initiates a new transaction and stores it in the database."""
-        try:
-            response = self.transaction.initiate_transaction(
-                amount=amount,
-                payment_reference=reference,
-                customer_name=customer_name,
-                customer_email=customer_email,
-                redirect_url=redirect_url,
-                description=description,
-                fee_bearer=fee_bearer,
-                currency=currency,
-                payment_method=payment_method,
-                customer_phone=customer_phone,
-                metadata=metadata,
-                **kwargs,
-            )
-            self._store_payment(
-                reference=reference,
-                amount=amount,
-                status="initialized",
-                metadata=metadata,
-            )
-            logger.info(f"Transaction {reference} initialized successfully")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to initiate transaction {reference}: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.transaction.initiate_transaction(
+            amount=amount,
+            payment_reference=reference,
+            customer_name=customer_name,
+            customer_email=customer_email,
+            redirect_url=redirect_url,
+            description=description,
+            fee_bearer=fee_bearer,
+            currency=currency,
+            payment_method=payment_method,
+            customer_phone=customer_phone,
+            metadata=metadata,
+            **kwargs,
+        )
+        self._store_payment(
+            reference=reference,
+            transaction_reference=response["responseBody"]["transactionReference"],
+            amount=amount,
+            currency=currency,
+            payment_method=payment_method,
+        )
+        logger.success("Transaction %s initialized successfully", reference)
+        return response
 
+    @_gateway_call("Failed to fetch details for transaction %s", "reference")
     def get_transaction_details(self, reference):
         """Fetches details of a transaction."""
-        try:
-            response = self.transaction.get_transaction_details(reference)
-            logger.info(f"Fetched details for transaction {reference}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to fetch details for transaction {reference}: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.transaction.get_transaction_details(reference)
+        logger.success("Fetched details for transaction %s", reference)
+        return response
 
+    @_gateway_call("Failed to verify transaction %s", "reference")
     def verify_transaction(self, reference):
         """Verifies the status of a transaction."""
+        return self._verify_transaction(reference)
+
+    def verify_webhook(self, reference):
+        """
+        Verifies the transaction named by a gateway webhook.
+
+        Unlike ``verify_transaction``, validation errors are raised instead
+        of returned, so a webhook for a transaction the gateway rejects is
+        not mistaken for a verified one.
+        """
         try:
-            response = self.transaction.verify_transaction(reference)
-            logger.info(f"Transaction {reference} verified successfully")
-            self._update_payment_status(reference, "verified")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to verify transaction {reference}: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
+            return self._verify_transaction(reference)
+        except ApiWrapperError as e:
+            logger.error(
+                "Failed to verify webhook for transaction %s: %s", reference, e
+            )
             raise
 
+    def _verify_transaction(self, reference):
+        response = self.transaction.verify_transaction(reference)
+        logger.success("Transaction %s verified successfully", reference)
+        self._update_payment_status(reference, payment_status_from_response(response))
+        return response
+
+    @_gateway_call("Failed to fetch status for transaction %s", "reference")
     def get_transaction_status(self, reference):
         """Fetches the status of a transaction."""
-        try:
-            response = self.transaction.get_transaction_status(reference)
-            logger.info(f"Fetched status for transaction {reference}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to fetch status for transaction {reference}: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.transaction.get_transaction_status(reference)
+        logger.success("Fetched status for transaction %s", reference)
+        return response
 
+    @_gateway_call("Failed to cancel transaction %s", "reference")
     def cancel_transaction(self, reference):
         """Cancels a transaction."""
-        try:
-            response = self.transaction.cancel_transaction(reference)
-            logger.info(f"Transaction {reference} canceled successfully")
-            self._update_payment_status(reference, "canceled")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to cancel transaction {reference}: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.transaction.cancel_transaction(reference)
+        logger.success("Transaction %s canceled successfully", reference)
+        self._update_payment_status(reference, PaymentStatusChoices.CANCELLED)
+        return response
 
     # Card Payment Methods
 
+    @_gateway_call("Failed to initiate card payment")
     def initiate_card_payment(self, transaction_ref, card_payload, device_details):
         """Initiates a card payment."""
-        try:
-            response = self.card.initiate_payment(
-                card_payload=card_payload,
-                transaction_ref=transaction_ref,
-                device_details=device_details,
-            )
-            logger.info(f"Card payment initiated for transaction {transaction_ref}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to initiate card payment: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.card.initiate_payment(
+            card_payload=card_payload,
+            transaction_ref=transaction_ref,
+            device_details=device_details,
+        )
+        logger.success("Card payment initiated for transaction %s", transaction_ref)
+        return response
 
+    @_gateway_call("Failed to submit OTP")
     def submit_card_otp(self, otp, gateway_ref):
         """Submits an OTP for a card payment."""
-        try:
-            response = self.card.submit_otp(otp=otp, gateway_ref=gateway_ref)
-            logger.info(f"OTP submitted for gateway reference {gateway_ref}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to submit OTP: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.card.submit_otp(otp=otp, gateway_ref=gateway_ref)
+        logger.success("OTP submitted for gateway reference %s", gateway_ref)
+        return response
 
+    @_gateway_call("Failed to resend OTP")
     def resend_card_otp(self, gateway_ref):
         """Resends the OTP for a card payment."""
-        try:
-            response = self.card.resend_otp(gateway_ref=gateway_ref)
-            logger.info(f"OTP resend requested for gateway reference {gateway_ref}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to resend OTP: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.card.resend_otp(gateway_ref=gateway_ref)
+        logger.success("OTP resend requested for gateway reference %s", gateway_ref)
+        return response
 
+    @_gateway_call("Failed to get card details")
     def get_card_payment_details(self, transaction_ref):
         """Retrieves details of a card transaction."""
-        try:
-            response = self.card.get_card_details(transaction_ref=transaction_ref)
-            logger.info(f"Retrieved card details for transaction {transaction_ref}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to get card details: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.card.get_card_details(transaction_ref=transaction_ref)
+        logger.success("Retrieved card details for transaction %s", transaction_ref)
+        return response
 
+    @_gateway_call("Failed to verify card payment")
     def verify_card_payment(self, transaction_ref):
         """Verifies the status of a card payment."""
-        try:
-            response = self.card.verify_card_payment(transaction_ref=transaction_ref)
-            logger.info(f"Card payment verified for transaction {transaction_ref}")
-            self._update_payment_status(transaction_ref, "verified")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to verify card payment: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.card.verify_card_payment(transaction_ref=transaction_ref)
+        logger.success("Card payment verified for transaction %s", transaction_ref)
+        self._update_payment_status(
+            transaction_ref, payment_status_from_response(response)
+        )
+        return response
+
+    # Bank Transfer Methods
+
+    @_gateway_call("Failed to initialize bank transfer")
+    def initialize_bank_transfer(self, transaction_ref):
+        """Returns bank account details, reusing ones already issued."""
+        response = get_bank_transfer_account(self.bank_transfer, transaction_ref)
+        logger.success("Bank transfer initialized for transaction %s", transaction_ref)
+        return response
 
     # USSD Payment Methods
 
+    @_gateway_call("Failed to initiate USSD payment")
     def initiate_ussd_payment(self, transaction_ref, bank_name):
         """Initiates a USSD payment."""
-        try:
-            response = self.ussd.initiate_ussd_payment(
-                bank_name=bank_name,
-                transaction_ref=transaction_ref,
-            )
-            logger.info(f"USSD payment initiated for transaction {transaction_ref}")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to initiate USSD payment: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.ussd.initiate_ussd_payment(
+            bank_name=bank_name,
+            transaction_ref=transaction_ref,
+        )
+        logger.success("USSD payment initiated for transaction %s", transaction_ref)
+        return response
 
+    @_gateway_call("Failed to retrieve supported banks for USSD")
     def get_ussd_supported_banks(self):
         """Retrieves the list of banks that support USSD payments."""
-        try:
-            response = self.ussd.get_bank_list()
-            logger.info("Retrieved list of supported banks for USSD payments")
-            return response
-        except HTTPError as e:
-            logger.error(f"Failed to retrieve supported banks for USSD: {e}")
-            if e.response.status_code == 400:
-                return e.response.json()
-            raise
+        response = self.ussd.get_bank_list()
+        logger.success("Retrieved list of supported banks for USSD payments")
+        return response
+
+    # Local Payment Methods
+
+    def get_payment(self, reference, using=None):
+        """
+        Returns the local payment for a transaction reference, or None.
+
+        Reads from ``using`` if given, otherwise from a read replica unless
+        the reference was written in the last ``ECRASPAY_REPLICA_LAG``
+        seconds (see ``ecraspay_django.routers``). Payments moved to the
+        archive are returned as ``ArchivedPayment`` rows.
+        """
+        using = using or read_database(reference)
+        payment = (
+            get_payment_model()
+            ._default_manager.using(using)
+            .filter(transaction_reference=reference)
+            .first()
+        )
+        return payment or find_archived_payment(reference, using)
 
     # Utility Methods
 
-    def _store_payment(self, reference, amount, status, metadata=None):
-        """Stores payment data in the configured model."""
+    def _store_payment(
+        self, reference, transaction_reference, amount, currency, payment_method=None
+    ):
+        """
+        Stores a new pending payment in the configured payment model, with one
+        INSERT. Fields the model does not define (e.g. ``currency`` on models
+        based on ``AbstractPayment``) are skipped.
+        """
+        payment_model = get_payment_model()
+        values = {
+            "payment_reference": reference,
+            "transaction_reference": transaction_reference,
+            "amount": amount,
+            "status": PaymentStatusChoices.PENDING,
+            "currency": currency.upper(),
+            "payment_method": payment_method,
+        }
+        names = {field.name for field in payment_model._meta.concrete_fields}
         try:
-            payment_model = apps.get_model(
-                get_ecraspay_setting("ECRASPAY_PAYMENT_STORAGE")
-            )
-            payment = payment_model.objects.create(
-                reference=reference,
-                amount=amount,
-                status=status,
-                metadata=metadata or {},
+            payment = payment_model._default_manager.create(
+                **{name: value for name, value in values.items() if name in names}
             )
-            logger.info(f"Payment {reference} stored successfully")
-            return payment
         except Exception as e:
-            logger.error(f"Failed to store payment {reference}: {e}")
+            logger.error("Failed to store payment %s: %s", reference, e)
             raise
+        logger.success("Payment %s stored successfully", reference)
+        return payment
 
     def _update_payment_status(self, reference, status):
-        """Updates the status of a payment in the database."""
+        """
+        Moves a payment to ``status`` if its current status allows it.
+
+        The change is a version-guarded UPDATE, recorded in the outbox in
+        the same transaction (see ``ecraspay_django.transitions``). Stale
+        transitions, e.g. a late "pending" after a webhook settled the
+        payment, are not applied.
+
+        Returns:
+            TransitionResult: The outcome, or None if there is no status.
+        """
+        if status is None:
+            return None
         try:
-            payment_model = apps.get_model(
-                get_ecraspay_setting("ECRASPAY_PAYMENT_STORAGE")
-            )
-            payment = payment_model.objects.get(reference=reference)
-            payment.status = status
-            payment.save()
-            logger.info(f"Payment {reference} status updated to {status}")
-            return payment
-        except payment_model.DoesNotExist:
-            logger.error(f"Payment {reference} not found in the database")
-            raise ValueError(f"Payment {reference} not found")
+            result = transition(reference, status)
         except Exception as e:
-            logger.error(f"Failed to update payment status for {reference}: {e}")
+            logger.error("Failed to update payment status for %s: %s", reference, e)
             raise
+        if result.applied:
+            logger.success("Payment %s status updated to %s", reference, status)
+        else:
+            logger.info(
+                "Payment %s not moved to %s: already settled or unknown",
+                reference,
+                status,
+            )
+        return result
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Return the process-wide ``EcraspayService``, created on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EcraspayService()
+    return _service
+
+
+@call_after_fork
+def _reset_service_lock():
+    # The service's clients reset themselves (see ecraspay.process).
+    global _service_lock
+    _service_lock = threading.Lock()
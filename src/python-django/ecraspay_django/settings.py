@@ -11,9 +11,51 @@ default_app_config = "ecraspay_django.apps.EcraspayDjangoConfig"
 ECRASPAY_DJANGO_SETTINGS = {
     "ECRASPAY_API_KEY": os.getenv("ECRASPAY_API_KEY", ""),
     "ECRASPAY_ENVIRONMENT": os.getenv("ECRASPAY_ENVIRONMENT", "sandbox"),
+    # Overrides the environment's base URL, e.g. a local emulator started with
+    # ``python -m ecraspay.emulator``: "http://127.0.0.1:8765/api/v1".
+    "ECRASPAY_BASE_URL": os.getenv("ECRASPAY_BASE_URL") or None,
     "ECRASPAY_PAYMENT_MODEL": "ecraspay_django.Payment",
     "ECRASPAY_WEBHOOK_URL": os.getenv("ECRASPAY_WEBHOOK_URL", ""),
     "ECRAS_REDIRECT_URL": os.getenv("ECRAS_REDIRECT_URL", ""),
+    # Bank transfer account details are cached in this cache alias and
+    # pending transfers older than the TTL (in seconds) are marked expired.
+    "ECRASPAY_BANK_TRANSFER_CACHE": "default",
+    "ECRASPAY_BANK_TRANSFER_TTL": 30 * 60,
+    # Verify and details responses of settled transactions are kept in memory
+    # and in the SettledResponse table; unsettled ones for ECRASPAY_PENDING_TTL
+    # seconds.
+    "ECRASPAY_SETTLED_CACHE": True,
+    "ECRASPAY_SETTLED_CACHE_SIZE": 10000,
+    "ECRASPAY_PENDING_TTL": 2,
+    # Local payment status endpoint: statuses are cached in this cache alias
+    # for ECRASPAY_STATUS_TTL seconds; long-polls and event streams wait at
+    # most ECRASPAY_STATUS_MAX_WAIT seconds per request and re-read the cache
+    # every ECRASPAY_STATUS_POLL_INTERVAL seconds for changes made by other
+    # processes.
+    "ECRASPAY_STATUS_CACHE": "default",
+    "ECRASPAY_STATUS_TTL": 300,
+    "ECRASPAY_STATUS_MAX_WAIT": 30,
+    "ECRASPAY_STATUS_POLL_INTERVAL": 2,
+    # Read replicas (see ecraspay_django.routers): payment reads go to these
+    # aliases, except for ECRASPAY_REPLICA_LAG seconds after a write.
+    "ECRASPAY_PRIMARY_DATABASE": "default",
+    "ECRASPAY_REPLICA_DATABASES": [],
+    "ECRASPAY_REPLICA_LAG": 5,
+    # Settled payments older than this many days are moved to the archive
+    # by the archive_payments command.
+    "ECRASPAY_ARCHIVE_AFTER_DAYS": 90,
+    # Background tasks: "thread", "database" or "celery".
+    "ECRASPAY_TASK_BACKEND": "thread",
+    "ECRASPAY_TASK_BATCH_SIZE": 50,
+    "ECRASPAY_TASK_CONCURRENCY": 8,
+    # Cache holding the celery backend's dedupe keys.
+    "ECRASPAY_TASK_CACHE": "default",
+    # Webhooks verify a payment with the gateway at most once per
+    # ECRASPAY_WEBHOOK_VERIFY_INTERVAL seconds; 0 disables the limit.
+    "ECRASPAY_WEBHOOK_CACHE": "default",
+    "ECRASPAY_WEBHOOK_VERIFY_INTERVAL": 5,
+    # Handlers (callables or dotted paths) the outbox relay delivers events to.
+    "ECRASPAY_OUTBOX_HANDLERS": ["ecraspay_django.outbox.signal_handler"],
     # "ECRASPAY_PAYMENT_METHOD_MODEL": "ecraspay_django.PaymentMethod",
     # "ECRASPAY_PAYMENT_METHOD_TYPE_MODEL": "ecraspay_django.PaymentMethodType",
     # "ECRASPAY_TRANSACTION_MODEL": "ecraspay_django.Transaction
@@ -0,0 +1,64 @@
+"""
+Durable settled-response cache for the ecraspay_django integration.
+
+``DatabaseStore`` keeps the responses of settled transactions in the
+``SettledResponse`` table, so verify and details lookups of a settled
+reference are answered from memory or the database by every process and
+never reach the gateway again. ``EcraspayService`` uses the shared cache from
+``get_settled_cache`` when ``ECRASPAY_SETTLED_CACHE`` is enabled.
+"""
+
+import threading
+
+from ecraspay.process import call_after_fork
+from ecraspay.settled import SettledCache
+from ecraspay_django.models import SettledResponse
+from ecraspay_django.settings import get_ecraspay_setting
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class DatabaseStore:
+    """A ``SettledCache`` store backed by the ``SettledResponse`` model."""
+
+    def get(self, operation, transaction_ref):
+        return (
+            SettledResponse.objects.filter(
+                reference=transaction_ref, operation=operation
+            )
+            .values_list("response", flat=True)
+            .first()
+        )
+
+    def set(self, operation, transaction_ref, response):
+        # Settled responses never change: a concurrent writer stored the same
+        # data, so conflicts are ignored instead of read first.
+        SettledResponse.objects.bulk_create(
+            [
+                SettledResponse(
+                    operation=operation, reference=transaction_ref, response=response
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def get_settled_cache():
+    """Return the process-wide ``SettledCache`` backed by the database."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SettledCache(
+                    DatabaseStore(),
+                    maxsize=get_ecraspay_setting("ECRASPAY_SETTLED_CACHE_SIZE"),
+                    pending_ttl=get_ecraspay_setting("ECRASPAY_PENDING_TTL"),
+                )
+    return _cache
+
+
+@call_after_fork
+def _reset_cache_lock():
+    global _cache_lock
+    _cache_lock = threading.Lock()
@@ -1 +1,9 @@
-from django.dispatch import receiver
\ No newline at end of file
+from django.dispatch import Signal, receiver
+
+# Sent by the outbox relay for every verified webhook from the gateway.
+# Arguments: event (the gateway's verify response), event_id.
+webhook_received = Signal()
+
+# Sent by the outbox relay for every delivered payment event.
+# Arguments: event_type, reference, payload, event_id.
+payment_event = Signal()
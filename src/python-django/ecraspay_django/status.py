@@ -0,0 +1,288 @@
+"""
+Cached payment status lookups and change notifications.
+
+Frontends waiting for a payment to complete can ask this application instead
+of the gateway: ``payment_status_view`` (see ``ecraspay_django.views``)
+serves the status of the local ``Payment`` row. The row is read once and kept
+in the cache configured by ``ECRASPAY_STATUS_CACHE``. After that, pollers cost
+one cache read per request and no database query.
+
+Every status transition publishes the new status when its transaction
+commits (see ``ecraspay_django.transitions``). ``publish`` caches the status
+unless a newer ``version`` is already cached, since transitions committing
+concurrently may publish out of order, and wakes the requests of this
+process waiting on the payment.
+Requests waiting in other processes see the change at their next cache read,
+within ``ECRASPAY_STATUS_POLL_INTERVAL`` seconds, so use a shared cache (e.g.
+Redis or Memcached) when running several processes.
+
+Example:
+    from ecraspay_django.status import get_payment_status
+
+    get_payment_status("txn_12345")
+    # {"transaction_reference": "txn_12345", "status": "pending", "version": 0, ...}
+"""
+
+import asyncio
+import math
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from ecraspay.log import get_logger
+from ecraspay.process import reinitialize_after_fork
+from ecraspay_django.choices import PaymentStatusChoices
+from ecraspay_django.models import ArchivedPayment
+from ecraspay_django.routers import pin_references, read_database
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.utils import get_payment_model
+
+logger = get_logger(__name__)
+
+# Rounds of compare-and-write ``publish`` makes against concurrent publishers.
+PUBLISH_ATTEMPTS = 3
+
+STATUS_FIELDS = (
+    "payment_reference",
+    "transaction_reference",
+    "status",
+    "version",
+    "updated_at",
+)
+
+# Statuses that never change again; there is nothing to wait for.
+FINAL_STATUSES = frozenset(
+    (
+        PaymentStatusChoices.SUCCESS,
+        PaymentStatusChoices.FAILED,
+        PaymentStatusChoices.CANCELLED,
+    )
+)
+
+
+def _cache():
+    return caches[get_ecraspay_setting("ECRASPAY_STATUS_CACHE")]
+
+
+def _key(reference):
+    return f"ecraspay:status:{reference}"
+
+
+def _status(values):
+    """Return the JSON-serialisable status of a payment row or event."""
+    updated_at = values.get("updated_at")
+    return {
+        "payment_reference": values.get("payment_reference"),
+        "transaction_reference": values["transaction_reference"],
+        "status": values["status"],
+        "version": values["version"],
+        "updated_at": (
+            updated_at.isoformat() if hasattr(updated_at, "isoformat") else updated_at
+        ),
+    }
+
+
+def get_payment_status(reference):
+    """
+    Return the status of a payment, from the cache when possible.
+
+    Archived payments (see ``ecraspay_django.archive``) are found too.
+
+    Args:
+        reference (str): Transaction reference of the payment.
+
+    Returns:
+        dict: ``payment_reference``, ``transaction_reference``, ``status``,
+        ``version`` and ``updated_at``, or None for an unknown reference.
+    """
+    cache = _cache()
+    status = cache.get(_key(reference))
+    if status is not None:
+        return status
+    db = read_database(reference)
+    for model in (get_payment_model(), ArchivedPayment):
+        row = (
+            model._default_manager.using(db)
+            .filter(transaction_reference=reference)
+            .values(*STATUS_FIELDS)
+            .first()
+        )
+        if row is not None:
+            break
+    else:
+        return None
+    status = _status(row)
+    # ``add``, not ``set``: a newer status published since the row was read
+    # must not be overwritten by this one.
+    cache.add(_key(reference), status, get_ecraspay_setting("ECRASPAY_STATUS_TTL"))
+    return status
+
+
+def status_etag(status):
+    """Return the ETag of a status; it changes with every status change."""
+    return f'"{status["version"]}-{status["status"]}"'
+
+
+def is_final(status):
+    """Return True if the payment ``status`` dict can no longer change."""
+    return status["status"] in FINAL_STATUSES
+
+
+class StatusHub:
+    """
+    Wakes the coroutines of this process waiting for a payment to change.
+
+    ``notify`` may be called from any thread; waiters are resumed on their
+    own event loops.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}
+        reinitialize_after_fork(self)
+
+    def _after_fork(self):
+        # The waiters are coroutines on the parent's event loops.
+        self._lock = threading.Lock()
+        self._waiters = {}
+
+    async def wait(self, reference, timeout):
+        """Return after ``reference`` is notified or ``timeout`` seconds."""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            self._waiters.setdefault(reference, set()).add(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(reference)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[reference]
+
+    def notify(self, reference):
+        """Wake every coroutine waiting on ``reference``."""
+        with self._lock:
+            waiters = list(self._waiters.get(reference, ()))
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def waiting(self):
+        """Return the number of waiting coroutines."""
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+hub = StatusHub()
+
+
+def publish(statuses):
+    """
+    Cache new payment statuses and wake the requests waiting on them.
+
+    Called by ``ecraspay_django.transitions`` when a transition commits.
+    A cached status is only replaced by one with a higher ``version``.
+
+    Args:
+        statuses (Iterable[dict]): Statuses with at least
+            ``transaction_reference``, ``status`` and ``version``.
+    """
+    statuses = [_status(status) for status in statuses]
+    try:
+        _cache_newer(statuses)
+    except Exception as e:
+        # The transition is committed; a cache outage only delays pollers.
+        logger.error("Failed to cache payment statuses: %s", e)
+    for status in statuses:
+        hub.notify(status["transaction_reference"])
+
+
+def _cache_newer(statuses):
+    """
+    Cache ``statuses`` where the cached version is missing or older.
+
+    Caches have no compare-and-set, so a write racing with an older one is
+    read back and retried, up to ``PUBLISH_ATTEMPTS`` rounds.
+    """
+    cache = _cache()
+    ttl = get_ecraspay_setting("ECRASPAY_STATUS_TTL")
+    pending = {}
+    for status in statuses:
+        key = _key(status["transaction_reference"])
+        if key not in pending or pending[key]["version"] < status["version"]:
+            pending[key] = status
+    for _ in range(PUBLISH_ATTEMPTS):
+        cached = cache.get_many(list(pending))
+        retry = {}
+        for key, status in pending.items():
+            current = cached.get(key)
+            if current is None:
+                if not cache.add(key, status, ttl):
+                    # Added concurrently; compare with it next round.
+                    retry[key] = status
+            elif current["version"] < status["version"]:
+                retry[key] = status
+        if not retry:
+            return
+        # Overwritten entries are read back next round, in case an older
+        # status was written in between.
+        cache.set_many(
+            {key: status for key, status in retry.items() if key in cached}, ttl
+        )
+        pending = retry
+
+
+def forget(references):
+    """Drop cached statuses, e.g. after a bulk UPDATE that bypassed ``publish``."""
+    references = list(references)
+    _cache().delete_many([_key(reference) for reference in references])
+    pin_references(references)
+    for reference in references:
+        hub.notify(reference)
+
+
+async def wait_for_change(reference, version, timeout):
+    """
+    Wait up to ``timeout`` seconds for a payment to leave ``version``.
+
+    Returns as soon as a change is published in this process; changes made
+    by other processes are noticed within ``ECRASPAY_STATUS_POLL_INTERVAL``
+    seconds.
+
+    Args:
+        reference (str): Transaction reference of the payment.
+        version (int): The version the caller already has, or None.
+        timeout (float): Maximum seconds to wait.
+
+    Returns:
+        dict: The current status (unchanged on timeout), or None for an
+        unknown reference.
+
+    Raises:
+        ValueError: If ``timeout`` is not a finite number.
+    """
+    if not math.isfinite(timeout):
+        raise ValueError("timeout must be a finite number of seconds.")
+    lookup = sync_to_async(get_payment_status)
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    poll_interval = get_ecraspay_setting("ECRASPAY_STATUS_POLL_INTERVAL")
+    while True:
+        status = await lookup(reference)
+        if status is None or status["version"] != version or is_final(status):
+            return status
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return status
+        await hub.wait(reference, min(remaining, poll_interval))
@@ -0,0 +1,497 @@
+"""
+Background payment tasks for the ecraspay_django integration.
+
+Verification, cancellation and status refreshes can be queued instead of
+running inline in the web request. Queued operations are deduplicated per
+transaction reference, executed in batches as concurrent gateway calls, and
+their results written back with one version-guarded UPDATE per status and
+batch.
+
+Three queues are available, selected with ``ECRASPAY_TASK_BACKEND``:
+
+- "thread": an in-process queue drained by a background thread. No extra
+  dependencies, but queued work is lost if the process exits.
+- "database": tasks are stored in the ``PaymentTask`` table and drained by
+  ``DatabaseTaskQueue.drain`` (e.g. from a cron job or a worker loop).
+- "celery": batches are sent to Celery, if it is installed.
+
+Example:
+    from ecraspay_django.tasks import enqueue_verify, reconcile_payments
+
+    enqueue_verify("txn_12345")         # returns immediately
+    reconcile_payments(older_than=600)  # refresh payments stuck in pending
+"""
+
+import datetime
+import threading
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ecraspay.batch import BatchRun
+from ecraspay.log import get_logger
+from ecraspay.process import call_after_fork
+from ecraspay_django.choices import PaymentStatusChoices, TaskOperationChoices
+from ecraspay_django.models import PaymentTask
+from ecraspay_django.services import get_service
+from ecraspay_django.routers import read_database
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.transitions import transition_many
+from ecraspay_django.utils import get_payment_model, payment_status_from_response
+
+try:
+    from celery import shared_task
+except ImportError:  # Celery is optional
+    shared_task = None
+
+logger = get_logger(__name__)
+
+VERIFY = TaskOperationChoices.VERIFY.value
+CANCEL = TaskOperationChoices.CANCEL.value
+REFRESH_STATUS = TaskOperationChoices.REFRESH_STATUS.value
+
+# Statuses that can still change at the gateway.
+OPEN_STATUSES = (PaymentStatusChoices.PENDING, PaymentStatusChoices.IN_PROGRESS)
+
+_CLIENT_METHODS = {
+    VERIFY: "verify_transaction",
+    CANCEL: "cancel_transaction",
+    REFRESH_STATUS: "get_transaction_status",
+}
+
+_queue_lock = threading.Lock()
+
+
+def _new_status(operation, response):
+    if operation == CANCEL:
+        return PaymentStatusChoices.CANCELLED.value
+    return payment_status_from_response(response)
+
+
+def run_batch(operation, references, concurrency=None):
+    """
+    Run one operation for many transaction references and save the results.
+
+    Gateway calls run concurrently; the resulting statuses are written back
+    with ``save_statuses``.
+
+    Args:
+        operation (str): "verify", "cancel" or "refresh_status".
+        references (Iterable[str]): Transaction references.
+        concurrency (int, optional): Concurrent gateway calls. Defaults to
+            ``ECRASPAY_TASK_CONCURRENCY``.
+
+    Returns:
+        dict: ``{reference: BatchResult}`` for every reference.
+    """
+    if operation not in _CLIENT_METHODS:
+        raise ValueError(f"Unknown payment operation '{operation}'.")
+    references = list(dict.fromkeys(references))
+    if concurrency is None:
+        concurrency = get_ecraspay_setting("ECRASPAY_TASK_CONCURRENCY")
+    call = getattr(get_service().transaction, _CLIENT_METHODS[operation])
+    results = {
+        result.key: result
+        for result in BatchRun(
+            call, references, concurrency=concurrency, key=lambda reference: reference
+        )
+    }
+
+    statuses = {}
+    for reference, result in results.items():
+        if result.ok:
+            status = _new_status(operation, result.response)
+            if status is not None:
+                statuses[reference] = status
+        else:
+            logger.error(
+                "Failed to %s transaction %s: %s", operation, reference, result.error
+            )
+    if statuses:
+        save_statuses(statuses)
+    return results
+
+
+def save_statuses(statuses):
+    """
+    Write payment statuses back with one version-guarded UPDATE per status.
+
+    Transitions the state machine does not allow are skipped (see
+    ``ecraspay_django.transitions``); the status-change outbox events are
+    inserted in the same transaction.
+
+    Args:
+        statuses (dict): ``{transaction_reference: status}``.
+
+    Returns:
+        int: The number of payments whose status changed.
+    """
+    results = transition_many(statuses)
+    return sum(1 for result in results.values() if result.applied)
+
+
+class ThreadTaskQueue:
+    """
+    An in-process task queue drained in batches by a daemon thread.
+
+    Args:
+        batch_size (int, optional): Maximum references per batch.
+        interval (float, optional): Seconds to wait for more work before
+            running a partial batch. Defaults to 0.2.
+    """
+
+    def __init__(self, batch_size=None, interval=0.2):
+        self.batch_size = batch_size or get_ecraspay_setting("ECRASPAY_TASK_BATCH_SIZE")
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._queued = {operation: {} for operation in _CLIENT_METHODS}
+        self._running = set()
+        self._thread = None
+
+    def enqueue(self, operation, reference) -> bool:
+        """
+        Queue an operation unless it is already queued or running.
+
+        Returns:
+            bool: True if the operation was queued.
+        """
+        with self._lock:
+            queued = self._queued[operation]
+            if reference in queued or (operation, reference) in self._running:
+                return False
+            queued[reference] = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="ecraspay-tasks", daemon=True
+                )
+                self._thread.start()
+        if len(queued) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def enqueue_many(self, operation, references) -> int:
+        """Queue an operation for many references; returns how many were new."""
+        return sum(self.enqueue(operation, reference) for reference in references)
+
+    def pending(self) -> int:
+        """Return the number of queued operations."""
+        with self._lock:
+            return sum(len(queued) for queued in self._queued.values())
+
+    def drain(self):
+        """Run every queued operation now, in batches, in this thread."""
+        while self._run_once():
+            pass
+
+    def _take(self):
+        with self._lock:
+            for operation, queued in self._queued.items():
+                if queued:
+                    batch = list(queued)[: self.batch_size]
+                    for reference in batch:
+                        del queued[reference]
+                        self._running.add((operation, reference))
+                    return operation, batch
+        return None, None
+
+    def _run_once(self) -> bool:
+        operation, batch = self._take()
+        if not batch:
+            return False
+        try:
+            run_batch(operation, batch)
+        except Exception as e:
+            logger.error("Failed to run %s batch: %s", operation, e)
+        finally:
+            with self._lock:
+                self._running.difference_update((operation, ref) for ref in batch)
+        return True
+
+    def _run(self):
+        try:
+            while True:
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                self.drain()
+        finally:
+            connection.close()
+
+
+class DatabaseTaskQueue:
+    """
+    A task queue stored in the ``PaymentTask`` table.
+
+    Enqueueing is a single INSERT that ignores duplicates. ``drain`` claims
+    due tasks with a lease, runs them in batches per operation and retries
+    failures with exponential backoff.
+
+    Args:
+        batch_size (int, optional): Maximum tasks claimed per batch.
+        lease (float, optional): Seconds a claimed task stays locked.
+            Defaults to 300.
+        max_attempts (int, optional): Attempts before a task is dropped.
+            Defaults to 5.
+    """
+
+    def __init__(self, batch_size=None, lease=300, max_attempts=5):
+        self.batch_size = batch_size or get_ecraspay_setting("ECRASPAY_TASK_BATCH_SIZE")
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def enqueue(self, operation, reference) -> bool:
+        """Queue an operation; returns False if it was already queued."""
+        _, created = PaymentTask.objects.get_or_create(
+            operation=operation,
+            reference=reference,
+            defaults={"available_at": timezone.now()},
+        )
+        return created
+
+    def enqueue_many(self, operation, references) -> int:
+        """
+        Queue an operation for many references with one INSERT.
+
+        Duplicates of queued tasks are ignored by the database. The new rows
+        are then counted by the ``available_at`` this call gave them.
+
+        Returns:
+            int: The number of tasks created.
+        """
+        now = timezone.now()
+        references = list(dict.fromkeys(references))
+        PaymentTask.objects.bulk_create(
+            [
+                PaymentTask(operation=operation, reference=reference, available_at=now)
+                for reference in references
+            ],
+            ignore_conflicts=True,
+        )
+        return PaymentTask.objects.filter(
+            operation=operation, reference__in=references, available_at=now
+        ).count()
+
+    def pending(self) -> int:
+        return PaymentTask.objects.count()
+
+    def claim(self):
+        """
+        Lease up to ``batch_size`` due tasks.
+
+        Returns:
+            list: The claimed ``PaymentTask`` rows.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                PaymentTask.objects.select_for_update(skip_locked=True)
+                .filter(available_at__lte=now)
+                .exclude(locked_until__gt=now)
+                .order_by("available_at")[: self.batch_size]
+            )
+            locked_until = now + datetime.timedelta(seconds=self.lease)
+            PaymentTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                locked_until=locked_until
+            )
+        return tasks
+
+    def drain(self, max_batches=None) -> int:
+        """
+        Run due tasks until none are left (or ``max_batches`` have run).
+
+        Returns:
+            int: The number of tasks that completed.
+        """
+        completed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            tasks = self.claim()
+            if not tasks:
+                break
+            batches += 1
+            by_operation = {}
+            for task in tasks:
+                by_operation.setdefault(task.operation, []).append(task)
+
+            done = []
+            failed = []
+            for operation, group in by_operation.items():
+                try:
+                    results = run_batch(operation, [task.reference for task in group])
+                except Exception as e:
+                    # Release the whole group for a retry instead of leaving
+                    # it leased until the lease runs out.
+                    for task in group:
+                        logger.error(
+                            "Failed to run %s for transaction %s: %s",
+                            operation,
+                            task.reference,
+                            e,
+                        )
+                        failed.append((task, e))
+                    continue
+                for task in group:
+                    result = results[task.reference]
+                    (done if result.ok else failed).append((task, result.error))
+
+            dropped = []
+            now = timezone.now()
+            for task, error in failed:
+                task.attempts += 1
+                task.last_error = str(error)
+                task.locked_until = None
+                task.available_at = now + datetime.timedelta(seconds=2**task.attempts)
+                if task.attempts >= self.max_attempts:
+                    dropped.append(task)
+            PaymentTask.objects.filter(
+                pk__in=[task.pk for task, _ in done] + [task.pk for task in dropped]
+            ).delete()
+            retried = [task for task, _ in failed if task not in dropped]
+            PaymentTask.objects.bulk_update(
+                retried, ["attempts", "last_error", "locked_until", "available_at"]
+            )
+            for task in dropped:
+                logger.error(
+                    "Giving up on %s for transaction %s: %s",
+                    task.operation,
+                    task.reference,
+                    task.last_error,
+                )
+            completed += len(done)
+        return completed
+
+
+class CeleryTaskQueue:
+    """
+    Sends task batches to Celery.
+
+    Deduplication uses ``cache.add`` on a key per operation and reference,
+    released when the batch has run. Workers and web processes must share
+    the cache.
+
+    Args:
+        dedupe_timeout (float, optional): Seconds a queued operation blocks
+            duplicates, as a safety net for lost tasks. Defaults to 600.
+        cache_alias (str, optional): Cache holding the dedupe keys. Defaults
+            to ``ECRASPAY_TASK_CACHE``.
+    """
+
+    def __init__(self, dedupe_timeout=600, cache_alias=None):
+        if shared_task is None:
+            raise ValueError("The 'celery' task backend requires Celery.")
+        self.dedupe_timeout = dedupe_timeout
+        self.cache_alias = cache_alias or get_ecraspay_setting("ECRASPAY_TASK_CACHE")
+
+    def enqueue(self, operation, reference) -> bool:
+        """Queue an operation; returns False if it was already queued."""
+        return self.enqueue_many(operation, [reference]) > 0
+
+    def enqueue_many(self, operation, references) -> int:
+        """Send new references to Celery in batches; returns how many were new."""
+        cache = caches[self.cache_alias]
+        fresh = [
+            reference
+            for reference in dict.fromkeys(references)
+            if cache.add(_dedupe_key(operation, reference), 1, self.dedupe_timeout)
+        ]
+        batch_size = get_ecraspay_setting("ECRASPAY_TASK_BATCH_SIZE")
+        for start in range(0, len(fresh), batch_size):
+            run_batch_task.delay(
+                operation, fresh[start : start + batch_size], self.cache_alias
+            )
+        return len(fresh)
+
+
+def _dedupe_key(operation, reference):
+    return f"ecraspay:task:{operation}:{reference}"
+
+
+def _run_queued_batch(operation, references, cache_alias):
+    """Run a batch sent by ``CeleryTaskQueue``, then release its dedupe keys."""
+    try:
+        run_batch(operation, references)
+    finally:
+        caches[cache_alias].delete_many(
+            [_dedupe_key(operation, reference) for reference in references]
+        )
+
+
+if shared_task is not None:
+
+    @shared_task(name="ecraspay_django.run_batch", ignore_result=True)
+    def run_batch_task(operation, references, cache_alias="default"):
+        """Celery task running ``run_batch`` and releasing the dedupe keys."""
+        _run_queued_batch(operation, references, cache_alias)
+
+
+_BACKENDS = {
+    "thread": ThreadTaskQueue,
+    "database": DatabaseTaskQueue,
+    "celery": CeleryTaskQueue,
+}
+_queue = None
+
+
+def get_task_queue():
+    """Return the task queue configured by ``ECRASPAY_TASK_BACKEND``."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                backend = get_ecraspay_setting("ECRASPAY_TASK_BACKEND")
+                if backend not in _BACKENDS:
+                    raise ValueError(
+                        f"Unknown task backend '{backend}'. "
+                        f"Use one of: {', '.join(_BACKENDS)}."
+                    )
+                _queue = _BACKENDS[backend]()
+    return _queue
+
+
+@call_after_fork
+def _reset_task_queue():
+    # A forked worker starts its own queue: work queued in the parent's
+    # thread queue stays with the parent instead of running twice.
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+def enqueue_verify(reference) -> bool:
+    """Queue verification of a transaction."""
+    return get_task_queue().enqueue(VERIFY, reference)
+
+
+def enqueue_cancel(reference) -> bool:
+    """Queue cancellation of a transaction."""
+    return get_task_queue().enqueue(CANCEL, reference)
+
+
+def enqueue_status_refresh(reference) -> bool:
+    """Queue a status refresh of a transaction."""
+    return get_task_queue().enqueue(REFRESH_STATUS, reference)
+
+
+def reconcile_payments(older_than=600, limit=1000, using=None) -> int:
+    """
+    Queue status refreshes for payments still open after ``older_than`` seconds.
+
+    Args:
+        older_than (float, optional): Minimum age in seconds. Defaults to 600.
+        limit (int, optional): Maximum payments queued per call. Defaults to 1000.
+        using (str, optional): Database alias to scan. Defaults to a read
+            replica, if configured (see ``ecraspay_django.routers``).
+
+    Returns:
+        int: The number of refreshes queued.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=older_than)
+    references = list(
+        get_payment_model()
+        ._default_manager.using(using or read_database())
+        .filter(status__in=OPEN_STATUSES, updated_at__lt=cutoff)
+        .order_by("updated_at")
+        .values_list("transaction_reference", flat=True)[:limit]
+    )
+    return get_task_queue().enqueue_many(REFRESH_STATUS, references)
@@ -0,0 +1,88 @@
+import datetime
+from urllib.parse import parse_qs
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from ecraspay_django.admin import PaymentAdmin, estimated_count
+from ecraspay_django.models import Payment
+
+
+class TestPaymentAdmin(TestCase):
+    def setUp(self):
+        self.model_admin = PaymentAdmin(Payment, admin.site)
+        self.model_admin.list_per_page = 2
+        self.user = User.objects.create_superuser("admin", password="secret")
+        now = timezone.now()
+        # Two pairs share a created_at: the pk breaks the tie.
+        for index, age in enumerate((1, 2, 2, 3, 4, 4, 5)):
+            payment = Payment.objects.create(
+                payment_reference=f"ref-{index}",
+                transaction_reference=f"ERCS|ref-{index}",
+                amount=1000,
+                currency="NGN",
+            )
+            Payment.objects.filter(pk=payment.pk).update(
+                created_at=now - datetime.timedelta(minutes=age)
+            )
+        self.newest_first = list(
+            Payment.objects.order_by("-created_at", "-pk").values_list(
+                "payment_reference", flat=True
+            )
+        )
+
+    def changelist(self, query=""):
+        request = RequestFactory().get(f"/admin/ecraspay_django/payment/{query}")
+        request.user = self.user
+        return self.model_admin.get_changelist_instance(request)
+
+    def page(self, changelist):
+        return [payment.payment_reference for payment in changelist.result_list]
+
+    def test_pages_follow_cursors_without_gaps(self):
+        """Test older and newer links walk every payment exactly once."""
+        changelist = self.changelist()
+        pages = [self.page(changelist)]
+        self.assertIsNone(changelist.newer_url)
+        while changelist.older_url:
+            changelist = self.changelist(changelist.older_url)
+            pages.append(self.page(changelist))
+
+        self.assertEqual(sum(pages, []), self.newest_first)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+        # Back again, from the last page to the first.
+        while changelist.newer_url:
+            changelist = self.changelist(changelist.newer_url)
+            self.assertEqual(self.page(changelist), pages.pop(-2))
+        self.assertEqual(self.page(changelist), self.newest_first[:2])
+
+    def test_cursor_links_keep_filters(self):
+        """Test cursors paginate the filtered rows and drop the old cursor."""
+        Payment.objects.filter(payment_reference__in=["ref-0", "ref-3"]).update(
+            status="success"
+        )
+        pending = [r for r in self.newest_first if r not in ("ref-0", "ref-3")]
+        changelist = self.changelist("?status__exact=pending")
+        self.assertEqual(self.page(changelist), pending[:2])
+
+        older = self.changelist(changelist.older_url)
+        params = parse_qs(changelist.older_url.lstrip("?"))
+        self.assertEqual(params["status__exact"], ["pending"])
+        self.assertEqual(self.page(older), pending[2:4])
+        params = parse_qs(older.older_url.lstrip("?"))
+        self.assertEqual(sorted(params), ["after", "status__exact"])
+        self.assertEqual(len(params["after"]), 1)
+
+    def test_counts_are_estimated_above_the_limit(self):
+        """Test the result count is exact up to ``count_limit`` rows."""
+        self.assertEqual(estimated_count(Payment.objects.all(), limit=7), (7, False))
+        self.assertEqual(estimated_count(Payment.objects.all(), limit=3), (4, True))
+
+        self.model_admin.count_limit = 5
+        changelist = self.changelist()
+        self.assertEqual(
+            (changelist.result_count, changelist.result_count_estimated), (6, True)
+        )
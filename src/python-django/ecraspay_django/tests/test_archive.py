@@ -0,0 +1,83 @@
+import datetime
+import io
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ecraspay_django.archive import archive_payments
+from ecraspay_django.exports import export_payments, month_range, payment_rows
+from ecraspay_django.models import ArchivedPayment, Payment
+
+
+def create_payment(reference, status="success", age_days=100):
+    payment = Payment.objects.create(
+        payment_reference=reference,
+        transaction_reference=f"ERCS|{reference}",
+        amount=1000,
+        currency="NGN",
+        status=status,
+    )
+    created_at = timezone.now() - datetime.timedelta(days=age_days)
+    Payment.objects.filter(pk=payment.pk).update(created_at=created_at)
+    return payment
+
+
+class TestArchivePayments(TestCase):
+    def test_settled_payments_are_moved(self):
+        """Test old settled payments move to the archive, others stay."""
+        old = create_payment("ref-1")
+        create_payment("ref-2", status="pending")
+        create_payment("ref-3", age_days=1)
+
+        self.assertEqual(archive_payments(older_than_days=90, batch_size=1), 1)
+
+        archived = ArchivedPayment.objects.get()
+        self.assertEqual(archived.pk, old.pk)
+        self.assertEqual(archived.month, archived.created_at.date().replace(day=1))
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def test_reference_conflict_keeps_payment(self):
+        """Test a payment whose reference is already archived is not deleted."""
+        create_payment("ref-1")
+        archive_payments(older_than_days=90)
+        reused = create_payment("ref-1")
+        create_payment("ref-4")
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(archive_payments(older_than_days=90, batch_size=1), 1)
+
+        self.assertTrue(Payment.objects.filter(pk=reused.pk).exists())
+        self.assertEqual(ArchivedPayment.objects.count(), 2)
+
+
+class TestArchivedExports(TestCase):
+    def test_exports_include_archived_payments(self):
+        """Test exports merge archived payments into created_at order."""
+        for age, reference in ((100, "ref-1"), (95, "ref-2"), (120, "ref-3")):
+            create_payment(reference, age_days=age)
+        create_payment("ref-4", status="pending", age_days=110)
+        archive_payments(older_than_days=90)
+        start = timezone.now() - datetime.timedelta(days=150)
+
+        rows = list(payment_rows(start=start, fields=("payment_reference",)))
+        hot = list(
+            payment_rows(
+                start=start, fields=("payment_reference",), include_archive=False
+            )
+        )
+
+        self.assertEqual(rows, [("ref-3",), ("ref-4",), ("ref-1",), ("ref-2",)])
+        self.assertEqual(hot, [("ref-4",)])
+
+    def test_monthly_export_reads_archive(self):
+        """Test a monthly export of an archived month is not empty."""
+        create_payment("ref-1")
+        archive_payments(older_than_days=90)
+        created_at = timezone.localtime(ArchivedPayment.objects.get().created_at)
+        start, end = month_range(f"{created_at:%Y-%m}")
+        out = io.StringIO()
+
+        count = export_payments(out, "ndjson", start=start, end=end)
+
+        self.assertEqual(count, 1)
+        self.assertIn('"payment_reference":"ref-1"', out.getvalue())
@@ -0,0 +1,70 @@
+import datetime
+
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ecraspay_django import bank_transfers
+from ecraspay_django.bank_transfers import expire_stale_bank_transfers
+from ecraspay_django.choices import PaymentMethodChoices
+from ecraspay_django.models import OutboxEvent, Payment
+from ecraspay_django.status import get_payment_status
+
+
+class TestExpireStaleBankTransfers(TestCase):
+    def create_transfer(self, reference, status="pending"):
+        return Payment.objects.create(
+            payment_reference=reference,
+            transaction_reference=f"ERCS|{reference}",
+            amount=1000,
+            currency="NGN",
+            status=status,
+            payment_method=PaymentMethodChoices.BANK_TRANSFER,
+        )
+
+    def test_expiry_is_a_recorded_transition(self):
+        """Test each expiry bumps the version, writes an event and publishes."""
+        self.create_transfer("ref-1")
+        self.create_transfer("ref-2", status="success")
+        self.create_transfer("ref-3")
+        later = timezone.now() + datetime.timedelta(hours=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            expired = expire_stale_bank_transfers(max_age=3600, batch_size=1, now=later)
+
+        self.assertEqual(expired, 2)
+        payment = Payment.objects.get(payment_reference="ref-1")
+        self.assertEqual((payment.status, payment.version), ("expired", 1))
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list("reference", flat=True)),
+            ["ERCS|ref-1", "ERCS|ref-3"],
+        )
+        self.assertEqual(get_payment_status("ERCS|ref-3")["status"], "expired")
+
+    def test_recent_transfers_are_kept(self):
+        """Test transfers younger than max_age stay pending."""
+        self.create_transfer("ref-1")
+
+        self.assertEqual(expire_stale_bank_transfers(max_age=3600), 0)
+        self.assertEqual(OutboxEvent.objects.count(), 0)
+
+    def test_batches_follow_the_primary_key(self):
+        """Test stale transfers are expired in primary key order."""
+        transfers = [self.create_transfer(f"ref-{index}") for index in range(5)]
+        later = timezone.now() + datetime.timedelta(hours=2)
+
+        with mock.patch.object(
+            bank_transfers, "transition_many", wraps=bank_transfers.transition_many
+        ) as transition_many:
+            expire_stale_bank_transfers(max_age=3600, batch_size=2, now=later)
+
+        batches = [list(call.args[0]) for call in transition_many.call_args_list]
+        ordered = sorted(transfers, key=lambda payment: payment.pk)
+        self.assertEqual(
+            batches,
+            [
+                [payment.transaction_reference for payment in ordered[start:][:2]]
+                for start in (0, 2, 4)
+            ],
+        )
@@ -0,0 +1,124 @@
+import csv
+import datetime
+import io
+import json
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ecraspay_django.exports import (
+    export_payments_parallel,
+    month_range,
+    partition_range,
+)
+from ecraspay_django.models import Payment
+
+
+def create_payment(reference, created_at):
+    payment = Payment.objects.create(
+        payment_reference=reference,
+        transaction_reference=f"ERCS|{reference}",
+        amount=1000,
+        currency="NGN",
+        status="success",
+    )
+    Payment.objects.filter(pk=payment.pk).update(created_at=created_at)
+    return payment
+
+
+def content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@override_settings(
+    MIDDLEWARE=[
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+    ]
+)
+class TestExportView(TestCase):
+    def setUp(self):
+        self.start, self.end = month_range("2024-05")
+        # Out of order, plus one payment on each side of the month.
+        for reference, day in (("ref-2", 20), ("ref-1", 3), ("ref-3", 31)):
+            create_payment(reference, self.start.replace(day=day))
+        create_payment("ref-0", self.start - datetime.timedelta(seconds=1))
+        create_payment("ref-4", self.end)
+        staff = User.objects.create_user("staff", password="secret", is_staff=True)
+        self.client.force_login(staff)
+
+    def test_csv_is_streamed_in_created_at_order(self):
+        """Test the month's payments stream as CSV rows, oldest first."""
+        response = self.client.get("/payments/export/", {"month": "2024-05"})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn(
+            'filename="payments-20240501.csv"', response["Content-Disposition"]
+        )
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        self.assertEqual(
+            [row["payment_reference"] for row in rows], ["ref-1", "ref-2", "ref-3"]
+        )
+        self.assertEqual(rows[0]["amount"], "1000.00")
+
+    def test_ndjson_is_one_object_per_line(self):
+        """Test NDJSON exports have one JSON record per payment."""
+        response = self.client.get(
+            "/payments/export/", {"month": "2024-05", "format": "ndjson"}
+        )
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual(
+            [record["payment_reference"] for record in records],
+            ["ref-1", "ref-2", "ref-3"],
+        )
+        self.assertEqual(
+            datetime.datetime.fromisoformat(records[0]["created_at"]),
+            self.start.replace(day=3),
+        )
+
+    def test_invalid_requests(self):
+        """Test bad months and unstreamable formats are rejected."""
+        for params in ({"month": "May"}, {"month": "2024-05", "format": "parquet"}):
+            response = self.client.get("/payments/export/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class TestParallelExport(TransactionTestCase):
+    # Partitions are read by worker threads on their own connections, so the
+    # payments must be committed.
+
+    def test_partitions_cover_the_range_once(self):
+        """Test partition files hold every payment in range exactly once."""
+        start = timezone.now().replace(microsecond=0) - datetime.timedelta(days=4)
+        end = start + datetime.timedelta(days=4)
+        bounds = [low for low, _ in partition_range(start, end, 4)] + [end]
+        # A payment on every partition bound, and one inside each partition.
+        moments = bounds + [bound + datetime.timedelta(hours=6) for bound in bounds]
+        for index, moment in enumerate(sorted(moments)):
+            create_payment(f"ref-{index}", moment)
+        expected = set(
+            Payment.objects.filter(
+                created_at__gte=start, created_at__lt=end
+            ).values_list("payment_reference", flat=True)
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = export_payments_parallel(
+                directory, "ndjson", start, end, partitions=4
+            )
+            exported = []
+            for path, count in results:
+                with open(path, encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+                self.assertEqual(len(lines), count)
+                exported += [json.loads(line)["payment_reference"] for line in lines]
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(exported), len(set(exported)))
+        self.assertEqual(set(exported), expected)
+        self.assertEqual(len(expected), 8)
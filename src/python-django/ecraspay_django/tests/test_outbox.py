@@ -0,0 +1,99 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ecraspay_django.models import OutboxEvent
+from ecraspay_django.outbox import STATUS_CHANGED, OutboxRelay, record_event
+
+
+class RecordingHandler:
+    """Handler recording delivered events and failing ``failing`` ids."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.delivered = []
+
+    def __call__(self, events):
+        self.delivered.extend(
+            (event.reference, event.payload["status"])
+            for event in events
+            if event.id not in self.failing
+        )
+        return [event.id for event in events if event.id in self.failing]
+
+
+class TestOutboxRelay(TestCase):
+    def record(self, reference, status):
+        return record_event(STATUS_CHANGED, reference, {"status": status})
+
+    def test_events_are_delivered_in_order_per_reference(self):
+        """Test only the oldest event of each reference is claimed per batch."""
+        self.record("ref-1", "in_progress")
+        self.record("ref-2", "success")
+        self.record("ref-1", "success")
+        handler = RecordingHandler()
+        relay = OutboxRelay(handlers=[handler])
+
+        self.assertEqual(relay.relay_batch(), (2, 0))
+        self.assertEqual(relay.relay_batch(), (1, 0))
+        self.assertEqual(relay.relay_batch(), (0, 0))
+
+        self.assertEqual(
+            handler.delivered,
+            [
+                ("ref-1", "in_progress"),
+                ("ref-2", "success"),
+                ("ref-1", "success"),
+            ],
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_event_holds_back_its_reference(self):
+        """Test a rejected event is retried with backoff before later events."""
+        failed = self.record("ref-1", "in_progress")
+        self.record("ref-1", "success")
+        self.record("ref-2", "success")
+        handler = RecordingHandler(failing=[failed.id])
+        relay = OutboxRelay(handlers=[handler], max_backoff=60)
+
+        started = timezone.now()
+        self.assertEqual(relay.drain(), 1)
+
+        self.assertEqual(handler.delivered, [("ref-2", "success")])
+        failed.refresh_from_db()
+        self.assertEqual(
+            (failed.attempts, failed.last_error), (1, "rejected by handler")
+        )
+        self.assertGreaterEqual(
+            failed.available_at, started + datetime.timedelta(seconds=2)
+        )
+
+        # Once due and accepted, the held-back event follows it.
+        handler.failing.clear()
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(relay.drain(), 2)
+        self.assertEqual(
+            handler.delivered[1:], [("ref-1", "in_progress"), ("ref-1", "success")]
+        )
+
+    def test_raising_handler_fails_the_batch(self):
+        """Test a raising handler fails every claimed event, backoff capped."""
+        self.record("ref-1", "success")
+        self.record("ref-2", "success")
+        OutboxEvent.objects.update(attempts=10)
+
+        def handler(events):
+            raise ConnectionError("callback down")
+
+        relay = OutboxRelay(handlers=[handler], max_backoff=30)
+        started = timezone.now()
+        self.assertEqual(relay.relay_batch(), (0, 2))
+
+        for event in OutboxEvent.objects.all():
+            self.assertEqual((event.attempts, event.last_error), (11, "callback down"))
+            self.assertLessEqual(
+                event.available_at, timezone.now() + datetime.timedelta(seconds=30)
+            )
+            self.assertGreater(event.available_at, started)
+        self.assertEqual(relay.relay_batch(), (0, 0))
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ecraspay_django import routers
+from ecraspay_django.models import Payment
+from ecraspay_django.routers import (
+    STICKY_COOKIE,
+    PrimaryReplicaRouter,
+    pin_references,
+    read_database,
+    replica_stickiness_middleware,
+)
+
+
+def elsewhere(function, *args):
+    """Call ``function`` in a new thread, i.e. a fresh context."""
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(function, *args).result()
+
+
+# SimpleTestCase: no test transaction holding every read on the primary.
+@override_settings(ECRASPAY_REPLICA_DATABASES=["replica"], ECRASPAY_REPLICA_LAG=5)
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    def setUp(self):
+        token = routers._pinned_until.set(0.0)
+        self.addCleanup(routers._pinned_until.reset, token)
+        cache = caches["default"]
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.router = PrimaryReplicaRouter()
+        self.now = 1000.0
+        patcher = mock.patch.object(routers.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_writes_pin_this_context_for_the_lag(self):
+        """Test reads follow a write to the primary until the lag has passed."""
+        self.assertEqual(self.router.db_for_read(Payment), "replica")
+
+        self.assertEqual(self.router.db_for_write(Payment), "default")
+        self.assertEqual(self.router.db_for_read(Payment), "default")
+        # Other threads and tasks are not pinned.
+        self.assertEqual(elsewhere(self.router.db_for_read, Payment), "replica")
+
+        self.now += 5
+        self.assertEqual(self.router.db_for_read(Payment), "replica")
+
+    def test_written_references_are_pinned_everywhere(self):
+        """Test a written reference is read from the primary in any context."""
+        self.router.db_for_write(
+            Payment, instance=Payment(transaction_reference="ERCS|ref-1")
+        )
+        pin_references(["ERCS|ref-2"])
+
+        for reference, database in (
+            ("ERCS|ref-1", "default"),
+            ("ERCS|ref-2", "default"),
+            ("ERCS|ref-3", "replica"),
+        ):
+            self.assertEqual(elsewhere(read_database, reference), database)
+
+    @override_settings(ECRASPAY_REPLICA_DATABASES=[])
+    def test_without_replicas_everything_is_primary(self):
+        """Test no replicas means primary reads and no reference pins."""
+        pin_references(["ERCS|ref-1"])
+
+        self.assertEqual(self.router.db_for_read(Payment), "default")
+        self.assertIsNone(caches["default"].get(routers._pin_key("ERCS|ref-1")))
+
+    def test_sticky_cookie_pins_the_next_requests(self):
+        """Test a writing request sets the cookie that pins its client."""
+        databases = []
+
+        def view(request):
+            if request.method == "POST":
+                self.router.db_for_write(Payment)
+            databases.append(self.router.db_for_read(Payment))
+            return HttpResponse()
+
+        middleware = replica_stickiness_middleware(view)
+        factory = RequestFactory()
+
+        written = middleware(factory.post("/"))
+        read = middleware(factory.get("/"))
+        sticky = factory.get("/")
+        sticky.COOKIES[STICKY_COOKIE] = "1"
+        pinned = middleware(sticky)
+
+        self.assertEqual(databases, ["default", "replica", "default"])
+        self.assertEqual(written.cookies[STICKY_COOKIE]["max-age"], 5)
+        # Reads, pinned or not, do not extend the cookie.
+        self.assertNotIn(STICKY_COOKIE, read.cookies)
+        self.assertNotIn(STICKY_COOKIE, pinned.cookies)
+        # The request's pin does not leak into the thread.
+        self.assertEqual(self.router.db_for_read(Payment), "replica")
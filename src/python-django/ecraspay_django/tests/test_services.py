@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from ecraspay import Transaction
+from ecraspay.emulator import Emulator, EmulatorTransport
+from ecraspay_django.models import OutboxEvent, Payment
+from ecraspay_django.services import EcraspayService
+from ecraspay_django.tasks import run_batch
+
+
+class EmulatedServiceTestCase(TestCase):
+    """
+    Runs ``EcraspayService`` against an in-process emulated gateway.
+
+    Inside ``TestCase`` every transaction is a SAVEPOINT/RELEASE pair, so a
+    status transition counts five queries: the read of the payment's status
+    and version, SAVEPOINT, the version-guarded UPDATE, the outbox INSERT and
+    RELEASE.
+    """
+
+    def setUp(self):
+        self.emulator = Emulator()
+        self.addCleanup(self.emulator.close)
+        self.service = EcraspayService()
+        self.service.transaction = Transaction(
+            api_key="test-key", transport=EmulatorTransport(self.emulator)
+        )
+        patcher = mock.patch("ecraspay_django.services._service", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def initiate(self, reference="pay_1"):
+        response = self.service.initiate_transaction(
+            amount=1000,
+            reference=reference,
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+            currency="ngn",
+        )
+        return response["responseBody"]["transactionReference"]
+
+
+class TestServiceQueries(EmulatedServiceTestCase):
+    def test_initiate_transaction(self):
+        """Test a new payment is stored with a single INSERT."""
+        with self.assertNumQueries(1):
+            reference = self.initiate()
+
+        payment = Payment.objects.get(transaction_reference=reference)
+        self.assertEqual(payment.status, "pending")
+        self.assertEqual(payment.currency, "NGN")
+
+    def test_verify_transaction(self):
+        """Test verify writes only when the status changes."""
+        reference = self.initiate()
+        with self.assertNumQueries(0):
+            self.service.verify_transaction(reference)
+
+        self.emulator.settle(reference, "SUCCESSFUL")
+        with self.assertNumQueries(5):
+            self.service.verify_transaction(reference)
+        # Settled: the read finds nothing to change, no event.
+        with self.assertNumQueries(1):
+            self.service.verify_transaction(reference)
+
+        payment = Payment.objects.get(transaction_reference=reference)
+        self.assertEqual((payment.status, payment.version), ("success", 1))
+        self.assertEqual(OutboxEvent.objects.filter(reference=reference).count(), 1)
+
+    def test_cancel_transaction(self):
+        """Test cancel is one transition, and a rejected cancel none."""
+        reference = self.initiate()
+        with self.assertNumQueries(5):
+            self.service.cancel_transaction(reference)
+        with self.assertNumQueries(0):
+            self.service.cancel_transaction(reference)
+
+        payment = Payment.objects.get(transaction_reference=reference)
+        self.assertEqual(payment.status, "cancelled")
+
+    def test_get_payment(self):
+        """Test lookups read the payment table, then the archive."""
+        reference = self.initiate()
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(self.service.get_payment(reference))
+        with self.assertNumQueries(2):
+            self.assertIsNone(self.service.get_payment("unknown"))
+
+    def test_batch_queries_do_not_grow_with_batch_size(self):
+        """Test a verify batch costs the same queries for 2 and 20 payments."""
+        counts = []
+        for size in (2, 20):
+            references = [self.initiate(f"pay_{size}_{index}") for index in range(size)]
+            for reference in references:
+                self.emulator.settle(reference, "SUCCESSFUL")
+            with CaptureQueriesContext(connection) as queries:
+                results = run_batch("verify", references)
+            self.assertTrue(all(result.ok for result in results.values()))
+            counts.append(len(queries))
+
+        self.assertEqual(counts, [5, 5])
+        self.assertEqual(Payment.objects.filter(status="success").count(), 22)
@@ -0,0 +1,41 @@
+from ecraspay.settled import SettledCache
+from ecraspay_django.models import SettledResponse
+from ecraspay_django.settled import DatabaseStore
+from ecraspay_django.tests.test_services import EmulatedServiceTestCase
+
+VERIFY = "transaction.verify"
+
+
+class TestDatabaseStore(EmulatedServiceTestCase):
+    def test_store_round_trip(self):
+        """Test a stored response is read back; a second write is ignored."""
+        store = DatabaseStore()
+        response = {"responseBody": {"status": "SUCCESSFUL", "amount": 1000}}
+
+        self.assertIsNone(store.get(VERIFY, "ERCS|ref-1"))
+        store.set(VERIFY, "ERCS|ref-1", response)
+        store.set(VERIFY, "ERCS|ref-1", {"responseBody": {"status": "FAILED"}})
+
+        self.assertEqual(store.get(VERIFY, "ERCS|ref-1"), response)
+        self.assertIsNone(store.get("transaction.details", "ERCS|ref-1"))
+        self.assertEqual(SettledResponse.objects.count(), 1)
+
+    def test_settled_lookups_survive_the_memory_tier(self):
+        """Test settled responses are stored and served without the gateway."""
+        reference = self.initiate()
+        transaction = self.service.transaction
+        # Unsettled responses are not cached, so the next verify is sent.
+        transaction.settled_cache = SettledCache(DatabaseStore(), pending_ttl=0)
+
+        transaction.verify_transaction(reference)
+        self.assertFalse(SettledResponse.objects.exists())
+
+        self.emulator.settle(reference, "SUCCESSFUL")
+        settled = transaction.verify_transaction(reference)
+        self.assertEqual(SettledResponse.objects.get().response, settled)
+
+        # A fresh memory tier, as in another process, reads the table.
+        requests = self.emulator.stats()["requests"]
+        transaction.settled_cache = SettledCache(DatabaseStore())
+        self.assertEqual(transaction.verify_transaction(reference), settled)
+        self.assertEqual(self.emulator.stats()["requests"], requests)
@@ -0,0 +1,126 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.utils import timezone
+
+from ecraspay_django import tasks
+from ecraspay_django.models import Payment, PaymentTask
+from ecraspay_django.tasks import VERIFY, CeleryTaskQueue, DatabaseTaskQueue
+from ecraspay_django.tests.test_services import EmulatedServiceTestCase
+
+
+class TestDatabaseTaskQueue(EmulatedServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = DatabaseTaskQueue(batch_size=10)
+
+    def test_enqueue_many_counts_created_tasks(self):
+        """Test duplicates, in the call or already queued, are not counted."""
+        self.assertEqual(self.queue.enqueue_many(VERIFY, ["a", "b", "a"]), 2)
+        self.assertEqual(self.queue.enqueue_many(VERIFY, ["a", "c"]), 1)
+        self.assertFalse(self.queue.enqueue(VERIFY, "c"))
+        self.assertEqual(self.queue.pending(), 3)
+
+    def test_claimed_tasks_are_leased(self):
+        """Test a claimed task is not claimed again until its lease ends."""
+        self.queue.enqueue_many(VERIFY, ["a", "b"])
+
+        claimed = self.queue.claim()
+
+        self.assertEqual(sorted(task.reference for task in claimed), ["a", "b"])
+        self.assertEqual(self.queue.claim(), [])
+        PaymentTask.objects.filter(reference="a").update(
+            locked_until=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual([task.reference for task in self.queue.claim()], ["a"])
+
+    def test_drain_runs_and_deletes_tasks(self):
+        """Test a drained verify settles the payment and removes the task."""
+        reference = self.initiate()
+        self.emulator.settle(reference, "SUCCESSFUL")
+        self.queue.enqueue(VERIFY, reference)
+
+        self.assertEqual(self.queue.drain(), 1)
+
+        self.assertEqual(
+            Payment.objects.get(transaction_reference=reference).status, "success"
+        )
+        self.assertFalse(PaymentTask.objects.exists())
+
+    def test_failed_tasks_are_retried_then_dropped(self):
+        """Test failures back off exponentially until ``max_attempts``."""
+        self.queue.max_attempts = 2
+        self.queue.enqueue(VERIFY, "ERCS|unknown")
+
+        started = timezone.now()
+        self.assertEqual(self.queue.drain(), 0)
+
+        task = PaymentTask.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNone(task.locked_until)
+        self.assertGreaterEqual(
+            task.available_at, started + datetime.timedelta(seconds=2)
+        )
+        self.assertTrue(task.last_error)
+        # Not due yet; then due, failing for the last time.
+        self.assertEqual(self.queue.claim(), [])
+        PaymentTask.objects.update(available_at=timezone.now())
+        self.queue.drain()
+        self.assertFalse(PaymentTask.objects.exists())
+
+    def test_batch_error_releases_the_lease(self):
+        """Test a batch that raises is logged per task and retried later."""
+        self.queue.enqueue_many(VERIFY, ["a", "b"])
+
+        with mock.patch.object(
+            tasks, "run_batch", side_effect=RuntimeError("gateway down")
+        ), self.assertLogs("ecraspay_django.tasks", "ERROR") as logs:
+            self.assertEqual(self.queue.drain(max_batches=1), 0)
+
+        self.assertEqual(len(logs.records), 2)
+        for task in PaymentTask.objects.all():
+            self.assertEqual((task.attempts, task.locked_until), (1, None))
+            self.assertEqual(task.last_error, "gateway down")
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "tasks": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tasks",
+        },
+    },
+    ECRASPAY_TASK_CACHE="tasks",
+    ECRASPAY_TASK_BATCH_SIZE=2,
+)
+class TestCeleryTaskQueue(EmulatedServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        # Celery itself is not needed: batches are captured from ``delay``.
+        for name, value in (("shared_task", object()), ("run_batch_task", mock.Mock())):
+            patcher = mock.patch.object(tasks, name, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = CeleryTaskQueue()
+        self.addCleanup(caches["tasks"].clear)
+
+    def test_batches_are_deduplicated_in_the_task_cache(self):
+        """Test queued references are skipped until their batch has run."""
+        self.assertEqual(self.queue.enqueue_many(VERIFY, ["a", "b", "a", "c"]), 3)
+        self.assertFalse(self.queue.enqueue(VERIFY, "b"))
+
+        self.assertEqual(
+            [call.args for call in tasks.run_batch_task.delay.call_args_list],
+            [(VERIFY, ["a", "b"], "tasks"), (VERIFY, ["c"], "tasks")],
+        )
+        self.assertIsNone(caches["default"].get(tasks._dedupe_key(VERIFY, "a")))
+
+        with mock.patch.object(tasks, "run_batch", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                tasks._run_queued_batch(VERIFY, ["a", "b"], "tasks")
+        # The keys are released even when the batch fails.
+        self.assertTrue(self.queue.enqueue(VERIFY, "a"))
+        self.assertFalse(self.queue.enqueue(VERIFY, "c"))
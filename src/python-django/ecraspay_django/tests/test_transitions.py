@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from ecraspay_django import transitions
+from ecraspay_django.choices import PaymentMethodChoices
+from ecraspay_django.models import OutboxEvent, Payment
+from ecraspay_django.outbox import STATUS_CHANGED
+from ecraspay_django.transitions import transition, transition_many
+
+
+class TestTransitions(TestCase):
+    def create_payment(self, reference, status="pending", version=0):
+        return Payment.objects.create(
+            payment_reference=reference,
+            transaction_reference=f"ERCS|{reference}",
+            amount=1000,
+            currency="NGN",
+            status=status,
+            version=version,
+            payment_method=PaymentMethodChoices.CARD,
+        )
+
+    def concurrently(self, reference, status):
+        """Apply ``reference -> status`` between the read and the UPDATE."""
+        apply = transitions._apply
+        calls = []
+
+        def interleaved(*args):
+            if not calls:
+                # Claimed first: the concurrent transition runs _apply too.
+                calls.append(None)
+                calls[0] = transition(reference, status)
+            return apply(*args)
+
+        patcher = mock.patch.object(transitions, "_apply", side_effect=interleaved)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    def events(self, reference):
+        return list(
+            OutboxEvent.objects.filter(
+                event_type=STATUS_CHANGED, reference=reference
+            ).values_list("payload__status", "payload__version")
+        )
+
+    def test_transitions_follow_the_state_machine(self):
+        """Test allowed changes apply and bump the version; others are lost."""
+        self.create_payment("ref-1")
+
+        self.assertTrue(transition("ERCS|ref-1", "in_progress"))
+        self.assertFalse(transition("ERCS|ref-1", "pending"))
+        self.assertTrue(transition("ERCS|ref-1", "success"))
+        self.assertFalse(transition("ERCS|ref-1", "failed"))
+        self.assertFalse(transition("ERCS|unknown", "success"))
+
+        payment = Payment.objects.get(payment_reference="ref-1")
+        self.assertEqual((payment.status, payment.version), ("success", 2))
+        self.assertEqual(
+            self.events("ERCS|ref-1"), [("in_progress", 1), ("success", 2)]
+        )
+        with self.assertRaises(ValueError):
+            transition("ERCS|ref-1", "settled")
+
+    def test_stale_transition_loses(self):
+        """Test a change read before a concurrent final one is not applied."""
+        self.create_payment("ref-1")
+        calls = self.concurrently("ERCS|ref-1", "failed")
+
+        result = transition("ERCS|ref-1", "success")
+
+        self.assertTrue(calls[0].applied)
+        self.assertFalse(result.applied)
+        payment = Payment.objects.get(payment_reference="ref-1")
+        self.assertEqual((payment.status, payment.version), ("failed", 1))
+        self.assertEqual(self.events("ERCS|ref-1"), [("failed", 1)])
+
+    def test_concurrent_change_is_retried(self):
+        """Test a change still allowed after a concurrent one is retried."""
+        self.create_payment("ref-1")
+        self.concurrently("ERCS|ref-1", "in_progress")
+
+        result = transition("ERCS|ref-1", "success")
+
+        self.assertTrue(result.applied)
+        payment = Payment.objects.get(payment_reference="ref-1")
+        self.assertEqual((payment.status, payment.version), ("success", 2))
+        self.assertEqual(
+            self.events("ERCS|ref-1"), [("in_progress", 1), ("success", 2)]
+        )
+
+    def test_concurrent_duplicate_applies_once(self):
+        """Test two racing changes to the same status record one event."""
+        self.create_payment("ref-1")
+        calls = self.concurrently("ERCS|ref-1", "success")
+
+        result = transition("ERCS|ref-1", "success")
+
+        self.assertTrue(calls[0].applied)
+        self.assertFalse(result.applied)
+        self.assertEqual(self.events("ERCS|ref-1"), [("success", 1)])
+
+    def test_batch_with_a_concurrent_change(self):
+        """Test only the payment changed concurrently is re-read and retried."""
+        self.create_payment("ref-1")
+        self.create_payment("ref-2", version=4)
+        self.create_payment("ref-3", status="expired", version=1)
+        self.concurrently("ERCS|ref-1", "cancelled")
+
+        results = transition_many(
+            {
+                "ERCS|ref-1": "success",
+                "ERCS|ref-2": "success",
+                "ERCS|ref-3": "success",
+            }
+        )
+
+        self.assertEqual(
+            {reference: result.applied for reference, result in results.items()},
+            {"ERCS|ref-1": False, "ERCS|ref-2": True, "ERCS|ref-3": True},
+        )
+        versions = dict(Payment.objects.values_list("payment_reference", "version"))
+        self.assertEqual(versions, {"ref-1": 1, "ref-2": 5, "ref-3": 2})
+
+    def test_no_writes_when_nothing_can_change(self):
+        """Test lost transitions cost only the read, in no transaction."""
+        self.create_payment("ref-1", status="success", version=1)
+
+        with self.assertNumQueries(1):
+            results = transition_many({"ERCS|ref-1": "failed", "ERCS|ref-2": "pending"})
+
+        self.assertFalse(any(result.applied for result in results.values()))
+        self.assertFalse(OutboxEvent.objects.exists())
@@ -0,0 +1,276 @@
+"""
+Query-count and latency regression tests for the status and webhook views.
+
+``TestViewLoad`` drives both views with many payments against the emulated
+gateway and records, per view, the request count, p50/p99/max latency and
+queries per request. Set ``ECRASPAY_PERF_REPORT`` to a file path to write
+the numbers as JSON, e.g. to compare them between commits in CI:
+
+    ECRASPAY_PERF_REPORT=perf.json python -m pytest -q
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.status import get_payment_status, publish, status_etag
+from ecraspay_django.tests.test_webhooks import WebhookTestCase
+
+
+def status_url(reference):
+    return f"/payments/{reference}/status/"
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RequestStats:
+    """Latency and query count of every request made through ``measure``."""
+
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+
+    def measure(self, request, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request(*args, **kwargs)
+            self.latencies.append(time.perf_counter() - start)
+        self.queries.append(len(queries))
+        return response
+
+    def report(self):
+        return {
+            "requests": len(self.latencies),
+            "p50_ms": round(percentile(self.latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 0.99) * 1000, 3),
+            "max_ms": round(max(self.latencies) * 1000, 3),
+            "queries_per_request": round(sum(self.queries) / len(self.queries), 3),
+            "max_queries": max(self.queries),
+        }
+
+
+class StatusTestCase(WebhookTestCase):
+    def setUp(self):
+        super().setUp()
+        cache = caches[get_ecraspay_setting("ECRASPAY_STATUS_CACHE")]
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+class TestStatusView(StatusTestCase):
+    def test_status_is_read_once_then_cached(self):
+        """Test only the first status read reaches the database."""
+        reference = self.initiate()
+        with self.assertNumQueries(1):
+            response = self.client.get(status_url(reference))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "pending")
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(status_url(reference))
+            unchanged = self.client.get(
+                status_url(reference), headers={"If-None-Match": response["ETag"]}
+            )
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(unchanged.status_code, 304)
+
+    def test_transition_updates_cached_status(self):
+        """Test a committed transition is served without a database read."""
+        reference = self.initiate()
+        etag = self.client.get(status_url(reference))["ETag"]
+        self.emulator.settle(reference, "SUCCESSFUL")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.verify_transaction(reference)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                status_url(reference), headers={"If-None-Match": etag}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "success")
+
+    def test_older_status_is_not_published_over_newer(self):
+        """Test statuses published out of order keep the highest version."""
+        reference = self.initiate()
+        older = {"transaction_reference": reference, "status": "in_progress"}
+        newer = {"transaction_reference": reference, "status": "success"}
+
+        publish([dict(newer, version=2)])
+        publish([dict(older, version=1), dict(newer, version=2)])
+        publish([dict(older, version=1)])
+
+        with self.assertNumQueries(0):
+            status = get_payment_status(reference)
+        self.assertEqual((status["status"], status["version"]), ("success", 2))
+
+    def test_unknown_payment(self):
+        """Test an unknown reference reads the payment table and the archive."""
+        with self.assertNumQueries(2):
+            response = self.client.get(status_url("unknown"))
+        self.assertEqual(response.status_code, 404)
+
+
+def newer(current, **changes):
+    """Return ``current`` one version later, with ``changes`` applied."""
+    return dict(current, version=current["version"] + 1, **changes)
+
+
+async def read_events(response):
+    """Return the Server-Sent Events of a streamed response, as text."""
+    return "".join([chunk.decode() async for chunk in response.streaming_content])
+
+
+class TestStatusLongPoll(StatusTestCase):
+    def test_invalid_waits_are_rejected(self):
+        """Test non-numeric and non-finite waits get a 400 without waiting."""
+        reference = self.initiate()
+        for wait in ("nan", "inf", "-inf", "soon"):
+            response = self.client.get(status_url(reference), {"wait": wait})
+            self.assertEqual(response.status_code, 400, wait)
+
+    def test_wait_ends_with_not_modified(self):
+        """Test an unchanged payment is answered 304 when the wait ends."""
+        reference = self.initiate()
+        etag = self.client.get(status_url(reference))["ETag"]
+
+        started = time.monotonic()
+        response = self.client.get(
+            status_url(reference), {"wait": "0.2"}, headers={"If-None-Match": etag}
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    async def test_change_ends_the_wait(self):
+        """Test a published change answers a waiting request at once."""
+        reference = await sync_to_async(self.initiate)()
+        status = await sync_to_async(get_payment_status)(reference)
+        request = asyncio.ensure_future(
+            self.async_client.get(
+                status_url(reference),
+                {"wait": "10"},
+                headers={"If-None-Match": status_etag(status)},
+            )
+        )
+        await asyncio.sleep(0.1)
+        started = time.monotonic()
+        publish([newer(status, status="success")])
+
+        response = await asyncio.wait_for(request, 5)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "success")
+
+
+class TestStatusEvents(StatusTestCase):
+    headers = {"Accept": "text/event-stream"}
+
+    async def test_final_payment_sends_one_event(self):
+        """Test a settled payment's stream is its status, then the end."""
+        reference = await sync_to_async(self.initiate)()
+        status = await sync_to_async(get_payment_status)(reference)
+        publish([newer(status, status="success")])
+
+        response = await self.async_client.get(
+            status_url(reference), headers=self.headers
+        )
+        events = await read_events(response)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(events.count("event: status"), 1)
+        self.assertIn(f"id: {status['version'] + 1}\n", events)
+        self.assertIn('"status": "success"', events)
+
+    @override_settings(ECRASPAY_STATUS_MAX_WAIT=0.2)
+    async def test_known_version_sends_keep_alives(self):
+        """Test ``Last-Event-ID`` of the current version sends no event."""
+        reference = await sync_to_async(self.initiate)()
+        status = await sync_to_async(get_payment_status)(reference)
+
+        response = await self.async_client.get(
+            status_url(reference),
+            headers={**self.headers, "Last-Event-ID": str(status["version"])},
+        )
+        events = await read_events(response)
+
+        self.assertNotIn("event: status", events)
+        self.assertIn(": keep-alive", events)
+
+    async def test_changes_are_streamed_until_final(self):
+        """Test every published change is an event; a final one ends the stream."""
+        reference = await sync_to_async(self.initiate)()
+        status = await sync_to_async(get_payment_status)(reference)
+        in_progress = newer(status, status="in_progress")
+
+        async def settle():
+            await asyncio.sleep(0.1)
+            publish([in_progress])
+            await asyncio.sleep(0.1)
+            publish([newer(in_progress, status="failed")])
+
+        changes = asyncio.ensure_future(settle())
+        response = await self.async_client.get(
+            status_url(reference),
+            headers={**self.headers, "Last-Event-ID": str(status["version"])},
+        )
+        events = await asyncio.wait_for(read_events(response), 5)
+        await changes
+
+        self.assertEqual(events.count("event: status"), 2)
+        self.assertLess(events.index("in_progress"), events.index("failed"))
+        self.assertNotIn("pending", events)
+
+
+class TestViewLoad(StatusTestCase):
+    payments = 100
+    polls = 5
+
+    def test_status_and_webhook_load(self):
+        """Test per-request queries stay flat under load; report latencies."""
+        references = [self.initiate(f"pay_{index}") for index in range(self.payments)]
+        status = RequestStats()
+        webhook = RequestStats()
+
+        # Clients poll while payments are pending: one read per payment.
+        for _ in range(self.polls):
+            for reference in references:
+                response = status.measure(self.client.get, status_url(reference))
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(status.queries), self.payments)
+
+        for reference in references:
+            self.emulator.settle(reference, "SUCCESSFUL")
+        for payload in self.wait_for_webhooks(self.payments):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = webhook.measure(self.post_webhook, payload)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(webhook.queries), {6})
+
+        # Settled statuses were published on commit: no further reads.
+        for reference in references:
+            response = status.measure(self.client.get, status_url(reference))
+            self.assertEqual(response.json()["status"], "success")
+        self.assertEqual(sum(status.queries), self.payments)
+
+        report = {
+            "payments": self.payments,
+            "status": status.report(),
+            "webhook": webhook.report(),
+        }
+        path = os.environ.get("ECRASPAY_PERF_REPORT")
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,181 @@
+import json
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import override_settings
+from ecraspay.exceptions import (
+    ApiWrapperRateLimitError,
+    ApiWrapperUnavailableError,
+    ApiWrapperValidationError,
+)
+from ecraspay_django.models import OutboxEvent, Payment
+from ecraspay_django.outbox import (
+    STATUS_CHANGED,
+    WEBHOOK_RECEIVED,
+    OutboxRelay,
+    signal_handler,
+)
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.signals import webhook_received
+from ecraspay_django.tests.test_services import EmulatedServiceTestCase
+
+WEBHOOK_URL = "/payments/webhook/"
+
+
+class WebhookTestCase(EmulatedServiceTestCase):
+    """Collects the webhooks the emulated gateway sends."""
+
+    def setUp(self):
+        super().setUp()
+        self.deliveries = []
+        self.delivered = threading.Condition()
+        self.emulator.webhook_url = self._receive
+        cache = caches[get_ecraspay_setting("ECRASPAY_WEBHOOK_CACHE")]
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _receive(self, payload):
+        with self.delivered:
+            self.deliveries.append(payload)
+            self.delivered.notify_all()
+
+    def wait_for_webhooks(self, count, timeout=5):
+        with self.delivered:
+            self.assertTrue(
+                self.delivered.wait_for(lambda: len(self.deliveries) >= count, timeout),
+                f"expected {count} webhooks, got {len(self.deliveries)}",
+            )
+        return self.deliveries[:count]
+
+    def post_webhook(self, payload):
+        return self.client.post(
+            WEBHOOK_URL, data=json.dumps(payload), content_type="application/json"
+        )
+
+    def verified(self, reference):
+        """Return the gateway's verify response for ``reference``."""
+        return self.service.transaction.verify_transaction(reference)
+
+
+class TestWebhooks(WebhookTestCase):
+    def test_webhook_applies_verified_status(self):
+        """Test a webhook is one gateway verify, one transition and one event."""
+        reference = self.initiate()
+        self.emulator.settle(reference, "SUCCESSFUL")
+        (payload,) = self.wait_for_webhooks(1)
+
+        # The status read that finds the payment, the transition, then the
+        # INSERT of the received webhook.
+        with self.assertNumQueries(7):
+            response = self.post_webhook(payload)
+
+        self.assertEqual(response.status_code, 200)
+        payment = Payment.objects.get(transaction_reference=reference)
+        self.assertEqual(payment.status, "success")
+        event = OutboxEvent.objects.get(event_type=WEBHOOK_RECEIVED)
+        self.assertEqual(event.reference, reference)
+        self.assertEqual(event.payload, self.verified(reference))
+
+    def test_receivers_run_in_the_relay(self):
+        """Test ``webhook_received`` receivers run outside the request."""
+        reference = self.initiate()
+        self.emulator.settle(reference, "SUCCESSFUL")
+        (payload,) = self.wait_for_webhooks(1)
+        events = []
+
+        def receiver(sender, event, **kwargs):
+            events.append(event)
+            raise RuntimeError("receiver failed")
+
+        webhook_received.connect(receiver)
+        self.addCleanup(webhook_received.disconnect, receiver)
+        response = self.post_webhook(payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(events, [])
+        OutboxRelay(handlers=[signal_handler]).drain()
+        self.assertEqual(events, [self.verified(reference)])
+        # A failing receiver fails the event, which is redelivered later.
+        self.assertTrue(OutboxEvent.objects.filter(event_type=WEBHOOK_RECEIVED))
+
+    @override_settings(ECRASPAY_WEBHOOK_VERIFY_INTERVAL=0)
+    def test_duplicate_webhook_does_not_transition(self):
+        """Test a redelivered webhook records no second status change."""
+        reference = self.initiate()
+        self.emulator.settle(reference, "FAILED")
+        (payload,) = self.wait_for_webhooks(1)
+
+        self.post_webhook(payload)
+        # The transition's read, then the INSERT of the received webhook.
+        with self.assertNumQueries(2):
+            response = self.post_webhook(payload)
+
+        self.assertEqual(response.status_code, 200)
+        events = OutboxEvent.objects.filter(reference=reference)
+        self.assertEqual(events.filter(event_type=STATUS_CHANGED).count(), 1)
+
+    def test_repeated_webhooks_are_throttled(self):
+        """Test a reference is verified once per interval; others get a 429."""
+        reference = self.initiate()
+        self.emulator.settle(reference, "SUCCESSFUL")
+        (payload,) = self.wait_for_webhooks(1)
+        self.post_webhook(payload)
+
+        patcher = mock.patch.object(self.service.transaction, "verify_transaction")
+        with patcher as verify, self.assertNumQueries(0):
+            response = self.post_webhook(payload)
+
+        verify.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertEqual(
+            OutboxEvent.objects.filter(event_type=WEBHOOK_RECEIVED).count(), 1
+        )
+
+    def test_webhook_body_is_not_trusted(self):
+        """Test a forged status is ignored, and not recorded, for the gateway's."""
+        reference = self.initiate()
+        forged = {"transactionReference": reference, "status": "SUCCESSFUL"}
+        # The status read that finds the payment, then the outbox INSERT.
+        with self.assertNumQueries(2):
+            response = self.post_webhook(forged)
+
+        self.assertEqual(response.status_code, 200)
+        payment = Payment.objects.get(transaction_reference=reference)
+        self.assertEqual(payment.status, "pending")
+        event = OutboxEvent.objects.get(event_type=WEBHOOK_RECEIVED)
+        self.assertEqual(event.payload, self.verified(reference))
+
+    def test_invalid_webhooks_are_rejected(self):
+        """Test malformed bodies and unknown transactions get a 400."""
+        patcher = mock.patch.object(self.service.transaction, "verify_transaction")
+        with patcher as verify:
+            malformed = self.client.post(
+                WEBHOOK_URL, data="not json", content_type="application/json"
+            )
+            unknown = self.post_webhook({"transactionReference": "ERCS|unknown"})
+
+        # Only local payments are verified with the gateway.
+        verify.assert_not_called()
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(unknown.status_code, 400)
+        self.assertEqual(self.client.get(WEBHOOK_URL).status_code, 405)
+
+    @override_settings(ECRASPAY_WEBHOOK_VERIFY_INTERVAL=0)
+    def test_gateway_errors(self):
+        """Test rejected lookups get a 400 and failed ones a 502, with no event."""
+        reference = self.initiate()
+        cases = [
+            (ApiWrapperValidationError("Invalid reference."), 400),
+            (ApiWrapperRateLimitError("Too many requests."), 502),
+            (ApiWrapperUnavailableError("Gateway unavailable."), 502),
+        ]
+        for error, status_code in cases:
+            with mock.patch.object(
+                self.service.transaction, "verify_transaction", side_effect=error
+            ):
+                response = self.post_webhook({"transactionReference": reference})
+            self.assertEqual(response.status_code, status_code, error)
+
+        self.assertFalse(OutboxEvent.objects.exists())
@@ -0,0 +1,257 @@
+"""
+Payment status state machine for the ecraspay_django integration.
+
+Status changes are optimistic and take no row locks. The payments' status
+and ``version`` are read, and each allowed change is applied with a single
+conditional UPDATE guarded by the version that was read:
+
+    UPDATE payment SET status = 'success', version = version + 1, ...
+    WHERE id IN (...) AND version = 3 AND status IN ('pending', 'in_progress')
+
+A payment changed by someone else since the read no longer matches, so
+concurrent webhook, verify and cancel calls cannot overwrite each other's
+results. When the UPDATE changes fewer rows than expected, the rows are read
+back: those carrying this UPDATE's version and ``updated_at`` are the ones it
+changed, and the others are retried against their new status, up to
+``ATTEMPTS`` times. A transition the new status does not allow is lost, and
+reported in the returned ``TransitionResult`` instead of being silently
+applied. Every applied transition records a status-change event in the
+outbox, in the same transaction. Once the transaction commits, the new
+statuses are published to the status cache (see ``ecraspay_django.status``),
+and reads of the changed references stay on the primary for a while (see
+``ecraspay_django.routers``).
+
+Allowed transitions:
+
+    pending      -> in_progress, success, failed, cancelled, expired
+    in_progress  -> success, failed, cancelled, expired
+    expired      -> success  (a transfer paid after its account expired)
+
+Success, failed and cancelled are final.
+
+Example:
+    from ecraspay_django.transitions import transition
+
+    result = transition("txn_12345", PaymentStatusChoices.SUCCESS)
+    if not result.applied:
+        ...  # already settled, or an unknown reference
+"""
+
+import functools
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ecraspay.log import get_logger
+from ecraspay_django.choices import PaymentStatusChoices
+from ecraspay_django.models import OutboxEvent
+from ecraspay_django.outbox import status_event
+from ecraspay_django.routers import pin_references
+from ecraspay_django.status import STATUS_FIELDS, publish
+from ecraspay_django.utils import get_payment_model
+
+logger = get_logger(__name__)
+
+# Rounds of UPDATEs for payments that changed concurrently.
+ATTEMPTS = 3
+
+TRANSITIONS = {
+    PaymentStatusChoices.PENDING: (
+        PaymentStatusChoices.IN_PROGRESS,
+        PaymentStatusChoices.SUCCESS,
+        PaymentStatusChoices.FAILED,
+        PaymentStatusChoices.CANCELLED,
+        PaymentStatusChoices.EXPIRED,
+    ),
+    PaymentStatusChoices.IN_PROGRESS: (
+        PaymentStatusChoices.SUCCESS,
+        PaymentStatusChoices.FAILED,
+        PaymentStatusChoices.CANCELLED,
+        PaymentStatusChoices.EXPIRED,
+    ),
+    PaymentStatusChoices.EXPIRED: (PaymentStatusChoices.SUCCESS,),
+    PaymentStatusChoices.SUCCESS: (),
+    PaymentStatusChoices.FAILED: (),
+    PaymentStatusChoices.CANCELLED: (),
+}
+
+# The statuses each status can be reached from.
+PREDECESSORS = {
+    status: tuple(
+        source for source, targets in TRANSITIONS.items() if status in targets
+    )
+    for status in PaymentStatusChoices.values
+}
+
+
+def can_transition(current, status) -> bool:
+    """Return True if a payment in status ``current`` may move to ``status``."""
+    return status in TRANSITIONS.get(current, ())
+
+
+class TransitionResult:
+    """
+    The outcome of a status transition.
+
+    Attributes:
+        reference (str): Transaction reference of the payment.
+        status (str): The requested status.
+        applied (bool): Whether the payment moved to ``status``. False when
+            the transition lost: the payment was already in a status
+            ``status`` cannot be reached from, or does not exist.
+    """
+
+    __slots__ = ("reference", "status", "applied")
+
+    def __init__(self, reference, status, applied):
+        self.reference = reference
+        self.status = status
+        self.applied = applied
+
+    def __bool__(self):
+        return self.applied
+
+    def __repr__(self):
+        outcome = "applied" if self.applied else "lost"
+        return f"<TransitionResult {self.reference} -> {self.status}: {outcome}>"
+
+
+def transition(reference, status):
+    """
+    Move one payment to ``status`` if its current status allows it.
+
+    Args:
+        reference (str): Transaction reference of the payment.
+        status (str): The new ``PaymentStatusChoices`` value.
+
+    Returns:
+        TransitionResult: Whether the transition was applied.
+
+    Raises:
+        ValueError: If ``status`` is not a payment status.
+    """
+    return transition_many({reference: status})[reference]
+
+
+def transition_many(statuses):
+    """
+    Apply many status transitions with one version-guarded UPDATE per status.
+
+    The payments are read once, without locks; applied transitions are
+    recorded in the outbox with one INSERT, in the same transaction as the
+    UPDATEs.
+
+    Args:
+        statuses (dict): ``{transaction_reference: status}``.
+
+    Returns:
+        dict: ``{transaction_reference: TransitionResult}``.
+
+    Raises:
+        ValueError: If a status is not a payment status.
+    """
+    references = []
+    for reference, status in statuses.items():
+        if status not in PREDECESSORS:
+            raise ValueError(f"Unknown payment status '{status}'.")
+        if PREDECESSORS[status]:
+            references.append(reference)
+
+    applied = set()
+    if not references:
+        # Only transitions into statuses nothing can reach, e.g. "pending".
+        return _results(statuses, applied)
+    payment_model = get_payment_model()
+    # The reads and UPDATEs all run on the primary.
+    db = router.db_for_write(payment_model)
+    payments = payment_model._default_manager.using(db).only("pk", *STATUS_FIELDS)
+    pending = [
+        payment
+        for payment in payments.filter(transaction_reference__in=references).order_by()
+        if can_transition(payment.status, statuses[payment.transaction_reference])
+    ]
+    changed = []
+    if not pending:
+        return _results(statuses, applied)
+    with transaction.atomic(using=db):
+        for _ in range(ATTEMPTS):
+            pending = _apply(payments, pending, statuses, changed)
+            if not pending:
+                break
+        else:
+            logger.warning(
+                "Gave up on %s payments changed concurrently %s times",
+                len(pending),
+                ATTEMPTS,
+            )
+        if changed:
+            OutboxEvent.objects.using(db).bulk_create(
+                [status_event(payment) for payment in changed]
+            )
+            published = [
+                {field: getattr(payment, field) for field in STATUS_FIELDS}
+                for payment in changed
+            ]
+            transaction.on_commit(functools.partial(_committed, published), using=db)
+
+    applied.update(payment.transaction_reference for payment in changed)
+    return _results(statuses, applied)
+
+
+def _apply(payments, candidates, statuses, changed):
+    """
+    Run one round of version-guarded UPDATEs.
+
+    Payments this round changed are updated in place and appended to
+    ``changed``.
+
+    Returns:
+        list: The payments that changed concurrently, as read back, to retry.
+    """
+    groups = {}
+    for payment in candidates:
+        status = statuses[payment.transaction_reference]
+        if can_transition(payment.status, status):
+            groups.setdefault((status, payment.version), []).append(payment)
+
+    retry = []
+    now = timezone.now()
+    for (status, version), group in groups.items():
+        count = payments.filter(
+            pk__in=[payment.pk for payment in group],
+            version=version,
+            status__in=PREDECESSORS[status],
+        ).update(status=status, version=F("version") + 1, updated_at=now)
+        if count < len(group):
+            # Another transaction got there first; the version and
+            # ``updated_at`` this UPDATE wrote tell its rows from theirs.
+            current = payments.filter(pk__in=[payment.pk for payment in group])
+            for payment in current:
+                if payment.version == version + 1 and (
+                    (payment.status, payment.updated_at) == (status, now)
+                ):
+                    changed.append(payment)
+                else:
+                    retry.append(payment)
+            continue
+        for payment in group:
+            payment.status = status
+            payment.version = version + 1
+            payment.updated_at = now
+            changed.append(payment)
+    return retry
+
+
+def _committed(statuses):
+    publish(statuses)
+    pin_references(status["transaction_reference"] for status in statuses)
+
+
+def _results(statuses, applied):
+    results = {}
+    for reference, status in statuses.items():
+        results[reference] = TransitionResult(reference, status, reference in applied)
+        if reference not in applied:
+            logger.debug("Transition of payment %s to %s lost", reference, status)
+    return results
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from ecraspay_django import views
+
+app_name = "ecraspay_django"
+
+urlpatterns = [
+    path("payments/export/", views.export_payments_view, name="export_payments"),
+    path("payments/webhook/", views.payment_webhook_view, name="payment_webhook"),
+    path(
+        "payments/<str:reference>/status/",
+        views.payment_status_view,
+        name="payment_status",
+    ),
+]
@@ -0,0 +1,46 @@
+from django.apps import apps
+
+from ecraspay_django.settings import get_ecraspay_setting
+
+
+def get_payment_model():
+    """
+    Return the payment model configured by ``ECRASPAY_PAYMENT_MODEL``.
+    """
+    return apps.get_model(get_ecraspay_setting("ECRASPAY_PAYMENT_MODEL"))
+
+
+# Gateway transaction statuses mapped to PaymentStatusChoices values.
+GATEWAY_STATUSES = {
+    "SUCCESSFUL": "success",
+    "SUCCESS": "success",
+    "PAID": "success",
+    "PENDING": "pending",
+    "INITIATED": "pending",
+    "PROCESSING": "in_progress",
+    "IN_PROGRESS": "in_progress",
+    "FAILED": "failed",
+    "DECLINED": "failed",
+    "CANCELLED": "cancelled",
+    "CANCELED": "cancelled",
+    "ABANDONED": "cancelled",
+    "EXPIRED": "expired",
+}
+
+
+def payment_status_from_response(response):
+    """
+    Return the payment status reported by a gateway response, or None.
+
+    Reads ``responseBody.status`` (or ``paymentStatus``) from a verify or
+    status response and maps it to a ``PaymentStatusChoices`` value.
+    """
+    if not isinstance(response, dict):
+        return None
+    body = response.get("responseBody")
+    if not isinstance(body, dict):
+        return None
+    status = body.get("status") or body.get("paymentStatus")
+    if not isinstance(status, str):
+        return None
+    return GATEWAY_STATUSES.get(status.upper())
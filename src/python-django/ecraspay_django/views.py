@@ -1,4 +1,181 @@
-from django.dispatch import Signal
+import json
+import math
 
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.http import (
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
 
-webhook_received = Signal(providing_args=["request", "event"])
\ No newline at end of file
+from ecraspay.exceptions import ApiWrapperError, ApiWrapperRequestError
+from ecraspay_django.exports import export_response, month_range
+from ecraspay_django.outbox import WEBHOOK_RECEIVED, record_event
+from ecraspay_django.services import get_service
+from ecraspay_django.settings import get_ecraspay_setting
+from ecraspay_django.status import (
+    get_payment_status,
+    is_final,
+    status_etag,
+    wait_for_change,
+)
+
+# Seconds between keep-alive comments on an idle event stream.
+HEARTBEAT = 15
+
+
+@staff_member_required
+def export_payments_view(request):
+    """
+    Download a month of payments, streamed with constant memory.
+
+    Query parameters: ``month`` (YYYY-MM, required) and ``format`` ("csv" or
+    "ndjson", default "csv").
+    """
+    try:
+        start, end = month_range(request.GET.get("month", ""))
+        return export_response(request.GET.get("format", "csv"), start, end)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+
+@csrf_exempt
+def payment_webhook_view(request):
+    """
+    Receive a transaction webhook from the gateway.
+
+    The gateway does not sign its webhooks, so nothing in the body is
+    trusted but its ``transactionReference``: the transaction is verified
+    with the gateway and the verified status applied as a transition, which
+    makes forged, duplicate and out-of-order deliveries harmless. The
+    gateway's verify response, not the body, is then recorded in the
+    outbox; the relay delivers it to ``webhook_received`` receivers outside
+    this request (see ``ecraspay_django.outbox``).
+
+    The endpoint is public, so only local payments are verified, and each
+    at most once per ``ECRASPAY_WEBHOOK_VERIFY_INTERVAL`` seconds; a webhook
+    inside that interval is answered 429 with ``Retry-After``, and the
+    gateway redelivers it later.
+
+    Responds 200 once the payment is up to date, 400 for a malformed body or
+    a transaction that is unknown or that the gateway rejects, and 502 if
+    the gateway could not verify it, so that it retries.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        event = json.loads(request.body)
+        reference = event["transactionReference"]
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest("Expected a JSON transaction.")
+    if not isinstance(reference, str):
+        return HttpResponseBadRequest("Expected a JSON transaction.")
+    if get_payment_status(reference) is None:
+        return JsonResponse({"detail": "Unknown transaction."}, status=400)
+    interval = get_ecraspay_setting("ECRASPAY_WEBHOOK_VERIFY_INTERVAL")
+    cache = caches[get_ecraspay_setting("ECRASPAY_WEBHOOK_CACHE")]
+    if not cache.add(f"ecraspay:webhook:{reference}", 1, timeout=interval):
+        response = JsonResponse({"detail": "Verified recently."}, status=429)
+        response["Retry-After"] = str(math.ceil(interval))
+        return response
+    try:
+        verified = get_service().verify_webhook(reference)
+    except ApiWrapperError as e:
+        if isinstance(e, ApiWrapperRequestError) and not e.retryable:
+            # The gateway rejected the lookup; redelivering will not help.
+            return JsonResponse({"detail": "Unknown transaction."}, status=400)
+        return JsonResponse({"detail": "Verification failed."}, status=502)
+    record_event(WEBHOOK_RECEIVED, reference, verified)
+    return JsonResponse({"received": True})
+
+
+async def payment_status_view(request, reference):
+    """
+    Serve the status of a local payment without calling the gateway.
+
+    - Plain GET: the status as JSON, with an ``ETag``. A request whose
+      ``If-None-Match`` matches gets ``304 Not Modified``.
+    - Long-poll: with ``?wait=<seconds>`` and a matching ``If-None-Match``,
+      the response is held until the status changes or the wait ends
+      (at most ``ECRASPAY_STATUS_MAX_WAIT``).
+    - Server-Sent Events: with ``Accept: text/event-stream``, a ``status``
+      event is sent now and on every change until the payment is final.
+      ``Last-Event-ID`` resumes after a known version.
+
+    Statuses come from the status cache (see ``ecraspay_django.status``).
+    The view is async; under WSGI it still works but holds a worker thread
+    while waiting.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    max_wait = get_ecraspay_setting("ECRASPAY_STATUS_MAX_WAIT")
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        version = request.headers.get("Last-Event-ID")
+        response = StreamingHttpResponse(
+            _status_events(reference, _int_or_none(version), max_wait),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        wait = math.nan
+    if not math.isfinite(wait):
+        # NaN would survive min/max and make the wait endless.
+        return HttpResponseBadRequest("wait must be a number of seconds.")
+    wait = min(max(wait, 0), max_wait)
+    status = await sync_to_async(get_payment_status)(reference)
+    if status is None:
+        return JsonResponse({"detail": "Payment not found."}, status=404)
+    known = parse_etags(request.headers.get("If-None-Match", ""))
+    if wait and status_etag(status) in known:
+        status = await wait_for_change(reference, status["version"], wait)
+        if status is None:
+            return JsonResponse({"detail": "Payment not found."}, status=404)
+
+    etag = status_etag(status)
+    if etag in known or "*" in known:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(status)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _status_events(reference, version, duration):
+    """Yield Server-Sent Events for ``reference`` for up to ``duration`` seconds."""
+    yield f"retry: {HEARTBEAT * 1000}\n\n"
+    remaining = duration
+    while remaining > 0:
+        timeout = min(HEARTBEAT, remaining)
+        remaining -= timeout
+        status = await wait_for_change(reference, version, timeout)
+        if status is None:
+            yield 'event: error\ndata: {"detail": "Payment not found."}\n\n'
+            return
+        if status["version"] == version:
+            if is_final(status):
+                return
+            yield ": keep-alive\n\n"
+            continue
+        version = status["version"]
+        yield f"id: {version}\nevent: status\ndata: {json.dumps(status)}\n\n"
+        if is_final(status):
+            return
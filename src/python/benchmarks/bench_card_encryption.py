@@ -0,0 +1,62 @@
+"""
+Benchmark for card payload encryption.
+
+Reports encryptions per second for each available crypto backend, for single
+``encrypt_card`` calls and for ``encrypt_batch`` with an increasing number of
+threads.
+
+Usage:
+    python -m benchmarks.bench_card_encryption
+"""
+
+import os
+import time
+
+from Crypto.PublicKey import RSA
+
+from ecraspay.utilities import card as card_utils
+
+CARDS = 2000
+
+
+def _rate(func, count) -> float:
+    started = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    public_key = RSA.generate(2048).publickey().export_key()
+    card = {
+        "card_number": "4242424242424242",
+        "expiration_date": "12/25",
+        "cvv": "123",
+        "pin": "1234",
+    }
+    cards = [card] * CARDS
+    backends = [name for name in card_utils.BACKENDS]
+    if card_utils.serialization is None:
+        backends.remove("cryptography")
+
+    print(f"{CARDS} cards, 2048-bit key, {os.cpu_count()} CPUs")
+    for backend in backends:
+        single = _rate(
+            lambda: [
+                card_utils.encrypt_card(**card, public_key=public_key, backend=backend)
+                for _ in range(CARDS)
+            ],
+            CARDS,
+        )
+        print(f"{backend:<13} encrypt_card             {single:10.0f} /s")
+        for workers in (1, 2, 4, 8):
+            batch = _rate(
+                lambda: card_utils.encrypt_batch(
+                    cards, public_key, backend=backend, max_workers=workers
+                ),
+                CARDS,
+            )
+            print(f"{backend:<13} encrypt_batch workers={workers} {batch:10.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
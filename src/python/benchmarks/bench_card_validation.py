@@ -0,0 +1,67 @@
+"""
+Benchmark for local card pre-validation.
+
+Compares rejecting an invalid card locally with the cost of encrypting it, and
+measures BIN lookups against an in-memory and a memory-mapped index of
+100,000 ranges.
+
+Usage:
+    python -m benchmarks.bench_card_validation
+"""
+
+import os
+import tempfile
+import timeit
+
+from Crypto.PublicKey import RSA
+
+from ecraspay.exceptions import CardValidationError
+from ecraspay.utilities import card as card_utils
+from ecraspay.utilities.validation import BinIndex, validate_card
+
+NUMBER = 20_000
+
+
+def _per_call(func, number=NUMBER) -> float:
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    public_key = RSA.generate(2048).publickey().export_key()
+
+    def reject():
+        try:
+            validate_card("4242424242424241", "12/30", "123", "1234")
+        except CardValidationError:
+            pass
+
+    def encrypt():
+        card_utils.encrypt_card(
+            "4242424242424241", "12/30", "123", "1234", public_key=public_key
+        )
+
+    index = BinIndex(
+        (f"{bin_:06d}", f"{bin_:06d}", "scheme", f"issuer {bin_ % 500}")
+        for bin_ in range(400000, 500000)
+    )
+    handle, path = tempfile.mkstemp(suffix=".idx")
+    os.close(handle)
+    index.save(path)
+    mapped = BinIndex.open(path)
+
+    print(
+        f"validate_card (valid)      {_per_call(lambda: validate_card('4242424242424242', '12/30', '123', '1234')):8.2f} us"
+    )
+    print(f"validate_card (rejected)   {_per_call(reject):8.2f} us")
+    print(f"encrypt_card               {_per_call(encrypt, 2000):8.2f} us")
+    print(
+        f"BIN lookup, in memory      {_per_call(lambda: index.lookup('4567891234567890')):8.2f} us"
+    )
+    print(
+        f"BIN lookup, memory-mapped  {_per_call(lambda: mapped.lookup('4567891234567890')):8.2f} us"
+    )
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for time-ordered identifiers.
+
+Compares random ``uuid4`` keys with ``uuid7`` keys, both when generating them
+and when inserting rows keyed by them into a SQLite table clustered on its
+primary key (as InnoDB tables and Postgres B-tree indexes are). Random keys
+land all over the index; time-ordered keys append at its right-hand edge.
+
+Usage:
+    python -m benchmarks.bench_ids
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from ecraspay.ids import new_reference, uuid7
+
+GENERATED = 200_000
+ROWS = 500_000
+BATCH = 10_000
+
+
+def _generation(name, factory):
+    started = time.perf_counter()
+    for _ in range(GENERATED):
+        factory()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<16} {elapsed / GENERATED * 1e9:8.0f} ns/id")
+
+
+def _inserts(name, factory):
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "bench.sqlite3"))
+        connection.execute("PRAGMA cache_size=-8000")  # 8 MB, smaller than the table
+        connection.execute(
+            "CREATE TABLE payment (id BLOB PRIMARY KEY, reference TEXT, amount INT)"
+            " WITHOUT ROWID"
+        )
+        started = time.perf_counter()
+        for _ in range(ROWS // BATCH):
+            rows = [(factory().bytes, "invoice", 1000) for _ in range(BATCH)]
+            connection.executemany("INSERT INTO payment VALUES (?, ?, ?)", rows)
+            connection.commit()
+        elapsed = time.perf_counter() - started
+        pages = connection.execute("PRAGMA page_count").fetchone()[0]
+        connection.close()
+    print(f"{name:<16} {ROWS / elapsed:10.0f} rows/s  {pages:6d} pages")
+
+
+def main():
+    print(f"Generating {GENERATED} identifiers")
+    _generation("uuid.uuid4", uuid.uuid4)
+    _generation("uuid7", uuid7)
+    _generation("new_reference", new_reference)
+    print(f"\nInserting {ROWS} rows in batches of {BATCH}")
+    _inserts("uuid.uuid4", uuid.uuid4)
+    _inserts("uuid7", uuid7)
+
+
+if __name__ == "__main__":
+    main()
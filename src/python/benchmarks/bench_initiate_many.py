@@ -0,0 +1,60 @@
+"""
+Throughput benchmark for ``Checkout.initiate_many``.
+
+The gateway is replaced by a stub that sleeps for a fixed latency, so the
+numbers show how batch throughput scales with the configured concurrency.
+
+Usage:
+    python -m benchmarks.bench_initiate_many
+"""
+
+import time
+from unittest.mock import patch
+
+from ecraspay import Checkout
+
+API_KEY = "ECRS-TEST-benchmark"
+LATENCY = 0.02
+BATCH_SIZE = 400
+
+
+class _Response:
+    """Minimal stand-in for ``requests.Response``."""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"requestSuccessful": True}
+
+
+def _request(method, url, headers=None, json=None, params=None, timeout=None):
+    time.sleep(LATENCY)
+    return _Response()
+
+
+def main():
+    client = Checkout(api_key=API_KEY)
+    specs = [
+        {
+            "amount": 1000,
+            "payment_reference": f"invoice_{index}",
+            "customer_name": "John Doe",
+            "customer_email": "johndoe@example.com",
+        }
+        for index in range(BATCH_SIZE)
+    ]
+    print(f"{BATCH_SIZE} checkouts, {LATENCY * 1000:.0f}ms simulated latency")
+    with patch("requests.request", _request):
+        for concurrency in (1, 4, 16, 64):
+            started = time.perf_counter()
+            run = client.initiate_many(specs, concurrency=concurrency).wait()
+            elapsed = time.perf_counter() - started
+            print(
+                f"concurrency={concurrency:<3} {BATCH_SIZE / elapsed:8.1f} req/s "
+                f"({run.succeeded} ok, {run.failed} failed)"
+            )
+
+
+if __name__ == "__main__":
+    main()
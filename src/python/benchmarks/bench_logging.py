@@ -0,0 +1,88 @@
+"""
+Benchmark for the SDK's structured logging.
+
+Measures the per-request overhead of the success-path log call with logging
+disabled, sampled and fully enabled, together with the cost of redacting a
+typical card payload. The network layer is replaced by a no-op.
+
+Usage:
+    python -m benchmarks.bench_logging
+"""
+
+import logging
+import timeit
+from unittest.mock import patch
+
+from ecraspay import Transaction
+from ecraspay.base import log
+from ecraspay.log import redact
+
+NUMBER = 100_000
+
+CARD_BODY = (
+    '{"pan": "4242424242424242", "expiryDate": "12/25", "cvv": "123", '
+    '"pin": "1234", "note": "card 5399 8300 0000 0008 declined"}'
+)
+
+
+class _Response:
+    """Minimal stand-in for ``requests.Response``."""
+
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return None
+
+
+_RESPONSE = _Response()
+
+
+def _request(method, url, headers=None, json=None, params=None, timeout=None):
+    return _RESPONSE
+
+
+def _per_call(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e9
+
+
+def main():
+    client = Transaction(api_key="ECRS-TEST-benchmark")
+    logger = logging.getLogger("ecraspay.http")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    def request():
+        client.get_transaction_status("unique_ref_123")
+
+    def empty_call(*args, **kwargs):
+        pass
+
+    with patch("requests.request", _request):
+        logger.setLevel(logging.CRITICAL)
+        with patch.object(log, "success", empty_call):
+            baseline = _per_call(request)
+        disabled = _per_call(request)
+        log_call = _per_call(lambda: log.success("Request to %s.", "url", method="GET"))
+
+        logger.setLevel(logging.INFO)
+        log.set_sample_rate(0.01)
+        sampled = _per_call(request)
+        log.set_sample_rate(1.0)
+        enabled = _per_call(request)
+
+    print(f"request, log call stubbed out   {baseline:8.1f} ns")
+    print(f"request, logging disabled       {disabled:8.1f} ns")
+    print(f"request, 1% success sampling    {sampled:8.1f} ns")
+    print(f"request, every success logged   {enabled:8.1f} ns")
+    print(f"disabled log.success() call     {log_call:8.1f} ns")
+    print(
+        f"redact() on a card payload      {_per_call(lambda: redact(CARD_BODY)):8.1f} ns"
+    )
+    print(redact(CARD_BODY))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Offline load test driven by a record/replay cassette.
+
+Replays the interactions in a cassette through the SDK clients from several
+threads and reports throughput and latency percentiles. Without arguments a
+small synthetic cassette is generated; pass a cassette recorded with
+``ecraspay.transport.RecordingTransport`` to replay real sandbox traffic.
+
+Usage:
+    python -m benchmarks.bench_replay [cassette.ndjson] [--threads 8]
+        [--requests 20000] [--latency none|recorded]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ecraspay import Transaction
+from ecraspay.transport import ReplayTransport
+
+
+def _synthetic_cassette() -> str:
+    handle, path = tempfile.mkstemp(suffix=".ndjson")
+    with os.fdopen(handle, "w") as cassette:
+        for index in range(100):
+            cassette.write(
+                json.dumps(
+                    {
+                        "method": "GET",
+                        "endpoint": f"/payment/status/txn_{index}",
+                        "body": "",
+                        "status": 200,
+                        "response": json.dumps({"responseBody": {"status": "SUCCESS"}}),
+                        "latency": 0.005,
+                    }
+                )
+                + "\n"
+            )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("cassette", nargs="?")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--latency", choices=("none", "recorded"), default="none")
+    args = parser.parse_args()
+
+    path = args.cassette or _synthetic_cassette()
+    transport = ReplayTransport(path, latency=args.latency)
+    if not args.cassette:
+        os.remove(path)
+    references = [
+        key[1].rsplit("/", 1)[-1]
+        for key in transport._interactions
+        if key[0] == "GET" and key[1].startswith("/payment/status/")
+    ]
+    if not references:
+        raise SystemExit("The cassette has no /payment/status/ interactions.")
+    client = Transaction(api_key="ECRS-TEST-benchmark", transport=transport)
+
+    def call(index):
+        started = time.perf_counter()
+        client.get_transaction_status(references[index % len(references)])
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        latencies = sorted(executor.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.requests} requests, {args.threads} threads, latency={args.latency}")
+    print(f"throughput {args.requests / elapsed:10.1f} req/s")
+    print(f"p50        {percentiles[49] * 1000:10.3f} ms")
+    print(f"p99        {percentiles[98] * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
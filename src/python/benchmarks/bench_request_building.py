@@ -0,0 +1,231 @@
+"""
+Micro-benchmark for per-call request construction.
+
+Compares the previous approach (build an 11-key dict, filter out ``None`` with a
+comprehension, re-format the URL and rebuild the headers on every call) with the
+request builders from ``ecraspay.endpoints`` and the cached headers. The
+network layer is replaced by a no-op so only the SDK's own per-call overhead is
+measured.
+
+Two things are measured for each call: building the request alone (method,
+URL, payload and headers), and the whole client call. The legacy client has
+none of the retry, deadline, routing and logging checks of the current one, so
+whole calls cost a few hundred nanoseconds more than legacy. Building an
+initiate request costs about the same either way, and a GET about 100ns more.
+
+Usage:
+    python -m benchmarks.bench_request_building
+"""
+
+import timeit
+from unittest.mock import patch
+
+import requests
+
+from ecraspay import Transaction
+
+API_KEY = "ECRS-TEST-benchmark"
+NUMBER = 100_000
+
+
+class _Response:
+    """Minimal stand-in for ``requests.Response``."""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return None
+
+
+_RESPONSE = _Response()
+
+
+def _request(method, url, headers=None, json=None, params=None, timeout=None):
+    return _RESPONSE
+
+
+class LegacyTransaction(Transaction):
+    """The request construction used before the endpoint registry."""
+
+    def _legacy_headers(self):
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _make_request(self, method, endpoint, data=None, params=None, timeout=10):
+        url = f"{self.base_url}{endpoint}"
+        headers = self._legacy_headers()
+        response = requests.request(
+            method, url, headers=headers, json=data, params=params, timeout=timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def initiate_transaction(
+        self,
+        amount,
+        payment_reference,
+        customer_name,
+        customer_email,
+        redirect_url=None,
+        description=None,
+        fee_bearer=None,
+        currency="usd",
+        payment_method="card",
+        customer_phone=None,
+        metadata=None,
+        **kwargs,
+    ):
+        payload = self._initiate_payload(
+            amount,
+            payment_reference,
+            customer_name,
+            customer_email,
+            redirect_url,
+            description,
+            fee_bearer,
+            currency,
+            payment_method,
+            customer_phone,
+            metadata,
+            kwargs,
+        )
+        return self._make_request("POST", "/payment/initiate", data=payload)
+
+    def _initiate_payload(
+        self,
+        amount,
+        payment_reference,
+        customer_name,
+        customer_email,
+        redirect_url,
+        description,
+        fee_bearer,
+        currency,
+        payment_method,
+        customer_phone,
+        metadata,
+        kwargs,
+    ):
+        payload = {
+            key: value
+            for key, value in {
+                "amount": amount,
+                "paymentReference": payment_reference,
+                "customerName": customer_name,
+                "customerEmail": customer_email,
+                "redirectUrl": redirect_url,
+                "description": description,
+                "feeBearer": fee_bearer,
+                "currency": currency,
+                "paymentMethods": payment_method,
+                "customerPhoneNumber": customer_phone,
+                "metadata": metadata,
+            }.items()
+            if value is not None
+        }
+        payload.update(kwargs)
+        return payload
+
+    def get_transaction_status(self, transaction_ref):
+        return self._make_request(
+            method="GET", endpoint=f"/payment/status/{transaction_ref}"
+        )
+
+
+def _build_cases(legacy, client):
+    """Request construction alone: method, URL, payload and headers."""
+    initiate = client._get_builder("payment.initiate")
+    status = client._get_builder("transaction.status")
+    return {
+        ("build initiate_transaction", "legacy"): lambda: (
+            "POST",
+            f"{legacy.base_url}/payment/initiate",
+            legacy._initiate_payload(
+                1000,
+                "unique_ref_123",
+                "John Doe",
+                "johndoe@example.com",
+                None,
+                None,
+                None,
+                "usd",
+                "card",
+                None,
+                {"order_id": "12345"},
+                {},
+            ),
+            legacy._legacy_headers(),
+        ),
+        ("build initiate_transaction", "builder"): lambda: (
+            initiate.build(
+                {
+                    "amount": 1000,
+                    "payment_reference": "unique_ref_123",
+                    "customer_name": "John Doe",
+                    "customer_email": "johndoe@example.com",
+                    "redirect_url": None,
+                    "description": None,
+                    "fee_bearer": None,
+                    "currency": "usd",
+                    "payment_method": "card",
+                    "customer_phone": None,
+                    "metadata": {"order_id": "12345"},
+                },
+                {},
+            ),
+            client._get_headers(),
+        ),
+        ("build get_transaction_status", "legacy"): lambda: (
+            "GET",
+            f"{legacy.base_url}/payment/status/unique_ref_123",
+            None,
+            legacy._legacy_headers(),
+        ),
+        ("build get_transaction_status", "builder"): lambda: (
+            status.build({"transaction_ref": "unique_ref_123"}),
+            client._get_headers(),
+        ),
+    }
+
+
+def _call_cases(label, client):
+    """The whole client call, with the network stubbed."""
+    return {
+        ("initiate_transaction", label): lambda: client.initiate_transaction(
+            amount=1000,
+            payment_reference="unique_ref_123",
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+            metadata={"order_id": "12345"},
+        ),
+        ("get_transaction_status", label): lambda: client.get_transaction_status(
+            "unique_ref_123"
+        ),
+    }
+
+
+def main():
+    legacy = LegacyTransaction(api_key=API_KEY)
+    client = Transaction(api_key=API_KEY)
+    cases = {
+        **_build_cases(legacy, client),
+        **_call_cases("legacy", legacy),
+        **_call_cases("builder", client),
+    }
+    results = {}
+    with patch("requests.request", _request):
+        # Interleave the runs so background noise affects both sides equally.
+        for _ in range(5):
+            for key, func in cases.items():
+                seconds = timeit.timeit(func, number=NUMBER)
+                results[key] = min(results.get(key, seconds), seconds)
+
+    for (case, label), seconds in sorted(results.items()):
+        print(f"{case:<30} {label:<8} {seconds / NUMBER * 1e9:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
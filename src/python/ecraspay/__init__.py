@@ -5,6 +5,7 @@ from .modules.checkout import Checkout
 from .modules.card import Card
 from .modules.transaction import Transaction
 from .modules.ussd import USSD
+from .flows import CardPaymentFlow
 
 # Add utility functions here
 from .utilities import card as card_utils
@@ -18,6 +19,7 @@ __all__ = [
     "Card",
     "Transaction",
     "USSD",
+    "CardPaymentFlow",
     "card_utils",
     "web_utils",
 ]
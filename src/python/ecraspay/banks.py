@@ -0,0 +1,274 @@
+"""
+This module provides the BankDirectory class, a locally indexed copy of the
+banks that support USSD payments.
+
+Free-form bank names are resolved without touching the network: exact matches
+use a normalised-name dictionary, partial input is completed with a prefix trie
+over every word of every bank name, and typos fall back to fuzzy matching. The
+directory is refreshed incrementally from ``USSD.get_bank_list``, optionally in
+a background thread.
+
+Example:
+    from ecraspay import USSD
+
+    api = USSD(api_key="your_api_key", environment="sandbox")
+    banks = api.get_bank_directory(refresh_interval=3600)
+
+    banks.resolve("guaranty trust")   # "Guaranty Trust Bank"
+    banks.resolve("Zenith Bnak")      # "Zenith Bank" (fuzzy)
+    banks.complete("fi")              # ["Fidelity Bank", "First Bank", ...]
+"""
+
+import difflib
+import re
+import threading
+
+from ecraspay.process import reinitialize_after_fork
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_SUFFIXES = frozenset({"plc", "ltd", "limited", "of", "nigeria", "ng"})
+_STOP_WORDS = _SUFFIXES | {"bank", "the"}
+_TERMINAL = "\0"
+
+
+def normalize_bank_name(name: str) -> str:
+    """Lowercase a bank name and collapse punctuation and spacing."""
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def _aliases(name: str) -> set:
+    """The full name, the name without corporate suffixes and its core words."""
+    normalized = normalize_bank_name(name)
+    words = normalized.split()
+    while words and words[-1] in _SUFFIXES:
+        words = words[:-1]
+    short = [word for word in words if word not in _STOP_WORDS]
+    aliases = set()
+    for alias in (normalized, " ".join(words), " ".join(short)):
+        if alias:
+            aliases.update({alias, alias.replace(" ", "")})
+    return aliases
+
+
+def _bank_names(response) -> list:
+    """Extract bank names from a ``get_bank_list`` response."""
+    banks = response.get("responseBody") if isinstance(response, dict) else response
+    names = []
+    for bank in banks or ():
+        if isinstance(bank, dict):
+            bank = bank.get("name") or bank.get("bank_name") or bank.get("bankName")
+        if bank:
+            names.append(str(bank))
+    return names
+
+
+class BankDirectory:
+    """
+    An in-memory, incrementally refreshed index of USSD banks.
+
+    Args:
+        ussd (USSD, optional): Client used to fetch the bank list on refresh.
+        banks (Iterable[str], optional): Initial bank names.
+        fuzzy_cutoff (float, optional): Minimum similarity (0-1) for fuzzy
+            matches. Defaults to 0.75.
+    """
+
+    def __init__(self, ussd=None, banks=(), fuzzy_cutoff=0.75):
+        self.ussd = ussd
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.RLock()
+        self._names = set()
+        self._lookup = {}
+        self._owners = {}
+        self._trie = {}
+        self._stop = threading.Event()
+        self._thread = None
+        reinitialize_after_fork(self)
+        self.update(banks)
+
+    def _after_fork(self):
+        # The names carry over; refreshing stops, as its thread is gone.
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return self.resolve(name, fuzzy=False) is not None
+
+    @property
+    def names(self) -> list:
+        """The canonical bank names, sorted."""
+        with self._lock:
+            return sorted(self._names)
+
+    def resolve(self, name: str, fuzzy: bool = True):
+        """
+        Resolve free-form input to a canonical bank name.
+
+        Args:
+            name (str): User input, e.g. "guaranty trust" or "Zenith Bnak".
+            fuzzy (bool, optional): Fall back to prefix and fuzzy matching.
+                Defaults to True.
+
+        Returns:
+            str: The canonical bank name, or None if nothing matches well.
+        """
+        normalized = normalize_bank_name(name)
+        with self._lock:
+            match = self._lookup.get(normalized) or self._lookup.get(
+                normalized.replace(" ", "")
+            )
+            if match or not fuzzy or not normalized:
+                return match
+            completions = self._complete(normalized, limit=2)
+            if len(completions) == 1:
+                return completions[0]
+            close = difflib.get_close_matches(
+                normalized, self._lookup, n=1, cutoff=self.fuzzy_cutoff
+            )
+            return self._lookup[close[0]] if close else None
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """
+        Return bank names with a word starting with ``prefix``.
+
+        Args:
+            prefix (str): Partial user input.
+            limit (int, optional): Maximum number of names. Defaults to 10.
+
+        Returns:
+            list: Matching canonical bank names, sorted.
+        """
+        with self._lock:
+            return self._complete(normalize_bank_name(prefix), limit)
+
+    def update(self, banks) -> tuple:
+        """
+        Apply a new bank list, indexing only the names that changed.
+
+        Args:
+            banks (Iterable[str]): The complete current list of bank names.
+
+        Returns:
+            tuple: ``(added, removed)`` sets of bank names.
+        """
+        banks = set(banks)
+        with self._lock:
+            added = banks - self._names
+            removed = self._names - banks
+            for name in removed:
+                self._unindex(name)
+            for name in added:
+                self._index(name)
+            self._names = banks
+        return added, removed
+
+    def refresh(self) -> tuple:
+        """
+        Fetch the bank list from the gateway and apply it incrementally.
+
+        Returns:
+            tuple: ``(added, removed)`` sets of bank names.
+        """
+        if self.ussd is None:
+            raise ValueError("A USSD client is required to refresh the directory.")
+        return self.update(_bank_names(self.ussd.get_bank_list()))
+
+    def start(self, interval: float):
+        """
+        Refresh the directory every ``interval`` seconds in a daemon thread.
+
+        Refresh errors are ignored; the previous list stays in use.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="ecraspay-banks", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:  # keep serving the last known list
+                pass
+
+    def _words(self, name):
+        normalized = normalize_bank_name(name)
+        return set(normalized.split()) | {normalized.replace(" ", "")}
+
+    def _index(self, name):
+        # An alias shared by several banks resolves to the first of them in
+        # sorted order, whatever order they were added in.
+        for alias in _aliases(name):
+            owners = self._owners.setdefault(alias, set())
+            owners.add(name)
+            self._lookup[alias] = min(owners)
+        for word in self._words(name):
+            node = self._trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node.setdefault(_TERMINAL, set()).add(name)
+
+    def _unindex(self, name):
+        for alias in _aliases(name):
+            owners = self._owners.get(alias)
+            if owners is None:
+                continue
+            owners.discard(name)
+            if owners:
+                # Another bank shares the alias: it now resolves to that one.
+                self._lookup[alias] = min(owners)
+            else:
+                del self._owners[alias]
+                del self._lookup[alias]
+        for word in self._words(name):
+            path = [self._trie]
+            for char in word:
+                node = path[-1].get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                names = path[-1].get(_TERMINAL)
+                if names is None:
+                    continue
+                names.discard(name)
+                if not names:
+                    del path[-1][_TERMINAL]
+                # Prune the nodes left without names or children.
+                for parent, char, node in zip(
+                    reversed(path[:-1]), reversed(word), reversed(path[1:])
+                ):
+                    if node:
+                        break
+                    del parent[char]
+
+    def _complete(self, prefix, limit):
+        node = self._trie
+        for char in prefix.replace(" ", ""):
+            node = node.get(char)
+            if node is None:
+                return []
+        found = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _TERMINAL:
+                    found.update(child)
+                else:
+                    stack.append(child)
+        return sorted(found)[:limit]
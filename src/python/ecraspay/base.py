@@ -1,10 +1,50 @@
+import logging
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
 import requests
-import logging
+
+from ecraspay.deadline import current_deadline
+from ecraspay.endpoints import get_endpoint
+from ecraspay.exceptions import (
+    ApiWrapperConnectionError,
+    ApiWrapperDeadlineError,
+    ApiWrapperError,
+    ApiWrapperTimeoutError,
+    http_error_from_response,
+)
+from ecraspay.health import get_hedge_executor, is_gateway_failure
+from ecraspay.log import get_logger
+
+log = get_logger("ecraspay.http")
 
 
 class BaseAPI:
-    def __init__(self, api_key=None, webhook_url=None, environment="sandbox"):
+    # Per-instance caches, created lazily so subclasses that bypass __init__
+    # (e.g. test doubles) keep working.
+    _headers = None
+    _headers_key = None
+    _builders = None
+    _builders_base_url = None
+    transport = None
+    alternate_base_urls = ()
+    health = None
+    hedge = False
+    retry = None
+
+    def __init__(
+        self,
+        api_key=None,
+        webhook_url=None,
+        environment="sandbox",
+        transport=None,
+        alternate_base_urls=None,
+        health=None,
+        hedge=False,
+        retry=None,
+        base_url=None,
+    ):
         """
         Initialize the API client.
 
@@ -12,7 +52,28 @@ class BaseAPI:
             api_key (str): API key for authentication.
             webhook_url (str): Webhook URL for notifications.
             environment (str): The environment to use ('sandbox' or 'live').
+            transport (optional): Object with a ``request`` method taking the
+                same arguments as ``requests.request`` (see
+                ``ecraspay.transport``). Defaults to ``requests.request``.
+            alternate_base_urls (list, optional): Alternate or regional base
+                URLs serving the same API, used when ``health`` is set.
+            health (HealthMonitor, optional): Monitor recording every request
+                and used to route requests to the healthiest base URL (see
+                ``ecraspay.health``).
+            hedge (bool, optional): Hedge idempotent GET requests (to an
+                alternate base URL when there is one) once they exceed the
+                monitor's latency percentile. Requires ``health``. Defaults
+                to False.
+            retry (RetryPolicy, optional): How failed idempotent calls are
+                retried (see ``ecraspay.deadline``). Defaults to no retries.
+            base_url (str, optional): Base URL overriding the environment's,
+                e.g. a local emulator (see ``ecraspay.emulator``).
         """
+        self.transport = transport
+        self.alternate_base_urls = tuple(alternate_base_urls or ())
+        self.health = health
+        self.hedge = hedge
+        self.retry = retry
         self.api_key = api_key or os.getenv("API_KEY")
         self.webhook_url = webhook_url or os.getenv("WEBHOOK_URL")
 
@@ -26,7 +87,7 @@ class BaseAPI:
         }
 
         # Select the base URL based on the environment
-        self.base_url = self.base_urls.get(self.environment)
+        self.base_url = base_url or self.base_urls.get(self.environment)
         if not self.base_url:
             raise ValueError(
                 f"Invalid environment '{self.environment}'. Use 'sandbox' or 'live'."
@@ -35,12 +96,90 @@ class BaseAPI:
         if not self.api_key:
             raise ValueError("API key is required")
 
+    def __getstate__(self):
+        """
+        Pickle the client by its configuration.
+
+        The transport, health monitor and settled cache pickle by their own
+        configuration (see ``ecraspay.process``); per-instance caches are
+        rebuilt on first use by the copy.
+        """
+        state = self.__dict__.copy()
+        for name in ("_headers", "_headers_key", "_builders", "_builders_base_url"):
+            state.pop(name, None)
+        return state
+
+    def get_base_urls(self) -> list:
+        """Return the primary base URL followed by the alternate ones."""
+        return [self.base_url, *self.alternate_base_urls]
+
     def _get_headers(self):
-        """Prepare headers for API requests."""
-        return {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        """
+        Prepare headers for API requests.
+
+        The headers are built once per API key and reused for every request;
+        ``requests`` copies them into its own mapping so they are never mutated.
+        """
+        if self._headers is None or self._headers_key != self.api_key:
+            self._headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+            self._headers_key = self.api_key
+        return self._headers
+
+    def _get_builder(self, name):
+        """
+        Return the request builder for a registered endpoint.
+
+        Builders are compiled against ``self.base_url`` on first use and cached
+        on the instance.
+
+        Args:
+            name (str): Registry name of the endpoint (see ``ecraspay.endpoints``).
+
+        Returns:
+            RequestBuilder: The compiled builder.
+        """
+        builders = self._builders
+        if builders is None or self._builders_base_url != self.base_url:
+            builders = self._builders = {}
+            self._builders_base_url = self.base_url
+        builder = builders.get(name)
+        if builder is None:
+            builder = builders[name] = get_endpoint(name).compile(self.base_url)
+        return builder
+
+    def _call(self, name, values=None, extra=None, timeout=10):
+        """
+        Send a request for a registered endpoint.
+
+        Args:
+            name (str): Registry name of the endpoint.
+            values (dict, optional): Path parameters and payload values, keyed
+                by the endpoint's argument names.
+            extra (dict, optional): Additional payload fields sent as-is.
+            timeout (int): Timeout for the request in seconds. Defaults to 10.
+
+        Returns:
+            dict: JSON response from the API.
+        """
+        builders = self._builders
+        if builders is not None and self._builders_base_url is self.base_url:
+            builder = builders.get(name) or self._get_builder(name)
+        else:
+            builder = self._get_builder(name)
+        method, url, payload = builder.build(values, extra)
+        if self.health is None and self.retry is None and current_deadline() is None:
+            return self._send(method, url, payload, None, timeout)
+        return self._execute(
+            method,
+            url[len(self.base_url) :],
+            payload,
+            None,
+            timeout,
+            builder.idempotent,
+        )
 
     def _make_request(self, method, endpoint, data=None, params=None, timeout=10):
         """
@@ -58,30 +197,201 @@ class BaseAPI:
 
         Raises:
             ValueError: If the response cannot be parsed as JSON.
-            requests.exceptions.RequestException: For any request-related errors.
+            ApiWrapperHTTPError: For error responses; the subclass tells auth
+                (401/403), validation (400/422), rate-limit (429) and gateway
+                (5xx) failures apart, and ``body`` holds the parsed error body.
+            ApiWrapperTimeoutError: If the request times out.
+            ApiWrapperConnectionError: If the gateway cannot be reached.
+            requests.exceptions.RequestException: For other request errors.
+            All of these subclass the matching ``requests`` exceptions.
+        """
+        if self.health is None and self.retry is None and current_deadline() is None:
+            return self._send(
+                method,
+                f"{self.base_url}{endpoint}",
+                data=data,
+                params=params,
+                timeout=timeout,
+            )
+        return self._execute(
+            method, endpoint, data, params, timeout, method.upper() == "GET"
+        )
+
+    def _execute(self, method, path, data, params, timeout, idempotent):
         """
-        url = f"{self.base_url}{endpoint}"
-        headers = self._get_headers()
+        Send a request under the current deadline, retrying idempotent calls.
+
+        Each attempt's timeout is capped by the time left before the deadline,
+        and no retry is started if its backoff would outlast the deadline.
+
+        Raises:
+            ApiWrapperDeadlineError: If the deadline passes before an attempt.
+        """
+        deadline = current_deadline()
+        retry = self.retry
+        attempts = retry.attempts if retry is not None and idempotent else 1
+        hedge = self.hedge and idempotent and method == "GET"
+        for attempt in range(1, attempts + 1):
+            attempt_timeout = timeout if deadline is None else deadline.timeout(timeout)
+            try:
+                if self.health is None:
+                    return self._send(
+                        method, f"{self.base_url}{path}", data, params, attempt_timeout
+                    )
+                return self._send_routed(
+                    method, path, data, params, attempt_timeout, hedge, deadline
+                )
+            except Exception as e:
+                if attempt == attempts or not retry.retry_on(e):
+                    raise
+                delay = max(retry.delay(attempt), getattr(e, "retry_after", 0) or 0)
+                if deadline is not None and deadline.remaining() <= delay:
+                    raise ApiWrapperDeadlineError(
+                        f"Deadline of {deadline.budget:.3f}s exceeded after "
+                        f"{attempt} attempts."
+                    ) from e
+                log.warning(
+                    "Retrying %s %s after %s (attempt %s of %s).",
+                    method,
+                    path,
+                    type(e).__name__,
+                    attempt + 1,
+                    attempts,
+                )
+                time.sleep(delay)
+
+    def _send_routed(
+        self, method, path, data, params, timeout, hedge=False, deadline=None
+    ):
+        """
+        Send a request to the healthiest base URL, recording its outcome.
+
+        With ``hedge``, a backup request is sent to the next base URL (or the
+        same one if there is no alternate) if the first has not answered
+        within the monitor's hedge delay, and the first successful response
+        is returned. Whether the backup won is recorded in the monitor.
+        """
+        base_urls = self.health.rank(self.get_base_urls())
+        delay = self.health.hedge_delay(base_urls[0]) if hedge else None
+        if delay is None:
+            return self._send_monitored(
+                base_urls[0], method, path, data, params, timeout
+            )
+        if deadline is not None:
+            delay = min(delay, deadline.remaining())
+
+        executor = get_hedge_executor()
+        pending = {
+            executor.submit(
+                self._send_monitored, base_urls[0], method, path, data, params, timeout
+            )
+        }
+        done, pending = wait(pending, timeout=delay)
+        backup = None
+        if not done and (deadline is None or not deadline.expired):
+            backup_url = base_urls[1] if len(base_urls) > 1 else base_urls[0]
+            log.info("Hedging request to %s%s.", backup_url, path, method=method)
+            backup_timeout = timeout if deadline is None else deadline.timeout(timeout)
+            backup = executor.submit(
+                self._send_monitored,
+                backup_url,
+                method,
+                path,
+                data,
+                params,
+                backup_timeout,
+            )
+            pending.add(backup)
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    if backup is not None:
+                        self.health.record_hedge(base_urls[0], won=future is backup)
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def _send_monitored(self, base_url, method, path, data, params, timeout):
+        """Send a request to ``base_url`` and record it in the health monitor."""
+        started = time.perf_counter()
+        try:
+            result = self._send(method, f"{base_url}{path}", data, params, timeout)
+        except Exception as e:
+            failed = is_gateway_failure(e)
+            self.health.record(
+                base_url,
+                time.perf_counter() - started,
+                not failed,
+                e if failed else None,
+            )
+            raise
+        self.health.record(base_url, time.perf_counter() - started, True)
+        return result
+
+    def _send(self, method, url, data=None, params=None, timeout=10):
+        """
+        Send an HTTP request to an absolute URL and decode the JSON response.
+
+        This is the single network entry point used by ``_make_request`` and
+        ``_call``; see ``_make_request`` for the arguments and errors.
+        """
+        headers = self._headers
+        if headers is None or self._headers_key is not self.api_key:
+            headers = self._get_headers()
 
         try:
             # Make the HTTP request
-            response = requests.request(
+            transport = self.transport
+            send = requests.request if transport is None else transport.request
+            response = send(
                 method, url, headers=headers, json=data, params=params, timeout=timeout
             )
 
             # Raise HTTP errors if status_code indicates an issue
             response.raise_for_status()
 
-        except requests.exceptions.Timeout:
-            logging.error(f"Request to {url} timed out.")
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None:
+                response = e.response
+            error = http_error_from_response(response, str(e))
+            log.error(
+                "Request to %s failed: %s",
+                url,
+                e,
+                method=method,
+                status=error.status_code,
+            )
+            raise error from None
+        except ApiWrapperError:
             raise
+        except requests.exceptions.Timeout as e:
+            log.error("Request to %s timed out.", url, method=method, timeout=timeout)
+            raise ApiWrapperTimeoutError(
+                str(e) or f"Request to {url} timed out."
+            ) from e
+        except requests.exceptions.ConnectionError as e:
+            log.error("Request to %s failed: %s", url, e, method=method, status=None)
+            raise ApiWrapperConnectionError(str(e)) from e
         except requests.exceptions.RequestException as e:
-            logging.error(f"Request to {url} failed: {str(e)}")
+            log.error("Request to %s failed: %s", url, e, method=method, status=None)
             raise
 
         try:
             # Parse and return JSON response
-            return response.json()
+            result = response.json()
         except ValueError:
-            logging.error(f"Failed to parse JSON from response: {response.text}")
+            log.error(
+                "Failed to parse JSON from response: %s",
+                log.body(response.text),
+                method=method,
+                url=url,
+            )
             raise ValueError("Failed to parse response as JSON.") from None
+
+        # A disabled success log costs one level check, not a logger call.
+        if log.logger.isEnabledFor(logging.INFO):
+            log.success("Request to %s succeeded.", url, method=method)
+        return result
@@ -0,0 +1,290 @@
+"""
+This module provides helpers for running many API calls through a bounded
+thread pool while streaming the results back as they complete.
+
+Example:
+    from ecraspay import Checkout
+
+    api = Checkout(api_key="your_api_key", environment="sandbox")
+    specs = [
+        {
+            "amount": 1000,
+            "payment_reference": f"invoice_{number}",
+            "customer_name": "John Doe",
+            "customer_email": "johndoe@example.com",
+        }
+        for number in range(1000)
+    ]
+    with open("checkout_links.ndjson", "w") as sink:
+        run = api.initiate_many(specs, concurrency=16, sink=sink)
+        run.wait()
+    print(run.succeeded, run.failed)
+
+``ProcessBatchRun`` spreads the same work over worker processes, for jobs one
+process cannot drive fast enough. Clients pickle by configuration, so their
+bound methods can be sent to the workers as they are:
+
+    from ecraspay import Transaction
+    from ecraspay.batch import ProcessBatchRun
+
+    api = Transaction(api_key="your_api_key", environment="live")
+    run = ProcessBatchRun(api.verify_transaction, references, concurrency=8)
+    failed = [result.key for result in run if not result.ok]
+"""
+
+import json
+import os
+import pickle
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from ecraspay.exceptions import ApiWrapperError
+
+
+class BatchResult:
+    """
+    The outcome of a single item in a batch.
+
+    Attributes:
+        index (int): Position of the item in the submitted batch.
+        key (str): Identifier of the item (e.g. the payment reference).
+        response (dict): API response, or None if the call failed.
+        error (Exception): The exception raised by the call, or None.
+    """
+
+    __slots__ = ("index", "key", "response", "error")
+
+    def __init__(self, index, key, response=None, error=None):
+        self.index = index
+        self.key = key
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call completed without raising."""
+        return self.error is None
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serialisable representation of the result."""
+        data = {"index": self.index, "key": self.key, "ok": self.ok}
+        if self.error is None:
+            data["response"] = self.response
+        else:
+            data["error"] = str(self.error)
+            data["errorType"] = type(self.error).__name__
+        return data
+
+    def __repr__(self):
+        state = "ok" if self.ok else f"error={self.error!r}"
+        return f"<BatchResult {self.index} {self.key} {state}>"
+
+
+class BatchRun:
+    """
+    A batch of calls streamed through a bounded thread pool.
+
+    Iterating over the run executes it and yields a ``BatchResult`` per item in
+    completion order. Failures are reported as results and never abort the
+    remaining items. At most ``concurrency`` calls are in flight and at most
+    ``2 * concurrency`` items are buffered, so arbitrarily long iterables are
+    processed with bounded memory.
+
+    Args:
+        func (callable): Called with each item; its return value becomes the
+            result's ``response``.
+        items (iterable): Items to process.
+        concurrency (int, optional): Maximum number of concurrent calls.
+            Defaults to 8.
+        key (callable, optional): Returns the identifier recorded for an item.
+        callback (callable, optional): Called with each ``BatchResult`` as
+            soon as it is available.
+        sink (file-like, optional): Text stream that receives one NDJSON line
+            per result.
+    """
+
+    def __init__(self, func, items, concurrency=8, key=None, callback=None, sink=None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        self.func = func
+        self.items = items
+        self.concurrency = concurrency
+        self.key = key
+        self.callback = callback
+        self.sink = sink
+        self.succeeded = 0
+        self.failed = 0
+        self._started = False
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("A batch run can only be iterated once.")
+        self._started = True
+        return self._execute()
+
+    def wait(self) -> "BatchRun":
+        """
+        Run the batch to completion, discarding the yielded results.
+
+        Returns:
+            BatchRun: The run itself, with ``succeeded`` and ``failed`` set.
+        """
+        for _ in self:
+            pass
+        return self
+
+    def _run_one(self, index, item):
+        key = self.key(item) if self.key is not None else None
+        try:
+            return BatchResult(index, key, response=self.func(item))
+        except Exception as error:  # reported per item, never aborts the batch
+            return BatchResult(index, key, error=error)
+
+    def _emit(self, result):
+        if result.ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        if self.sink is not None:
+            self.sink.write(json.dumps(result.to_dict(), default=str) + "\n")
+        if self.callback is not None:
+            self.callback(result)
+        return result
+
+    def _execute(self):
+        window = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            for index, item in enumerate(self.items):
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._emit(future.result())
+                pending.add(executor.submit(self._run_one, index, item))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._emit(future.result())
+
+
+def _portable(error):
+    """Return ``error``, or a plain ``ApiWrapperError`` if it cannot be pickled."""
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return ApiWrapperError(f"{type(error).__name__}: {error}")
+    return error
+
+
+def _run_chunk(func, items, concurrency):
+    """Run a chunk of a ``ProcessBatchRun`` in a worker process."""
+    results = sorted(
+        BatchRun(func, items, concurrency=concurrency), key=lambda result: result.index
+    )
+    return [(result.response, _portable(result.error)) for result in results]
+
+
+class ProcessBatchRun(BatchRun):
+    """
+    A batch of calls spread over worker processes.
+
+    Items are sent to a ``ProcessPoolExecutor`` in chunks of ``chunk_size``,
+    and each worker runs its chunk through up to ``concurrency`` threads, so
+    CPU-bound work scales with the number of cores and I/O-bound work with
+    ``processes * concurrency``. At most ``2 * processes`` chunks are in
+    flight. Results are yielded chunk by chunk in completion order; the
+    callback and sink run in this process. A worker failure, including an
+    item or result that cannot be pickled, is reported as the error of every
+    item in its chunk.
+
+    ``func`` must be picklable: a module-level function, or a method of an
+    SDK client, which pickles by configuration (see ``ecraspay.process``).
+
+    Args:
+        func (callable): Called with each item in a worker process.
+        items (iterable): Items to process.
+        processes (int, optional): Worker processes. Defaults to the CPU
+            count.
+        concurrency (int, optional): Threads per worker process. Defaults
+            to 1.
+        chunk_size (int, optional): Items sent to a worker at once.
+            Defaults to 64.
+        key (callable, optional): Returns the identifier recorded for an
+            item; called in this process.
+        callback (callable, optional): Called with each ``BatchResult``.
+        sink (file-like, optional): Text stream that receives one NDJSON line
+            per result.
+        mp_context (optional): ``multiprocessing`` context for the pool, e.g.
+            ``multiprocessing.get_context("spawn")`` (Python 3.7+).
+    """
+
+    def __init__(
+        self,
+        func,
+        items,
+        processes=None,
+        concurrency=1,
+        chunk_size=64,
+        key=None,
+        callback=None,
+        sink=None,
+        mp_context=None,
+    ):
+        super().__init__(
+            func, items, concurrency=concurrency, key=key, callback=callback, sink=sink
+        )
+        if processes is not None and processes < 1:
+            raise ValueError("processes must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.mp_context = mp_context
+
+    def _chunks(self):
+        chunk = []
+        start = 0
+        for index, item in enumerate(self.items):
+            if not chunk:
+                start = index
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield start, chunk
+                chunk = []
+        if chunk:
+            yield start, chunk
+
+    def _emit_chunk(self, future, start, keys):
+        error = future.exception()
+        if error is not None:
+            outcomes = [(None, error)] * len(keys)
+        else:
+            outcomes = future.result()
+        for offset, (response, item_error) in enumerate(outcomes):
+            yield self._emit(
+                BatchResult(start + offset, keys[offset], response, item_error)
+            )
+
+    def _execute(self):
+        options = {} if self.mp_context is None else {"mp_context": self.mp_context}
+        window = self.processes * 2
+        with ProcessPoolExecutor(max_workers=self.processes, **options) as executor:
+            pending = {}
+            for start, chunk in self._chunks():
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._emit_chunk(future, *pending.pop(future))
+                keys = [
+                    self.key(item) if self.key is not None else None for item in chunk
+                ]
+                future = executor.submit(_run_chunk, self.func, chunk, self.concurrency)
+                pending[future] = (start, keys)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from self._emit_chunk(future, *pending.pop(future))
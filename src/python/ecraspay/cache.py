@@ -0,0 +1,159 @@
+"""
+This module provides TTLCache, a small thread-safe cache with per-entry expiry
+and single-flight loading.
+
+Single-flight means that when several threads ask for the same missing key at
+once, only one of them calls the loader; the others wait for its result (or
+its exception) instead of issuing duplicate gateway requests.
+
+Example:
+    from ecraspay.cache import TTLCache
+
+    cache = TTLCache(maxsize=1024)
+    account = cache.get_or_load(
+        "txn_12345",
+        lambda: api.initialize_bank_transfer("txn_12345"),
+        ttl=1800,
+    )
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from ecraspay.process import reinitialize_after_fork
+
+_MISSING = object()
+
+
+class _Flight:
+    """A load in progress, shared by every caller waiting for the same key."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    A bounded, least-recently-used cache whose entries expire.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries. Defaults to 1024.
+        clock (callable, optional): Monotonic time source, in seconds.
+    """
+
+    def __init__(self, maxsize=1024, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        reinitialize_after_fork(self)
+
+    def __getstate__(self):
+        # Pickled by configuration: the copy starts empty.
+        return {"maxsize": self.maxsize, "clock": self.clock}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _after_fork(self):
+        # Entries stay valid in the child; the lock and the loads in flight
+        # belonged to the parent's threads.
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            return self._get(key, default)
+
+    def set(self, key, value, ttl: float):
+        """Cache ``value`` under ``key`` for ``ttl`` seconds."""
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def delete(self, key):
+        """Remove ``key`` from the cache, if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_load(self, key, loader, ttl):
+        """
+        Return the cached value for ``key``, loading it once if missing.
+
+        Args:
+            key: Cache key.
+            loader (callable): Called without arguments to produce the value.
+            ttl (Union[float, callable]): Lifetime in seconds, or a callable
+                returning it for the loaded value. A lifetime of None or 0
+                means the value is returned but not cached.
+
+        Returns:
+            The cached or freshly loaded value.
+
+        Raises:
+            Exception: Whatever ``loader`` raised, re-raised in every caller
+            that was waiting for it.
+        """
+        with self._lock:
+            value = self._get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            lifetime = ttl(flight.value) if callable(ttl) else ttl
+            with self._lock:
+                if lifetime:
+                    self._set(key, flight.value, lifetime)
+                del self._flights[key]
+        except BaseException as error:
+            flight.error = error
+            with self._lock:
+                self._flights.pop(key, None)
+            raise
+        finally:
+            flight.done.set()
+        return flight.value
+
+    def _get(self, key, default):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key, value, ttl):
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
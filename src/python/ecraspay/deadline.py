@@ -0,0 +1,143 @@
+"""
+This module provides deadlines and retry policies for API calls.
+
+A deadline is an overall time budget for an operation. Every attempt of a call
+made under a deadline uses the smaller of its own timeout and the time left,
+retries stop once the budget cannot cover another attempt, and an exhausted
+budget raises ``ApiWrapperDeadlineError`` instead of starting a request that
+could not finish in time.
+
+Example:
+    from ecraspay import Transaction
+    from ecraspay.deadline import RetryPolicy, deadline
+
+    api = Transaction(api_key="your_api_key", retry=RetryPolicy(attempts=3))
+
+    # The confirmation page has a 2 second budget for all attempts together.
+    with deadline(2.0):
+        status = api.get_transaction_status("txn_12345")
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from ecraspay.exceptions import ApiWrapperDeadlineError
+
+
+class _Local(threading.local):
+    # A class-level default makes the lookup cheap in threads that never
+    # entered a deadline block; it runs on every API call.
+    deadline = None
+
+
+_local = _Local()
+
+
+class Deadline:
+    """
+    A point in time by which an operation must finish.
+
+    Args:
+        seconds (float): Budget from now, in seconds.
+    """
+
+    __slots__ = ("budget", "expires_at")
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, default: float) -> float:
+        """
+        Return the timeout for the next attempt.
+
+        Raises:
+            ApiWrapperDeadlineError: If the deadline has already passed.
+        """
+        remaining = self.expires_at - time.monotonic()
+        if remaining <= 0:
+            raise ApiWrapperDeadlineError(f"Deadline of {self.budget:.3f}s exceeded.")
+        return remaining if default is None else min(default, remaining)
+
+    def __repr__(self):
+        return f"<Deadline {self.remaining():.3f}s of {self.budget:.3f}s left>"
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Run the calls made in this block (in this thread) under one deadline.
+
+    Nested blocks can only shorten the enclosing deadline.
+
+    Args:
+        seconds (float): Budget for the whole block, in seconds.
+    """
+    current = _local.deadline
+    new = Deadline(seconds)
+    if current is not None and current.expires_at < new.expires_at:
+        new = current
+    _local.deadline = new
+    try:
+        yield new
+    finally:
+        _local.deadline = current
+
+
+def current_deadline():
+    """Return the deadline of the enclosing ``deadline`` block, or None."""
+    return _local.deadline
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Return True for failures that may succeed when retried.
+
+    Connection errors, timeouts, 429 and 5xx responses are retryable; other
+    client errors and exhausted deadlines are not.
+    """
+    return getattr(error, "retryable", False)
+
+
+class RetryPolicy:
+    """
+    How failed idempotent calls are retried.
+
+    Args:
+        attempts (int, optional): Total attempts, including the first.
+            Defaults to 3.
+        backoff (float, optional): Delay before the first retry, in seconds;
+            doubled for every further retry. Defaults to 0.1.
+        max_backoff (float, optional): Upper bound on a single delay.
+            Defaults to 2.
+        jitter (bool, optional): Randomise delays between zero and the
+            computed value to avoid synchronised retries. Defaults to True.
+        retry_on (callable, optional): Predicate deciding whether an error is
+            retryable. Defaults to ``is_retryable``.
+    """
+
+    def __init__(
+        self, attempts=3, backoff=0.1, max_backoff=2.0, jitter=True, retry_on=None
+    ):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1.")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = retry_on or is_retryable
+
+    def delay(self, retry: int) -> float:
+        """Return the delay before retry number ``retry`` (starting at 1)."""
+        delay = min(self.max_backoff, self.backoff * 2 ** (retry - 1))
+        return random.uniform(0, delay) if self.jitter else delay
@@ -0,0 +1,891 @@
+"""
+This module provides a local emulator of the payment gateway, for development
+and load testing without the network.
+
+The emulator implements every endpoint in ``ecraspay.endpoints`` on top of
+in-memory transaction state machines:
+
+    PENDING --card OTP / USSD / transfer--> SUCCESSFUL or FAILED
+    PENDING --cancel--> CANCELLED
+    PENDING --bank transfer account expires--> EXPIRED
+
+Card payments move to SUCCESSFUL when the configured OTP is submitted; USSD
+and bank transfer payments settle ``settle_after`` seconds after the code or
+account is requested, or when ``settle`` is called. Every move to a final
+status delivers a webhook to ``webhook_url``.
+
+Latency and failures are tunable: a fixed latency plus jitter, a share of
+requests answered with an error status, a share that hangs until the client
+times out, and a share of payments declined.
+
+It can be used in-process through ``EmulatorTransport``, with no sockets and
+no serialisation beyond JSON, or served over HTTP:
+
+    python -m ecraspay.emulator --port 8765 --latency 0.05 --error-rate 0.01
+
+Example:
+    from ecraspay import Checkout
+    from ecraspay.emulator import Emulator, EmulatorTransport
+
+    emulator = Emulator(latency=0.02, settle_after=1.0)
+    api = Checkout(api_key="test", transport=EmulatorTransport(emulator))
+
+    # Or against the HTTP server:
+    api = Checkout(api_key="test", base_url="http://127.0.0.1:8765/api/v1")
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote
+
+import requests
+
+from ecraspay.endpoints import ENDPOINTS
+from ecraspay.log import get_logger
+from ecraspay.transport import RecordedResponse, _endpoint
+
+log = get_logger("ecraspay.emulator")
+
+PENDING = "PENDING"
+SUCCESSFUL = "SUCCESSFUL"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+EXPIRED = "EXPIRED"
+FINAL_STATUSES = frozenset((SUCCESSFUL, FAILED, CANCELLED, EXPIRED))
+
+DEFAULT_BANKS = (
+    "Access Bank",
+    "Ecobank Nigeria",
+    "Fidelity Bank",
+    "First Bank of Nigeria",
+    "First City Monument Bank",
+    "Guaranty Trust Bank",
+    "Keystone Bank",
+    "Stanbic IBTC Bank",
+    "Sterling Bank",
+    "Union Bank of Nigeria",
+    "United Bank for Africa",
+    "Unity Bank",
+    "Wema Bank",
+    "Zenith Bank",
+)
+
+# Handler method for every registered endpoint.
+_HANDLERS = {
+    "payment.initiate": "_initiate",
+    "checkout.verify": "_verify",
+    "transaction.details": "_details",
+    "transaction.verify": "_verify",
+    "transaction.status": "_status",
+    "transaction.cancel": "_cancel",
+    "card.initiate": "_card_initiate",
+    "card.submit_otp": "_card_submit_otp",
+    "card.resend_otp": "_card_resend_otp",
+    "card.details": "_card_details",
+    "card.verify": "_card_verify",
+    "ussd.initiate": "_ussd_initiate",
+    "ussd.banks": "_ussd_banks",
+    "bank_transfer.request_account": "_bank_transfer_account",
+}
+
+
+class EmulatorError(Exception):
+    """An error response: raised by handlers, rendered by ``Emulator.handle``."""
+
+    def __init__(self, status, message, code="failed"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class _Hang(Exception):
+    """The emulator decided not to answer this request."""
+
+
+def _route(path_template):
+    """Compile an endpoint path template into a regex matching request paths."""
+    pattern = re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(path_template))
+    return re.compile(pattern.rstrip("/") + "/?$")
+
+
+_ROUTES = [
+    (endpoint.method, _route(endpoint.path), _HANDLERS[name])
+    for name, endpoint in ENDPOINTS.items()
+]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ok(body, message="success"):
+    return {
+        "requestSuccessful": True,
+        "responseCode": "success",
+        "responseMessage": message,
+        "responseBody": body,
+    }
+
+
+class EmulatedTransaction:
+    """The state of one emulated transaction."""
+
+    __slots__ = (
+        "transaction_reference",
+        "payment_reference",
+        "amount",
+        "currency",
+        "customer",
+        "description",
+        "metadata",
+        "redirect_url",
+        "status",
+        "channel",
+        "gateway_reference",
+        "otp_attempts",
+        "created_at",
+        "paid_at",
+        "expires_at",
+    )
+
+    def __init__(self, transaction_reference, payload):
+        self.transaction_reference = transaction_reference
+        self.payment_reference = payload["paymentReference"]
+        self.amount = payload["amount"]
+        self.currency = payload.get("currency") or "NGN"
+        self.customer = {
+            "name": payload["customerName"],
+            "email": payload["customerEmail"],
+            "phone_number": payload.get("customerPhoneNumber"),
+        }
+        self.description = payload.get("description")
+        self.metadata = payload.get("metadata")
+        self.redirect_url = payload.get("redirectUrl")
+        self.status = PENDING
+        self.channel = None
+        self.gateway_reference = None
+        self.otp_attempts = 0
+        self.created_at = _now()
+        self.paid_at = None
+        self.expires_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "paymentReference": self.payment_reference,
+            "transactionReference": self.transaction_reference,
+            "amount": self.amount,
+            "currency": self.currency,
+            "channel": self.channel,
+            "customer": dict(self.customer),
+            "description": self.description,
+            "metadata": self.metadata,
+            "createdAt": self.created_at,
+            "paidAt": self.paid_at,
+        }
+
+
+class Emulator:
+    """
+    In-memory emulation of the gateway.
+
+    Args:
+        latency (float, optional): Seconds added to every response.
+            Defaults to 0.
+        jitter (float, optional): Up to this many extra seconds, drawn
+            uniformly per request. Defaults to 0.
+        error_rate (float, optional): Share of requests answered with
+            ``error_status`` before any state changes. Defaults to 0.
+        error_status (int, optional): Status of injected errors. 429
+            responses carry a ``Retry-After`` header. Defaults to 503.
+        timeout_rate (float, optional): Share of requests that are never
+            answered; the client sees a timeout. Defaults to 0.
+        decline_rate (float, optional): Share of card, USSD and bank transfer
+            payments that end FAILED instead of SUCCESSFUL. Defaults to 0.
+        settle_after (float, optional): Seconds after which USSD and bank
+            transfer payments settle on their own. Defaults to None: they
+            stay PENDING until ``settle`` is called.
+        otp (str, optional): The OTP that completes card payments.
+            Defaults to "123456".
+        max_otp_attempts (int, optional): Wrong OTPs after which a card
+            payment fails. Defaults to 3.
+        account_expires_in (int, optional): Minutes a bank transfer account
+            stays valid before the payment expires. Defaults to 30.
+        webhook_url (Union[str, callable], optional): URL webhooks are
+            POSTed to, or a callable receiving each webhook payload.
+        api_key (str, optional): The only accepted API key. Defaults to
+            None: any bearer token is accepted.
+        banks (Iterable[str], optional): Banks listed for USSD payments.
+        seed (int, optional): Seed for the failure and decline draws.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        timeout_rate=0.0,
+        decline_rate=0.0,
+        settle_after=None,
+        otp="123456",
+        max_otp_attempts=3,
+        account_expires_in=30,
+        webhook_url=None,
+        api_key=None,
+        banks=DEFAULT_BANKS,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.decline_rate = decline_rate
+        self.settle_after = settle_after
+        self.otp = otp
+        self.max_otp_attempts = max_otp_attempts
+        self.account_expires_in = account_expires_in
+        self.webhook_url = webhook_url
+        self.api_key = api_key
+        self.banks = list(banks)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._transactions = {}
+        self._by_payment_reference = {}
+        self._by_gateway_reference = {}
+        self._stats = {"requests": 0, "errors": 0, "timeouts": 0, "webhooks": 0}
+        self._schedule = []
+        self._wakeup = threading.Condition(self._lock)
+        self._scheduler = None
+        self._webhooks = None
+        self._closed = False
+
+    # Request handling
+
+    def handle(self, method, path, body=None, headers=None):
+        """
+        Answer one request.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the base URL, e.g. "/payment/initiate".
+            body (dict, optional): Decoded JSON body.
+            headers (dict, optional): Request headers.
+
+        Returns:
+            tuple: ``(status, body, headers)`` of the response.
+
+        Raises:
+            _Hang: If the request is chosen to time out.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            draw = self._random.random()
+        try:
+            if draw < self.timeout_rate:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise _Hang()
+            if draw < self.timeout_rate + self.error_rate:
+                raise EmulatorError(self.error_status, "Injected failure.", "error")
+            self._authenticate(headers or {})
+            handler, params = self._resolve(method.upper(), path)
+            return 200, handler(body or {}, **params), {}
+        except EmulatorError as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            response_headers = {"Retry-After": "1"} if e.status == 429 else {}
+            error = {
+                "requestSuccessful": False,
+                "responseCode": e.code,
+                "responseMessage": str(e),
+                "responseBody": None,
+            }
+            return e.status, error, response_headers
+
+    def delay(self) -> float:
+        """Return the latency to add to the next response, in seconds."""
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _authenticate(self, headers):
+        authorization = headers.get("Authorization") or headers.get("authorization")
+        if not authorization or not authorization.startswith("Bearer "):
+            raise EmulatorError(401, "Missing API key.", "unauthorized")
+        if self.api_key is not None and authorization[7:] != self.api_key:
+            raise EmulatorError(401, "Invalid API key.", "unauthorized")
+
+    def _resolve(self, method, path):
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.match(path)
+            if match is not None:
+                if route_method != method:
+                    raise EmulatorError(405, f"{method} not allowed.", "error")
+                params = {
+                    key: unquote(value) for key, value in match.groupdict().items()
+                }
+                return getattr(self, handler), params
+        raise EmulatorError(404, f"No endpoint at {path}.", "not_found")
+
+    def _get(self, transaction_ref):
+        transaction = self._transactions.get(transaction_ref)
+        if transaction is None:
+            raise EmulatorError(404, "Transaction not found.", "not_found")
+        return transaction
+
+    def _pending(self, transaction_ref):
+        transaction = self._get(transaction_ref)
+        if transaction.status != PENDING:
+            raise EmulatorError(
+                400, f"Transaction is already {transaction.status.lower()}."
+            )
+        return transaction
+
+    # Endpoints
+
+    def _initiate(self, body):
+        missing = [
+            field
+            for field in ("amount", "paymentReference", "customerName", "customerEmail")
+            if body.get(field) in (None, "")
+        ]
+        if missing:
+            raise EmulatorError(400, f"Missing fields: {', '.join(missing)}.")
+        try:
+            if float(body["amount"]) <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise EmulatorError(400, "Amount must be a positive number.") from None
+        with self._lock:
+            if body["paymentReference"] in self._by_payment_reference:
+                raise EmulatorError(400, "Duplicate payment reference.")
+            reference = (
+                f"ERCS|{datetime.now(timezone.utc):%Y%m%d%H%M%S}|{next(self._counter)}"
+            )
+            transaction = EmulatedTransaction(reference, body)
+            self._transactions[reference] = transaction
+            self._by_payment_reference[transaction.payment_reference] = transaction
+        return _ok(
+            {
+                "paymentReference": transaction.payment_reference,
+                "transactionReference": reference,
+                "checkoutUrl": f"https://checkout.emulator.local/{reference}",
+            }
+        )
+
+    def _verify(self, body, transaction_ref):
+        with self._lock:
+            transaction = self._get(transaction_ref)
+            return _ok(transaction.to_dict())
+
+    _details = _verify
+
+    def _status(self, body, transaction_ref):
+        with self._lock:
+            transaction = self._get(transaction_ref)
+            return _ok(
+                {
+                    "status": transaction.status,
+                    "paymentReference": transaction.payment_reference,
+                    "transactionReference": transaction.transaction_reference,
+                    "amount": transaction.amount,
+                    "channel": transaction.channel,
+                    "paidAt": transaction.paid_at,
+                }
+            )
+
+    def _cancel(self, body, transaction_ref):
+        with self._lock:
+            transaction = self._pending(transaction_ref)
+            self._finish(transaction, CANCELLED)
+        return _ok({"callback_url": transaction.redirect_url}, "Transaction cancelled")
+
+    def _card_initiate(self, body):
+        if not body.get("payload"):
+            raise EmulatorError(400, "Missing card payload.")
+        with self._lock:
+            transaction = self._pending(body.get("transactionReference"))
+            transaction.channel = "CARD"
+            transaction.gateway_reference = f"GW{next(self._counter):012d}"
+            self._by_gateway_reference[transaction.gateway_reference] = transaction
+            if self._random.random() < self.decline_rate:
+                self._finish(transaction, FAILED)
+                raise EmulatorError(400, "Card declined.", "declined")
+            return _ok(
+                {
+                    "code": "C1",
+                    "status": PENDING,
+                    "gatewayMessage": "Kindly enter the OTP sent to your phone.",
+                    "transactionReference": transaction.transaction_reference,
+                    "gatewayReference": transaction.gateway_reference,
+                    "amount": transaction.amount,
+                }
+            )
+
+    def _card_transaction(self, gateway_ref):
+        transaction = self._by_gateway_reference.get(gateway_ref)
+        if transaction is None:
+            raise EmulatorError(404, "Unknown gateway reference.", "not_found")
+        if transaction.status != PENDING:
+            raise EmulatorError(
+                400, f"Transaction is already {transaction.status.lower()}."
+            )
+        return transaction
+
+    def _card_submit_otp(self, body):
+        with self._lock:
+            transaction = self._card_transaction(body.get("gatewayReference"))
+            if body.get("otp") != self.otp:
+                transaction.otp_attempts += 1
+                if transaction.otp_attempts >= self.max_otp_attempts:
+                    self._finish(transaction, FAILED)
+                raise EmulatorError(400, "Invalid OTP.", "invalid_otp")
+            self._finish(transaction, SUCCESSFUL)
+            return _ok(
+                {
+                    "status": SUCCESSFUL,
+                    "gatewayMessage": "Transaction successful.",
+                    "transactionReference": transaction.transaction_reference,
+                    "amount": transaction.amount,
+                    "callbackUrl": transaction.redirect_url,
+                }
+            )
+
+    def _card_resend_otp(self, body):
+        with self._lock:
+            transaction = self._card_transaction(body.get("gatewayReference"))
+            return _ok(
+                {"gatewayReference": transaction.gateway_reference},
+                "OTP resent",
+            )
+
+    def _card_details(self, body, transaction_ref):
+        with self._lock:
+            transaction = self._get(transaction_ref)
+            return _ok(
+                {
+                    "amount": transaction.amount,
+                    "currency": transaction.currency,
+                    "customer": dict(transaction.customer),
+                    "paymentReference": transaction.payment_reference,
+                    "transactionReference": transaction.transaction_reference,
+                }
+            )
+
+    def _card_verify(self, body):
+        with self._lock:
+            transaction = self._get(body.get("transactionReference"))
+            return _ok(transaction.to_dict())
+
+    def _ussd_initiate(self, body, transaction_ref):
+        bank_name = body.get("bank_name")
+        if bank_name not in self.banks:
+            raise EmulatorError(400, f"Unsupported bank '{bank_name}'.")
+        with self._lock:
+            transaction = self._pending(transaction_ref)
+            transaction.channel = "USSD"
+            self._settle_later(transaction)
+            return _ok(
+                {
+                    "ussdCode": f"*737*000*{next(self._counter):04d}#",
+                    "paymentReference": transaction.payment_reference,
+                    "amount": transaction.amount,
+                    "bank_name": bank_name,
+                }
+            )
+
+    def _ussd_banks(self, body):
+        return _ok(list(self.banks))
+
+    def _bank_transfer_account(self, body, transaction_ref):
+        with self._lock:
+            transaction = self._pending(transaction_ref)
+            if transaction.channel != "BANK_TRANSFER":
+                transaction.channel = "BANK_TRANSFER"
+                transaction.expires_at = time.time() + self.account_expires_in * 60
+                self._settle_later(transaction)
+                self._at(transaction.expires_at, self._expire, transaction)
+            return _ok(
+                {
+                    "transactionReference": transaction.transaction_reference,
+                    "accountNumber": f"99{zlib.crc32(transaction_ref.encode()) % 10 ** 8:08d}",
+                    "accountName": "Ercaspay Emulator",
+                    "bankName": "Emulator Bank",
+                    "amount": transaction.amount,
+                    "accountEmail": transaction.customer["email"],
+                    "expires_in": self.account_expires_in,
+                }
+            )
+
+    # State transitions
+
+    def settle(self, transaction_ref, status=None):
+        """
+        Complete a pending payment, as the customer's bank would.
+
+        Args:
+            transaction_ref (str): The transaction reference.
+            status (str, optional): SUCCESSFUL or FAILED. Defaults to a draw
+                against ``decline_rate``.
+
+        Returns:
+            bool: False if the transaction was no longer pending.
+        """
+        with self._lock:
+            transaction = self._get(transaction_ref)
+            if transaction.status != PENDING:
+                return False
+            if status is None:
+                declined = self._random.random() < self.decline_rate
+                status = FAILED if declined else SUCCESSFUL
+            self._finish(transaction, status)
+            return True
+
+    def _settle_later(self, transaction):
+        if self.settle_after is not None:
+            self._at(
+                time.time() + self.settle_after,
+                self.settle,
+                transaction.transaction_reference,
+            )
+
+    def _expire(self, transaction):
+        with self._lock:
+            if transaction.status == PENDING:
+                self._finish(transaction, EXPIRED)
+
+    def _finish(self, transaction, status):
+        """Move ``transaction`` to a final status. Call with the lock held."""
+        if status not in FINAL_STATUSES:
+            raise ValueError(f"'{status}' is not a final status.")
+        transaction.status = status
+        if status == SUCCESSFUL:
+            transaction.paid_at = _now()
+        if self.webhook_url is not None:
+            self._stats["webhooks"] += 1
+            self._at(time.time(), self._deliver, transaction.to_dict(), 1)
+
+    # Scheduling and webhooks
+
+    def _at(self, when, function, *args):
+        """Run ``function(*args)`` at ``when``. Call with the lock held."""
+        if self._closed:
+            return
+        heapq.heappush(self._schedule, (when, next(self._counter), function, args))
+        if self._scheduler is None:
+            self._webhooks = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="ecraspay-emulator-webhook"
+            )
+            self._scheduler = threading.Thread(
+                target=self._run, name="ecraspay-emulator", daemon=True
+            )
+            self._scheduler.start()
+        self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and (
+                    not self._schedule or self._schedule[0][0] > time.time()
+                ):
+                    timeout = (
+                        self._schedule[0][0] - time.time() if self._schedule else None
+                    )
+                    self._wakeup.wait(timeout)
+                if self._closed:
+                    return
+                _, _, function, args = heapq.heappop(self._schedule)
+            if function == self._deliver:
+                self._webhooks.submit(function, *args)
+            else:
+                function(*args)
+
+    def _deliver(self, payload, attempt):
+        webhook = self.webhook_url
+        try:
+            if callable(webhook):
+                webhook(payload)
+            else:
+                requests.post(webhook, json=payload, timeout=5).raise_for_status()
+        except Exception as e:
+            if attempt >= 5:
+                log.error(
+                    "Giving up on webhook for %s: %s",
+                    payload["transactionReference"],
+                    e,
+                )
+                return
+            with self._lock:
+                self._at(
+                    time.time() + 2 ** (attempt - 1),
+                    self._deliver,
+                    payload,
+                    attempt + 1,
+                )
+
+    # Introspection
+
+    def transaction(self, transaction_ref) -> dict:
+        """Return the current state of a transaction."""
+        with self._lock:
+            return self._get(transaction_ref).to_dict()
+
+    def stats(self) -> dict:
+        """Return request, error, timeout and webhook counters and status counts."""
+        with self._lock:
+            statuses = {}
+            for transaction in self._transactions.values():
+                statuses[transaction.status] = statuses.get(transaction.status, 0) + 1
+            return dict(self._stats, transactions=statuses)
+
+    def reset(self):
+        """Forget every transaction and counter; pending webhooks still go out."""
+        with self._lock:
+            self._transactions.clear()
+            self._by_payment_reference.clear()
+            self._by_gateway_reference.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def close(self):
+        """Stop the scheduler; undelivered webhooks and settlements are dropped."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._scheduler is not None:
+            self._scheduler.join()
+            self._webhooks.shutdown(wait=True)
+
+
+class EmulatorTransport:
+    """
+    A transport answering requests from an ``Emulator`` in-process.
+
+    Args:
+        emulator (Emulator, optional): The emulator. Defaults to a new one.
+    """
+
+    def __init__(self, emulator=None):
+        self.emulator = emulator or Emulator()
+
+    def request(self, method, url, headers=None, json=None, timeout=None, **kwargs):
+        delay = self.emulator.delay()
+        try:
+            status, body, _ = self.emulator.handle(
+                method, _endpoint(url), json, headers
+            )
+        except _Hang:
+            time.sleep(timeout or 0)
+            raise requests.exceptions.ReadTimeout(
+                f"Emulated timeout for {method} {url}"
+            ) from None
+        if delay:
+            time.sleep(delay)
+        return RecordedResponse(status, _dumps(body), url=url)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "EcraspayEmulator"
+    # Headers and body are written separately; without this, delayed ACKs
+    # cap keep-alive connections at about 25 requests per second.
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        emulator = self.server.emulator
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/_emulator/"):
+            status, body, headers = self._admin(emulator, path, raw)
+        else:
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                status, body, headers = 400, {"responseMessage": "Invalid JSON."}, {}
+            else:
+                delay = emulator.delay()
+                try:
+                    status, body, headers = emulator.handle(
+                        self.command, _endpoint(path), body, self.headers
+                    )
+                except _Hang:
+                    time.sleep(self.server.hang)
+                    self.close_connection = True
+                    return
+                if delay:
+                    time.sleep(delay)
+        content = _dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _admin(self, emulator, path, raw):
+        """
+        Control endpoints:
+
+            GET  /_emulator/stats
+            GET  /_emulator/transactions/{ref}
+            POST /_emulator/settle/{ref}   {"status": "FAILED"}
+            POST /_emulator/config         {"latency": 0.1, "error_rate": 0.05}
+            POST /_emulator/reset
+        """
+        data = json.loads(raw) if raw else {}
+        action, _, argument = path[len("/_emulator/") :].partition("/")
+        argument = unquote(argument)
+        try:
+            if action == "stats":
+                return 200, emulator.stats(), {}
+            if action == "transactions":
+                return 200, emulator.transaction(argument), {}
+            if action == "settle" and self.command == "POST":
+                return (
+                    200,
+                    {"settled": emulator.settle(argument, data.get("status"))},
+                    {},
+                )
+            if action == "config" and self.command == "POST":
+                for name in _TUNABLE:
+                    if name in data:
+                        setattr(emulator, name, data[name])
+                return 200, {name: getattr(emulator, name) for name in _TUNABLE}, {}
+            if action == "reset" and self.command == "POST":
+                emulator.reset()
+                return 200, {}, {}
+        except EmulatorError as e:
+            return e.status, {"responseMessage": str(e)}, {}
+        return 404, {"responseMessage": f"No control endpoint at {path}."}, {}
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+
+_TUNABLE = (
+    "latency",
+    "jitter",
+    "error_rate",
+    "error_status",
+    "timeout_rate",
+    "decline_rate",
+    "settle_after",
+)
+
+
+class EmulatorServer(ThreadingMixIn, HTTPServer):
+    """
+    Serves an ``Emulator`` over HTTP, one thread per connection.
+
+    Args:
+        emulator (Emulator): The emulator to serve.
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind; 0 picks a free one.
+            Defaults to 8765.
+        hang (float, optional): Seconds a request chosen to time out is held
+            before its connection is dropped. Defaults to 30.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, emulator, host="127.0.0.1", port=8765, hang=30.0):
+        super().__init__((host, port), _Handler)
+        self.emulator = emulator
+        self.hang = hang
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to give clients, e.g. http://127.0.0.1:8765/api/v1."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start(self):
+        """Serve in a daemon thread and return immediately."""
+        thread = threading.Thread(
+            target=self.serve_forever, name="ecraspay-emulator-http", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop serving and close the socket and the emulator."""
+        self.shutdown()
+        self.server_close()
+        self.emulator.close()
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ecraspay.emulator",
+        description="Run a local emulator of the payment gateway.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0, help="seconds")
+    parser.add_argument("--decline-rate", type=float, default=0.0)
+    parser.add_argument("--settle-after", type=float, default=None, help="seconds")
+    parser.add_argument("--otp", default="123456")
+    parser.add_argument("--webhook-url", default=None)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    emulator = Emulator(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        decline_rate=args.decline_rate,
+        settle_after=args.settle_after,
+        otp=args.otp,
+        webhook_url=args.webhook_url,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    server = EmulatorServer(emulator, args.host, args.port, hang=args.hang)
+    print(f"Emulating the gateway at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        emulator.close()
+
+
+if __name__ == "__main__":
+    main()
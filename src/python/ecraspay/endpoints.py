@@ -0,0 +1,339 @@
+"""
+This module provides the declarative endpoint registry used by the API clients.
+
+Every gateway operation is described once, as an ``Endpoint`` holding the HTTP
+method, the path template, the mapping from Python argument names to the
+gateway's JSON field names and whether the call is idempotent. Clients compile
+an endpoint against their base URL into a ``RequestBuilder`` the first time it
+is used, so the per-call work is reduced to formatting the path and copying the
+supplied values into the payload. Values are passed by argument name.
+
+Example:
+    from ecraspay.endpoints import get_endpoint
+
+    builder = get_endpoint("transaction.status").compile(
+        "https://api.merchant.staging.ercaspay.com/api/v1"
+    )
+    method, url, payload = builder.build({"transaction_ref": "txn_12345"})
+"""
+
+import keyword
+import string
+
+_FORMATTER = string.Formatter()
+
+
+ENDPOINTS = {}
+
+
+class Endpoint:
+    """
+    Declarative description of a single gateway operation.
+
+    Args:
+        name (str): Registry key for the operation (e.g. "transaction.verify").
+        method (str): HTTP method used by the operation.
+        path (str): Path template relative to the base URL, with ``{name}``
+            placeholders for path parameters.
+        fields (tuple, optional): ``(argument, wire_name)`` pairs describing the
+            JSON payload. Defaults to no payload.
+        optional (tuple, optional): Argument names that are left out of the
+            payload when their value is ``None``.
+        idempotent (bool, optional): Whether repeating the call has no extra
+            effect on the gateway. Defaults to False.
+
+    Raises:
+        ValueError: If an argument name is not a valid Python keyword
+            argument name.
+    """
+
+    __slots__ = ("name", "method", "path", "fields", "optional", "idempotent")
+
+    def __init__(self, name, method, path, fields=(), optional=(), idempotent=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.fields = tuple(fields)
+        self.optional = frozenset(optional)
+        self.idempotent = idempotent
+        for argument in self.arguments:
+            if not argument.isidentifier() or keyword.iskeyword(argument):
+                raise ValueError(f"Invalid argument name '{argument}' in {name}.")
+
+    @property
+    def path_params(self) -> tuple:
+        """Names of the placeholders in the path template, in order."""
+        return tuple(field for _, field, _, _ in _FORMATTER.parse(self.path) if field)
+
+    @property
+    def arguments(self) -> tuple:
+        """Argument names a builder takes: path parameters, then payload fields."""
+        path_params = self.path_params
+        return path_params + tuple(
+            arg for arg, _ in self.fields if arg not in path_params
+        )
+
+    def compile(self, base_url: str) -> "RequestBuilder":
+        """
+        Compile the endpoint against a base URL.
+
+        Args:
+            base_url (str): Base URL of the client the builder is bound to.
+
+        Returns:
+            RequestBuilder: A prebuilt request builder for this endpoint.
+        """
+        return RequestBuilder(self, base_url)
+
+    def __repr__(self):
+        return f"<Endpoint {self.name}: {self.method} {self.path}>"
+
+
+class RequestBuilder:
+    """
+    An endpoint compiled against a base URL.
+
+    The URL template is split around its path parameters and the payload
+    fields are sorted into required and optional ones once, so ``build`` only
+    joins the URL and copies values. ``url``, ``payload`` and ``build`` take
+    the endpoint's values as a mapping from argument name to value; optional
+    arguments may be left out.
+
+    Raises:
+        KeyError: From ``url``, ``payload`` and ``build`` when a path
+            parameter or required field is missing from the values.
+    """
+
+    __slots__ = (
+        "endpoint",
+        "method",
+        "idempotent",
+        "_prefix",
+        "_segments",
+        "_fields",
+        "_required",
+        "_optional",
+    )
+
+    def __init__(self, endpoint: Endpoint, base_url: str):
+        self.endpoint = endpoint
+        self.method = endpoint.method
+        self.idempotent = endpoint.idempotent
+        # The URL up to the first path parameter, then (parameter, literal
+        # following it) pairs.
+        parsed = list(_FORMATTER.parse(f"{base_url}{endpoint.path}"))
+        self._prefix = parsed[0][0]
+        self._segments = tuple(
+            (field, parsed[index + 1][0] if index + 1 < len(parsed) else "")
+            for index, (_, field, _, _) in enumerate(parsed)
+            if field
+        )
+        self._fields = bool(endpoint.fields)
+        self._required = tuple(
+            (arg, wire) for arg, wire in endpoint.fields if arg not in endpoint.optional
+        )
+        self._optional = tuple(
+            (arg, wire) for arg, wire in endpoint.fields if arg in endpoint.optional
+        )
+
+    def url(self, values) -> str:
+        """Return the URL for ``values``."""
+        return self.build(values)[1]
+
+    def payload(self, values, extra=None):
+        """Return the JSON payload for ``values``, with ``extra`` fields added."""
+        return self.build(values, extra)[2]
+
+    def build(self, values, extra=None) -> tuple:
+        """Return ``(method, url, payload)`` for ``values``."""
+        url = self._prefix
+        for field, literal in self._segments:
+            url = f"{url}{values[field]}{literal}"
+        if not self._fields:
+            return self.method, url, dict(extra) if extra else None
+        payload = {wire: values[arg] for arg, wire in self._required}
+        for arg, wire in self._optional:
+            value = values.get(arg)
+            if value is not None:
+                payload[wire] = value
+        if extra:
+            payload.update(extra)
+        return self.method, url, payload
+
+
+def register(endpoint: Endpoint) -> Endpoint:
+    """
+    Add an endpoint to the registry.
+
+    Raises:
+        ValueError: If an endpoint with the same name is already registered.
+    """
+    if endpoint.name in ENDPOINTS:
+        raise ValueError(f"Endpoint '{endpoint.name}' is already registered.")
+    ENDPOINTS[endpoint.name] = endpoint
+    return endpoint
+
+
+def get_endpoint(name: str) -> Endpoint:
+    """
+    Look up a registered endpoint by name.
+
+    Raises:
+        KeyError: If no endpoint with that name exists.
+    """
+    try:
+        return ENDPOINTS[name]
+    except KeyError:
+        raise KeyError(f"Unknown endpoint '{name}'.") from None
+
+
+# Payments
+
+register(
+    Endpoint(
+        "payment.initiate",
+        "POST",
+        "/payment/initiate",
+        fields=(
+            ("amount", "amount"),
+            ("payment_reference", "paymentReference"),
+            ("customer_name", "customerName"),
+            ("customer_email", "customerEmail"),
+            ("redirect_url", "redirectUrl"),
+            ("description", "description"),
+            ("fee_bearer", "feeBearer"),
+            ("currency", "currency"),
+            ("payment_method", "paymentMethods"),
+            ("customer_phone", "customerPhoneNumber"),
+            ("metadata", "metadata"),
+        ),
+        optional=(
+            "redirect_url",
+            "description",
+            "fee_bearer",
+            "currency",
+            "payment_method",
+            "customer_phone",
+            "metadata",
+        ),
+    )
+)
+register(
+    Endpoint(
+        "checkout.verify",
+        "GET",
+        "/payment/transaction/verify/{transaction_ref}",
+        idempotent=True,
+    )
+)
+
+# Transactions
+
+register(
+    Endpoint(
+        "transaction.details",
+        "GET",
+        "/payment/details/{transaction_ref}",
+        idempotent=True,
+    )
+)
+register(
+    Endpoint(
+        "transaction.verify",
+        "GET",
+        "/payment/verify/{transaction_ref}",
+        idempotent=True,
+    )
+)
+register(
+    Endpoint(
+        "transaction.status",
+        "GET",
+        "/payment/status/{transaction_ref}",
+        idempotent=True,
+    )
+)
+register(
+    Endpoint(
+        "transaction.cancel",
+        "GET",
+        "/payment/cancel/{transaction_ref}",
+    )
+)
+
+# Card payments
+
+register(
+    Endpoint(
+        "card.initiate",
+        "POST",
+        "/payment/cards/initialize",
+        fields=(
+            ("card_payload", "payload"),
+            ("transaction_ref", "transactionReference"),
+            ("device_details", "deviceDetails"),
+        ),
+    )
+)
+register(
+    Endpoint(
+        "card.submit_otp",
+        "POST",
+        "/payment/cards/otp/submit/",
+        fields=(("otp", "otp"), ("gateway_ref", "gatewayReference")),
+    )
+)
+register(
+    Endpoint(
+        "card.resend_otp",
+        "POST",
+        "/payment/cards/otp/resend/",
+        fields=(("gateway_ref", "gatewayReference"),),
+    )
+)
+register(
+    Endpoint(
+        "card.details",
+        "GET",
+        "/payment/cards/details/{transaction_ref}",
+        idempotent=True,
+    )
+)
+register(
+    Endpoint(
+        "card.verify",
+        "POST",
+        "/payment/cards/verify/",
+        fields=(("transaction_ref", "transactionReference"),),
+        idempotent=True,
+    )
+)
+
+# USSD
+
+register(
+    Endpoint(
+        "ussd.initiate",
+        "POST",
+        "/payment/ussd/request-ussd-code/{transaction_ref}",
+        fields=(("bank_name", "bank_name"),),
+    )
+)
+register(
+    Endpoint(
+        "ussd.banks",
+        "GET",
+        "/payment/ussd/supported-banks",
+        idempotent=True,
+    )
+)
+
+# Bank transfer
+
+register(
+    Endpoint(
+        "bank_transfer.request_account",
+        "GET",
+        "/payment/bank-transfer/request-bank-account/{transaction_ref}",
+    )
+)
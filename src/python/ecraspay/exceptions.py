@@ -1,10 +1,149 @@
+import email.utils
+import time
+
+import requests
+
+
 class ApiWrapperError(Exception):
     """Base exception for the API wrapper."""
 
+    # Whether repeating the request may succeed.
+    retryable = False
+
+
+class ApiWrapperHTTPError(ApiWrapperError, requests.exceptions.HTTPError):
+    """
+    Exception raised when the gateway answers with an error status.
+
+    Subclasses ``requests.exceptions.HTTPError``, so existing handlers keep
+    working; ``response`` is still available.
+
+    Attributes:
+        status_code (int): The HTTP status code.
+        body: The error body, parsed from JSON once when the error is raised,
+            or the raw text if it is not JSON.
+    """
+
+    def __init__(self, message, response=None, body=None):
+        super().__init__(message, response=response)
+        self.status_code = getattr(response, "status_code", None)
+        self.body = body
+
+
+class ApiWrapperAuthError(ApiWrapperHTTPError):
+    """Exception raised for authentication errors (401 and 403)."""
+
+
+class ApiWrapperRequestError(ApiWrapperHTTPError):
+    """Exception raised for invalid requests (4xx)."""
+
+
+class ApiWrapperValidationError(ApiWrapperRequestError):
+    """Exception raised when the gateway rejects the request data (400 and 422)."""
+
+
+class ApiWrapperRateLimitError(ApiWrapperRequestError):
+    """
+    Exception raised when requests are being rate limited (429).
+
+    Attributes:
+        retry_after (float): Seconds to wait before retrying, from the
+            ``Retry-After`` header, or None.
+    """
+
+    retryable = True
+
+    def __init__(self, message, response=None, body=None):
+        super().__init__(message, response=response, body=body)
+        headers = getattr(response, "headers", None) or {}
+        self.retry_after = _parse_retry_after(headers.get("Retry-After"))
+
+
+class ApiWrapperUnavailableError(ApiWrapperHTTPError):
+    """Exception raised when the gateway fails or is unavailable (5xx)."""
+
+    retryable = True
+
+
+class ApiWrapperConnectionError(ApiWrapperError, requests.exceptions.ConnectionError):
+    """Exception raised when the gateway cannot be reached."""
+
+    retryable = True
+
+
+class ApiWrapperTimeoutError(ApiWrapperError, requests.exceptions.Timeout):
+    """Exception raised when a request to the gateway times out."""
+
+    retryable = True
+
+
+class ApiWrapperDeadlineError(ApiWrapperTimeoutError):
+    """Exception raised when an operation's deadline passes before it completes."""
+
+    retryable = False
+
+
+class ApiWrapperCassetteError(ApiWrapperError):
+    """Exception raised when a replayed request has no recorded response."""
+
+
+class CardValidationError(ApiWrapperError, ValueError):
+    """Exception raised when card details fail local validation."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Invalid card details: " + "; ".join(self.errors))
+
+
+_STATUS_ERRORS = {
+    400: ApiWrapperValidationError,
+    401: ApiWrapperAuthError,
+    403: ApiWrapperAuthError,
+    422: ApiWrapperValidationError,
+    429: ApiWrapperRateLimitError,
+}
+
+
+def http_error_from_response(response, message) -> ApiWrapperHTTPError:
+    """
+    Build the typed exception for an error response.
+
+    The response body is parsed here, once, and attached to the exception.
+
+    Args:
+        response (requests.Response): The error response.
+        message (str): The exception message.
 
-class ApiWrapperAuthError(ApiWrapperError):
-    """Exception raised for authentication errors."""
+    Returns:
+        ApiWrapperHTTPError: An instance of the subclass matching the status.
+    """
+    status = getattr(response, "status_code", None)
+    if not isinstance(status, int):
+        error_class = ApiWrapperHTTPError
+    elif status in _STATUS_ERRORS:
+        error_class = _STATUS_ERRORS[status]
+    elif status >= 500:
+        error_class = ApiWrapperUnavailableError
+    elif status >= 400:
+        error_class = ApiWrapperRequestError
+    else:
+        error_class = ApiWrapperHTTPError
+    try:
+        body = response.json()
+    except ValueError:
+        body = getattr(response, "text", None)
+    return error_class(message, response=response, body=body)
 
 
-class ApiWrapperRequestError(ApiWrapperError):
-    """Exception raised for invalid requests."""
+def _parse_retry_after(value):
+    """Parse a ``Retry-After`` header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
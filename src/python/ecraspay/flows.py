@@ -0,0 +1,281 @@
+"""
+This module provides the CardPaymentFlow class, a resumable state machine for
+the direct card payment flow.
+
+The flow overlaps the independent steps of a card payment: the public key is
+loaded and the card encrypted in a worker thread while the transaction is
+being initiated, so the local encryption time is hidden behind that
+round-trip. The two gateway calls before the OTP prompt (initiating the
+transaction, then the card payment) still run one after the other, as the
+second needs the transaction reference returned by the first. The flow's
+state can be saved after the OTP prompt and restored in another worker to
+submit the OTP and verify the payment.
+
+Example:
+    from ecraspay import Card, Transaction
+    from ecraspay.flows import CardPaymentFlow
+
+    flow = CardPaymentFlow(
+        transaction=Transaction(api_key="your_api_key"),
+        card=Card(api_key="your_api_key"),
+        public_key="path/to/public_key.pem",
+    )
+    flow.start(
+        amount=1000,
+        payment_reference="unique_ref_123",
+        customer_name="John Doe",
+        customer_email="johndoe@example.com",
+        card_number="4242424242424242",
+        expiration_date="12/30",
+        cvv="123",
+        pin="1234",
+        device_details={"ip_address": "192.168.1.1"},
+    )
+    state = flow.to_dict()  # store it until the customer enters the OTP
+
+    flow = CardPaymentFlow.from_dict(state, transaction=..., card=...)
+    flow.submit_otp("123456")
+    print(flow.verify(), flow.timings)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ecraspay.utilities import card as card_utils
+from ecraspay.utilities.validation import validate_card
+
+
+class CardPaymentFlow:
+    """
+    A resumable, pipelined card payment flow.
+
+    States:
+        NEW: Nothing has been sent yet.
+        OTP_REQUIRED: The card payment was initiated and the gateway is
+            waiting for the customer's OTP.
+        OTP_SUBMITTED: The OTP was accepted by the gateway.
+        VERIFIED: The payment has been verified.
+
+    Args:
+        transaction (Transaction): Client used to initiate the transaction.
+        card (Card): Client used for the card payment calls.
+        public_key (Union[str, bytes], optional): RSA public key (or path to it)
+            used to encrypt the card details. Only needed for ``start``.
+        bin_index (BinIndex, optional): BIN index used to detect the issuer
+            during validation.
+        validate (bool, optional): Validate the card details locally before
+            anything is sent. Defaults to True.
+    """
+
+    NEW = "new"
+    OTP_REQUIRED = "otp_required"
+    OTP_SUBMITTED = "otp_submitted"
+    VERIFIED = "verified"
+
+    def __init__(
+        self, transaction, card, public_key=None, bin_index=None, validate=True
+    ):
+        self.transaction = transaction
+        self.card = card
+        self.public_key = public_key
+        self.bin_index = bin_index
+        self.validate = validate
+        self.state = self.NEW
+        self.card_scheme = None
+        self.payment_reference = None
+        self.transaction_reference = None
+        self.gateway_reference = None
+        self.timings = {}
+
+    def start(
+        self,
+        card_number: str,
+        expiration_date: str,
+        cvv: str,
+        pin: str,
+        device_details: dict,
+        **transaction_kwargs,
+    ) -> dict:
+        """
+        Initiate the transaction and the card payment up to the OTP prompt.
+
+        The card is encrypted in a worker thread while the transaction is
+        initiated; the card payment is sent as soon as both are done.
+
+        Args:
+            card_number (str): The card number (PAN).
+            expiration_date (str): The card expiry date in MM/YY format.
+            cvv (str): The card's CVV.
+            pin (str): The card's PIN.
+            device_details (dict): Details of the device making the payment.
+            **transaction_kwargs: Arguments for ``initiate_transaction``.
+
+        Returns:
+            dict: The gateway response to the card payment initialisation.
+
+        Raises:
+            CardValidationError: If the card details fail local validation, in
+            which case nothing is encrypted or sent.
+        """
+        self._expect(self.NEW, "start")
+        if self.public_key is None:
+            raise ValueError("A public key is required to start a card payment.")
+
+        started = time.perf_counter()
+        if self.validate:
+            info = self._timed(
+                "validate_card",
+                validate_card,
+                card_number=card_number,
+                expiration_date=expiration_date,
+                cvv=cvv,
+                pin=pin,
+                bin_index=self.bin_index,
+            )
+            self.card_scheme = info.scheme
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            encrypted = executor.submit(
+                self._timed,
+                "encrypt_card",
+                card_utils.encrypt_card,
+                card_number=card_number,
+                expiration_date=expiration_date,
+                cvv=cvv,
+                pin=pin,
+                public_key=self.public_key,
+            )
+            try:
+                response = self._timed(
+                    "initiate_transaction",
+                    self.transaction.initiate_transaction,
+                    **transaction_kwargs,
+                )
+            except BaseException:
+                encrypted.cancel()
+                raise
+            card_payload = encrypted.result()
+
+        self.payment_reference = transaction_kwargs.get("payment_reference")
+        self.transaction_reference = response["responseBody"]["transactionReference"]
+        response = self._timed(
+            "initiate_payment",
+            self.card.initiate_payment,
+            card_payload=card_payload,
+            transaction_ref=self.transaction_reference,
+            device_details=device_details,
+        )
+        self.gateway_reference = (response.get("responseBody") or {}).get(
+            "gatewayReference"
+        )
+        self.timings["time_to_otp_prompt"] = time.perf_counter() - started
+        self.state = self.OTP_REQUIRED
+        return response
+
+    def submit_otp(self, otp: str) -> dict:
+        """
+        Submit the customer's OTP.
+
+        Args:
+            otp (str): The One-Time Password provided by the customer.
+
+        Returns:
+            dict: The gateway response confirming the OTP submission.
+        """
+        self._expect(self.OTP_REQUIRED, "submit an OTP")
+        response = self._timed(
+            "submit_otp",
+            self.card.submit_otp,
+            otp=otp,
+            gateway_ref=self.gateway_reference,
+        )
+        self.state = self.OTP_SUBMITTED
+        return response
+
+    def resend_otp(self) -> dict:
+        """
+        Ask the gateway to resend the OTP.
+
+        Returns:
+            dict: The gateway response confirming the OTP resend request.
+        """
+        self._expect(self.OTP_REQUIRED, "resend the OTP")
+        return self._timed(
+            "resend_otp", self.card.resend_otp, gateway_ref=self.gateway_reference
+        )
+
+    def verify(self) -> dict:
+        """
+        Verify the card payment.
+
+        Returns:
+            dict: The gateway response confirming the payment status.
+        """
+        self._expect(self.OTP_SUBMITTED, "verify the payment")
+        response = self._timed(
+            "verify_card_payment",
+            self.card.verify_card_payment,
+            transaction_ref=self.transaction_reference,
+        )
+        self.state = self.VERIFIED
+        return response
+
+    def to_dict(self) -> dict:
+        """
+        Return the JSON-serialisable state of the flow.
+
+        Card details are never part of the state. Neither are the clients,
+        the public key and ``bin_index``: they are configuration shared by
+        every flow, passed again to ``from_dict``.
+        """
+        return {
+            "state": self.state,
+            "validate": self.validate,
+            "card_scheme": self.card_scheme,
+            "payment_reference": self.payment_reference,
+            "transaction_reference": self.transaction_reference,
+            "gateway_reference": self.gateway_reference,
+            "timings": dict(self.timings),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, transaction, card, public_key=None, bin_index=None):
+        """
+        Restore a flow saved with ``to_dict``.
+
+        Args:
+            data (dict): The saved state.
+            transaction (Transaction): Client used to initiate transactions.
+            card (Card): Client used for the card payment calls.
+            public_key (Union[str, bytes], optional): RSA public key.
+            bin_index (BinIndex, optional): BIN index used to detect the
+                issuer during validation.
+
+        Returns:
+            CardPaymentFlow: The restored flow.
+        """
+        flow = cls(
+            transaction,
+            card,
+            public_key=public_key,
+            bin_index=bin_index,
+            validate=data.get("validate", True),
+        )
+        flow.state = data["state"]
+        flow.card_scheme = data.get("card_scheme")
+        flow.payment_reference = data.get("payment_reference")
+        flow.transaction_reference = data.get("transaction_reference")
+        flow.gateway_reference = data.get("gateway_reference")
+        flow.timings = dict(data.get("timings") or {})
+        return flow
+
+    def _expect(self, state, action):
+        if self.state != state:
+            raise ValueError(f"Cannot {action} in state '{self.state}'.")
+
+    def _timed(self, step, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[step] = time.perf_counter() - started
@@ -0,0 +1,387 @@
+"""
+This module provides the HealthMonitor class, which tracks the health of the
+gateway base URLs a client talks to.
+
+For every base URL the monitor keeps a rolling window of request latencies and
+outcomes, from which it derives latency percentiles and an error rate. Probe
+outcomes are kept in a window of their own: they count towards the error
+rate, but their latencies (an unauthenticated HEAD is much faster than a real
+call) never lower the hedging percentile. Clients
+created with a monitor record every request in it, route requests to the
+healthiest of their primary and alternate base URLs, and can hedge idempotent
+GET requests: if the first request has not answered after the p95 latency, a
+second one is sent to the next base URL and the first response wins. How
+often the backup request wins is tracked per base URL. The monitor can also
+probe the base URLs on a schedule and export its state for dashboards.
+
+Example:
+    from ecraspay import Transaction
+    from ecraspay.health import HealthMonitor
+
+    health = HealthMonitor()
+    api = Transaction(
+        api_key="your_api_key",
+        environment="live",
+        alternate_base_urls=["https://eu.api.example.com/api/v1"],
+        health=health,
+        hedge=True,
+    )
+    health.start_probing(api, interval=30)
+    print(health.to_json())
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ecraspay.exceptions import (
+    ApiWrapperConnectionError,
+    ApiWrapperDeadlineError,
+    ApiWrapperTimeoutError,
+    ApiWrapperUnavailableError,
+)
+from ecraspay.process import call_after_fork, reinitialize_after_fork
+
+_HEDGE_EXECUTOR = None
+_HEDGE_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Return the thread pool shared by every hedged request."""
+    global _HEDGE_EXECUTOR
+    if _HEDGE_EXECUTOR is None:
+        with _HEDGE_EXECUTOR_LOCK:
+            if _HEDGE_EXECUTOR is None:
+                _HEDGE_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=16, thread_name_prefix="ecraspay-hedge"
+                )
+    return _HEDGE_EXECUTOR
+
+
+@call_after_fork
+def _reset_hedge_executor():
+    # The parent's pool threads do not exist in a forked child.
+    global _HEDGE_EXECUTOR, _HEDGE_EXECUTOR_LOCK
+    _HEDGE_EXECUTOR = None
+    _HEDGE_EXECUTOR_LOCK = threading.Lock()
+
+
+def is_gateway_failure(error: BaseException) -> bool:
+    """
+    Return True if ``error`` says something about the gateway's health.
+
+    Connection errors, timeouts and 5xx responses count against a base URL;
+    4xx responses (including rate limiting) are the caller's concern and do
+    not.
+    """
+    return isinstance(
+        error,
+        (ApiWrapperUnavailableError, ApiWrapperConnectionError, ApiWrapperTimeoutError),
+    ) and not isinstance(error, ApiWrapperDeadlineError)
+
+
+class EndpointHealth:
+    """
+    Rolling statistics for one base URL.
+
+    Args:
+        base_url (str): The base URL being tracked.
+        window (int): Number of most recent requests, and of most recent
+            probes, kept.
+    """
+
+    __slots__ = (
+        "base_url",
+        "_samples",
+        "_probes",
+        "_sorted",
+        "requests",
+        "errors",
+        "last_error",
+        "last_checked",
+        "hedges",
+        "hedge_wins",
+    )
+
+    def __init__(self, base_url, window):
+        self.base_url = base_url
+        self._samples = deque(maxlen=window)
+        self._probes = deque(maxlen=window)
+        self._sorted = None
+        self.requests = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_checked = None
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency, ok, error=None, now=None, probe=False):
+        if probe:
+            self._probes.append((latency, ok))
+        else:
+            self._samples.append((latency, ok))
+            self._sorted = None
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+            self.last_error = str(error) if error is not None else None
+        self.last_checked = now
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+    @property
+    def probes(self) -> int:
+        return len(self._probes)
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of failed requests and probes in their windows."""
+        total = len(self._samples) + len(self._probes)
+        if not total:
+            return 0.0
+        failed = sum(1 for _, ok in self._samples if not ok)
+        failed += sum(1 for _, ok in self._probes if not ok)
+        return failed / total
+
+    def percentile(self, q: float):
+        """
+        Return the ``q``-th latency percentile of successful requests, or None.
+
+        Probes are left out.
+        """
+        latencies = self._sorted
+        if latencies is None:
+            latencies = self._sorted = sorted(
+                latency for latency, ok in self._samples if ok
+            )
+        if not latencies:
+            return None
+        rank = max(0, math.ceil(q / 100 * len(latencies)) - 1)
+        return latencies[rank]
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "probes": self.probes,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "last_error": self.last_error,
+            "last_checked": self.last_checked,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else None,
+        }
+
+
+class HealthMonitor:
+    """
+    Tracks rolling latency and error rates per base URL.
+
+    Args:
+        window (int, optional): Requests kept per base URL. Defaults to 200.
+        error_threshold (float, optional): Error rate above which a base URL
+            is considered unhealthy. Defaults to 0.5.
+        min_samples (int, optional): Requests needed before a base URL can be
+            judged unhealthy or its latency used for hedging. Defaults to 10.
+        hedge_percentile (float, optional): Latency percentile after which an
+            idempotent GET is hedged. Defaults to 95.
+        probe_timeout (float, optional): Timeout of probe requests in seconds.
+            Defaults to 2.
+    """
+
+    def __init__(
+        self,
+        window=200,
+        error_threshold=0.5,
+        min_samples=10,
+        hedge_percentile=95,
+        probe_timeout=2.0,
+    ):
+        self.window = window
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.hedge_percentile = hedge_percentile
+        self.probe_timeout = probe_timeout
+        self._lock = threading.RLock()
+        self._endpoints = {}
+        self._stop = threading.Event()
+        self._thread = None
+        reinitialize_after_fork(self)
+
+    def __getstate__(self):
+        # Pickled by configuration: the copy starts without statistics.
+        return {
+            "window": self.window,
+            "error_threshold": self.error_threshold,
+            "min_samples": self.min_samples,
+            "hedge_percentile": self.hedge_percentile,
+            "probe_timeout": self.probe_timeout,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _after_fork(self):
+        # Statistics carry over; probing stops, as its thread is gone.
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, base_url: str) -> EndpointHealth:
+        """Return the statistics for ``base_url``, creating them if needed."""
+        health = self._endpoints.get(base_url)
+        if health is None:
+            with self._lock:
+                health = self._endpoints.setdefault(
+                    base_url, EndpointHealth(base_url, self.window)
+                )
+        return health
+
+    def record(self, base_url: str, latency: float, ok: bool, error=None, probe=False):
+        """
+        Record the outcome of one request to ``base_url``.
+
+        Args:
+            probe (bool, optional): The request was a health probe; its
+                latency is kept out of the hedging percentile. Defaults to
+                False.
+        """
+        health = self.get(base_url)
+        with self._lock:
+            health.record(latency, ok, error, now=time.time(), probe=probe)
+
+    def record_hedge(self, base_url: str, won: bool):
+        """
+        Record a hedged request whose primary attempt went to ``base_url``.
+
+        Args:
+            base_url (str): Base URL of the primary attempt.
+            won (bool): Whether the backup request answered first.
+        """
+        health = self.get(base_url)
+        with self._lock:
+            health.hedges += 1
+            health.hedge_wins += won
+
+    def is_healthy(self, base_url: str) -> bool:
+        health = self._endpoints.get(base_url)
+        if health is None or health.samples + health.probes < self.min_samples:
+            return True
+        with self._lock:
+            return health.error_rate <= self.error_threshold
+
+    def hedge_delay(self, base_url: str):
+        """
+        Return how long to wait before hedging a request to ``base_url``.
+
+        Returns:
+            float: The ``hedge_percentile`` latency, or None while there are
+            fewer than ``min_samples`` requests (probes excluded) to base it
+            on.
+        """
+        health = self._endpoints.get(base_url)
+        if health is None or health.samples < self.min_samples:
+            return None
+        with self._lock:
+            return health.percentile(self.hedge_percentile)
+
+    def rank(self, base_urls) -> list:
+        """
+        Order ``base_urls`` for routing.
+
+        Healthy base URLs keep their configured order (the primary first);
+        unhealthy ones follow, least failing first.
+        """
+        healthy = []
+        unhealthy = []
+        with self._lock:
+            for base_url in base_urls:
+                if self.is_healthy(base_url):
+                    healthy.append(base_url)
+                else:
+                    unhealthy.append(base_url)
+            unhealthy.sort(key=lambda base_url: self._endpoints[base_url].error_rate)
+        return healthy + unhealthy
+
+    def probe(self, client):
+        """
+        Send a lightweight HEAD request to each of ``client``'s base URLs.
+
+        Any HTTP response below 500 counts as healthy. Probes count towards
+        the error rate but not the hedging latency.
+        """
+        transport = client.transport
+        send = requests.request if transport is None else transport.request
+        for base_url in client.get_base_urls():
+            started = time.perf_counter()
+            try:
+                response = send("HEAD", base_url, timeout=self.probe_timeout)
+                ok = response.status_code < 500
+                error = None if ok else f"HTTP {response.status_code}"
+            except requests.exceptions.RequestException as e:
+                ok, error = False, e
+            self.record(base_url, time.perf_counter() - started, ok, error, probe=True)
+
+    def start_probing(self, client, interval: float):
+        """Probe ``client``'s base URLs every ``interval`` seconds in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(client, interval), name="ecraspay-health"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop_probing(self):
+        """Stop the background probes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self) -> dict:
+        """
+        Return the health state of every base URL as a JSON-serialisable dict.
+
+        Example:
+            {"generated_at": 1700000000.0, "base_urls": {
+                "https://api.ercaspay.com/api/v1": {"healthy": True,
+                "error_rate": 0.0, "p95": 0.21, ...}}}
+        """
+        with self._lock:
+            base_urls = {
+                base_url: dict(health.to_dict(), healthy=self.is_healthy(base_url))
+                for base_url, health in self._endpoints.items()
+            }
+        hedges = sum(stats["hedges"] for stats in base_urls.values())
+        wins = sum(stats["hedge_wins"] for stats in base_urls.values())
+        return {
+            "generated_at": time.time(),
+            "base_urls": base_urls,
+            "hedges": {
+                "sent": hedges,
+                "won": wins,
+                "win_rate": wins / hedges if hedges else None,
+            },
+        }
+
+    def to_json(self) -> str:
+        """Return ``snapshot`` as a JSON string."""
+        return json.dumps(self.snapshot())
+
+    def _run(self, client, interval):
+        while not self._stop.is_set():
+            self.probe(client)
+            self._stop.wait(interval)
@@ -0,0 +1,262 @@
+"""
+This module provides the structured, redacting logger used by the SDK.
+
+Messages use ``logging``'s %-style arguments, and both the arguments and the
+structured fields are wrapped so that formatting and redaction only happen when
+a handler actually emits the record. When a level is disabled a call costs a
+single ``isEnabledFor`` check. Success-path messages can be sampled, captured
+response bodies are bounded, and card numbers, CVVs, PINs and OTPs are masked
+using precompiled patterns.
+
+Example:
+    import logging
+    from ecraspay.log import configure_logging
+
+    logging.basicConfig(level=logging.INFO)
+    # Log 1 in 100 successful requests and at most 256 characters of bodies.
+    configure_logging(sample_rate=0.01, max_body=256)
+"""
+
+import itertools
+import logging
+import re
+
+REDACTED = "[REDACTED]"
+
+SENSITIVE_KEYS = frozenset(
+    {
+        "pan",
+        "cardnumber",
+        "card_number",
+        "cvv",
+        "cvv2",
+        "pin",
+        "otp",
+        "expirydate",
+        "expiry_date",
+        "expiration_date",
+        "payload",
+        "card_payload",
+    }
+)
+
+# Candidate card numbers: digit runs, optionally grouped with spaces or dashes.
+# The digit count (13-19) and the Luhn checksum are checked in ``_mask_pan``,
+# which keeps the pattern free of nested repetition and therefore cheap to scan
+# with, and leaves references, timestamps and amounts readable.
+_PAN_PATTERN = re.compile(r"\d[\d -]{11,21}\d")
+# "key": "value" / "key": 123 pairs in JSON bodies.
+_JSON_PATTERN = re.compile(
+    r'("(?:pan|cardNumber|card_number|cvv2?|pin|otp|expiryDate|payload)"\s*:\s*)'
+    r'(?:"[^"]*"|\d+)',
+    re.IGNORECASE,
+)
+# key=value pairs in query strings and form bodies.
+_PAIR_PATTERN = re.compile(
+    r"\b(pan|cardNumber|card_number|cvv2?|pin|otp)=([^&\s]+)", re.IGNORECASE
+)
+
+
+# Luhn sums of a doubled digit, indexed by the digit.
+_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _luhn_valid(digits: str) -> bool:
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        value = ord(digit) - 48
+        total += _DOUBLED[value] if index % 2 else value
+    return total % 10 == 0
+
+
+def _mask_pan(match) -> str:
+    candidate = match.group()
+    digits = candidate.replace(" ", "").replace("-", "")
+    if 13 <= len(digits) <= 19 and _luhn_valid(digits):
+        return f"****{digits[-4:]}"
+    return candidate
+
+
+def redact(text) -> str:
+    """
+    Mask card numbers, CVVs, PINs and OTPs in a piece of text.
+
+    Card numbers, i.e. Luhn-valid runs of 13-19 digits, keep their last four
+    digits; other numbers such as references and amounts are left as they are.
+
+    Args:
+        text (str): Text to redact; other values are converted with ``str``.
+
+    Returns:
+        str: The redacted text.
+    """
+    text = str(text)
+    if '"' in text:
+        text = _JSON_PATTERN.sub(rf'\1"{REDACTED}"', text)
+    if "=" in text:
+        text = _PAIR_PATTERN.sub(rf"\1={REDACTED}", text)
+    return _PAN_PATTERN.sub(_mask_pan, text)
+
+
+def redact_fields(fields: dict) -> dict:
+    """
+    Return a copy of ``fields`` with sensitive values masked.
+
+    Values under sensitive keys are replaced entirely; nested mappings are
+    redacted recursively and strings are passed through ``redact``.
+    """
+    clean = {}
+    for key, value in fields.items():
+        if str(key).lower() in SENSITIVE_KEYS:
+            clean[key] = REDACTED
+        elif isinstance(value, dict):
+            clean[key] = redact_fields(value)
+        elif isinstance(value, str):
+            clean[key] = redact(value)
+        else:
+            clean[key] = value
+    return clean
+
+
+def truncate(text, limit: int) -> str:
+    """Bound ``text`` to ``limit`` characters, noting how much was dropped."""
+    text = str(text)
+    if limit is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}...[{len(text) - limit} more characters]"
+
+
+class _Lazy:
+    """Defers redaction (and truncation) of a log argument until it is formatted."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        if self.limit is None:
+            return redact(self.value)
+        # Redact a slightly larger window so a card number straddling the
+        # cut-off is still recognised, then bound the result.
+        return truncate(redact(str(self.value)[: self.limit + 32]), self.limit)
+
+    __repr__ = __str__
+
+
+class _LazyFields:
+    """Structured fields attached to a record, redacted when first rendered."""
+
+    __slots__ = ("fields", "_clean")
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._clean = None
+
+    def as_dict(self) -> dict:
+        if self._clean is None:
+            self._clean = redact_fields(self.fields)
+        return self._clean
+
+    def __str__(self):
+        return " ".join(f"{key}={value}" for key, value in self.as_dict().items())
+
+
+class StructuredLogger:
+    """
+    A thin wrapper around ``logging.Logger`` with lazy redaction and sampling.
+
+    Keyword arguments passed to the logging methods become structured fields,
+    available to handlers as ``record.ecraspay`` (call ``as_dict()`` for the
+    redacted mapping). Positional arguments are redacted when the message is
+    formatted, so messages should only use ``%s`` placeholders.
+
+    Args:
+        name (str): Name of the underlying logger.
+        sample_rate (float, optional): Fraction of ``success`` messages to
+            emit. Defaults to 1.0 (all of them).
+        max_body (int, optional): Maximum number of characters of a response
+            body passed to ``body``. Defaults to 512.
+    """
+
+    def __init__(self, name, sample_rate=1.0, max_body=512):
+        self.logger = logging.getLogger(name)
+        self.max_body = max_body
+        self.set_sample_rate(sample_rate)
+
+    def set_sample_rate(self, sample_rate: float):
+        """Emit roughly ``sample_rate`` of the ``success`` messages."""
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1.")
+        self.sample_rate = sample_rate
+        self._sample_every = round(1 / sample_rate) if sample_rate else 0
+        self._counter = itertools.count()
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level, msg, *args, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(
+            level,
+            msg,
+            *[arg if isinstance(arg, _Lazy) else _Lazy(arg) for arg in args],
+            extra={"ecraspay": _LazyFields(fields)},
+        )
+
+    def debug(self, msg, *args, **fields):
+        self.log(logging.DEBUG, msg, *args, **fields)
+
+    def info(self, msg, *args, **fields):
+        self.log(logging.INFO, msg, *args, **fields)
+
+    def warning(self, msg, *args, **fields):
+        self.log(logging.WARNING, msg, *args, **fields)
+
+    def error(self, msg, *args, **fields):
+        self.log(logging.ERROR, msg, *args, **fields)
+
+    def success(self, msg, *args, **fields):
+        """Log a success-path message at INFO level, subject to sampling."""
+        if not self.logger.isEnabledFor(logging.INFO) or not self._sample_every:
+            return
+        if self._sample_every > 1 and next(self._counter) % self._sample_every:
+            return
+        self.log(logging.INFO, msg, *args, **fields)
+
+    def body(self, text):
+        """Wrap a response body so it is bounded and redacted when logged."""
+        return _Lazy(text, self.max_body)
+
+
+_LOGGERS = {}
+_SETTINGS = {"sample_rate": 1.0, "max_body": 512}
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Return the shared ``StructuredLogger`` for ``name``."""
+    logger = _LOGGERS.get(name)
+    if logger is None:
+        logger = _LOGGERS.setdefault(name, StructuredLogger(name, **_SETTINGS))
+    return logger
+
+
+def configure_logging(sample_rate: float = None, max_body: int = None):
+    """
+    Configure sampling and body capture for every SDK logger.
+
+    Args:
+        sample_rate (float, optional): Fraction of success messages to emit.
+        max_body (int, optional): Maximum characters of response bodies logged.
+    """
+    if sample_rate is not None:
+        _SETTINGS["sample_rate"] = sample_rate
+    if max_body is not None:
+        _SETTINGS["max_body"] = max_body
+    for logger in _LOGGERS.values():
+        if sample_rate is not None:
+            logger.set_sample_rate(sample_rate)
+        if max_body is not None:
+            logger.max_body = max_body
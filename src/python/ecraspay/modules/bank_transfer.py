@@ -12,9 +12,34 @@ Example:
         transaction_ref="txn_12345"
     )
     print(response)
+
+    # Repeated calls for the same reference reuse the issued account until it
+    # expires; concurrent calls share a single gateway request.
+    response = api.initialize_bank_transfer(transaction_ref="txn_12345")
 """
 
+import copy
+
 from ecraspay.base import BaseAPI
+from ecraspay.cache import TTLCache
+
+
+def account_ttl(response: dict, default: float) -> float:
+    """
+    Return how long (in seconds) issued account details remain valid.
+
+    Uses the ``expires_in`` field (in minutes) of the response body when
+    present. Unsuccessful responses are not cached.
+    """
+    if not isinstance(response, dict) or response.get("requestSuccessful") is False:
+        return 0
+    body = response.get("responseBody")
+    if not isinstance(body, dict):
+        return 0
+    try:
+        return float(body["expires_in"]) * 60
+    except (KeyError, TypeError, ValueError):
+        return default
 
 
 class BankTransfer(BaseAPI):
@@ -23,18 +48,33 @@ class BankTransfer(BaseAPI):
 
     This class provides a method to initialize bank transfers by requesting
     bank account details for a given transaction reference.
+
+    Issued account details are cached per transaction reference in
+    ``account_cache`` until they expire. Every client has its own cache,
+    created on first use; clients of the same merchant can share one by
+    setting ``account_cache`` to the same ``TTLCache``.
     """
 
-    def initialize_bank_transfer(self, transaction_ref: str) -> dict:
+    # Used when the gateway response does not say when the account expires.
+    DEFAULT_ACCOUNT_TTL = 30 * 60
+    ACCOUNT_CACHE_SIZE = 4096
+    account_cache = None
+
+    def initialize_bank_transfer(
+        self, transaction_ref: str, use_cache: bool = True
+    ) -> dict:
         """
         Initialize a bank transfer by requesting bank account details.
 
         Args:
             transaction_ref (str): Unique reference for the transaction.
+            use_cache (bool, optional): Reuse account details already issued
+                for ``transaction_ref`` and share in-flight requests. Defaults
+                to True.
 
         Returns:
             dict: The API response containing the bank account details
-            for the transfer.
+            for the transfer. Cached responses are returned as copies.
 
         Example:
             response = api.initialize_bank_transfer(
@@ -42,9 +82,34 @@ class BankTransfer(BaseAPI):
             )
             print(response)
         """
-        return self._make_request(
-            method="GET",
-            endpoint=(
-                f"/payment/bank-transfer/request-bank-account/" f"{transaction_ref}"
-            ),
+        if not use_cache:
+            return self._request_account(transaction_ref)
+        response = self._get_account_cache().get_or_load(
+            self._account_key(transaction_ref),
+            lambda: self._request_account(transaction_ref),
+            ttl=lambda response: account_ttl(response, self.DEFAULT_ACCOUNT_TTL),
+        )
+        # Callers may change the response; the cached one must not change.
+        return copy.deepcopy(response)
+
+    def forget_bank_transfer(self, transaction_ref: str):
+        """
+        Drop cached account details, e.g. once the transfer has been settled.
+
+        Args:
+            transaction_ref (str): Unique reference for the transaction.
+        """
+        self._get_account_cache().delete(self._account_key(transaction_ref))
+
+    def _get_account_cache(self):
+        if self.account_cache is None:
+            self.account_cache = TTLCache(maxsize=self.ACCOUNT_CACHE_SIZE)
+        return self.account_cache
+
+    def _account_key(self, transaction_ref):
+        return (self.base_url, self.api_key, transaction_ref)
+
+    def _request_account(self, transaction_ref):
+        return self._call(
+            "bank_transfer.request_account", {"transaction_ref": transaction_ref}
         )
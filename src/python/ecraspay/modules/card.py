@@ -48,16 +48,13 @@ class Card(BaseAPI):
             )
             print(response)
         """
-        payload = {
-            "payload": card_payload,
-            "transactionReference": transaction_ref,
-            "deviceDetails": device_details,
-        }
-
-        return self._make_request(
-            method="POST",
-            endpoint="/payment/cards/initialize",
-            data=payload,
+        return self._call(
+            "card.initiate",
+            {
+                "card_payload": card_payload,
+                "transaction_ref": transaction_ref,
+                "device_details": device_details,
+            },
         )
 
     def submit_otp(self, otp: str, gateway_ref: str) -> dict:
@@ -75,16 +72,7 @@ class Card(BaseAPI):
             response = api.submit_otp(otp="123456", gateway_ref="gateway_001")
             print(response)
         """
-        payload = {
-            "otp": otp,
-            "gatewayReference": gateway_ref,
-        }
-
-        return self._make_request(
-            method="POST",
-            endpoint="/payment/cards/otp/submit/",
-            data=payload,
-        )
+        return self._call("card.submit_otp", {"otp": otp, "gateway_ref": gateway_ref})
 
     def resend_otp(self, gateway_ref: str) -> dict:
         """
@@ -100,15 +88,7 @@ class Card(BaseAPI):
             response = api.resend_otp(gateway_ref="gateway_001")
             print(response)
         """
-        payload = {
-            "gatewayReference": gateway_ref,
-        }
-
-        return self._make_request(
-            method="POST",
-            endpoint="/payment/cards/otp/resend/",
-            data=payload,
-        )
+        return self._call("card.resend_otp", {"gateway_ref": gateway_ref})
 
     def get_card_details(self, transaction_ref: str) -> dict:
         """
@@ -124,10 +104,7 @@ class Card(BaseAPI):
             response = api.get_card_details(transaction_ref="txn_12345")
             print(response)
         """
-        return self._make_request(
-            method="GET",
-            endpoint=f"/payment/cards/details/{transaction_ref}",
-        )
+        return self._call("card.details", {"transaction_ref": transaction_ref})
 
     def verify_card_payment(self, transaction_ref: str) -> dict:
         """
@@ -143,12 +120,4 @@ class Card(BaseAPI):
             response = api.verify_card_payment(transaction_ref="txn_12345")
             print(response)
         """
-        payload = {
-            "transactionReference": transaction_ref,
-        }
-
-        return self._make_request(
-            method="POST",
-            endpoint="/payment/cards/verify/",
-            data=payload,
-        )
+        return self._call("card.verify", {"transaction_ref": transaction_ref})
@@ -15,80 +15,112 @@ Example:
     print(response)
 """
 
+from numbers import Number
+
 from ecraspay.base import BaseAPI
+from ecraspay.batch import BatchRun
+from ecraspay.modules.initiation import TransactionInitiationMixin
+from ecraspay.settled import SettledLookupMixin
+
+REQUIRED_SPEC_FIELDS = (
+    "amount",
+    "payment_reference",
+    "customer_name",
+    "customer_email",
+)
+
+
+def _validate_spec(spec) -> list:
+    """Return a list of problems with a single ``initiate_transaction`` spec."""
+    if not isinstance(spec, dict):
+        return ["spec must be a dict of initiate_transaction arguments"]
+    problems = [
+        f"missing '{field}'" for field in REQUIRED_SPEC_FIELDS if not spec.get(field)
+    ]
+    amount = spec.get("amount")
+    if amount is not None and (
+        isinstance(amount, bool) or not isinstance(amount, Number) or amount <= 0
+    ):
+        problems.append("'amount' must be a positive number")
+    email = spec.get("customer_email")
+    if email and "@" not in str(email):
+        problems.append("'customer_email' is not a valid email address")
+    return problems
 
 
-class Checkout(BaseAPI):
+class Checkout(TransactionInitiationMixin, SettledLookupMixin, BaseAPI):
     """
     A class for interacting with the Checkout API.
+
+    Verify lookups go through ``settled_cache`` when it is set (see
+    ``ecraspay.settled``).
     """
 
-    def initiate_transaction(
-        self,
-        amount: int,
-        payment_reference: str,
-        customer_name: str,
-        customer_email: str,
-        redirect_url: str = None,
-        description: str = None,
-        fee_bearer: str = None,
-        currency: str = "usd",
-        payment_method: str = "card",
-        customer_phone: str = None,
-        metadata: dict = None,
-        **kwargs,
-    ) -> dict:
+    def verify_transaction(self, transaction_id: str, use_cache: bool = True) -> dict:
         """
-        Initiate a new transaction.
+        Verify a transaction.
 
         Args:
-            amount (int): Amount to be paid (smallest currency unit, e.g., usd for USD).
-            payment_reference (str): Unique reference for the transaction.
-            customer_name (str): Customer's name.
-            customer_email (str): Customer's email.
-            redirect_url (str, optional): URL to redirect the customer after payment.
-            description (str, optional): Description of the transaction.
-            fee_bearer (str, optional): Fee bearer ('customer' or 'merchant').
-            currency (str, optional): Transaction currency (default: 'usd').
-            payment_method (str, optional): Payment method (e.g., 'card').
-            customer_phone (str, optional): Customer's phone number.
-            metadata (dict, optional): Additional metadata for the transaction.
-            **kwargs: Extra parameters to include in the transaction.
+            transaction_id (str): Transaction ID.
+            use_cache (bool, optional): Use ``settled_cache``, if set.
+                Defaults to True.
 
         Returns:
             dict: API response.
         """
-        payload = {
-            key: value
-            for key, value in {
-                "amount": amount,
-                "paymentReference": payment_reference,
-                "customerName": customer_name,
-                "customerEmail": customer_email,
-                "redirectUrl": redirect_url,
-                "description": description,
-                "feeBearer": fee_bearer,
-                "currency": currency,
-                "paymentMethods": payment_method,
-                "customerPhoneNumber": customer_phone,
-                "metadata": metadata,
-            }.items()
-            if value is not None
-        }
-        payload.update(kwargs)
-
-        return self._make_request("POST", "/payment/initiate", data=payload)
-
-    def verify_transaction(self, transaction_id: str) -> dict:
+        return self._lookup("checkout.verify", transaction_id, use_cache)
+
+    def initiate_many(
+        self, specs, concurrency: int = 8, callback=None, sink=None
+    ) -> BatchRun:
         """
-        Verify a transaction.
+        Initiate many checkout transactions concurrently.
+
+        Every spec is validated before any request is sent. The returned run
+        streams the transactions through a bounded thread pool; iterate over it
+        to receive a ``BatchResult`` per spec as it completes, or call
+        ``wait()`` when only the callback or sink is needed. Failed requests
+        are reported as results and do not abort the batch.
 
         Args:
-            transaction_id (str): Transaction ID.
+            specs (iterable): Dicts of ``initiate_transaction`` keyword arguments.
+            concurrency (int, optional): Maximum number of concurrent requests.
+                Defaults to 8.
+            callback (callable, optional): Called with each ``BatchResult``.
+            sink (file-like, optional): Text stream receiving one NDJSON line
+                per result.
 
         Returns:
-            dict: API response.
+            BatchRun: The pending batch.
+
+        Raises:
+            ValueError: If any spec is invalid or a payment reference repeats.
+
+        Example:
+            run = api.initiate_many(specs, concurrency=16, sink=open("out.ndjson", "w"))
+            for result in run:
+                if not result.ok:
+                    print(result.key, result.error)
         """
-        return self._make_request(
-            "GET", f"/payment/transaction/verify/{transaction_id}"
+        specs = list(specs)
+        errors = []
+        seen = set()
+        for index, spec in enumerate(specs):
+            problems = _validate_spec(spec)
+            if not problems:
+                reference = spec["payment_reference"]
+                if reference in seen:
+                    problems.append(f"duplicate payment_reference '{reference}'")
+                seen.add(reference)
+            errors.extend(f"spec {index}: {problem}" for problem in problems)
+        if errors:
+            raise ValueError("Invalid checkout specs: " + "; ".join(errors))
+
+        return BatchRun(
+            lambda spec: self.initiate_transaction(**spec),
+            specs,
+            concurrency=concurrency,
+            key=lambda spec: spec["payment_reference"],
+            callback=callback,
+            sink=sink,
         )
@@ -0,0 +1,79 @@
+"""
+This module provides the shared transaction initiation logic used by both the
+Checkout and Transaction clients.
+
+Example:
+    from ecraspay.checkout import Checkout
+
+    api = Checkout(api_key="your_api_key", environment="sandbox")
+    response = api.initiate_transaction(
+        amount=1000,
+        payment_reference="unique_ref_123",
+        customer_name="John Doe",
+        customer_email="johndoe@example.com",
+    )
+    print(response)
+"""
+
+
+class TransactionInitiationMixin:
+    """
+    Mixin adding ``initiate_transaction`` to a ``BaseAPI`` subclass.
+
+    The arguments are passed by name to the prebuilt ``payment.initiate``
+    request builder, which copies them into the payload and leaves out the
+    optional ones that are None.
+    """
+
+    def initiate_transaction(
+        self,
+        amount: int,
+        payment_reference: str,
+        customer_name: str,
+        customer_email: str,
+        redirect_url: str = None,
+        description: str = None,
+        fee_bearer: str = None,
+        currency: str = "usd",
+        payment_method: str = "card",
+        customer_phone: str = None,
+        metadata: dict = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Initiate a new transaction.
+
+        Args:
+            amount (int): Amount to be paid (smallest currency unit, e.g., usd for USD).
+            payment_reference (str): Unique reference for the transaction.
+            customer_name (str): Customer's name.
+            customer_email (str): Customer's email.
+            redirect_url (str, optional): URL to redirect the customer after payment.
+            description (str, optional): Description of the transaction.
+            fee_bearer (str, optional): Fee bearer ('customer' or 'merchant').
+            currency (str, optional): Transaction currency (default: 'usd').
+            payment_method (str, optional): Payment method (e.g., 'card').
+            customer_phone (str, optional): Customer's phone number.
+            metadata (dict, optional): Additional metadata for the transaction.
+            **kwargs: Extra parameters to include in the transaction.
+
+        Returns:
+            dict: API response.
+        """
+        return self._call(
+            "payment.initiate",
+            {
+                "amount": amount,
+                "payment_reference": payment_reference,
+                "customer_name": customer_name,
+                "customer_email": customer_email,
+                "redirect_url": redirect_url,
+                "description": description,
+                "fee_bearer": fee_bearer,
+                "currency": currency,
+                "payment_method": payment_method,
+                "customer_phone": customer_phone,
+                "metadata": metadata,
+            },
+            extra=kwargs,
+        )
@@ -22,125 +22,126 @@ Example:
 """
 
 from ecraspay.base import BaseAPI
+from ecraspay.batch import BatchRun, ProcessBatchRun
+from ecraspay.modules.initiation import TransactionInitiationMixin
+from ecraspay.settled import SettledLookupMixin
 
 
-class Transaction(BaseAPI):
+class Transaction(TransactionInitiationMixin, SettledLookupMixin, BaseAPI):
     """
     A class for managing transactions through the API.
 
     This class provides methods for fetching transaction details, verifying
     transactions, checking transaction status, canceling transactions, and
     initiating new transactions.
+
+    Details and verify lookups go through ``settled_cache`` when it is set
+    (see ``ecraspay.settled``).
     """
 
-    def get_transaction_details(self, transaction_ref: str) -> dict:
+    def get_transaction_details(
+        self, transaction_ref: str, use_cache: bool = True
+    ) -> dict:
         """
         Fetch the details of a transaction.
 
         Args:
             transaction_ref (str): Unique reference for the transaction.
+            use_cache (bool, optional): Use ``settled_cache``, if set.
+                Defaults to True.
 
         Returns:
             dict: API response containing transaction details.
         """
-        return self._make_request(
-            method="GET", endpoint=f"/payment/details/{transaction_ref}"
-        )
+        return self._lookup("transaction.details", transaction_ref, use_cache)
 
-    def verify_transaction(self, transaction_ref: str) -> dict:
+    def verify_transaction(self, transaction_ref: str, use_cache: bool = True) -> dict:
         """
         Verify the status of a transaction.
 
         Args:
             transaction_ref (str): Unique reference for the transaction.
+            use_cache (bool, optional): Use ``settled_cache``, if set.
+                Defaults to True.
 
         Returns:
             dict: API response confirming the transaction status.
         """
-        return self._make_request(
-            method="GET", endpoint=f"/payment/verify/{transaction_ref}"
-        )
+        return self._lookup("transaction.verify", transaction_ref, use_cache)
 
-    def get_transaction_status(self, transaction_ref: str) -> dict:
+    def verify_many(
+        self,
+        transaction_refs,
+        concurrency: int = 8,
+        processes: int = None,
+        callback=None,
+        sink=None,
+    ) -> BatchRun:
         """
-        Fetch the status of a transaction.
+        Verify many transactions concurrently.
+
+        The returned run yields a ``BatchResult`` per reference, keyed by the
+        reference, as it completes; failed lookups are reported as results.
+        With ``processes``, the references are spread over that many worker
+        processes, each sending up to ``concurrency`` requests; the client is
+        sent to them by configuration (see ``ecraspay.process``).
 
         Args:
-            transaction_ref (str): Unique reference for the transaction.
+            transaction_refs (iterable): References to verify.
+            concurrency (int, optional): Concurrent requests, per process when
+                ``processes`` is set. Defaults to 8.
+            processes (int, optional): Worker processes. Defaults to None:
+                threads in this process only.
+            callback (callable, optional): Called with each ``BatchResult``.
+            sink (file-like, optional): Text stream receiving one NDJSON line
+                per result.
 
         Returns:
-            dict: API response containing the transaction status.
+            BatchRun: The pending batch.
+
+        Example:
+            run = api.verify_many(references, concurrency=16, processes=4)
+            settled = {result.key: result.response for result in run if result.ok}
         """
-        return self._make_request(
-            method="GET", endpoint=f"/payment/status/{transaction_ref}"
+        if processes is None:
+            return BatchRun(
+                self.verify_transaction,
+                transaction_refs,
+                concurrency=concurrency,
+                key=str,
+                callback=callback,
+                sink=sink,
+            )
+        return ProcessBatchRun(
+            self.verify_transaction,
+            transaction_refs,
+            processes=processes,
+            concurrency=concurrency,
+            key=str,
+            callback=callback,
+            sink=sink,
         )
 
-    def cancel_transaction(self, transaction_ref: str) -> dict:
+    def get_transaction_status(self, transaction_ref: str) -> dict:
         """
-        Cancel a transaction.
+        Fetch the status of a transaction.
 
         Args:
             transaction_ref (str): Unique reference for the transaction.
 
         Returns:
-            dict: API response confirming the transaction cancellation.
+            dict: API response containing the transaction status.
         """
-        return self._make_request(
-            method="GET", endpoint=f"/payment/cancel/{transaction_ref}"
-        )
+        return self._call("transaction.status", {"transaction_ref": transaction_ref})
 
-    def initiate_transaction(
-        self,
-        amount: int,
-        payment_reference: str,
-        customer_name: str,
-        customer_email: str,
-        redirect_url: str = None,
-        description: str = None,
-        fee_bearer: str = None,
-        currency: str = "usd",
-        payment_method: str = "card",
-        customer_phone: str = None,
-        metadata: dict = None,
-        **kwargs,
-    ) -> dict:
+    def cancel_transaction(self, transaction_ref: str) -> dict:
         """
-        Initiate a new transaction.
+        Cancel a transaction.
 
         Args:
-            amount (int): Amount to be paid (smallest currency unit, e.g., usd for USD).
-            payment_reference (str): Unique reference for the transaction.
-            customer_name (str): Customer's name.
-            customer_email (str): Customer's email.
-            redirect_url (str, optional): URL to redirect the customer after payment.
-            description (str, optional): Description of the transaction.
-            fee_bearer (str, optional): Fee bearer ('customer' or 'merchant').
-            currency (str, optional): Transaction currency (default: 'usd').
-            payment_method (str, optional): Payment method (e.g., 'card').
-            customer_phone (str, optional): Customer's phone number.
-            metadata (dict, optional): Additional metadata for the transaction.
-            **kwargs: Extra parameters to include in the transaction.
+            transaction_ref (str): Unique reference for the transaction.
 
         Returns:
-            dict: API response.
+            dict: API response confirming the transaction cancellation.
         """
-        payload = {
-            key: value
-            for key, value in {
-                "amount": amount,
-                "paymentReference": payment_reference,
-                "customerName": customer_name,
-                "customerEmail": customer_email,
-                "redirectUrl": redirect_url,
-                "description": description,
-                "feeBearer": fee_bearer,
-                "currency": currency,
-                "paymentMethods": payment_method,
-                "customerPhoneNumber": customer_phone,
-                "metadata": metadata,
-            }.items()
-            if value is not None
-        }
-        payload.update(kwargs)
-
-        return self._make_request("POST", "/payment/initiate", data=payload)
+        return self._call("transaction.cancel", {"transaction_ref": transaction_ref})
@@ -14,9 +14,28 @@ Example:
     # Get the list of supported banks
     response = api.get_bank_list()
     print(response)
+
+    # Resolve free-form bank names locally before initiating the payment
+    response = api.initiate_ussd_payment(
+        bank_name="zenith bnak", transaction_ref="txn_12345", resolve_bank=True
+    )
 """
 
+import threading
+
+from ecraspay.banks import BankDirectory
 from ecraspay.base import BaseAPI
+from ecraspay.process import call_after_fork
+
+# Guards the lazy creation of every client's bank directory, so concurrent
+# first calls fetch the bank list once.
+_DIRECTORY_LOCK = threading.Lock()
+
+
+@call_after_fork
+def _reset_directory_lock():
+    global _DIRECTORY_LOCK
+    _DIRECTORY_LOCK = threading.Lock()
 
 
 class USSD(BaseAPI):
@@ -26,29 +45,44 @@ class USSD(BaseAPI):
     This class provides methods for initiating USSD payments and retrieving the list of supported banks.
     """
 
-    def initiate_ussd_payment(self, bank_name: str, transaction_ref: str) -> dict:
+    _bank_directory = None
+
+    def initiate_ussd_payment(
+        self, bank_name: str, transaction_ref: str, resolve_bank: bool = False
+    ) -> dict:
         """
         Initiate a USSD payment by requesting a USSD code for a specific bank.
 
         Args:
             bank_name (str): Name of the bank to process the USSD payment.
             transaction_ref (str): Unique reference for the transaction.
+            resolve_bank (bool, optional): Resolve ``bank_name`` to the exact
+                supported name with the local bank directory first. Defaults
+                to False.
 
         Returns:
             dict: The API response containing the USSD code and payment instructions.
 
+        Raises:
+            ValueError: If ``resolve_bank`` is set and no supported bank matches.
+
         Example:
             response = api.initiate_ussd_payment(bank_name="Bank ABC", transaction_ref="txn_12345")
             print(response)
         """
-        payload = {
-            "bank_name": bank_name,
-        }
-
-        return self._make_request(
-            method="POST",
-            endpoint=f"/payment/ussd/request-ussd-code/{transaction_ref}",
-            data=payload,
+        if resolve_bank:
+            directory = self.get_bank_directory()
+            resolved = directory.resolve(bank_name)
+            if resolved is None:
+                suggestions = ", ".join(directory.complete(bank_name, limit=3))
+                raise ValueError(
+                    f"Unknown bank '{bank_name}'."
+                    + (f" Did you mean: {suggestions}?" if suggestions else "")
+                )
+            bank_name = resolved
+        return self._call(
+            "ussd.initiate",
+            {"transaction_ref": transaction_ref, "bank_name": bank_name},
         )
 
     def get_bank_list(self) -> dict:
@@ -62,7 +96,29 @@ class USSD(BaseAPI):
             response = api.get_bank_list()
             print(response)
         """
-        return self._make_request(
-            method="GET",
-            endpoint="/payment/ussd/supported-banks",
-        )
+        return self._call("ussd.banks")
+
+    def get_bank_directory(self, refresh_interval: float = None) -> BankDirectory:
+        """
+        Return the local bank directory, fetching the bank list on first use.
+
+        Args:
+            refresh_interval (float, optional): If given, refresh the directory
+                in the background every ``refresh_interval`` seconds.
+
+        Returns:
+            BankDirectory: The directory shared by this client.
+
+        Example:
+            banks = api.get_bank_directory(refresh_interval=3600)
+            print(banks.resolve("guaranty trust"), banks.complete("fir"))
+        """
+        if self._bank_directory is None:
+            with _DIRECTORY_LOCK:
+                if self._bank_directory is None:
+                    directory = BankDirectory(self)
+                    directory.refresh()
+                    self._bank_directory = directory
+        if refresh_interval is not None:
+            self._bank_directory.start(refresh_interval)
+        return self._bank_directory
@@ -0,0 +1,91 @@
+"""
+This module makes SDK clients safe to share across ``fork`` and process pools.
+
+A forked child inherits its parent's memory but none of its other threads: a
+lock another thread held at fork time stays locked forever, connection pools
+share their sockets with the parent, and background threads are gone.
+Objects holding such state register here and are reinitialized in the child
+right after the fork, through ``os.register_at_fork`` (Python 3.7+). That
+covers gunicorn prefork workers and ``multiprocessing`` pools using "fork".
+Within the SDK, transports, ``TTLCache`` and ``SettledCache`` stores,
+``HealthMonitor``, ``BankDirectory``, the hedge executor and ``ecraspay.ids``
+all reset this way, so a client created before the fork keeps working in
+every child.
+
+Clients and their components pickle by configuration (API key, base URLs,
+transport and cache settings), never by state, so they can be sent to
+"spawn" pool workers as well; see ``ecraspay.batch.ProcessBatchRun``. A
+pickled client contains its API key: send it to workers, do not store it.
+
+On Python 3.6 there is no fork hook; call ``after_fork()`` first thing in
+the child instead.
+
+Example:
+    import requests
+    from ecraspay.process import reinitialize_after_fork
+
+    class PooledTransport:
+        def __init__(self):
+            self.session = requests.Session()
+            reinitialize_after_fork(self)
+
+        def request(self, method, url, **kwargs):
+            return self.session.request(method, url, **kwargs)
+
+        def _after_fork(self):
+            self.session = requests.Session()
+"""
+
+import os
+import weakref
+
+from ecraspay.log import get_logger
+
+log = get_logger("ecraspay.process")
+
+_objects = weakref.WeakSet()
+_callbacks = []
+
+
+def reinitialize_after_fork(obj):
+    """
+    Call ``obj._after_fork()`` in the child process after every fork.
+
+    Only a weak reference to ``obj`` is kept.
+
+    Returns:
+        The object, unchanged.
+    """
+    _objects.add(obj)
+    return obj
+
+
+def call_after_fork(func):
+    """
+    Call ``func()`` in the child process after every fork.
+
+    Meant for resetting module-level state; usable as a decorator.
+
+    Returns:
+        The function, unchanged.
+    """
+    _callbacks.append(func)
+    return func
+
+
+def after_fork():
+    """
+    Reinitialize every registered function and object in this process.
+
+    Runs automatically in forked children on Python 3.7+. A failing reset is
+    logged and does not stop the others.
+    """
+    for reset in list(_callbacks) + [obj._after_fork for obj in list(_objects)]:
+        try:
+            reset()
+        except Exception as e:  # the child must start whatever happens
+            log.error("Failed to reinitialize %r after fork: %s", reset, e)
+
+
+if hasattr(os, "register_at_fork"):  # Python 3.7+
+    os.register_at_fork(after_in_child=after_fork)
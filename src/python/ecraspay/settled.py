@@ -0,0 +1,205 @@
+"""
+This module provides SettledCache, a two-tier cache for transaction lookups.
+
+Once a transaction is settled (successful, failed, cancelled or expired) its
+verify and details responses never change, so they are kept forever: in a
+bounded in-memory LRU, backed by a durable store (``SQLiteStore`` here, or the
+``SettledResponse`` table through ``ecraspay_django.settled.DatabaseStore``)
+that survives restarts and is shared between processes. Responses for
+transactions still in progress are only cached for a few seconds.
+
+A store is an object with ``get(operation, transaction_ref)`` returning a
+response or None, and ``set(operation, transaction_ref, response)``. Stores are
+not keyed by base URL; use one store per environment.
+
+Example:
+    from ecraspay import Transaction
+    from ecraspay.settled import SettledCache, SQLiteStore
+
+    api = Transaction(api_key="your_api_key")
+    api.settled_cache = SettledCache(SQLiteStore("settled.sqlite3"))
+
+    # Only the first lookup of a settled reference reaches the gateway, in
+    # this process or any other sharing the store.
+    api.verify_transaction("txn_12345")
+"""
+
+import json
+import math
+import sqlite3
+import threading
+
+from ecraspay.cache import TTLCache
+from ecraspay.process import reinitialize_after_fork
+
+# Gateway statuses after which a transaction never changes again.
+FINAL_STATUSES = frozenset(
+    (
+        "SUCCESSFUL",
+        "SUCCESS",
+        "PAID",
+        "FAILED",
+        "DECLINED",
+        "CANCELLED",
+        "CANCELED",
+        "ABANDONED",
+        "EXPIRED",
+    )
+)
+
+
+def response_status(response):
+    """Return the upper-cased transaction status of a lookup response, or None."""
+    if not isinstance(response, dict):
+        return None
+    body = response.get("responseBody")
+    if not isinstance(body, dict):
+        return None
+    status = body.get("status") or body.get("paymentStatus")
+    return status.upper() if isinstance(status, str) else None
+
+
+def is_settled(response) -> bool:
+    """Return True if ``response`` reports a final transaction status."""
+    return response_status(response) in FINAL_STATUSES
+
+
+class SQLiteStore:
+    """
+    A durable store of settled responses in a SQLite database.
+
+    Every thread uses its own connection, as does every forked child; the
+    database runs in WAL mode, so several processes can read and write it
+    concurrently. Pickles by path and table.
+
+    Args:
+        path (str): Database file, created if missing.
+        table (str, optional): Table name. Defaults to "ecraspay_settled".
+    """
+
+    def __init__(self, path, table="ecraspay_settled"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'.")
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        reinitialize_after_fork(self)
+        self._connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "operation TEXT NOT NULL, reference TEXT NOT NULL, response TEXT NOT NULL, "
+            "PRIMARY KEY (operation, reference)) WITHOUT ROWID"
+        )
+
+    def __getstate__(self):
+        return {"path": self.path, "table": self.table}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _after_fork(self):
+        # SQLite connections must not be used across a fork: the child opens
+        # its own.
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, operation, transaction_ref):
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT response FROM {self.table} WHERE operation = ? AND reference = ?",
+                (operation, transaction_ref),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, operation, transaction_ref, response):
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+            (operation, transaction_ref, json.dumps(response, separators=(",", ":"))),
+        )
+
+    def __len__(self):
+        return (
+            self._connection()
+            .execute(f"SELECT COUNT(*) FROM {self.table}")
+            .fetchone()[0]
+        )
+
+
+class SettledCache:
+    """
+    An in-memory LRU of lookup responses in front of a durable store.
+
+    Settled responses are cached forever in both tiers; other responses are
+    cached in memory for ``pending_ttl`` seconds only. Concurrent lookups of
+    the same reference share one gateway request.
+
+    Args:
+        store (optional): Durable tier, e.g. ``SQLiteStore``. Defaults to
+            None: memory only.
+        maxsize (int, optional): Entries kept in memory. Defaults to 10000.
+        pending_ttl (float, optional): Seconds responses for unsettled
+            transactions are cached; 0 disables it. Defaults to 2.
+    """
+
+    def __init__(self, store=None, maxsize=10000, pending_ttl=2.0):
+        self.store = store
+        self.pending_ttl = pending_ttl
+        self.memory = TTLCache(maxsize=maxsize)
+
+    def get_or_load(self, key, operation, transaction_ref, loader) -> dict:
+        """
+        Return the response for a lookup, calling ``loader`` only if needed.
+
+        Args:
+            key: Memory key, unique per base URL, operation and reference.
+            operation (str): Endpoint name, e.g. "transaction.verify".
+            transaction_ref (str): The transaction reference.
+            loader (callable): Fetches the response from the gateway.
+        """
+
+        def load():
+            if self.store is not None:
+                response = self.store.get(operation, transaction_ref)
+                if response is not None:
+                    return response
+            response = loader()
+            if self.store is not None and is_settled(response):
+                self.store.set(operation, transaction_ref, response)
+            return response
+
+        return self.memory.get_or_load(key, load, ttl=self._ttl)
+
+    def _ttl(self, response):
+        return math.inf if is_settled(response) else self.pending_ttl
+
+
+class SettledLookupMixin:
+    """
+    Serves transaction lookups through ``settled_cache`` when one is set.
+
+    ``settled_cache`` is a class attribute, so a cache can be shared by every
+    client of a class or set on a single client.
+    """
+
+    settled_cache = None
+
+    def _lookup(self, name, transaction_ref, use_cache=True):
+        cache = self.settled_cache
+        if cache is None or not use_cache:
+            return self._call(name, {"transaction_ref": transaction_ref})
+        return cache.get_or_load(
+            (self.base_url, name, transaction_ref),
+            name,
+            transaction_ref,
+            lambda: self._call(name, {"transaction_ref": transaction_ref}),
+        )
@@ -0,0 +1,333 @@
+"""
+This module provides pluggable transports for ``BaseAPI`` clients, including a
+record/replay pair for deterministic, offline load and regression testing.
+
+A transport is any object with a ``request`` method accepting the same
+arguments as ``requests.request`` and returning a response-like object.
+
+Cassettes are NDJSON files with one recorded interaction per line. Requests
+are matched on method, endpoint path (the base URL is ignored, so a cassette
+recorded against the sandbox replays against any base URL) and canonical JSON
+body. Authorization headers are never written to a cassette, and the values
+of sensitive fields (card data, PINs and OTPs; see ``ecraspay.log``) are
+replaced in request bodies and parameters.
+
+``SessionTransport`` reuses connections across requests. Every transport here
+is fork-safe and pickles by configuration (see ``ecraspay.process``).
+
+Example:
+    from ecraspay import Checkout
+    from ecraspay.transport import RecordingTransport, ReplayTransport
+
+    # Record against the sandbox once...
+    with RecordingTransport("checkout.ndjson") as transport:
+        api = Checkout(api_key="your_api_key", transport=transport)
+        api.initiate_transaction(...)
+
+    # ...then replay offline, as fast as possible or with recorded latencies.
+    api = Checkout(
+        api_key="your_api_key",
+        transport=ReplayTransport("checkout.ndjson", latency="recorded"),
+    )
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ecraspay.exceptions import ApiWrapperCassetteError
+from ecraspay.log import REDACTED, SENSITIVE_KEYS
+from ecraspay.process import reinitialize_after_fork
+
+
+class RequestsTransport:
+    """The default transport, sending requests with ``requests.request``."""
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+
+class SessionTransport:
+    """
+    A transport keeping connections to the gateway open between requests.
+
+    Requests go through one ``requests.Session`` per process: a forked child
+    starts its own session instead of sharing the parent's sockets, and a
+    pickled copy starts with an empty pool.
+
+    Args:
+        pool_maxsize (int, optional): Connections kept open per host.
+            Defaults to 10.
+    """
+
+    def __init__(self, pool_maxsize=10):
+        self.pool_maxsize = pool_maxsize
+        self.session = self._new_session()
+        reinitialize_after_fork(self)
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __getstate__(self):
+        return {"pool_maxsize": self.pool_maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _after_fork(self):
+        # The parent's session is dropped, not closed: its sockets are still
+        # the parent's to use.
+        self.session = self._new_session()
+
+
+class RecordedResponse:
+    """
+    A response replayed from a cassette.
+
+    Implements the subset of ``requests.Response`` used by the SDK.
+    """
+
+    def __init__(self, status_code, text, url=None, reason=None):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        self.reason = reason or ""
+        self.content = text.encode("utf-8")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error: {self.reason} for url: {self.url}",
+                response=self,
+            )
+
+
+def _endpoint(url: str) -> str:
+    """Return the part of ``url`` after the ``/api/vN`` prefix, or its path."""
+    path = urlsplit(url).path
+    marker = path.find("/api/v")
+    if marker != -1:
+        slash = path.find("/", marker + len("/api/v"))
+        path = path[slash:] if slash != -1 else ""
+    return path
+
+
+def _without_secrets(value):
+    """Return ``value`` with the values of sensitive fields replaced, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: (
+                REDACTED
+                if str(key).lower() in SENSITIVE_KEYS
+                else _without_secrets(item)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_without_secrets(item) for item in value]
+    return value
+
+
+def _canonical_body(body, ignore_fields) -> str:
+    """
+    Return the form of ``body`` written to cassettes and matched on.
+
+    Only the values of sensitive fields are replaced, so they are never
+    recorded and do not take part in matching. Every other value is kept as
+    sent: references and amounts tell transactions apart.
+    """
+    if body is None:
+        return ""
+    if isinstance(body, dict):
+        body = {key: value for key, value in body.items() if key not in ignore_fields}
+    return json.dumps(
+        _without_secrets(body), sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+class _Cassette:
+    """Matching configuration, locking and pickling shared by both transports."""
+
+    def __init__(self, path, match_on=("method", "endpoint", "body"), ignore_fields=()):
+        unknown = set(match_on) - {"method", "endpoint", "body"}
+        if unknown:
+            raise ValueError(f"Unknown match criteria: {sorted(unknown)}")
+        self.path = path
+        self.match_on = tuple(match_on)
+        self.ignore_fields = frozenset(ignore_fields)
+        self._lock = threading.Lock()
+        reinitialize_after_fork(self)
+
+    def _config(self) -> dict:
+        return {
+            "path": self.path,
+            "match_on": self.match_on,
+            "ignore_fields": tuple(self.ignore_fields),
+        }
+
+    def __getstate__(self):
+        # Pickled by configuration: the copy reopens the cassette.
+        return self._config()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def _key(self, method, endpoint, body) -> tuple:
+        parts = {"method": method.upper(), "endpoint": endpoint, "body": body}
+        return tuple(parts[name] for name in self.match_on)
+
+
+class RecordingTransport(_Cassette):
+    """
+    A transport that forwards requests and appends each interaction to a cassette.
+
+    Args:
+        path (str): Cassette file; interactions are appended to it.
+        inner (optional): Transport that performs the real requests.
+            Defaults to ``RequestsTransport``.
+        match_on (tuple, optional): Request attributes used for matching on
+            replay. Any of "method", "endpoint" and "body".
+        ignore_fields (tuple, optional): Top-level body fields excluded from
+            matching, e.g. ``("payload",)`` for randomly padded card payloads.
+    """
+
+    def __init__(self, path, inner=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.inner = inner or RequestsTransport()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _config(self) -> dict:
+        return dict(super()._config(), inner=self.inner)
+
+    def request(self, method, url, headers=None, json=None, params=None, **kwargs):
+        started = time.perf_counter()
+        response = self.inner.request(
+            method, url, headers=headers, json=json, params=params, **kwargs
+        )
+        latency = time.perf_counter() - started
+        line = _dumps(
+            {
+                "method": method.upper(),
+                "endpoint": _endpoint(url),
+                "body": _canonical_body(json, self.ignore_fields),
+                "params": _without_secrets(params) if params else params,
+                "status": response.status_code,
+                "reason": getattr(response, "reason", ""),
+                "response": response.text,
+                "latency": round(latency, 6),
+            }
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+        return response
+
+    def close(self):
+        """Close the cassette file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayTransport(_Cassette):
+    """
+    A transport that answers requests from a cassette without any network I/O.
+
+    Identical requests are answered in recorded order; once all recordings
+    for a request have been used they are cycled again, so a short cassette
+    can drive a long load test.
+
+    Args:
+        path (str): Cassette file to load.
+        latency (str, optional): "none" to reply immediately or "recorded" to
+            sleep for the recorded latency. Defaults to "none".
+        speed (float, optional): Divides recorded latencies, e.g. 2.0 replays
+            twice as fast. Defaults to 1.0.
+        match_on (tuple, optional): Request attributes used for matching.
+        ignore_fields (tuple, optional): Top-level body fields excluded from
+            matching.
+
+    Raises:
+        ApiWrapperCassetteError: From ``request`` when nothing was recorded
+            for a request.
+    """
+
+    def __init__(self, path, latency="none", speed=1.0, **kwargs):
+        super().__init__(path, **kwargs)
+        if latency not in ("none", "recorded"):
+            raise ValueError("latency must be 'none' or 'recorded'.")
+        self.latency = latency
+        self.speed = speed
+        self._interactions = {}
+        with open(path, encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    self._add(json.loads(line))
+
+    def _config(self) -> dict:
+        return dict(super()._config(), latency=self.latency, speed=self.speed)
+
+    def _add(self, interaction):
+        # Match on the body as it would be canonicalised with this
+        # transport's ignore_fields, not the recorder's.
+        body = interaction["body"]
+        if body:
+            body = _canonical_body(json.loads(body), self.ignore_fields)
+        key = self._key(interaction["method"], interaction["endpoint"], body)
+        self._interactions.setdefault(key, deque()).append(interaction)
+
+    def request(self, method, url, headers=None, json=None, params=None, **kwargs):
+        key = self._key(
+            method, _endpoint(url), _canonical_body(json, self.ignore_fields)
+        )
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise ApiWrapperCassetteError(
+                    f"No recorded response for {method.upper()} {_endpoint(url)}"
+                )
+            interaction = recorded.popleft()
+            recorded.append(interaction)
+        if self.latency == "recorded" and interaction["latency"]:
+            time.sleep(interaction["latency"] / self.speed)
+        return RecordedResponse(
+            interaction["status"],
+            interaction["response"],
+            url=url,
+            reason=interaction.get("reason"),
+        )
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
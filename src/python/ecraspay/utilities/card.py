@@ -1,52 +1,218 @@
 import json
 import base64
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_v1_5
-from typing import Union
+from Crypto.Cipher import PKCS1_OAEP, PKCS1_v1_5
+from Crypto.Hash import SHA1, SHA256
+from typing import Iterable, List, Union
 
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:  # pragma: no cover - optional dependency
+    serialization = None
 
-def load_public_key(public_key: Union[str, bytes]) -> RSA.RsaKey:
+# Encryption schemes accepted by the gateway. PKCS#1 v1.5 is what the ErcasPay
+# card endpoints expect; OAEP is available for gateways configured to accept
+# it. OAEP pads with two hashes, so it leaves less room for the card: 42 bytes
+# of a key go to padding with SHA-1 and 66 with SHA-256, against 11 for
+# PKCS#1 v1.5. OAEP-SHA256 card payloads need a key of at least 2048 bits.
+PKCS1_V1_5 = "pkcs1v15"
+OAEP_SHA1 = "oaep-sha1"
+OAEP_SHA256 = "oaep-sha256"
+SCHEMES = (PKCS1_V1_5, OAEP_SHA1, OAEP_SHA256)
+
+# Bytes of padding overhead per scheme, used to report oversize plaintexts.
+_SCHEME_OVERHEAD = {PKCS1_V1_5: 11, OAEP_SHA1: 2 * 20 + 2, OAEP_SHA256: 2 * 32 + 2}
+
+
+def load_public_key(public_key: Union[str, bytes], backend: str = None):
     """
     Load a public key for RSA encryption.
 
     Args:
         public_key (Union[str, bytes]): The public key as a string, bytes, or a path to a .pub file.
+        backend (str, optional): Crypto backend name (see ``get_backend``).
 
     Returns:
-        RSA.RsaKey: The RSA public key object.
+        The backend's public key object: an ``RSA.RsaKey`` with the default
+        pycryptodome backend.
 
     Raises:
         ValueError: If the provided public key format is invalid.
 
     Notes:
-        - If a string is provided, the function first attempts to treat it as a file path.
-        - If the file path is invalid, the function assumes the input is the key data itself.
+        - A string holding a PEM key is used as it is; any other string is
+          read as a file path if the file exists, or used as key data.
         - If bytes are provided, they are decoded to a UTF-8 string.
+        - Parsed keys are cached, so loading the same key again is cheap.
     """
-    if isinstance(public_key, str):
-        try:
-            # Attempt to load from file
-            with open(public_key, "r") as key_file:
-                key_data = key_file.read()
-        except FileNotFoundError:
-            # Treat the input as a direct key string
-            key_data = public_key
-    elif isinstance(public_key, bytes):
+    if isinstance(public_key, bytes):
         key_data = public_key.decode("utf-8")
-    else:
+    elif not isinstance(public_key, str):
         raise ValueError(
             "Invalid public key format. Provide a string or a .pub file path."
         )
+    elif "-----BEGIN" in public_key or not os.path.isfile(public_key):
+        key_data = public_key
+    else:
+        with open(public_key, "r") as key_file:
+            key_data = key_file.read()
+    return get_backend(backend).load_key(key_data)
 
+
+@functools.lru_cache(maxsize=32)
+def _import_rsa_key(key_data: str) -> RSA.RsaKey:
     return RSA.importKey(key_data)
 
 
+class PycryptodomeBackend:
+    """RSA encryption with pycryptodome (the default backend)."""
+
+    name = "pycryptodome"
+
+    @staticmethod
+    def load_key(key_data: str):
+        return _import_rsa_key(key_data)
+
+    _hashes = {OAEP_SHA1: SHA1, OAEP_SHA256: SHA256}
+
+    def encrypt(self, key, plaintext: bytes, scheme: str = PKCS1_V1_5) -> bytes:
+        if scheme == PKCS1_V1_5:
+            return PKCS1_v1_5.new(key).encrypt(plaintext)
+        return PKCS1_OAEP.new(key, hashAlgo=self._hashes[scheme]).encrypt(plaintext)
+
+    @staticmethod
+    def key_size(key) -> int:
+        return key.size_in_bytes()
+
+
+class CryptographyBackend:
+    """RSA encryption with the ``cryptography`` package (OpenSSL)."""
+
+    name = "cryptography"
+
+    def __init__(self):
+        if serialization is None:
+            raise ImportError(
+                "The 'cryptography' backend requires the cryptography package."
+            )
+        self._oaep = {
+            scheme: padding.OAEP(
+                mgf=padding.MGF1(algorithm=algorithm()),
+                algorithm=algorithm(),
+                label=None,
+            )
+            for scheme, algorithm in (
+                (OAEP_SHA1, hashes.SHA1),
+                (OAEP_SHA256, hashes.SHA256),
+            )
+        }
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def load_key(key_data: str):
+        data = key_data.encode("utf-8")
+        if b"-----BEGIN" in data:
+            return serialization.load_pem_public_key(data)
+        return serialization.load_der_public_key(base64.b64decode(data))
+
+    def encrypt(self, key, plaintext: bytes, scheme: str = PKCS1_V1_5) -> bytes:
+        if scheme == PKCS1_V1_5:
+            return key.encrypt(plaintext, padding.PKCS1v15())
+        return key.encrypt(plaintext, self._oaep[scheme])
+
+    @staticmethod
+    def key_size(key) -> int:
+        return (key.key_size + 7) // 8
+
+
+BACKENDS = {
+    PycryptodomeBackend.name: PycryptodomeBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+_backend_instances = {}
+
+
+def get_backend(name: str = None):
+    """
+    Return a crypto backend instance.
+
+    Args:
+        name (str, optional): "pycryptodome" (the default) or
+            "cryptography". The ``cryptography`` (OpenSSL) backend is only
+            used when asked for, even when it is installed.
+
+    Returns:
+        The backend instance.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+        ImportError: If the requested backend's library is not installed.
+    """
+    if name is None:
+        name = PycryptodomeBackend.name
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown crypto backend '{name}'. Use one of {sorted(BACKENDS)}."
+        )
+    backend = _backend_instances.get(name)
+    if backend is None:
+        backend = _backend_instances.setdefault(name, BACKENDS[name]())
+    return backend
+
+
+def _serialize_card(card_number, expiration_date, cvv, pin, scheme) -> bytes:
+    card_data = {
+        "pan": card_number,
+        "expiryDate": expiration_date,
+        "cvv": cvv,
+        "pin": pin,
+    }
+    if scheme == PKCS1_V1_5:
+        # The JSON the gateway has always received, byte for byte.
+        return json.dumps(card_data).encode("utf-8")
+    # OAEP leaves less room: drop the spaces after separators.
+    return json.dumps(card_data, separators=(",", ":")).encode("utf-8")
+
+
+def _encrypt_payload(backend, key, plaintext: bytes, scheme: str) -> str:
+    size = backend.key_size(key)
+    limit = size - _SCHEME_OVERHEAD[scheme]
+    if len(plaintext) > limit:
+        fits = [
+            other
+            for other in SCHEMES
+            if len(plaintext) <= size - _SCHEME_OVERHEAD[other]
+        ]
+        raise ValueError(
+            f"Card payload is {len(plaintext)} bytes but {scheme} with this "
+            f"{size * 8}-bit key can encrypt at most {limit} bytes. "
+            + (
+                f"Use a larger key or the {', '.join(fits)} scheme."
+                if fits
+                else "Use a larger key."
+            )
+        )
+    return base64.b64encode(backend.encrypt(key, plaintext, scheme)).decode("utf-8")
+
+
+def _check_scheme(scheme: str):
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown encryption scheme '{scheme}'. Use one of {SCHEMES}.")
+
+
 def encrypt_card(
     card_number: str,
     expiration_date: str,
     cvv: str,
     pin: str,
     public_key: Union[str, bytes],
+    scheme: str = PKCS1_V1_5,
+    backend: str = None,
 ) -> str:
     """
     Encrypt card details using the provided RSA public key.
@@ -58,29 +224,108 @@ def encrypt_card(
         pin (str): The PIN associated with the card.
         public_key (Union[str, bytes]): The RSA public key as a string,
         bytes, or file path.
+        scheme (str, optional): Encryption scheme, one of ``SCHEMES``.
+        Defaults to PKCS#1 v1.5, which the gateway expects.
+        backend (str, optional): Crypto backend name (see ``get_backend``).
 
     Returns:
         str: The encrypted card details as a Base64-encoded string.
 
     Raises:
-        ValueError: If the public key format is invalid.
+        ValueError: If the public key format or scheme is invalid, or the card
+        payload is too large for the key and scheme.
 
     Notes:
-        - The card details are serialized into a JSON object before encryption.
-        - RSA encryption is performed using the PKCS#1 v1.5 standard.
+        - The card details are serialized into a JSON object before encryption;
+          for the OAEP schemes without spaces, as their padding leaves less
+          room.
+        - RSA encryption is performed using the PKCS#1 v1.5 standard by default.
+        - Parsed public keys are cached, so repeated calls with the same key
+          do not re-parse it.
         - The encrypted data is Base64-encoded for safe transmission.
     """
-    card_data = {
-        "pan": card_number,
-        "expiryDate": expiration_date,
-        "cvv": cvv,
-        "pin": pin,
-    }
+    _check_scheme(scheme)
+    crypto = get_backend(backend)
+    key = load_public_key(public_key, backend)
+    plaintext = _serialize_card(card_number, expiration_date, cvv, pin, scheme)
+    return _encrypt_payload(crypto, key, plaintext, scheme)
+
+
+def encrypt_batch(
+    cards: Iterable[dict],
+    public_key: Union[str, bytes],
+    scheme: str = PKCS1_V1_5,
+    backend: str = None,
+    max_workers: int = None,
+    processes: int = None,
+) -> List[str]:
+    """
+    Encrypt many cards with the same public key.
+
+    The key is loaded once and the cards are encrypted in chunks across a
+    thread pool. With ``backend="cryptography"`` the RSA operations run in
+    OpenSSL without holding the GIL, so throughput scales with the number of
+    cores; pycryptodome's pure-Python integer fallback gains little from
+    extra threads; pass ``processes`` to spread its chunks over worker
+    processes instead.
+
+    Args:
+        cards (Iterable[dict]): Dicts with ``card_number``, ``expiration_date``,
+        ``cvv`` and ``pin`` keys.
+        public_key (Union[str, bytes]): The RSA public key as a string,
+        bytes, or file path.
+        scheme (str, optional): Encryption scheme, one of ``SCHEMES``.
+        backend (str, optional): Crypto backend name (see ``get_backend``).
+        max_workers (int, optional): Number of threads. Defaults to the CPU
+        count.
+        processes (int, optional): Number of worker processes to use instead
+        of threads. Each loads the key once.
+
+    Returns:
+        List[str]: The Base64-encoded payloads, in the order of ``cards``.
+    """
+    _check_scheme(scheme)
+    crypto = get_backend(backend)
+    key = load_public_key(public_key, backend)
+    plaintexts = [
+        _serialize_card(
+            card["card_number"],
+            card["expiration_date"],
+            card["cvv"],
+            card["pin"],
+            scheme,
+        )
+        for card in cards
+    ]
+    workers = processes or max_workers or os.cpu_count() or 1
+    if workers == 1 or len(plaintexts) < 2:
+        return [_encrypt_payload(crypto, key, text, scheme) for text in plaintexts]
+
+    def encrypt_chunk(chunk):
+        return [_encrypt_payload(crypto, key, text, scheme) for text in chunk]
 
-    card_json = json.dumps(card_data).encode("utf-8")
-    rsa_public_key = load_public_key(public_key)
+    size = -(-len(plaintexts) // workers)
+    chunks = [plaintexts[i : i + size] for i in range(0, len(plaintexts), size)]
+    if processes:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            encrypted = executor.map(
+                _encrypt_chunk,
+                [crypto.name] * len(chunks),
+                [public_key] * len(chunks),
+                [scheme] * len(chunks),
+                chunks,
+            )
+            return [payload for chunk in encrypted for payload in chunk]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [
+            payload
+            for chunk in executor.map(encrypt_chunk, chunks)
+            for payload in chunk
+        ]
 
-    cipher = PKCS1_v1_5.new(rsa_public_key)
-    encrypted_data = cipher.encrypt(card_json)
 
-    return base64.b64encode(encrypted_data).decode("utf-8")
+def _encrypt_chunk(backend_name, public_key, scheme, plaintexts) -> List[str]:
+    """Encrypt a chunk of ``encrypt_batch`` in a worker process."""
+    crypto = get_backend(backend_name)
+    key = load_public_key(public_key, backend_name)
+    return [_encrypt_payload(crypto, key, text, scheme) for text in plaintexts]
@@ -0,0 +1,314 @@
+"""
+This module provides local card pre-validation, so malformed card details are
+rejected before any RSA encryption or gateway round-trip.
+
+It checks the card number with the Luhn algorithm, the expiry date and the
+CVV/PIN formats, and detects the card scheme and issuer with a compact BIN
+range index. The index is a sorted array of range starts searched with
+``bisect``; it can be loaded from a CSV file, and large tables can be saved
+to a binary file that is memory-mapped instead of loaded into memory.
+
+Example:
+    from ecraspay.utilities.validation import BinIndex, validate_card
+
+    issuers = BinIndex.from_csv("bins.csv")  # start,end,scheme,issuer
+    info = validate_card(
+        card_number="5399830000000008",
+        expiration_date="12/30",
+        cvv="123",
+        pin="1234",
+        bin_index=issuers,
+    )
+    print(info.scheme, info.issuer)
+"""
+
+import bisect
+import csv
+import datetime
+import heapq
+import json
+import mmap
+import struct
+import sys
+from typing import Iterable, Optional
+
+from ecraspay.exceptions import CardValidationError
+
+# BIN ranges are normalised to this many leading PAN digits.
+BIN_DIGITS = 8
+
+_MAGIC = b"ECBIN1\0\0"
+_HEADER = struct.Struct("<8sQQ")  # magic, range count, record table size
+
+# Scheme-wide prefixes. Narrower ranges take precedence over wider ones, so
+# e.g. Verve's 506099-506198 wins over any broader prefix covering it.
+SCHEME_PREFIXES = (
+    ("4", "4", "visa"),
+    ("51", "55", "mastercard"),
+    ("2221", "2720", "mastercard"),
+    ("34", "34", "amex"),
+    ("37", "37", "amex"),
+    ("506099", "506198", "verve"),
+    ("650002", "650027", "verve"),
+    ("507865", "507964", "verve"),
+    ("6011", "6011", "discover"),
+    ("644", "649", "discover"),
+    ("65", "65", "discover"),
+)
+
+_CVV_LENGTHS = {"amex": (4,)}
+_DEFAULT_CVV_LENGTHS = (3,)
+
+
+class CardInfo:
+    """
+    The result of a successful card validation.
+
+    Attributes:
+        scheme (str): Detected card scheme (e.g. "visa"), or None.
+        issuer (str): Issuer from the BIN index, or None.
+        last4 (str): Last four digits of the card number.
+    """
+
+    __slots__ = ("scheme", "issuer", "last4")
+
+    def __init__(self, scheme=None, issuer=None, last4=None):
+        self.scheme = scheme
+        self.issuer = issuer
+        self.last4 = last4
+
+    def __repr__(self):
+        return f"<CardInfo {self.scheme} {self.issuer} ****{self.last4}>"
+
+
+def _bin_key(digits: str, fill: str) -> int:
+    return int(digits[:BIN_DIGITS].ljust(BIN_DIGITS, fill))
+
+
+def _flatten(ranges):
+    """
+    Turn possibly overlapping ``(start, end, record)`` ranges into disjoint
+    ones, resolving each overlap in favour of the narrowest range.
+    """
+    ranges = sorted(ranges, key=lambda item: item[0])
+    points = sorted(
+        {start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges}
+    )
+    active = []
+    flat = []
+    position = 0
+    for low, next_low in zip(points, points[1:]):
+        while position < len(ranges) and ranges[position][0] <= low:
+            start, end, record = ranges[position]
+            heapq.heappush(active, (end - start, position, end, record))
+            position += 1
+        while active and active[0][2] < low:
+            heapq.heappop(active)
+        if not active:
+            continue
+        record = active[0][3]
+        if flat and flat[-1][2] == record and flat[-1][1] == low - 1:
+            flat[-1] = (flat[-1][0], next_low - 1, record)
+        else:
+            flat.append((low, next_low - 1, record))
+    return flat
+
+
+class BinIndex:
+    """
+    A sorted, non-overlapping BIN range index searched with ``bisect``.
+
+    Ranges are given as BIN prefixes of any length (e.g. "4" or "506099") and
+    normalised to 8-digit bounds. Overlapping ranges are allowed; the
+    narrowest one wins.
+
+    Args:
+        ranges (Iterable[tuple]): ``(start_prefix, end_prefix, scheme, issuer)``
+            tuples.
+    """
+
+    def __init__(self, ranges: Iterable[tuple] = ()):
+        records = {}
+        normalised = []
+        for start, end, scheme, issuer in ranges:
+            record = records.setdefault((scheme or None, issuer or None), len(records))
+            normalised.append((_bin_key(start, "0"), _bin_key(end, "9"), record))
+        flat = _flatten(normalised)
+        self._starts = [start for start, _, _ in flat]
+        self._ends = [end for _, end, _ in flat]
+        self._record_ids = [record for _, _, record in flat]
+        self._records = sorted(records, key=records.get)
+        self._mmap = None
+
+    def __len__(self):
+        return len(self._starts)
+
+    def lookup(self, card_number: str) -> Optional[tuple]:
+        """
+        Find the range containing a card number.
+
+        Args:
+            card_number (str): The card number or its leading digits.
+
+        Returns:
+            tuple: ``(scheme, issuer)``, or None if no range matches.
+        """
+        key = _bin_key(card_number, "0")
+        position = bisect.bisect_right(self._starts, key) - 1
+        if position < 0 or key > self._ends[position]:
+            return None
+        return self._records[self._record_ids[position]]
+
+    @classmethod
+    def from_csv(cls, path: str) -> "BinIndex":
+        """
+        Load an index from a CSV file with ``start,end,scheme,issuer`` columns.
+
+        A header row is skipped if present; ``end`` defaults to ``start``.
+        """
+        with open(path, newline="", encoding="utf-8") as bins:
+            rows = [row for row in csv.reader(bins) if row and row[0].strip()]
+        if rows and not rows[0][0].strip().isdigit():
+            rows = rows[1:]
+        return cls(
+            (
+                row[0].strip(),
+                (row[1].strip() if len(row) > 1 else "") or row[0].strip(),
+                row[2].strip() if len(row) > 2 else None,
+                row[3].strip() if len(row) > 3 else None,
+            )
+            for row in rows
+        )
+
+    def save(self, path: str):
+        """Write the index in the binary format read by ``open``."""
+        count = len(self._starts)
+        table = json.dumps(self._records).encode("utf-8")
+        with open(path, "wb") as output:
+            output.write(_HEADER.pack(_MAGIC, count, len(table)))
+            output.write(struct.pack(f"<{count}Q", *self._starts))
+            output.write(struct.pack(f"<{count}Q", *self._ends))
+            output.write(struct.pack(f"<{count}Q", *self._record_ids))
+            output.write(table)
+
+    @classmethod
+    def open(cls, path: str) -> "BinIndex":
+        """
+        Memory-map an index written by ``save``.
+
+        The range arrays stay in the page cache rather than in Python objects,
+        so very large BIN tables can be shared cheaply between processes.
+        """
+        with open(path, "rb") as source:
+            mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, table_size = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError(f"'{path}' is not a BIN index file.")
+        view = memoryview(mapped)
+        offset = _HEADER.size
+        size = count * 8
+        index = cls.__new__(cls)
+        arrays = [
+            view[offset + size * column : offset + size * (column + 1)]
+            for column in range(3)
+        ]
+        if sys.byteorder == "little":
+            arrays = [array.cast("Q") for array in arrays]
+        else:  # the file is little-endian; unpack instead of mapping
+            arrays = [list(struct.unpack(f"<{count}Q", array)) for array in arrays]
+        index._starts, index._ends, index._record_ids = arrays
+        table = bytes(view[offset + 3 * size : offset + 3 * size + table_size])
+        index._records = [tuple(record) for record in json.loads(table)]
+        index._mmap = mapped
+        return index
+
+
+SCHEMES = BinIndex((start, end, scheme, None) for start, end, scheme in SCHEME_PREFIXES)
+
+
+def luhn_check(card_number: str) -> bool:
+    """Return True if ``card_number`` is all digits and passes the Luhn check."""
+    if not card_number.isdigit():
+        return False
+    total = 0
+    for position, digit in enumerate(reversed(card_number)):
+        value = ord(digit) - 48
+        if position % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def check_expiry(expiration_date: str, today: datetime.date = None) -> bool:
+    """
+    Return True if an ``MM/YY`` or ``MM/YYYY`` expiry date has not passed.
+
+    Cards are valid until the end of their expiry month.
+    """
+    month, _, year = expiration_date.partition("/")
+    if not (month.isdigit() and year.isdigit() and len(year) in (2, 4)):
+        return False
+    month, year = int(month), int(year)
+    if not 1 <= month <= 12:
+        return False
+    if year < 100:
+        year += 2000
+    today = today or datetime.date.today()
+    return (year, month) >= (today.year, today.month)
+
+
+def validate_card(
+    card_number: str,
+    expiration_date: str,
+    cvv: str,
+    pin: str = None,
+    bin_index: BinIndex = None,
+    today: datetime.date = None,
+) -> CardInfo:
+    """
+    Validate card details locally.
+
+    Args:
+        card_number (str): The card number (spaces and dashes are ignored).
+        expiration_date (str): The expiry date in MM/YY or MM/YYYY format.
+        cvv (str): The CVV; four digits for Amex, three otherwise.
+        pin (str, optional): The card PIN, checked to be 4 digits if given.
+        bin_index (BinIndex, optional): Index used to detect the issuer.
+        today (datetime.date, optional): Reference date for the expiry check.
+
+    Returns:
+        CardInfo: The detected scheme and issuer.
+
+    Raises:
+        CardValidationError: If any detail is invalid. ``errors`` lists every
+        problem found.
+    """
+    number = card_number.replace(" ", "").replace("-", "")
+    errors = []
+    if not 12 <= len(number) <= 19 or not luhn_check(number):
+        errors.append("card_number is not a valid card number")
+    if not check_expiry(expiration_date, today):
+        errors.append("expiration_date is invalid or in the past")
+
+    scheme = issuer = None
+    if number.isdigit():
+        match = SCHEMES.lookup(number)
+        scheme = match[0] if match else None
+        if bin_index is not None:
+            match = bin_index.lookup(number)
+            if match:
+                scheme = match[0] or scheme
+                issuer = match[1]
+
+    lengths = _CVV_LENGTHS.get(scheme, _DEFAULT_CVV_LENGTHS)
+    if not (cvv.isdigit() and len(cvv) in lengths):
+        errors.append("cvv has the wrong format")
+    if pin is not None and not (pin.isdigit() and len(pin) == 4):
+        errors.append("pin must be 4 digits")
+
+    if errors:
+        raise CardValidationError(errors)
+    return CardInfo(scheme=scheme, issuer=issuer, last4=number[-4:])
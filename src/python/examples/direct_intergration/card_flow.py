@@ -1,19 +1,13 @@
-from urllib.error import HTTPError
+from requests import HTTPError
 from ecraspay import Card
+from ecraspay import CardPaymentFlow
 from ecraspay import Transaction
-from ecraspay import card_utils
+from ecraspay.ids import new_reference
 
 
 public_key_path = "path/to/public_key.pem"
 
 
-def generate_unique_ref():
-    import random
-    import string
-
-    return "".join(random.choices(string.ascii_letters + string.digits, k=10))
-
-
 transaction = Transaction(
     api_key="ECRS-TEST-SKY13sZYcUErhEuSMxbmSicDoMLN30YskXCu8EDQRI",
     environment="sandbox",
@@ -23,34 +17,35 @@ card = Card(
     environment="sandbox",
 )
 
+flow = CardPaymentFlow(transaction, card, public_key=public_key_path)
 
-# Initiate Transaction
-transaction = transaction.initiate_transaction(
-    amount=1000,
-    payment_reference="unique_ref_1234",
-    customer_name="John Doe",
-    customer_email="samuelasikhalaye@gmail.com",
-    currency="NGN",
-    payment_method="ussd",
-)
-
-transaction_reference = transaction["responseBody"]["transactionReference"]
-
-# initiate a card payment
 try:
-    response = Card.initiate_payment(
-        card_payload=card_utils.encrypt_card(
-            card_number="4242424242424242",
-            cvv="123",
-            pin="1234",
-            expiration_date="12/23",
-            public_key_path=public_key_path,
-        ),
-        transaction_ref=transaction_reference,
+    # Initiate the transaction and the card payment. The card is encrypted
+    # while the transaction is being initiated.
+    response = flow.start(
+        amount=1000,
+        payment_reference=new_reference(),
+        customer_name="John Doe",
+        customer_email="samuelasikhalaye@gmail.com",
+        currency="NGN",
+        payment_method="card",
+        card_number="4242424242424242",
+        cvv="123",
+        pin="1234",
+        expiration_date="12/30",
         device_details={"ip_address": ""},
     )
     print(response)
 
+    # The state can be stored (e.g. in a session) and the flow resumed in
+    # another worker once the customer has entered the OTP.
+    state = flow.to_dict()
+    flow = CardPaymentFlow.from_dict(state, transaction, card)
+
+    print(flow.submit_otp(input("OTP: ")))
+    print(flow.verify())
+    print("Step timings:", flow.timings)
+
 except HTTPError as e:
     # Handle HTTP errors and print the response payload if available
     print(f"An HTTP error occurred: {e}")
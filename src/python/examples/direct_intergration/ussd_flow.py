@@ -1,13 +1,7 @@
 from urllib.error import HTTPError
 from ecraspay import USSD
 from ecraspay import Transaction
-
-
-def generate_unique_ref():
-    import random
-    import string
-
-    return "".join(random.choices(string.ascii_letters + string.digits, k=10))
+from ecraspay.ids import new_reference
 
 
 transaction = Transaction(
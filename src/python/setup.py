@@ -8,6 +8,9 @@ setup(
         "requests >= 2.32.3",
         "pycryptodome >= 3.11.0",
     ],
+    extras_require={
+        "cryptography": ["cryptography >= 42.0.0"],
+    },
     author="Asikhalaye Samuel",
     author_email="samuelasikhalaye@gmail.com",
     classifiers=[
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+import pytest
+from ecraspay import USSD
+from ecraspay.banks import BankDirectory, normalize_bank_name
+from ecraspay.transport import RecordedResponse
+
+BANKS = [
+    "Access Bank",
+    "Fidelity Bank",
+    "First Bank of Nigeria",
+    "Guaranty Trust Bank",
+    "Zenith Bank PLC",
+]
+
+
+class BankListTransport:
+    """Transport serving a mutable supported-banks list."""
+
+    def __init__(self, banks, delay=0.0):
+        self.banks = list(banks)
+        self.delay = delay
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs.get("json")))
+        time.sleep(self.delay)
+        if url.endswith("/supported-banks"):
+            body = {"responseBody": self.banks}
+        else:
+            body = {"responseBody": kwargs["json"]}
+        return RecordedResponse(200, json.dumps(body), url=url)
+
+
+class TestBankDirectory:
+    @pytest.fixture
+    def directory(self):
+        return BankDirectory(banks=BANKS)
+
+    def test_normalize_bank_name(self):
+        """Test case, punctuation and spacing are normalised."""
+        assert normalize_bank_name("  Zenith-Bank, PLC ") == "zenith bank plc"
+
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("ZENITH BANK PLC", "Zenith Bank PLC"),
+            ("zenith", "Zenith Bank PLC"),
+            ("guaranty trust", "Guaranty Trust Bank"),
+            ("first bank", "First Bank of Nigeria"),
+            ("AccessBank", "Access Bank"),
+        ],
+    )
+    def test_resolve_exact(self, directory, name, expected):
+        """Test normalised names and their short forms resolve directly."""
+        assert directory.resolve(name, fuzzy=False) == expected
+
+    def test_resolve_prefix_and_fuzzy(self, directory):
+        """Test unique prefixes and typos fall back to approximate matching."""
+        assert directory.resolve("guar") == "Guaranty Trust Bank"
+        assert directory.resolve("Zenith Bnak") == "Zenith Bank PLC"
+        assert directory.resolve("Fidelty") == "Fidelity Bank"
+        assert directory.resolve("Unknown Savings") is None
+        assert "fidelity" in directory and "fidelty" not in directory
+
+    def test_complete(self, directory):
+        """Test autocomplete matches the start of any word."""
+        assert directory.complete("fi") == ["Fidelity Bank", "First Bank of Nigeria"]
+        assert directory.complete("trust") == ["Guaranty Trust Bank"]
+        assert directory.complete("ba", limit=2) == ["Access Bank", "Fidelity Bank"]
+        assert directory.complete("xyz") == []
+
+    def test_update_is_incremental(self, directory):
+        """Test only changed names are re-indexed and removed ones disappear."""
+        added, removed = directory.update(BANKS[1:] + ["Kuda Bank"])
+
+        assert added == {"Kuda Bank"} and removed == {"Access Bank"}
+        assert directory.resolve("access", fuzzy=False) is None
+        assert directory.complete("acc") == []
+        assert directory.resolve("kuda") == "Kuda Bank"
+        assert len(directory) == len(BANKS)
+
+    def test_shared_alias_survives_removal(self):
+        """Test an alias of two banks still resolves when one is removed."""
+        directory = BankDirectory(banks=["First Bank", "First Bank of Nigeria"])
+        assert directory.resolve("first", fuzzy=False) == "First Bank"
+
+        directory.update(["First Bank of Nigeria"])
+        assert directory.resolve("first", fuzzy=False) == "First Bank of Nigeria"
+        assert directory.resolve("first bank", fuzzy=False) == "First Bank of Nigeria"
+
+        directory.update(["First Bank"])
+        assert directory.resolve("first", fuzzy=False) == "First Bank"
+
+    def test_removed_banks_leave_no_trie_nodes(self, directory):
+        """Test emptied trie branches are pruned, shared ones are kept."""
+        directory.update(["Fidelity Bank", "Kuda Bank"])
+        assert directory.complete("fi") == ["Fidelity Bank"]
+        assert "z" not in directory._trie and "g" not in directory._trie
+
+        directory.update([])
+        assert directory._trie == {} and directory._lookup == {}
+
+
+class TestUSSDBankResolution:
+    def test_initiate_resolves_bank_locally(self):
+        """Test bank names are resolved without extra round-trips."""
+        transport = BankListTransport(BANKS)
+        api = USSD(api_key="key", transport=transport)
+
+        api.initiate_ussd_payment("zenith bnak", "txn_1", resolve_bank=True)
+        api.initiate_ussd_payment("guaranty trust", "txn_2", resolve_bank=True)
+
+        bank_list_calls = [call for call in transport.calls if call[0] == "GET"]
+        assert len(bank_list_calls) == 1
+        assert transport.calls[1][2] == {"bank_name": "Zenith Bank PLC"}
+
+    def test_initiate_rejects_unknown_bank(self):
+        """Test an unresolvable name fails before the USSD request is sent."""
+        transport = BankListTransport(BANKS)
+        api = USSD(api_key="key", transport=transport)
+
+        with pytest.raises(ValueError, match="Unknown bank 'Nonexistent'"):
+            api.initiate_ussd_payment("Nonexistent", "txn_1", resolve_bank=True)
+        assert all(call[0] == "GET" for call in transport.calls)
+
+    def test_concurrent_first_use_fetches_once(self):
+        """Test concurrent first calls share one directory and one bank list."""
+        transport = BankListTransport(BANKS, delay=0.05)
+        api = USSD(api_key="key", transport=transport)
+        directories = []
+        threads = [
+            threading.Thread(
+                target=lambda: directories.append(api.get_bank_directory())
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(transport.calls) == 1
+        assert all(directory is directories[0] for directory in directories)
+
+    def test_background_refresh(self):
+        """Test the directory picks up bank list changes in the background."""
+        transport = BankListTransport(BANKS)
+        directory = USSD(api_key="key", transport=transport).get_bank_directory(
+            refresh_interval=0.01
+        )
+        try:
+            transport.banks.append("Kuda Bank")
+            deadline = time.time() + 2
+            while directory.resolve("kuda") is None and time.time() < deadline:
+                time.sleep(0.01)
+            assert directory.resolve("kuda") == "Kuda Bank"
+        finally:
+            directory.stop()
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+import pytest
+from ecraspay import BankTransfer
+from ecraspay.cache import TTLCache
+from ecraspay.modules.bank_transfer import account_ttl
+from ecraspay.transport import RecordedResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class AccountTransport:
+    """Transport issuing a new account number for every request."""
+
+    def __init__(self, delay=0.0, expires_in=30):
+        self.delay = delay
+        self.expires_in = expires_in
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.delay)
+        body = {
+            "requestSuccessful": True,
+            "responseBody": {
+                "accountNumber": str(number),
+                "expires_in": self.expires_in,
+            },
+        }
+        return RecordedResponse(200, json.dumps(body), url=url)
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        """Test entries are served until their TTL elapses."""
+        clock = FakeClock()
+        cache = TTLCache(clock=clock)
+        cache.set("a", 1, ttl=10)
+
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10
+        assert cache.get("a") is None and len(cache) == 0
+
+    def test_maxsize_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_get_or_load_single_flight(self):
+        """Test concurrent misses for one key call the loader once."""
+        cache = TTLCache()
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(1)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get_or_load("k", loader, 60))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["value"] * 8
+
+    def test_get_or_load_errors_are_shared_and_not_cached(self):
+        """Test a failed load is raised to waiters and retried afterwards."""
+        cache = TTLCache()
+
+        def failing():
+            raise RuntimeError("gateway down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("k", failing, 60)
+        assert cache.get_or_load("k", lambda: "ok", 60) == "ok"
+
+    def test_zero_ttl_is_not_cached(self):
+        """Test a TTL of zero returns the value without caching it."""
+        cache = TTLCache()
+        assert cache.get_or_load("k", lambda: 1, ttl=lambda value: 0) == 1
+        assert cache.get("k") is None
+
+
+class TestBankTransferCache:
+    def test_account_ttl(self):
+        """Test the account lifetime is read from ``expires_in`` minutes."""
+        body = {"accountNumber": "1"}
+        assert account_ttl({"responseBody": dict(body, expires_in=30)}, 60) == 1800
+        assert account_ttl({"responseBody": body}, 60) == 60
+        assert account_ttl({"requestSuccessful": False, "responseBody": body}, 60) == 0
+
+    def test_repeated_calls_reuse_the_account(self):
+        """Test a page refresh does not request a new account."""
+        transport = AccountTransport()
+        api = BankTransfer(api_key="key", transport=transport)
+
+        first = api.initialize_bank_transfer("txn_1")
+        again = api.initialize_bank_transfer("txn_1")
+
+        assert first == again and transport.calls == 1
+        api.initialize_bank_transfer("txn_2")
+        api.initialize_bank_transfer("txn_1", use_cache=False)
+        assert transport.calls == 3
+
+        api.forget_bank_transfer("txn_1")
+        api.initialize_bank_transfer("txn_1")
+        assert transport.calls == 4
+
+    def test_cache_is_per_client(self):
+        """Test clients of other keys or environments never share accounts."""
+        transport = AccountTransport()
+        api = BankTransfer(api_key="key", transport=transport)
+        api.initialize_bank_transfer("txn_1")
+
+        for other in (
+            BankTransfer(api_key="other-key", transport=transport),
+            BankTransfer(api_key="key", environment="live", transport=transport),
+        ):
+            other.initialize_bank_transfer("txn_1")
+        assert transport.calls == 3
+
+        # Shared explicitly, the cache is still keyed by base URL and API key.
+        shared = BankTransfer(api_key="key", transport=transport)
+        shared.account_cache = api.account_cache
+        shared.initialize_bank_transfer("txn_1")
+        other = BankTransfer(api_key="other-key", transport=transport)
+        other.account_cache = api.account_cache
+        other.initialize_bank_transfer("txn_1")
+        assert transport.calls == 4
+
+    def test_cached_account_is_copied(self):
+        """Test changing a returned response does not change the cached one."""
+        api = BankTransfer(api_key="key", transport=AccountTransport())
+        first = api.initialize_bank_transfer("txn_1")
+        first["responseBody"]["accountNumber"] = "changed"
+
+        again = api.initialize_bank_transfer("txn_1")
+        assert again["responseBody"]["accountNumber"] == "1"
+
+    def test_concurrent_calls_share_one_request(self):
+        """Test concurrent requests for one reference hit the gateway once."""
+        transport = AccountTransport(delay=0.05)
+        api = BankTransfer(api_key="key", transport=transport)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(api.initialize_bank_transfer("txn_1"))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert transport.calls == 1
+        assert len({json.dumps(result) for result in results}) == 1
@@ -0,0 +1,118 @@
+import base64
+import json
+import pytest
+from Crypto.Cipher import PKCS1_OAEP, PKCS1_v1_5
+from Crypto.Hash import SHA1, SHA256
+from Crypto.PublicKey import RSA
+from ecraspay.utilities import card as card_utils
+
+BACKENDS = ["pycryptodome"]
+if card_utils.serialization is not None:
+    BACKENDS.append("cryptography")
+
+
+@pytest.fixture(scope="module")
+def key_pair():
+    """Fixture generating an RSA key pair."""
+    private_key = RSA.generate(2048)
+    return private_key, private_key.publickey().export_key()
+
+
+class TestCardUtils:
+    @staticmethod
+    def _card(number="4242424242424242"):
+        return {
+            "card_number": number,
+            "expiration_date": "12/25",
+            "cvv": "123",
+            "pin": "1234",
+        }
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.parametrize("scheme", card_utils.SCHEMES)
+    def test_encrypt_card_round_trip(self, key_pair, backend, scheme):
+        """Test every backend and scheme produces a decryptable payload."""
+        private_key, public_key = key_pair
+
+        payload = card_utils.encrypt_card(
+            **self._card(), public_key=public_key, scheme=scheme, backend=backend
+        )
+
+        ciphertext = base64.b64decode(payload)
+        if scheme == card_utils.PKCS1_V1_5:
+            plaintext = PKCS1_v1_5.new(private_key).decrypt(ciphertext, None)
+        else:
+            algorithm = SHA1 if scheme == card_utils.OAEP_SHA1 else SHA256
+            plaintext = PKCS1_OAEP.new(private_key, hashAlgo=algorithm).decrypt(
+                ciphertext
+            )
+        assert json.loads(plaintext) == {
+            "pan": "4242424242424242",
+            "expiryDate": "12/25",
+            "cvv": "123",
+            "pin": "1234",
+        }
+
+    def test_encrypt_card_rejects_oversize_payload(self, key_pair):
+        """Test a payload larger than the key allows gives a clear error."""
+        with pytest.raises(ValueError, match="can encrypt at most 245 bytes"):
+            card_utils.encrypt_card(
+                card_number="4" * 300,
+                expiration_date="12/25",
+                cvv="123",
+                pin="1234",
+                public_key=key_pair[1],
+            )
+
+    def test_oaep_sha256_needs_a_larger_key(self):
+        """Test OAEP-SHA256's padding leaves no room for a card in 1024 bits."""
+        public_key = RSA.generate(1024).publickey().export_key()
+
+        with pytest.raises(ValueError, match="1024-bit key can encrypt at most 62"):
+            card_utils.encrypt_card(
+                **self._card(), public_key=public_key, scheme=card_utils.OAEP_SHA256
+            )
+        for scheme in (card_utils.PKCS1_V1_5, card_utils.OAEP_SHA1):
+            card_utils.encrypt_card(
+                **self._card(), public_key=public_key, scheme=scheme
+            )
+
+    def test_default_backend_is_pycryptodome(self):
+        """Test the cryptography backend is used only when asked for."""
+        assert card_utils.get_backend().name == "pycryptodome"
+
+    def test_load_public_key(self, key_pair, tmp_path):
+        """Test keys load from PEM text, bytes and file paths alike."""
+        public_key = key_pair[1]
+        path = tmp_path / "key.pub"
+        path.write_bytes(public_key)
+
+        keys = [
+            card_utils.load_public_key(value)
+            for value in (public_key, public_key.decode(), str(path))
+        ]
+        assert keys[0] == keys[1] == keys[2] == key_pair[0].publickey()
+        with pytest.raises(ValueError, match="Invalid public key format"):
+            card_utils.load_public_key(1234)
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_encrypt_batch_keeps_order(self, key_pair, backend):
+        """Test encrypt_batch returns payloads in input order."""
+        private_key, public_key = key_pair
+        cards = [self._card(f"42424242424242{index:02d}") for index in range(10)]
+
+        payloads = card_utils.encrypt_batch(
+            cards, public_key, backend=backend, max_workers=3
+        )
+
+        cipher = PKCS1_v1_5.new(private_key)
+        numbers = [
+            json.loads(cipher.decrypt(base64.b64decode(payload), None))["pan"]
+            for payload in payloads
+        ]
+        assert numbers == [card["card_number"] for card in cards]
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name raises ValueError."""
+        with pytest.raises(ValueError, match="Unknown crypto backend"):
+            card_utils.get_backend("nope")
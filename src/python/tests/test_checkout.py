@@ -1,3 +1,5 @@
+import io
+import json
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
@@ -172,3 +174,77 @@ class TestCheckout:
                 customer_name="John Doe",
                 customer_email="johndoe@example.com",
             )
+
+    @patch("requests.request")
+    def test_initiate_many_reports_partial_failures(self, mock_request):
+        """Test initiate_many streams results and keeps going after a failure."""
+
+        def respond(method, url, json=None, **kwargs):
+            response = MagicMock()
+            if json["paymentReference"] == "ref_1":
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                    "Bad Request"
+                )
+            response.json.return_value = {"reference": json["paymentReference"]}
+            return response
+
+        mock_request.side_effect = respond
+        checkout = Checkout(api_key="test_key", environment="sandbox")
+        specs = [
+            {
+                "amount": 1000,
+                "payment_reference": f"ref_{index}",
+                "customer_name": "John Doe",
+                "customer_email": "johndoe@example.com",
+            }
+            for index in range(5)
+        ]
+        sink = io.StringIO()
+        seen = []
+
+        run = checkout.initiate_many(
+            specs, concurrency=2, callback=seen.append, sink=sink
+        )
+        results = sorted(run, key=lambda result: result.index)
+
+        assert [result.key for result in results] == [f"ref_{i}" for i in range(5)]
+        assert [result.ok for result in results] == [True, False, True, True, True]
+        assert results[0].response == {"reference": "ref_0"}
+        assert (run.succeeded, run.failed) == (4, 1)
+        assert len(seen) == 5
+        lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+        assert sorted(line["key"] for line in lines if not line["ok"]) == ["ref_1"]
+
+    @patch("requests.request")
+    def test_initiate_many_validates_up_front(self, mock_request):
+        """Test initiate_many rejects invalid specs before sending anything."""
+        checkout = Checkout(api_key="test_key", environment="sandbox")
+        specs = [
+            {
+                "amount": 1000,
+                "payment_reference": "ref_1",
+                "customer_name": "John Doe",
+                "customer_email": "johndoe@example.com",
+            },
+            {
+                "amount": -5,
+                "payment_reference": "ref_2",
+                "customer_name": "Jane Doe",
+                "customer_email": "not-an-email",
+            },
+            {
+                "amount": 1000,
+                "payment_reference": "ref_1",
+                "customer_name": "John Doe",
+                "customer_email": "johndoe@example.com",
+            },
+        ]
+
+        with pytest.raises(ValueError) as excinfo:
+            checkout.initiate_many(specs)
+
+        message = str(excinfo.value)
+        assert "spec 1: 'amount' must be a positive number" in message
+        assert "spec 1: 'customer_email' is not a valid email address" in message
+        assert "spec 2: duplicate payment_reference 'ref_1'" in message
+        mock_request.assert_not_called()
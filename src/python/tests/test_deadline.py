@@ -0,0 +1,127 @@
+import json
+import time
+import pytest
+import requests
+from ecraspay import Transaction
+from ecraspay.deadline import Deadline, RetryPolicy, current_deadline, deadline
+from ecraspay.exceptions import ApiWrapperDeadlineError
+from ecraspay.health import HealthMonitor
+from ecraspay.transport import RecordedResponse
+
+
+class ScriptedTransport:
+    """Transport replaying a script of (delay, status or exception) steps."""
+
+    def __init__(self, *steps, default=(0, 200)):
+        self.steps = list(steps)
+        self.default = default
+        self.timeouts = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        delay, outcome = self.steps.pop(0) if self.steps else self.default
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return RecordedResponse(outcome, json.dumps({"status": outcome}), url=url)
+
+
+def make_client(transport, **kwargs):
+    return Transaction(api_key="key", transport=transport, **kwargs)
+
+
+class TestDeadline:
+    def test_timeout_is_capped_by_remaining_budget(self):
+        """Test attempts never get more time than the deadline has left."""
+        budget = Deadline(0.5)
+        assert 0.4 < budget.timeout(10) <= 0.5
+        assert budget.timeout(0.1) == 0.1
+
+        expired = Deadline(0)
+        with pytest.raises(ApiWrapperDeadlineError):
+            expired.timeout(10)
+
+    def test_nested_deadlines_only_shorten(self):
+        """Test an inner block cannot extend the enclosing deadline."""
+        assert current_deadline() is None
+        with deadline(1) as outer:
+            with deadline(5) as inner:
+                assert inner is outer
+            with deadline(0.5) as inner:
+                assert inner.budget == 0.5
+            assert current_deadline() is outer
+        assert current_deadline() is None
+
+    def test_deadline_error_is_a_timeout(self):
+        """Test existing timeout handling also catches deadline errors."""
+        assert issubclass(ApiWrapperDeadlineError, requests.exceptions.Timeout)
+
+
+class TestRetries:
+    def test_idempotent_calls_are_retried(self):
+        """Test retryable failures of GETs are retried."""
+        transport = ScriptedTransport(
+            (0, 503), (0, requests.exceptions.ConnectionError())
+        )
+        api = make_client(transport, retry=RetryPolicy(attempts=3, backoff=0))
+
+        assert api.get_transaction_status("txn_1") == {"status": 200}
+        assert len(transport.timeouts) == 3
+
+    def test_client_errors_and_side_effects_are_not_retried(self):
+        """Test 4xx responses and non-idempotent calls fail on the first attempt."""
+        transport = ScriptedTransport((0, 400), (0, 503))
+        api = make_client(transport, retry=RetryPolicy(attempts=3, backoff=0))
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            api.get_transaction_status("txn_1")
+        with pytest.raises(requests.exceptions.HTTPError):
+            api.cancel_transaction("txn_1")
+        assert len(transport.timeouts) == 2
+
+    def test_budget_shrinks_across_attempts(self):
+        """Test each retry's timeout is what is left of the deadline."""
+        transport = ScriptedTransport(
+            (0.1, requests.exceptions.ConnectionError()),
+            (0.1, requests.exceptions.ConnectionError()),
+        )
+        api = make_client(transport, retry=RetryPolicy(attempts=5, backoff=0))
+
+        with deadline(0.5):
+            api.get_transaction_status("txn_1")
+
+        first, second, third = transport.timeouts
+        assert first > second > third
+        assert first <= 0.5 and third <= 0.3
+
+    def test_deadline_stops_retries(self):
+        """Test no attempt starts once the deadline has passed."""
+        transport = ScriptedTransport(
+            default=(0.1, requests.exceptions.ConnectionError())
+        )
+        api = make_client(transport, retry=RetryPolicy(attempts=10, backoff=0))
+
+        started = time.perf_counter()
+        with pytest.raises(requests.exceptions.Timeout):
+            with deadline(0.25):
+                api.get_transaction_status("txn_1")
+        assert time.perf_counter() - started < 0.4
+        assert len(transport.timeouts) == 3
+
+
+class TestHedgeMetrics:
+    def test_hedge_wins_are_counted(self):
+        """Test hedges against a single base URL and their win rate."""
+        transport = ScriptedTransport()
+        health = HealthMonitor(min_samples=5)
+        api = make_client(transport, health=health, hedge=True)
+        for _ in range(5):
+            api.verify_transaction("txn_1")
+
+        transport.steps = [(0.3, 200), (0, 200)]
+        api.verify_transaction("txn_1")
+        transport.steps = [(0, 200)]
+        api.verify_transaction("txn_1")
+
+        hedges = health.snapshot()["hedges"]
+        assert hedges == {"sent": 1, "won": 1, "win_rate": 1.0}
@@ -0,0 +1,162 @@
+import time
+
+import pytest
+import requests
+from ecraspay import BankTransfer, Card, Checkout, Transaction, USSD
+from ecraspay.deadline import RetryPolicy, deadline
+from ecraspay.emulator import Emulator, EmulatorServer, EmulatorTransport
+from ecraspay.endpoints import ENDPOINTS
+from ecraspay.exceptions import (
+    ApiWrapperAuthError,
+    ApiWrapperTimeoutError,
+    ApiWrapperUnavailableError,
+    ApiWrapperValidationError,
+)
+
+
+def _initiate(api, reference="ref_1"):
+    response = api.initiate_transaction(
+        amount=1000,
+        payment_reference=reference,
+        customer_name="John Doe",
+        customer_email="johndoe@example.com",
+    )
+    return response["responseBody"]["transactionReference"]
+
+
+class TestEmulator:
+    @pytest.fixture
+    def emulator(self):
+        emulator = Emulator(seed=1)
+        yield emulator
+        emulator.close()
+
+    @pytest.fixture
+    def transport(self, emulator):
+        return EmulatorTransport(emulator)
+
+    def test_every_endpoint_is_emulated(self, emulator):
+        """Test each registered endpoint reaches a handler."""
+        for endpoint in ENDPOINTS.values():
+            path = endpoint.path.format(
+                **{name: "missing" for name in endpoint.path_params}
+            )
+            status, _, _ = emulator.handle(
+                endpoint.method, path, {}, {"Authorization": "Bearer key"}
+            )
+            assert status in (200, 400, 404)
+
+    def test_card_payment_state_machine(self, emulator, transport):
+        """Test a card payment moves from PENDING to SUCCESSFUL on the right OTP."""
+        checkout = Checkout(api_key="key", transport=transport)
+        card = Card(api_key="key", transport=transport)
+        reference = _initiate(checkout)
+
+        response = card.initiate_payment(
+            card_payload="ciphertext", transaction_ref=reference, device_details={}
+        )
+        gateway_ref = response["responseBody"]["gatewayReference"]
+        with pytest.raises(ApiWrapperValidationError) as excinfo:
+            card.submit_otp(otp="000000", gateway_ref=gateway_ref)
+        assert excinfo.value.body["responseMessage"] == "Invalid OTP."
+        card.submit_otp(otp="123456", gateway_ref=gateway_ref)
+
+        verified = card.verify_card_payment(transaction_ref=reference)
+        assert verified["responseBody"]["status"] == "SUCCESSFUL"
+        with pytest.raises(ApiWrapperValidationError):
+            Transaction(api_key="key", transport=transport).cancel_transaction(
+                reference
+            )
+
+    def test_ussd_settles_and_delivers_webhook(self):
+        """Test USSD payments settle on their own and send a webhook."""
+        webhooks = []
+        emulator = Emulator(settle_after=0.01, webhook_url=webhooks.append)
+        transport = EmulatorTransport(emulator)
+        try:
+            reference = _initiate(Checkout(api_key="key", transport=transport))
+            ussd = USSD(api_key="key", transport=transport)
+            ussd.initiate_ussd_payment("Zenith Bank", reference)
+            until = time.monotonic() + 5
+            while not webhooks and time.monotonic() < until:
+                time.sleep(0.01)
+        finally:
+            emulator.close()
+
+        assert webhooks[0]["transactionReference"] == reference
+        assert webhooks[0]["status"] == "SUCCESSFUL"
+        assert emulator.transaction(reference)["channel"] == "USSD"
+
+    def test_bank_transfer_and_cancel(self, emulator, transport):
+        """Test account details, duplicate references and cancellation."""
+        checkout = Checkout(api_key="key", transport=transport)
+        reference = _initiate(checkout)
+        with pytest.raises(ApiWrapperValidationError):
+            _initiate(checkout)
+
+        account = BankTransfer(api_key="key", transport=transport)
+        body = account.initialize_bank_transfer(reference, use_cache=False)
+        assert body["responseBody"]["expires_in"] == 30
+
+        transaction = Transaction(api_key="key", transport=transport)
+        transaction.cancel_transaction(reference)
+        status = transaction.get_transaction_status(reference)
+        assert status["responseBody"]["status"] == "CANCELLED"
+        assert emulator.stats()["transactions"] == {"CANCELLED": 1}
+
+    def test_injected_failures(self):
+        """Test error, timeout and authentication failures surface as typed errors."""
+        emulator = Emulator(error_rate=1.0)
+        api = Transaction(api_key="key", transport=EmulatorTransport(emulator))
+        with pytest.raises(ApiWrapperUnavailableError):
+            api.get_transaction_status("txn")
+
+        emulator.error_rate, emulator.timeout_rate = 0.0, 1.0
+        with pytest.raises(ApiWrapperTimeoutError), deadline(0.01):
+            api.get_transaction_status("txn")
+
+        emulator.timeout_rate, emulator.api_key = 0.0, "secret"
+        with pytest.raises(ApiWrapperAuthError):
+            api.get_transaction_status("txn")
+
+    def test_retries_recover_from_injected_errors(self):
+        """Test a retry policy rides out a partially failing emulator."""
+        emulator = Emulator(error_rate=0.3, seed=7)
+        transport = EmulatorTransport(emulator)
+        reference = None
+        while reference is None:
+            try:
+                reference = _initiate(Checkout(api_key="key", transport=transport))
+            except ApiWrapperUnavailableError:
+                pass
+        api = Transaction(
+            api_key="key",
+            transport=transport,
+            retry=RetryPolicy(attempts=10, backoff=0, jitter=False),
+        )
+
+        for _ in range(20):
+            assert api.verify_transaction(reference)["responseBody"]["status"]
+
+    def test_http_server(self):
+        """Test the SDK against the emulator served over HTTP."""
+        server = EmulatorServer(Emulator(), port=0)
+        server.start()
+        try:
+            api = Checkout(api_key="key", base_url=server.base_url)
+            reference = _initiate(api, reference="ref|1")
+            assert api.verify_transaction(reference)["responseBody"]["status"] == (
+                "PENDING"
+            )
+            settle = requests.post(
+                f"{server.base_url[: -len('/api/v1')]}/_emulator/settle/"
+                f"{requests.utils.quote(reference, safe='')}",
+                json={"status": "FAILED"},
+                timeout=5,
+            )
+            assert settle.json() == {"settled": True}
+            assert api.verify_transaction(reference)["responseBody"]["status"] == (
+                "FAILED"
+            )
+        finally:
+            server.stop()
@@ -0,0 +1,116 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from ecraspay.endpoints import Endpoint, get_endpoint
+from ecraspay.modules.checkout import Checkout
+from ecraspay.modules.transaction import Transaction
+
+
+class TestEndpoints:
+    @pytest.fixture
+    def builder(self):
+        """Fixture compiling the initiate endpoint against a test base URL."""
+        return get_endpoint("payment.initiate").compile("https://api.example.com")
+
+    def test_build_drops_optional_none_fields(self, builder):
+        """Optional fields set to None are left out of the payload."""
+        method, url, payload = builder.build(
+            {
+                "amount": 1000,
+                "payment_reference": "ref_123",
+                "customer_name": "John Doe",
+                "customer_email": "johndoe@example.com",
+                "description": None,
+                "currency": "NGN",
+            },
+            {"extraField": "value"},
+        )
+
+        assert method == "POST"
+        assert url == "https://api.example.com/payment/initiate"
+        assert payload == {
+            "amount": 1000,
+            "paymentReference": "ref_123",
+            "customerName": "John Doe",
+            "customerEmail": "johndoe@example.com",
+            "currency": "NGN",
+            "extraField": "value",
+        }
+
+    def test_build_formats_path_parameters(self):
+        """Path placeholders are filled from the values."""
+        builder = Endpoint(
+            "test.multi", "GET", "/a/{first}/b/{second}/", idempotent=True
+        ).compile("https://api.example.com")
+
+        method, url, payload = builder.build({"first": "x", "second": 2})
+
+        assert (method, url, payload) == (
+            "GET",
+            "https://api.example.com/a/x/b/2/",
+            None,
+        )
+        assert builder.idempotent is True
+
+    def test_arguments_are_path_parameters_then_fields(self):
+        """Arguments are the path parameters, then the remaining fields."""
+        endpoint = Endpoint(
+            "test.mixed",
+            "POST",
+            "/a/{ref}/",
+            fields=(("name", "name"), ("ref", "reference")),
+        )
+        builder = endpoint.compile("https://api.example.com")
+
+        assert endpoint.arguments == ("ref", "name")
+        assert builder.build({"name": "n1", "ref": "r1"})[1:] == (
+            "https://api.example.com/a/r1/",
+            {"name": "n1", "reference": "r1"},
+        )
+        with pytest.raises(KeyError):
+            builder.build({"ref": "r1"})
+
+    def test_invalid_argument_names(self):
+        """Arguments that are not valid keyword argument names are rejected."""
+        for argument in ("class", "not-a-name"):
+            with pytest.raises(ValueError, match="Invalid argument name"):
+                Endpoint("test.bad", "POST", "/a", fields=((argument, "wire"),))
+
+    def test_unknown_endpoint(self):
+        """Looking up an unregistered endpoint raises KeyError."""
+        with pytest.raises(KeyError, match="Unknown endpoint"):
+            get_endpoint("does.not.exist")
+
+    @pytest.mark.parametrize("client_class", [Checkout, Transaction])
+    @patch("requests.request")
+    def test_initiate_transaction_is_shared(self, mock_request, client_class):
+        """Checkout and Transaction send the same initiate request."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"requestSuccessful": True}
+        mock_request.return_value = mock_response
+        client = client_class(api_key="test_key", environment="sandbox")
+
+        client.initiate_transaction(
+            amount=1000,
+            payment_reference="ref_123",
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+        )
+
+        mock_request.assert_called_once_with(
+            "POST",
+            "https://api.merchant.staging.ercaspay.com/api/v1/payment/initiate",
+            headers={
+                "Authorization": "Bearer test_key",
+                "Content-Type": "application/json",
+            },
+            json={
+                "amount": 1000,
+                "paymentReference": "ref_123",
+                "customerName": "John Doe",
+                "customerEmail": "johndoe@example.com",
+                "currency": "usd",
+                "paymentMethods": "card",
+            },
+            params=None,
+            timeout=10,
+        )
@@ -0,0 +1,130 @@
+import json
+import pytest
+import requests
+from ecraspay import Transaction
+from ecraspay.deadline import RetryPolicy
+from ecraspay.exceptions import (
+    ApiWrapperAuthError,
+    ApiWrapperConnectionError,
+    ApiWrapperError,
+    ApiWrapperHTTPError,
+    ApiWrapperRateLimitError,
+    ApiWrapperRequestError,
+    ApiWrapperTimeoutError,
+    ApiWrapperUnavailableError,
+    ApiWrapperValidationError,
+)
+from ecraspay.transport import RecordedResponse
+
+
+class StatusTransport:
+    """Transport answering with a fixed status, body and headers."""
+
+    def __init__(self, status, body=None, headers=None, error=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.error = error
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        text = self.body if isinstance(self.body, str) else json.dumps(self.body)
+        response = RecordedResponse(self.status, text, url=url)
+        response.headers = self.headers
+        return response
+
+
+class TestErrorMapping:
+    @pytest.mark.parametrize(
+        "status, error_class",
+        [
+            (400, ApiWrapperValidationError),
+            (401, ApiWrapperAuthError),
+            (403, ApiWrapperAuthError),
+            (404, ApiWrapperRequestError),
+            (422, ApiWrapperValidationError),
+            (429, ApiWrapperRateLimitError),
+            (500, ApiWrapperUnavailableError),
+            (503, ApiWrapperUnavailableError),
+        ],
+    )
+    def test_status_maps_to_typed_error(self, status, error_class):
+        """Test error responses raise the matching typed, parsed exception."""
+        body = {"errorCode": "E1", "responseMessage": "Nope"}
+        api = Transaction(api_key="key", transport=StatusTransport(status, body))
+
+        with pytest.raises(error_class) as excinfo:
+            api.get_transaction_status("txn_1")
+
+        error = excinfo.value
+        assert type(error) is error_class
+        assert isinstance(error, requests.exceptions.HTTPError)
+        assert error.status_code == status and error.body == body
+        assert error.response.status_code == status
+
+    def test_non_json_error_body_is_kept_as_text(self):
+        """Test error bodies that are not JSON are exposed as text."""
+        api = Transaction(api_key="key", transport=StatusTransport(502, "Bad gateway"))
+
+        with pytest.raises(ApiWrapperUnavailableError) as excinfo:
+            api.get_transaction_status("txn_1")
+        assert excinfo.value.body == "Bad gateway"
+
+    @pytest.mark.parametrize(
+        "error, error_class, requests_class",
+        [
+            (
+                requests.exceptions.ConnectTimeout(),
+                ApiWrapperTimeoutError,
+                requests.exceptions.Timeout,
+            ),
+            (
+                requests.exceptions.ConnectionError("refused"),
+                ApiWrapperConnectionError,
+                requests.exceptions.ConnectionError,
+            ),
+        ],
+    )
+    def test_network_errors(self, error, error_class, requests_class):
+        """Test network failures are typed but still caught as requests errors."""
+        api = Transaction(api_key="key", transport=StatusTransport(0, error=error))
+
+        with pytest.raises(error_class) as excinfo:
+            api.get_transaction_status("txn_1")
+        assert isinstance(excinfo.value, requests_class)
+        assert excinfo.value.retryable
+
+    def test_retryable_flags(self):
+        """Test retry logic can classify errors without inspecting them."""
+        assert ApiWrapperUnavailableError.retryable
+        assert ApiWrapperRateLimitError.retryable
+        assert not ApiWrapperValidationError.retryable
+        assert not ApiWrapperAuthError.retryable
+        assert issubclass(ApiWrapperHTTPError, ApiWrapperError)
+
+
+class TestRateLimit:
+    def test_retry_after_is_parsed(self):
+        """Test the Retry-After header is exposed in seconds."""
+        transport = StatusTransport(429, {}, headers={"Retry-After": "7"})
+        api = Transaction(api_key="key", transport=transport)
+
+        with pytest.raises(ApiWrapperRateLimitError) as excinfo:
+            api.get_transaction_status("txn_1")
+        assert excinfo.value.retry_after == 7.0
+
+    def test_retries_wait_for_retry_after(self, monkeypatch):
+        """Test retries back off for at least the Retry-After delay."""
+        sleeps = []
+        monkeypatch.setattr("ecraspay.base.time.sleep", sleeps.append)
+        transport = StatusTransport(429, {}, headers={"Retry-After": "2"})
+        api = Transaction(
+            api_key="key", transport=transport, retry=RetryPolicy(attempts=2)
+        )
+
+        with pytest.raises(ApiWrapperRateLimitError):
+            api.get_transaction_status("txn_1")
+        assert transport.calls == 2 and sleeps == [2.0]
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from Crypto.PublicKey import RSA
+from ecraspay import Card, Transaction
+from ecraspay.flows import CardPaymentFlow
+from ecraspay.utilities.validation import BinIndex
+
+
+class TestCardPaymentFlow:
+    @pytest.fixture
+    def public_key(self):
+        """Fixture generating an RSA public key for card encryption."""
+        return RSA.generate(1024).publickey().export_key()
+
+    @pytest.fixture
+    def clients(self):
+        """Fixture returning the Transaction and Card clients."""
+        return (
+            Transaction(api_key="test_key", environment="sandbox"),
+            Card(api_key="test_key", environment="sandbox"),
+        )
+
+    @staticmethod
+    def _respond(method, url, json=None, **kwargs):
+        response = MagicMock()
+        if url.endswith("/payment/initiate"):
+            body = {"transactionReference": "txn_1"}
+        elif url.endswith("/payment/cards/initialize"):
+            body = {"gatewayReference": "gw_1", "status": "PENDING"}
+        else:
+            body = {"status": "SUCCESS"}
+        response.json.return_value = {"responseBody": body}
+        return response
+
+    @patch("requests.request")
+    def test_flow_resumes_from_saved_state(self, mock_request, clients, public_key):
+        """Test the flow can be saved at the OTP prompt and resumed elsewhere."""
+        mock_request.side_effect = self._respond
+        transaction, card = clients
+        flow = CardPaymentFlow(transaction, card, public_key=public_key)
+
+        flow.start(
+            amount=1000,
+            payment_reference="ref_1",
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+            card_number="4242424242424242",
+            expiration_date="12/30",
+            cvv="123",
+            pin="1234",
+            device_details={"ip_address": "127.0.0.1"},
+        )
+        state = flow.to_dict()
+
+        assert state["state"] == CardPaymentFlow.OTP_REQUIRED
+        assert state["transaction_reference"] == "txn_1"
+        assert state["gateway_reference"] == "gw_1"
+        assert "4242424242424242" not in repr(state)
+        assert {"encrypt_card", "initiate_transaction", "initiate_payment"} <= set(
+            state["timings"]
+        )
+
+        resumed = CardPaymentFlow.from_dict(state, transaction, card)
+        resumed.submit_otp("123456")
+        assert resumed.verify() == {"responseBody": {"status": "SUCCESS"}}
+        assert resumed.state == CardPaymentFlow.VERIFIED
+
+        otp_call = mock_request.call_args_list[-2]
+        assert otp_call.kwargs["json"] == {"otp": "123456", "gatewayReference": "gw_1"}
+
+    def test_configuration_round_trips(self, clients, public_key):
+        """Test ``validate`` is saved and ``bin_index`` can be passed back."""
+        bin_index = BinIndex([("4", "4", "visa", None)])
+        flow = CardPaymentFlow(
+            *clients, public_key=public_key, bin_index=bin_index, validate=False
+        )
+
+        resumed = CardPaymentFlow.from_dict(
+            flow.to_dict(), *clients, public_key=public_key, bin_index=bin_index
+        )
+
+        assert resumed.validate is False
+        assert resumed.bin_index is bin_index
+        assert resumed.to_dict() == flow.to_dict()
+
+    def test_flow_rejects_out_of_order_steps(self, clients):
+        """Test steps cannot be run out of order."""
+        flow = CardPaymentFlow(*clients)
+
+        with pytest.raises(ValueError, match="Cannot submit an OTP in state 'new'"):
+            flow.submit_otp("123456")
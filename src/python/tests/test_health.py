@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+import pytest
+import requests
+from ecraspay import Transaction
+from ecraspay.health import HealthMonitor
+from ecraspay.transport import RecordedResponse
+
+PRIMARY = "https://api.merchant.staging.ercaspay.com/api/v1"
+ALTERNATE = "https://eu.example.com/api/v1"
+
+
+class RegionalTransport:
+    """Transport with a configurable delay and status per base URL."""
+
+    def __init__(self, delays=None, statuses=None):
+        self.delays = delays or {}
+        self.statuses = statuses or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        base_url = ALTERNATE if url.startswith(ALTERNATE) else PRIMARY
+        with self._lock:
+            self.calls.append((method, url))
+        time.sleep(self.delays.get(base_url, 0))
+        status = self.statuses.get(base_url, 200)
+        if isinstance(status, Exception):
+            raise status
+        return RecordedResponse(status, json.dumps({"from": base_url}), url=url)
+
+
+def make_client(transport, health, hedge=False):
+    return Transaction(
+        api_key="key",
+        transport=transport,
+        alternate_base_urls=[ALTERNATE],
+        health=health,
+        hedge=hedge,
+    )
+
+
+class TestHealthMonitor:
+    def test_percentiles_and_error_rate(self):
+        """Test rolling statistics only use the most recent window."""
+        health = HealthMonitor(window=10, min_samples=1)
+        for latency in range(1, 21):
+            health.record(PRIMARY, latency / 100, ok=latency % 5 != 0)
+
+        stats = health.snapshot()["base_urls"][PRIMARY]
+        assert stats["samples"] == 10 and stats["requests"] == 20
+        assert stats["error_rate"] == pytest.approx(0.2)
+        assert stats["p50"] == 0.14 and stats["p99"] == 0.19
+        assert health.hedge_delay(PRIMARY) == 0.19
+
+    def test_rank_demotes_unhealthy_base_urls(self):
+        """Test failing base URLs are moved behind healthy ones."""
+        health = HealthMonitor(min_samples=3)
+        assert health.rank([PRIMARY, ALTERNATE]) == [PRIMARY, ALTERNATE]
+        for _ in range(3):
+            health.record(PRIMARY, 0.1, ok=False, error="boom")
+
+        assert health.rank([PRIMARY, ALTERNATE]) == [ALTERNATE, PRIMARY]
+        snapshot = json.loads(health.to_json())
+        assert snapshot["base_urls"][PRIMARY]["healthy"] is False
+        assert snapshot["base_urls"][PRIMARY]["last_error"] == "boom"
+
+    def test_probe(self):
+        """Test probes send HEAD requests and record 5xx as failures."""
+        transport = RegionalTransport(statuses={ALTERNATE: 503})
+        health = HealthMonitor(min_samples=1)
+        health.probe(make_client(transport, health))
+
+        assert [method for method, _ in transport.calls] == ["HEAD", "HEAD"]
+        assert health.is_healthy(PRIMARY) and not health.is_healthy(ALTERNATE)
+
+    def test_probes_do_not_lower_the_hedge_delay(self):
+        """Test fast probes count as outcomes but not as request latencies."""
+        health = HealthMonitor(min_samples=2)
+        transport = RegionalTransport(statuses={PRIMARY: 503})
+        client = make_client(transport, health)
+        for _ in range(2):
+            health.record(PRIMARY, 0.5, ok=True)
+            health.probe(client)
+
+        stats = health.snapshot()["base_urls"][PRIMARY]
+        assert (stats["samples"], stats["probes"]) == (2, 2)
+        assert stats["error_rate"] == 0.5
+        assert health.hedge_delay(PRIMARY) == 0.5
+        # Probes alone say whether a base URL is up, never how slow it is.
+        assert health.is_healthy(ALTERNATE)
+        assert health.hedge_delay(ALTERNATE) is None
+
+
+class TestRoutedRequests:
+    def test_requests_are_recorded_and_fail_over(self):
+        """Test client errors don't count against a base URL but 5xx do."""
+        transport = RegionalTransport(statuses={PRIMARY: 404})
+        health = HealthMonitor(min_samples=2)
+        api = make_client(transport, health)
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.HTTPError):
+                api.get_transaction_status("txn_1")
+        assert health.is_healthy(PRIMARY)
+
+        transport.statuses[PRIMARY] = requests.exceptions.ConnectionError("down")
+        for _ in range(3):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                api.get_transaction_status("txn_1")
+        assert api.get_transaction_status("txn_1") == {"from": ALTERNATE}
+
+    def test_slow_get_is_hedged(self):
+        """Test an idempotent GET slower than p95 is answered by the alternate."""
+        transport = RegionalTransport()
+        health = HealthMonitor(min_samples=5)
+        api = make_client(transport, health, hedge=True)
+        for _ in range(5):
+            api.get_transaction_status("txn_1")
+
+        transport.delays[PRIMARY] = 0.3
+        started = time.perf_counter()
+        response = api.get_transaction_status("txn_1")
+
+        assert response == {"from": ALTERNATE}
+        assert time.perf_counter() - started < 0.25
+        assert transport.calls[-1][1].startswith(ALTERNATE)
+
+    def test_non_idempotent_calls_are_not_hedged(self):
+        """Test calls with side effects are never duplicated."""
+        transport = RegionalTransport()
+        health = HealthMonitor(min_samples=1)
+        api = make_client(transport, health, hedge=True)
+        api.get_transaction_status("txn_1")
+
+        transport.delays[PRIMARY] = 0.05
+        assert api.cancel_transaction("txn_1") == {"from": PRIMARY}
+        assert len(transport.calls) == 2
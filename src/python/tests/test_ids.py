@@ -0,0 +1,65 @@
+import threading
+import uuid
+from unittest.mock import patch
+
+import pytest
+from ecraspay import ids
+from ecraspay.ids import new_reference, reference_time, uuid7
+
+
+class TestIds:
+    def test_uuid7_layout_and_order(self):
+        """Test uuid7 values are version 7 and strictly increasing."""
+        values = [uuid7() for _ in range(5000)]
+
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+        assert {value.version for value in values} == {7}
+        assert {value.variant for value in values} == {uuid.RFC_4122}
+
+    def test_monotonic_when_clock_steps_back(self):
+        """Test identifiers keep increasing if the clock stalls or steps back."""
+        with patch("time.time", return_value=1_700_000_000.0):
+            first = [uuid7() for _ in range(5000)]
+        with patch("time.time", return_value=1_600_000_000.0):
+            later = uuid7()
+
+        assert first == sorted(first)
+        assert later > first[-1]
+
+    def test_references_are_unique_across_threads(self):
+        """Test concurrent generation never collides and stays sortable."""
+        results = []
+
+        def generate():
+            results.append([new_reference("pay_") for _ in range(2000)])
+
+        threads = [threading.Thread(target=generate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        references = [reference for batch in results for reference in batch]
+        assert len(set(references)) == len(references)
+        assert all(batch == sorted(batch) for batch in results)
+        assert all(
+            len(reference) == 30 and reference[4:].isalnum() for reference in references
+        )
+
+    def test_reference_time(self):
+        """Test the creation time is read back from references and UUIDs."""
+        # Restore the generator state afterwards, so later identifiers are
+        # not stamped in the future.
+        with patch("time.time", return_value=1_900_000_000.123), patch.object(
+            ids, "_last_ms", 0
+        ), patch.object(ids, "_counter", 0):
+            reference = new_reference("pay_")
+            value = uuid7()
+
+        assert reference_time(reference) == 1_900_000_000.123
+        assert reference_time(str(value)) == reference_time(value)
+        with pytest.raises(ValueError):
+            reference_time(str(uuid.uuid4()))
+        with pytest.raises(ValueError):
+            reference_time("not-a-reference")
@@ -0,0 +1,74 @@
+import logging
+import pytest
+from unittest.mock import patch, MagicMock
+from ecraspay import Transaction
+from ecraspay.log import StructuredLogger, redact, redact_fields
+
+
+class TestLog:
+    def test_redact_masks_card_data(self):
+        """Test card numbers, CVVs, PINs and OTPs are masked."""
+        text = (
+            '{"pan": "4242424242424242", "cvv": "123", "pin": 1234, '
+            '"note": "card 5399-8300-0000-0008"} otp=123456&amount=1000'
+        )
+
+        redacted = redact(text)
+
+        assert "4242424242424242" not in redacted
+        assert '"cvv": "[REDACTED]"' in redacted
+        assert '"pin": "[REDACTED]"' in redacted
+        assert "****0008" in redacted
+        assert "otp=[REDACTED]&amount=1000" in redacted
+
+    def test_redact_keeps_references_and_amounts(self):
+        """Test only Luhn-valid digit runs are masked as card numbers."""
+        text = (
+            "ref=ERCS|20241214085034|1734162634489 amount=1000000000000 "
+            "card=4242 4242 4242 4241"
+        )
+
+        assert redact(text) == text
+        assert redact("card=4242 4242 4242 4242") == "card=****4242"
+
+    def test_redact_fields(self):
+        """Test sensitive keys are replaced in structured fields."""
+        fields = {"cvv": "123", "url": "/pay", "card": {"pan": "4242424242424242"}}
+
+        assert redact_fields(fields) == {
+            "cvv": "[REDACTED]",
+            "url": "/pay",
+            "card": {"pan": "[REDACTED]"},
+        }
+
+    def test_success_sampling(self, caplog):
+        """Test only the sampled fraction of success messages is emitted."""
+        logger = StructuredLogger("ecraspay.test.sampling", sample_rate=0.25)
+
+        with caplog.at_level(logging.INFO, logger="ecraspay.test.sampling"):
+            for index in range(8):
+                logger.success("Request %s succeeded.", index, status=200)
+
+        assert [record.getMessage() for record in caplog.records] == [
+            "Request 0 succeeded.",
+            "Request 4 succeeded.",
+        ]
+        assert caplog.records[0].ecraspay.as_dict() == {"status": 200}
+
+    @patch("requests.request")
+    def test_invalid_json_body_is_bounded_and_redacted(self, mock_request, caplog):
+        """Test a non-JSON body is truncated and redacted in the error log."""
+        mock_response = MagicMock()
+        mock_response.text = "pan=4242424242424242 " + "x" * 2000
+        mock_response.json.side_effect = ValueError
+        mock_request.return_value = mock_response
+        client = Transaction(api_key="test_key", environment="sandbox")
+
+        with caplog.at_level(logging.ERROR, logger="ecraspay.http"):
+            with pytest.raises(ValueError):
+                client.get_transaction_status("ref_1")
+
+        message = caplog.records[-1].getMessage()
+        assert "4242424242424242" not in message
+        assert "more characters]" in message
+        assert len(message) < 700
@@ -0,0 +1,202 @@
+import base64
+import json
+import os
+import pickle
+import threading
+
+import pytest
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from ecraspay import Transaction, ids
+from ecraspay.batch import ProcessBatchRun
+from ecraspay.cache import TTLCache
+from ecraspay.health import HealthMonitor
+from ecraspay.settled import SettledCache, SQLiteStore
+from ecraspay.transport import (
+    RecordedResponse,
+    RecordingTransport,
+    ReplayTransport,
+    SessionTransport,
+)
+from ecraspay.utilities import card as card_utils
+
+
+class EchoTransport:
+    """Picklable transport answering every request with its own URL."""
+
+    def request(self, method, url, **kwargs):
+        return RecordedResponse(200, '{"url": "%s"}' % url, url=url)
+
+
+def _checked_square(value):
+    if value < 0:
+        raise ValueError(f"negative value {value}")
+    return value * value
+
+
+def _in_child(check):
+    """Run ``check`` in a forked child; return its exit code."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if check() else 1)
+        except BaseException:
+            os._exit(2)
+    return os.waitpid(pid, 0)[1] >> 8
+
+
+class TestPickling:
+    def test_client_pickles_by_configuration(self, tmp_path):
+        """Test a client's copy keeps its settings but none of its state."""
+        client = Transaction(
+            api_key="key",
+            environment="live",
+            transport=SessionTransport(pool_maxsize=4),
+            health=HealthMonitor(window=50),
+            alternate_base_urls=["https://eu.example.com/api/v1"],
+        )
+        client.settled_cache = SettledCache(
+            SQLiteStore(str(tmp_path / "settled.db")), maxsize=10, pending_ttl=0
+        )
+        client.health.record(client.base_url, 0.1, True)
+        client.settled_cache.memory.set("key", "value", ttl=60)
+        client._get_headers()
+
+        copy = pickle.loads(pickle.dumps(client))
+
+        assert (copy.api_key, copy.base_url) == ("key", client.base_url)
+        assert copy.get_base_urls() == client.get_base_urls()
+        assert copy._headers is None
+        assert copy.transport.pool_maxsize == 4
+        assert copy.transport.session is not client.transport.session
+        assert copy.health.window == 50 and copy.health.snapshot()["base_urls"] == {}
+        assert copy.settled_cache.memory.maxsize == 10
+        assert len(copy.settled_cache.memory) == 0
+        assert copy.settled_cache.store.path == client.settled_cache.store.path
+
+    def test_cassette_transports_reopen_their_cassette(self, tmp_path):
+        """Test recording and replay transports pickle by path and settings."""
+        path = str(tmp_path / "cassette.ndjson")
+        with RecordingTransport(path, inner=EchoTransport()) as transport:
+            Transaction(api_key="key", transport=transport).verify_transaction("t1")
+            copy = pickle.loads(pickle.dumps(transport))
+        Transaction(api_key="key", transport=copy).verify_transaction("t2")
+        copy.close()
+
+        replay = pickle.loads(pickle.dumps(ReplayTransport(path, latency="recorded")))
+        client = Transaction(api_key="key", transport=replay)
+        assert replay.latency == "recorded"
+        assert client.verify_transaction("t2")["url"].endswith("/t2")
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="needs os.register_at_fork"
+)
+class TestFork:
+    def test_locks_held_at_fork_are_replaced(self):
+        """Test a child can use objects whose locks were held when it forked."""
+        cache = TTLCache()
+        health = HealthMonitor()
+        cache._lock.acquire()
+        health._lock.acquire()
+        ids._lock.acquire()
+        try:
+
+            def check():
+                cache.set("key", "value", ttl=60)
+                health.record("https://example.com", 0.1, True)
+                return cache.get("key") == "value" and bool(ids.new_reference())
+
+            assert _in_child(check) == 0
+        finally:
+            cache._lock.release()
+            health._lock.release()
+            ids._lock.release()
+
+    def test_child_gets_its_own_session(self):
+        """Test pooled connections are never shared with a forked child."""
+        transport = SessionTransport()
+        parent_session = transport.session
+
+        assert _in_child(lambda: transport.session is not parent_session) == 0
+        assert transport.session is parent_session
+
+    def test_loads_in_flight_are_not_waited_for(self):
+        """Test a child does not wait for a load started by a parent thread."""
+        cache = TTLCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_load():
+            started.set()
+            release.wait(5)
+            return "parent"
+
+        loader = threading.Thread(target=cache.get_or_load, args=("key", slow_load, 60))
+        loader.start()
+        started.wait(5)
+        try:
+            assert _in_child(lambda: cache.get_or_load("key", lambda: "child", 60)) == 0
+        finally:
+            release.set()
+            loader.join()
+
+
+class TestProcessBatchRun:
+    def test_results_and_failures(self):
+        """Test every item is reported once, with failures as results."""
+        run = ProcessBatchRun(
+            _checked_square, [3, -1, 2, 5, -4], processes=2, chunk_size=2, key=str
+        )
+        results = sorted(run, key=lambda result: result.index)
+
+        assert [result.response for result in results] == [9, None, 4, 25, None]
+        assert [result.key for result in results] == ["3", "-1", "2", "5", "-4"]
+        assert isinstance(results[1].error, ValueError)
+        assert (run.succeeded, run.failed) == (3, 2)
+
+    def test_unpicklable_function_fails_every_item(self):
+        """Test a worker failure is reported per item, not raised."""
+        run = ProcessBatchRun(lambda value: value, [1, 2, 3], processes=1)
+
+        assert run.wait().failed == 3
+
+    def test_verify_many_in_processes(self):
+        """Test bulk verification runs through worker processes."""
+        client = Transaction(api_key="key", transport=EchoTransport())
+        references = [f"txn_{index}" for index in range(20)]
+
+        run = client.verify_many(references, concurrency=2, processes=2)
+        results = {result.key: result.response for result in run}
+
+        assert sorted(results) == sorted(references)
+        assert all(results[ref]["url"].endswith("/" + ref) for ref in references)
+
+    def test_encrypt_batch_in_processes(self):
+        """Test card encryption in worker processes keeps the card order."""
+        private_key = RSA.generate(1024)
+        cards = [
+            {
+                "card_number": f"42424242424242{index:02d}",
+                "expiration_date": "12/25",
+                "cvv": "123",
+                "pin": "1234",
+            }
+            for index in range(6)
+        ]
+
+        payloads = card_utils.encrypt_batch(
+            cards,
+            private_key.publickey().export_key(),
+            backend="pycryptodome",
+            processes=2,
+        )
+
+        cipher = PKCS1_v1_5.new(private_key)
+        decrypted = [
+            json.loads(cipher.decrypt(base64.b64decode(payload), None))
+            for payload in payloads
+        ]
+        assert [card["pan"] for card in decrypted] == [
+            card["card_number"] for card in cards
+        ]
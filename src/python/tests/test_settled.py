@@ -0,0 +1,60 @@
+import pytest
+from ecraspay import Checkout, Transaction
+from ecraspay.emulator import Emulator, EmulatorTransport
+from ecraspay.settled import SettledCache, SQLiteStore, is_settled
+
+
+class TestSettledCache:
+    @pytest.fixture
+    def emulator(self):
+        emulator = Emulator()
+        yield emulator
+        emulator.close()
+
+    @pytest.fixture
+    def reference(self, emulator):
+        checkout = Checkout(api_key="key", transport=EmulatorTransport(emulator))
+        response = checkout.initiate_transaction(
+            amount=1000,
+            payment_reference="ref_1",
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+        )
+        return response["responseBody"]["transactionReference"]
+
+    def _client(self, emulator, cache):
+        api = Transaction(api_key="key", transport=EmulatorTransport(emulator))
+        api.settled_cache = cache
+        return api
+
+    def test_settled_lookups_never_reach_the_gateway_again(
+        self, emulator, reference, tmp_path
+    ):
+        """Test settled responses are served from memory, then from the store."""
+        path = str(tmp_path / "settled.sqlite3")
+        api = self._client(emulator, SettledCache(SQLiteStore(path), pending_ttl=0))
+
+        assert api.verify_transaction(reference)["responseBody"]["status"] == "PENDING"
+        emulator.settle(reference, "SUCCESSFUL")
+        requests_before = emulator.stats()["requests"]
+        for _ in range(3):
+            assert is_settled(api.verify_transaction(reference))
+        assert emulator.stats()["requests"] == requests_before + 1
+
+        # A new process with an empty memory tier reads the durable tier.
+        restarted = self._client(emulator, SettledCache(SQLiteStore(path)))
+        assert is_settled(restarted.verify_transaction(reference))
+        assert emulator.stats()["requests"] == requests_before + 1
+        assert len(SQLiteStore(path)) == 1
+
+    def test_unsettled_responses_expire(self, emulator, reference):
+        """Test unsettled responses are cached for pending_ttl only."""
+        api = self._client(emulator, SettledCache(pending_ttl=60))
+
+        api.get_transaction_details(reference)
+        emulator.settle(reference, "FAILED")
+        cached = api.get_transaction_details(reference)
+        fresh = api.get_transaction_details(reference, use_cache=False)
+
+        assert cached["responseBody"]["status"] == "PENDING"
+        assert fresh["responseBody"]["status"] == "FAILED"
@@ -0,0 +1,128 @@
+import json
+import pytest
+import requests
+from ecraspay import BankTransfer, Card, Checkout, USSD
+from ecraspay.exceptions import ApiWrapperCassetteError
+from ecraspay.transport import RecordedResponse, RecordingTransport, ReplayTransport
+
+
+class FakeTransport:
+    """Transport answering every request with a canned response."""
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        status = 400 if url.endswith("/supported-banks") else 200
+        text = json.dumps({"echo": kwargs["json"], "url": url})
+        return RecordedResponse(status, text, url=url)
+
+
+class TestTransport:
+    @pytest.fixture
+    def cassette(self, tmp_path):
+        """Fixture recording a cassette covering each client."""
+        path = str(tmp_path / "cassette.ndjson")
+        inner = FakeTransport()
+        with RecordingTransport(path, inner=inner, ignore_fields=("payload",)) as rec:
+            Checkout(api_key="key", transport=rec).initiate_transaction(
+                amount=1000,
+                payment_reference="ref_1",
+                customer_name="John Doe",
+                customer_email="johndoe@example.com",
+            )
+            Card(api_key="key", transport=rec).initiate_payment(
+                card_payload="random-ciphertext-1",
+                transaction_ref="txn_1",
+                device_details={},
+            )
+            BankTransfer(api_key="key", transport=rec).initialize_bank_transfer("txn_1")
+            with pytest.raises(requests.exceptions.HTTPError):
+                USSD(api_key="key", transport=rec).get_bank_list()
+        return path
+
+    def test_cassette_does_not_store_credentials(self, cassette):
+        """Test the Authorization header is never recorded."""
+        with open(cassette) as recorded:
+            content = recorded.read()
+
+        assert len(content.splitlines()) == 4
+        assert "Bearer" not in content
+
+    def test_cassette_redacts_card_secrets(self, tmp_path):
+        """Test OTPs and card payloads are redacted in recorded bodies."""
+        path = str(tmp_path / "otp.ndjson")
+        with RecordingTransport(path, inner=FakeTransport()) as rec:
+            Card(api_key="key", transport=rec).submit_otp(
+                otp="493817", gateway_ref="gw_1"
+            )
+        with open(path) as recorded:
+            body = json.loads(recorded.readline())["body"]
+
+        assert "493817" not in body
+        assert json.loads(body)["otp"] == "[REDACTED]"
+        replayed = Card(api_key="key", transport=ReplayTransport(path)).submit_otp(
+            otp="000000", gateway_ref="gw_1"
+        )
+        assert replayed["echo"]["gatewayReference"] == "gw_1"
+
+    def test_replay_matches_method_endpoint_and_body(self, cassette):
+        """Test recorded responses are replayed offline against any base URL."""
+        transport = ReplayTransport(cassette, ignore_fields=("payload",))
+        checkout = Checkout(api_key="key", environment="live", transport=transport)
+        card = Card(api_key="key", transport=transport)
+
+        response = checkout.initiate_transaction(
+            amount=1000,
+            payment_reference="ref_1",
+            customer_name="John Doe",
+            customer_email="johndoe@example.com",
+        )
+        card_response = card.initiate_payment(
+            card_payload="random-ciphertext-2",
+            transaction_ref="txn_1",
+            device_details={},
+        )
+
+        assert response["echo"]["paymentReference"] == "ref_1"
+        assert card_response["echo"]["transactionReference"] == "txn_1"
+        assert (
+            BankTransfer(api_key="key", transport=transport)
+            .initialize_bank_transfer("txn_1")["url"]
+            .endswith("/request-bank-account/txn_1")
+        )
+        with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+            USSD(api_key="key", transport=transport).get_bank_list()
+        assert excinfo.value.response.status_code == 400
+
+    def test_replay_keeps_references_apart(self, tmp_path):
+        """Test references are matched as sent, even when they look like PANs."""
+        path = str(tmp_path / "references.ndjson")
+        references = ["2024121408594242", "2024121408674242"]
+        with RecordingTransport(path, inner=FakeTransport()) as rec:
+            for reference in references:
+                Card(api_key="key", transport=rec).initiate_payment(
+                    card_payload="ciphertext",
+                    transaction_ref=reference,
+                    device_details={},
+                )
+
+        card = Card(api_key="key", transport=ReplayTransport(path))
+        for reference in reversed(references):
+            replayed = card.initiate_payment(
+                card_payload="ciphertext", transaction_ref=reference, device_details={}
+            )
+            assert replayed["echo"]["transactionReference"] == reference
+
+    def test_replay_miss(self, cassette):
+        """Test an unrecorded request raises ApiWrapperCassetteError."""
+        checkout = Checkout(api_key="key", transport=ReplayTransport(cassette))
+
+        with pytest.raises(ApiWrapperCassetteError, match="/payment/initiate"):
+            checkout.initiate_transaction(
+                amount=5,
+                payment_reference="ref_2",
+                customer_name="John Doe",
+                customer_email="johndoe@example.com",
+            )
@@ -0,0 +1,88 @@
+import datetime
+import pytest
+from unittest.mock import patch
+from ecraspay import Card, Transaction
+from ecraspay.exceptions import CardValidationError
+from ecraspay.flows import CardPaymentFlow
+from ecraspay.utilities.validation import (
+    BinIndex,
+    check_expiry,
+    luhn_check,
+    validate_card,
+)
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+class TestValidation:
+    @pytest.fixture
+    def bins_csv(self, tmp_path):
+        """Fixture writing a small BIN table with an overlapping range."""
+        path = tmp_path / "bins.csv"
+        path.write_text(
+            "start,end,scheme,issuer\n"
+            "539983,539983,mastercard,GTBank\n"
+            "5,5,,Generic\n"
+            "506099,506198,verve,Interswitch\n"
+        )
+        return str(path)
+
+    def test_luhn_and_expiry(self):
+        """Test the Luhn and expiry checks."""
+        assert luhn_check("4242424242424242")
+        assert not luhn_check("4242424242424241")
+        assert not luhn_check("4242x")
+        assert check_expiry("10/26", TODAY)
+        assert check_expiry("01/2030", TODAY)
+        assert not check_expiry("09/26", TODAY)
+        assert not check_expiry("13/30", TODAY)
+
+    def test_validate_card_reports_every_problem(self):
+        """Test all problems are reported at once."""
+        with pytest.raises(CardValidationError) as excinfo:
+            validate_card("4242424242424241", "09/26", "12", pin="12", today=TODAY)
+
+        assert len(excinfo.value.errors) == 4
+
+    def test_validate_card_detects_scheme(self):
+        """Test the scheme is detected and Amex requires a 4-digit CVV."""
+        assert validate_card("4242 4242 4242 4242", "12/30", "123").scheme == "visa"
+        with pytest.raises(CardValidationError, match="cvv"):
+            validate_card("378282246310005", "12/30", "123")
+        assert validate_card("378282246310005", "12/30", "1234").scheme == "amex"
+
+    def test_bin_index_csv_and_mmap(self, bins_csv, tmp_path):
+        """Test the narrowest range wins, in memory and memory-mapped."""
+        index = BinIndex.from_csv(bins_csv)
+        path = str(tmp_path / "bins.idx")
+        index.save(path)
+        mapped = BinIndex.open(path)
+
+        for bins in (index, mapped):
+            assert bins.lookup("5399830000000008") == ("mastercard", "GTBank")
+            assert bins.lookup("5399840000000000") == (None, "Generic")
+            assert bins.lookup("5061000000000000") == ("verve", "Interswitch")
+            assert bins.lookup("4242424242424242") is None
+
+    @patch("requests.request")
+    def test_flow_rejects_invalid_card_before_network(self, mock_request):
+        """Test the card flow sends nothing for an invalid card."""
+        flow = CardPaymentFlow(
+            Transaction(api_key="test_key"), Card(api_key="test_key"), public_key="key"
+        )
+
+        with pytest.raises(CardValidationError):
+            flow.start(
+                card_number="4242424242424241",
+                expiration_date="12/30",
+                cvv="123",
+                pin="1234",
+                device_details={},
+                amount=1000,
+                payment_reference="ref_1",
+                customer_name="John Doe",
+                customer_email="johndoe@example.com",
+            )
+
+        mock_request.assert_not_called()
+        assert flow.state == CardPaymentFlow.NEW